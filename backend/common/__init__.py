@@ -4,8 +4,13 @@
 This module provides common functions for backend.
 """
 
+from .relationships import LINK_PATTERNS, LINK_RELATIONSHIPS
 from .utils import (
-    get_env_variable
+    get_env_variable,
+    normalize_name,
+    build_search_name,
+    trigrams,
+    trigram_similarity
 )
 
-__all__ = ['get_env_variable']
+__all__ = ['LINK_PATTERNS', 'LINK_RELATIONSHIPS', 'get_env_variable', 'normalize_name', 'build_search_name', 'trigrams', 'trigram_similarity']
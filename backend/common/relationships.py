@@ -0,0 +1,18 @@
+# backend/common/relationships.py
+
+# Import dependencies
+from typing import Final
+
+# OFAC relationship phrases, most specific first: relationship type -> pattern
+LINK_PATTERNS: Final[tuple[tuple[str, str], ...]] = (
+    ("OWNED_OR_CONTROLLED_BY", r"owned\s+or\s+controlled\s+by"),
+    ("ACTING_FOR", r"acting\s+for\s+or\s+on\s+behalf\s+of"),
+    ("LEADER_OF", r"leader\s+or\s+official\s+of"),
+    ("PROVIDING_SUPPORT_TO", r"providing\s+support\s+to"),
+    ("FAMILY_MEMBER_OF", r"family\s+member\s+of"),
+    ("ASSOCIATE_OF", r"associate\s+of"),
+    ("LINKED_TO", r"linked\s+to"),
+)
+
+# Relationship types of the entity-to-entity edges
+LINK_RELATIONSHIPS: Final[tuple[str, ...]] = tuple(name for name, _ in LINK_PATTERNS)
@@ -1,7 +1,9 @@
 # backend/common/utils.py
 
 import os
+import re
 import logging
+import unicodedata
 from typing import Final
 from dotenv import load_dotenv
 
@@ -27,4 +29,67 @@ def get_env_variable(var_name: str) -> Final[str]:
         raise ValueError(f"Environment variable {var_name} not found.")
 
     logger.info(f"Environment variable {var_name} retrieved successfully.")
-    return value
\ No newline at end of file
+    return value
+
+def normalize_name(value: str | None) -> str:
+    """
+    Normalize a name for searching.
+    The name is casefolded, stripped of accents and punctuation and its whitespace collapsed.
+
+    Args:
+        value (str | None): The name to normalize.
+
+    Returns:
+        str: The normalized name, empty if no name was given.
+    """
+    if not value:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", value.casefold())
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(re.sub(r"[\W_]+", " ", stripped).split())
+
+def build_search_name(first_name: str | None, last_name: str | None) -> str | None:
+    """
+    Build the normalized full name used by the name search.
+
+    Args:
+        first_name (str | None): The first name.
+        last_name (str | None): The last name.
+
+    Returns:
+        str | None: The normalized full name, or None if both parts are empty.
+    """
+    return normalize_name(" ".join(part for part in (first_name, last_name) if part)) or None
+
+def trigrams(value: str) -> set[str]:
+    """
+    Extract the trigrams of a normalized name the way pg_trgm does,
+    padding each word with two spaces in front and one behind.
+
+    Args:
+        value (str): The normalized name.
+
+    Returns:
+        set[str]: The trigrams.
+    """
+    result = set()
+    for word in value.split():
+        padded = f"  {word} "
+        result.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return result
+
+def trigram_similarity(left: str, right: str) -> float:
+    """
+    Compute the pg_trgm similarity of two normalized names, for databases without pg_trgm.
+
+    Args:
+        left (str): The first normalized name.
+        right (str): The second normalized name.
+
+    Returns:
+        float: The share of trigrams in common, between 0 and 1.
+    """
+    left_trigrams, right_trigrams = trigrams(left), trigrams(right)
+    if not left_trigrams or not right_trigrams:
+        return 0.0
+    return len(left_trigrams & right_trigrams) / len(left_trigrams | right_trigrams)
@@ -0,0 +1,413 @@
+# backend/data_layer/cache.py
+
+# Import dependencies
+import hashlib
+import importlib
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Callable, Final
+from dotenv import load_dotenv
+from sqlalchemy import Connection, insert, select, update
+from sqlalchemy.orm import Session
+
+# Import custom modules
+from backend.models.SDNEntity import DataGeneration
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Primary key of the single data generation row
+GENERATION_ROW_ID: Final[int] = 1
+
+# Sentinel returned by the caches on a miss, since None is a cacheable value
+MISSING: Final[object] = object()
+
+# Key marking a value of a type JSON has no representation for in the shared tier
+TYPE_TAG: Final[str] = "__cache_type__"
+
+# Types restored from their tagged string form: tag -> (type, parse)
+TAGGED_TYPES: Final[dict[str, tuple[type, Callable[[str], Any]]]] = {
+    "datetime": (datetime, datetime.fromisoformat),
+    "date": (date, date.fromisoformat),
+    "decimal": (Decimal, Decimal),
+    "uuid": (uuid.UUID, uuid.UUID),
+}
+
+
+def get_data_generation(db: Session | Connection) -> int:
+    """
+    Reads the current data generation.
+    Args:
+        db (Session | Connection): The database session or connection.
+    Returns:
+        int: The current generation, 0 if ingestion never committed any data.
+    """
+    generation = db.execute(
+        select(DataGeneration.generation).where(DataGeneration.id == GENERATION_ROW_ID)
+    ).scalar_one_or_none()
+    return generation or 0
+
+
+def bump_data_generation(db: Session | Connection) -> int:
+    """
+    Increments the data generation inside the caller's transaction.
+    The new generation becomes visible to readers atomically with the data it describes.
+    Args:
+        db (Session | Connection): The database session or connection.
+    Returns:
+        int: The new generation.
+    """
+    generation = db.execute(
+        update(DataGeneration)
+        .where(DataGeneration.id == GENERATION_ROW_ID)
+        .values(generation=DataGeneration.generation + 1)
+        .returning(DataGeneration.generation)
+    ).scalar_one_or_none()
+    if generation is None:
+        generation = 1
+        db.execute(insert(DataGeneration).values(id=GENERATION_ROW_ID, generation=generation))
+    logger.info(f"Data generation bumped to {generation}.")
+    return generation
+
+
+def estimate_size(value: Any) -> int:
+    """
+    Estimates the memory held by a cached value.
+    Byte strings and NumPy arrays are measured exactly, containers recursively,
+    and anything else by its JSON representation.
+    Args:
+        value (Any): The value.
+    Returns:
+        int: The estimated size in bytes.
+    """
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return len(value)
+    if hasattr(value, "nbytes"):
+        return int(value.nbytes)
+    if isinstance(value, str):
+        return len(value.encode("utf-8"))
+    if isinstance(value, dict):
+        return sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sum(estimate_size(item) for item in value)
+    return len(json.dumps(value, default=str))
+
+
+def _tag_value(value: Any) -> dict:
+    """
+    Tags a value JSON has no representation for with its type. Used as the default hook of json.dumps.
+    Args:
+        value (Any): The value.
+    Returns:
+        dict: The type tag and the string form of the value.
+    Raises:
+        TypeError: If the type cannot be restored.
+    """
+    # datetime is a subclass of date, so it is checked first
+    for tag, (kind, _) in TAGGED_TYPES.items():
+        if isinstance(value, kind):
+            return {TYPE_TAG: tag, "value": value.isoformat() if hasattr(value, "isoformat") else str(value)}
+    raise TypeError(f"Object of type {type(value).__name__} cannot be cached in the shared tier")
+
+
+def _untag_value(entry: dict) -> Any:
+    """
+    Restores a value tagged by _tag_value. Used as the object hook of json.loads.
+    Args:
+        entry (dict): A decoded JSON object.
+    Returns:
+        Any: The restored value, or the object itself if it is not tagged.
+    """
+    tag = entry.get(TYPE_TAG)
+    if tag is None or set(entry) != {TYPE_TAG, "value"}:
+        return entry
+    return TAGGED_TYPES[tag][1](entry["value"])
+
+
+def dump_value(value: Any) -> str:
+    """
+    Serializes a value for the shared tier so that load_value restores it with its types,
+    tagging datetimes, dates, decimals and UUIDs. Tuples come back as lists.
+    Args:
+        value (Any): The value.
+    Returns:
+        str: The JSON document.
+    Raises:
+        TypeError: If the value holds a type that cannot be restored.
+    """
+    return json.dumps(value, default=_tag_value, separators=(",", ":"))
+
+
+def load_value(text: str) -> Any:
+    """
+    Restores a value serialized with dump_value.
+    Args:
+        text (str): The JSON document.
+    Returns:
+        Any: The value.
+    """
+    return json.loads(text, object_hook=_untag_value)
+
+
+class LRUCache:
+    """
+    A thread safe in-process LRU cache with entry count, memory and TTL bounds.
+    The memory bound only applies when max_bytes is set; entry sizes are then measured with sizeof.
+    """
+
+    def __init__(self,
+                 max_entries: int = 10000,
+                 ttl_seconds: float | None = 3600,
+                 max_bytes: int | None = None,
+                 sizeof: Callable[[Any], int] | None = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof or estimate_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._bytes = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Any:
+        """
+        Returns the cached value and marks it as recently used.
+        Args:
+            key (str): The cache key.
+        Returns:
+            Any: The cached value, or MISSING if absent or expired.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return MISSING
+            value, expires_at, size = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._entries[key]
+                self._bytes -= size
+                self.misses += 1
+                return MISSING
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        """
+        Stores a value, evicting the least recently used entries beyond the size bound.
+        Args:
+            key (str): The cache key.
+            value (Any): The value to cache.
+        """
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds else None
+        size = self.sizeof(value) if self.max_bytes is not None else 0
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[2]
+            # A value larger than the whole budget would only flush the cache
+            if self.max_bytes is not None and size > self.max_bytes:
+                logger.debug(f"Not caching {key}: {size} bytes exceed the {self.max_bytes} bytes bound.")
+                return
+            self._entries[key] = (value, expires_at, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or \
+                    (self.max_bytes is not None and self._bytes > self.max_bytes):
+                _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """
+        Removes all entries.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Returns the measured size of the cached values, 0 without a memory bound.
+        """
+        return self._bytes
+
+    def stats(self) -> dict[str, int]:
+        """
+        Returns the cache counters.
+        """
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+
+class LocalCacheBackend:
+    """
+    An in-process stand-in for the shared cache backend.
+    Entries are bounded like the local tier, so that the keys of older generations
+    are evicted even if they are never read again.
+    """
+
+    def __init__(self, max_entries: int | None = None):
+        max_entries = max_entries if max_entries is not None else int(os.getenv("CACHE_MAX_ENTRIES", "10000"))
+        # Expiry is per entry, so the LRU itself has no TTL
+        self._entries = LRUCache(max_entries=max_entries, ttl_seconds=None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> str | None:
+        """
+        Returns a stored value.
+        Args:
+            key (str): The cache key.
+        Returns:
+            str | None: The value, or None if absent or expired.
+        """
+        entry = self._entries.get(key)
+        if entry is MISSING:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            return None
+        return value
+
+    def set(self, key: str, value: str, ttl_seconds: float | None = None) -> None:
+        """
+        Stores a value, evicting the least recently used entries beyond the size bound.
+        Args:
+            key (str): The cache key.
+            value (str): The serialized value.
+            ttl_seconds (float | None): The time to live, None for no expiry.
+        """
+        expires_at = time.monotonic() + ttl_seconds if ttl_seconds else None
+        self._entries.set(key, (value, expires_at))
+
+
+class RedisCacheBackend:
+    """
+    A shared cache backend on Redis, so that all replicas serve from the same entries.
+    """
+
+    def __init__(self, url: str):
+        try:
+            redis = importlib.import_module("redis")
+        except ImportError as e:
+            logger.error("The redis package is required for the shared cache backend.")
+            raise RuntimeError("The redis package is not installed.") from e
+        self._client = redis.Redis.from_url(url)
+
+    def get(self, key: str) -> str | None:
+        """
+        Returns a stored value.
+        Args:
+            key (str): The cache key.
+        Returns:
+            str | None: The value, or None if absent or expired.
+        """
+        value = self._client.get(key)
+        return value.decode("utf-8") if value is not None else None
+
+    def set(self, key: str, value: str, ttl_seconds: float | None = None) -> None:
+        """
+        Stores a value with an expiry, so that Redis evicts the entries of older generations.
+        Args:
+            key (str): The cache key.
+            value (str): The serialized value.
+            ttl_seconds (float | None): The time to live, None for no expiry.
+        """
+        self._client.set(key, value, ex=int(ttl_seconds) if ttl_seconds else None)
+
+
+def get_shared_backend() -> LocalCacheBackend | RedisCacheBackend:
+    """
+    Returns the shared cache backend configured through CACHE_REDIS_URL,
+    falling back to the local stand-in when it is not set.
+    """
+    redis_url = os.getenv("CACHE_REDIS_URL", "")
+    if redis_url:
+        logger.info("Using Redis as shared cache backend.")
+        return RedisCacheBackend(redis_url)
+    logger.info("Using the local stand-in as shared cache backend.")
+    return LocalCacheBackend()
+
+
+class QueryCache:
+    """
+    A two tier query result cache keyed by the query and the data generation.
+    Entries of older generations are never hit again, so no invalidation is needed
+    beyond bumping the generation; they simply age out of both tiers.
+    """
+
+    def __init__(self,
+                 local: LRUCache | None = None,
+                 shared: LocalCacheBackend | RedisCacheBackend | None = None,
+                 ttl_seconds: float | None = None):
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else float(os.getenv("CACHE_TTL_SECONDS", "3600"))
+        self.local = local or LRUCache(max_entries=int(os.getenv("CACHE_MAX_ENTRIES", "10000")),
+                                       ttl_seconds=self.ttl_seconds)
+        self.shared = shared if shared is not None else get_shared_backend()
+
+    @staticmethod
+    def make_key(namespace: str, key: Any, generation: int) -> str:
+        """
+        Derives the cache key of a query.
+        Args:
+            namespace (str): The kind of query.
+            key (Any): The JSON serializable query parameters.
+            generation (int): The data generation.
+        Returns:
+            str: The cache key.
+        """
+        digest = hashlib.sha256(json.dumps(key, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+        return f"{namespace}:{generation}:{digest}"
+
+    def get_or_compute(self, namespace: str, key: Any, generation: int, compute: Callable[[], Any]) -> Any:
+        """
+        Returns the cached result of a query, computing and caching it on a miss.
+        Args:
+            namespace (str): The kind of query.
+            key (Any): The JSON serializable query parameters.
+            generation (int): The data generation the result belongs to.
+            compute (Callable[[], Any]): Runs the query. Only results dump_value can serialize
+                are shared; other results are cached locally.
+        Returns:
+            Any: The query result.
+        """
+        cache_key = self.make_key(namespace, key, generation)
+        value = self.local.get(cache_key)
+        if value is not MISSING:
+            return value
+
+        try:
+            shared_value = self.shared.get(cache_key)
+        except Exception as e:
+            logger.error(f"Shared cache read failed: {e}")
+            shared_value = None
+        if shared_value is not None:
+            value = load_value(shared_value)
+            self.local.set(cache_key, value)
+            return value
+
+        value = compute()
+        self.local.set(cache_key, value)
+        try:
+            self.shared.set(cache_key, dump_value(value), ttl_seconds=self.ttl_seconds)
+        except TypeError as e:
+            logger.debug(f"Not sharing {cache_key}: {e}")
+        except Exception as e:
+            logger.error(f"Shared cache write failed: {e}")
+        return value
@@ -2,8 +2,9 @@
 
 # Import dependencies
 import logging
+import os
 from typing import Generator
-from sqlalchemy import Engine, create_engine
+from sqlalchemy import Engine, create_engine, event
 from sqlalchemy.orm import Session, sessionmaker
 from typing import Final
 
@@ -14,6 +15,51 @@ from backend.models.base import Base
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Database file of the embedded profile, when DB_BACKEND=sqlite and SQLITE_PATH is not set
+DEFAULT_SQLITE_PATH: Final[str] = "opengraphintel.db"
+
+# Pragmas of the embedded database: readers never block the single writer under WAL
+SQLITE_PRAGMAS: Final[dict[str, str]] = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "foreign_keys": "ON",
+    "busy_timeout": "5000",
+    "cache_size": "-65536",
+    "mmap_size": "268435456",
+    "temp_store": "MEMORY"
+}
+
+# Pragmas for bulk loading a fresh database file, trading durability for speed
+SQLITE_BULK_LOAD_PRAGMAS: Final[dict[str, str]] = {
+    "journal_mode": "OFF",
+    "synchronous": "OFF",
+    "foreign_keys": "ON",
+    "cache_size": "-262144",
+    "temp_store": "MEMORY"
+}
+
+
+def configure_sqlite_engine(engine: Engine, pragmas: dict[str, str] | None = None) -> Engine:
+    """
+    Applies pragmas to every connection of a SQLite engine.
+    Args:
+        engine (Engine): The SQLite engine.
+        pragmas (dict[str, str] | None): The pragmas, SQLITE_PRAGMAS if None.
+    Returns:
+        Engine: The engine.
+    """
+    pragmas = pragmas or SQLITE_PRAGMAS
+
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+        cursor.close()
+
+    return engine
+
+
 class DatabaseManager:
     """
     A class to manage the database connection and session.
@@ -29,12 +75,33 @@ class DatabaseManager:
             cls._instance._engine = None
             cls._instance._session_factory = None
             cls._instance._base = None
-            cls._instance._db_url = database_url or cls._instance._construct_postgres_url()
+            cls._instance._db_url = database_url or cls._instance._construct_database_url()
             cls._instance._engine = cls._instance._construct_engine(cls._instance._db_url)
             cls._instance._session_factory = cls._instance._construct_session(cls._instance._engine)
             cls._instance._base = cls._instance._construct_base()
         return cls._instance
 
+    def _construct_database_url(self) -> str:
+        """
+        Constructs the database URL from environment variables.
+        DATABASE_URL takes precedence, otherwise DB_BACKEND selects PostgreSQL (the default)
+        or the embedded SQLite file at SQLITE_PATH.
+        Returns:
+            str: The database URL.
+        """
+        database_url = os.getenv("DATABASE_URL", "")
+        if database_url:
+            return database_url
+        backend = os.getenv("DB_BACKEND", "postgresql").lower()
+        if backend == "sqlite":
+            sqlite_path = os.getenv("SQLITE_PATH", DEFAULT_SQLITE_PATH)
+            logger.info(f"Using the embedded SQLite database at {sqlite_path}.")
+            return f"sqlite:///{sqlite_path}"
+        if backend not in ("postgresql", "postgres"):
+            logger.error(f"Unsupported database backend: {backend}")
+            raise ValueError(f"Unsupported database backend: {backend}")
+        return self._construct_postgres_url()
+
     def _construct_postgres_url(self) -> str:
         """
         Constructs the PostgreSQL URL from environment variables.
@@ -64,7 +131,13 @@ class DatabaseManager:
         if self._engine is None:
             for i in range(retries):
                 try:
-                    self._engine = create_engine(database_url)
+                    if database_url.startswith("sqlite"):
+                        # Sessions are handed between the threads of the request pool
+                        self._engine = configure_sqlite_engine(
+                            create_engine(database_url, connect_args={"check_same_thread": False})
+                        )
+                    else:
+                        self._engine = create_engine(database_url)
                     logger.info(f"Database engine created successfully.")
                     return self._engine
                 except Exception as e:
@@ -99,6 +172,13 @@ class DatabaseManager:
             self._base = Base
         return self._base
 
+    @property
+    def engine(self) -> Engine:
+        """
+        Returns the SQLAlchemy engine.
+        """
+        return self._construct_engine(self._db_url)
+
     def get_db(self) -> Generator[Session, None, None]:
         """
         Dependency that provides a database session.
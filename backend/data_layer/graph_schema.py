@@ -0,0 +1,136 @@
+# backend/data_layer/graph_schema.py
+
+# Import dependencies
+import logging
+from typing import Final
+
+# Import custom modules
+from backend.data_layer.graphdb import GraphDBManager
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Unique constraints backing the MERGE lookups: name -> (label, property)
+GRAPH_CONSTRAINTS: Final[dict[str, tuple[str, str]]] = {
+    "sdn_entity_uid": ("SDNEntity", "uid"),
+    "program_name": ("Program", "name"),
+    "country_name": ("Country", "name"),
+    "identifier_key": ("Identifier", "key"),
+    "address_key": ("Address", "key"),
+    "vessel_entity_uid": ("Vessel", "entity_uid"),
+    "aka_uid": ("AKA", "uid"),
+    "dateofbirth_uid": ("DateOfBirth", "uid"),
+    "placeofbirth_uid": ("PlaceOfBirth", "uid"),
+}
+
+# Range indexes for equality and range lookups on non-unique properties: name -> (label, property)
+GRAPH_RANGE_INDEXES: Final[dict[str, tuple[str, str]]] = {
+    "sdn_entity_sdn_type": ("SDNEntity", "sdn_type"),
+    "identifier_id_type": ("Identifier", "id_type"),
+    "address_city": ("Address", "city"),
+    "vessel_flag": ("Vessel", "vessel_flag"),
+    "dateofbirth_date_of_birth": ("DateOfBirth", "date_of_birth"),
+}
+
+# Text indexes for CONTAINS and ENDS WITH lookups: name -> (label, property)
+GRAPH_TEXT_INDEXES: Final[dict[str, tuple[str, str]]] = {
+    "identifier_id_number": ("Identifier", "id_number"),
+    "vessel_call_sign": ("Vessel", "call_sign"),
+    "placeofbirth_place_of_birth": ("PlaceOfBirth", "place_of_birth"),
+}
+
+# Full-text index over the names and aliases of the entities
+NAME_FULLTEXT_INDEX: Final[str] = "entity_names"
+NAME_FULLTEXT_LABELS: Final[tuple[str, ...]] = ("SDNEntity", "AKA")
+NAME_FULLTEXT_PROPERTIES: Final[tuple[str, ...]] = ("first_name", "last_name")
+
+# Seconds to wait for the indexes to come online
+AWAIT_INDEXES_TIMEOUT: Final[int] = 300
+
+SHOW_INDEXES_CYPHER = """
+SHOW INDEXES YIELD name, type, state, populationPercent, labelsOrTypes, properties
+RETURN name, type, state, populationPercent, labelsOrTypes, properties
+ORDER BY name
+"""
+
+
+class GraphSchemaManager:
+    """
+    A class to declare and apply the constraints and indexes of the graph.
+    All statements use IF NOT EXISTS, so applying the schema again is a no-op.
+    """
+
+    def __init__(self, graph_db: GraphDBManager) -> None:
+        """
+        Args:
+            graph_db (GraphDBManager): The graph database manager.
+        """
+        self.graph_db = graph_db
+
+    @staticmethod
+    def statements() -> list[str]:
+        """
+        Returns the schema statements, constraints first.
+        Returns:
+            list[str]: The Cypher statements.
+        """
+        statements = [
+            f"CREATE CONSTRAINT {name} IF NOT EXISTS FOR (n:{label}) REQUIRE n.{prop} IS UNIQUE"
+            for name, (label, prop) in GRAPH_CONSTRAINTS.items()
+        ]
+        statements += [
+            f"CREATE RANGE INDEX {name} IF NOT EXISTS FOR (n:{label}) ON (n.{prop})"
+            for name, (label, prop) in GRAPH_RANGE_INDEXES.items()
+        ]
+        statements += [
+            f"CREATE TEXT INDEX {name} IF NOT EXISTS FOR (n:{label}) ON (n.{prop})"
+            for name, (label, prop) in GRAPH_TEXT_INDEXES.items()
+        ]
+        labels = "|".join(NAME_FULLTEXT_LABELS)
+        properties = ", ".join(f"n.{prop}" for prop in NAME_FULLTEXT_PROPERTIES)
+        statements.append(
+            f"CREATE FULLTEXT INDEX {NAME_FULLTEXT_INDEX} IF NOT EXISTS FOR (n:{labels}) ON EACH [{properties}]"
+        )
+        return statements
+
+    def apply(self, wait: bool = True, timeout: int = AWAIT_INDEXES_TIMEOUT) -> list[dict]:
+        """
+        Create the missing constraints and indexes.
+        Args:
+            wait (bool): Wait for the indexes to come online.
+            timeout (int): The number of seconds to wait.
+        Returns:
+            list[dict]: The index population progress after applying the schema.
+        """
+        try:
+            for statement in self.statements():
+                self.graph_db.execute_query(statement)
+            logger.info("Graph schema applied.")
+            if wait:
+                self.await_indexes(timeout)
+        except Exception as e:
+            logger.error(f"Failed to apply graph schema: {e}")
+            raise RuntimeError("Failed to apply graph schema.") from e
+        return self.index_progress()
+
+    def await_indexes(self, timeout: int = AWAIT_INDEXES_TIMEOUT) -> None:
+        """
+        Block until all indexes are online.
+        Args:
+            timeout (int): The number of seconds to wait before the procedure fails.
+        """
+        self.graph_db.execute_query("CALL db.awaitIndexes($timeout)", {"timeout": timeout})
+
+    def index_progress(self) -> list[dict]:
+        """
+        Report the state and population progress of every index.
+        Returns:
+            list[dict]: One entry per index with its name, type, state and population percentage.
+        """
+        progress = []
+        for record in self.graph_db.execute_query(SHOW_INDEXES_CYPHER):
+            entry = dict(record)
+            progress.append(entry)
+            if entry["state"] != "ONLINE":
+                logger.info(f"Index {entry['name']} is {entry['state']}: {entry['populationPercent']}% populated.")
+        return progress
@@ -2,8 +2,10 @@
 
 # Import dependencies
 import logging
-from neo4j import Driver, GraphDatabase
-from neomodel import config as neomodel_config
+import os
+from typing import Any, Callable, Final, Iterator
+from neo4j import Driver, GraphDatabase, ManagedTransaction, Record, ResultSummary, Session
+from neomodel import get_config as get_neomodel_config
 
 # Import custom modules
 from backend.common.utils import get_env_variable
@@ -11,6 +13,44 @@ from backend.common.utils import get_env_variable
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Records pulled from the server per round trip when streaming
+DEFAULT_FETCH_SIZE: Final[int] = 1000
+
+# Records per page of a keyset paginated query
+DEFAULT_PAGE_SIZE: Final[int] = 1000
+
+# Driver pool settings: environment variable -> (driver option, type, default)
+POOL_SETTINGS: Final[dict[str, tuple[str, type, int | float]]] = {
+    "NEO4J_MAX_CONNECTION_POOL_SIZE": ("max_connection_pool_size", int, 100),
+    "NEO4J_CONNECTION_ACQUISITION_TIMEOUT": ("connection_acquisition_timeout", float, 60.0),
+    "NEO4J_MAX_CONNECTION_LIFETIME": ("max_connection_lifetime", float, 3600.0),
+    "NEO4J_MAX_TRANSACTION_RETRY_TIME": ("max_transaction_retry_time", float, 30.0),
+}
+
+
+def _collect_records(tx: ManagedTransaction, query: str, parameters: dict) -> list[Record]:
+    """
+    Run a query in a managed transaction and collect its records before the transaction ends.
+    """
+    return list(tx.run(query, parameters))
+
+
+def get_neo4j_config() -> tuple[str, str, str]:
+    """
+    Retrieves the Neo4j configuration from environment variables, shared by the synchronous and async managers.
+    Returns:
+        tuple: A tuple containing the Neo4j URI, user, and password
+    """
+    try:
+        NEO4J_URI = get_env_variable("NEO4J_URI")
+        NEO4J_USER = get_env_variable("NEO4J_USER")
+        NEO4J_PASSWORD = get_env_variable("NEO4J_PASSWORD")
+        return NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD
+    except ValueError as e:
+        logger.error(f"Error retrieving environment variables: {e}")
+        raise
+
+
 class GraphDBManager:
     """
     A class to manage the Neo4j database connection and operations.
@@ -25,44 +65,60 @@ class GraphDBManager:
         if cls._instance is None:
             cls._instance = super(GraphDBManager, cls).__new__(cls)
             cls._instance._driver = None
+            # Shared by all sessions, so a read always sees the writes committed before it
+            cls._instance._bookmark_manager = GraphDatabase.bookmark_manager()
             cls._instance._initialize_driver()
             cls._instance._configure_neomodel()
         return cls._instance
 
-    def get_neo4j_config(self) -> tuple[str, str, str]:
+    @staticmethod
+    def get_pool_config() -> dict[str, int | float]:
         """
-        Retrieves the Neo4j configuration from environment variables.
+        Retrieves the driver pool settings from environment variables, see POOL_SETTINGS.
         Returns:
-            tuple: A tuple containing the Neo4j URI, user, and password
+            dict: The driver options.
         """
-        try:
-            NEO4J_URI = get_env_variable("NEO4J_URI")
-            NEO4J_USER = get_env_variable("NEO4J_USER")
-            NEO4J_PASSWORD = get_env_variable("NEO4J_PASSWORD")
-            return NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD
-        except ValueError as e:
-            logger.error(f"Error retrieving environment variables: {e}")
-            raise
+        config = {}
+        for var_name, (option, cast, default) in POOL_SETTINGS.items():
+            value = os.getenv(var_name)
+            try:
+                config[option] = cast(value) if value else default
+            except ValueError as e:
+                logger.error(f"Invalid value for {var_name}: {value}")
+                raise ValueError(f"Invalid value for {var_name}: {value}") from e
+        return config
 
     def _initialize_driver(self) -> None:
-        """Initialize the Neo4j driver with the provided credentials."""
-        NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD = self.get_neo4j_config()
+        """Initialize the Neo4j driver with the provided credentials and pool settings."""
+        NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD = get_neo4j_config()
         if self._driver is None:
             try:
-                self._driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
+                self._driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD),
+                                                    **self.get_pool_config())
                 logger.info(f"Neo4j driver created successfully: {NEO4J_URI}")
             except Exception as e:
                 logger.error(f"Failed to create Neo4j driver: {e}")
                 raise RuntimeError("Failed to create Neo4j driver.") from e
 
     def _configure_neomodel(self) -> None:
-        """Configure neomodel with the Neo4j driver."""
+        """Configure neomodel to share the Neo4j driver, and with it the connection pool."""
         if self._driver is None:
             self._initialize_driver()
-        NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD = self.get_neo4j_config()
-        neomodel_config.DATABASE_URL = f'bolt://{NEO4J_USER}:{NEO4J_PASSWORD}@{NEO4J_URI}'
+        get_neomodel_config().driver = self._driver
         logger.info("neomodel configured successfully.")
 
+    def _session(self, **config) -> Session:
+        """
+        Open a session that shares the bookmark manager of this instance.
+        Args:
+            **config: Additional session configuration.
+        Returns:
+            Session: The session.
+        """
+        if self._driver is None:
+            self._initialize_driver()
+        return self._driver.session(bookmark_manager=self._bookmark_manager, **config)
+
     def close_driver(self) -> None:
         """Close the Neo4j driver connection."""
         if self._driver is not None:
@@ -84,13 +140,132 @@ class GraphDBManager:
         Returns:
             list: The results of the query.
         """
-        if self._driver is None:
-            self._initialize_driver()
-
-        with self._driver.session() as session:
+        with self._session() as session:
             try:
                 result = session.run(query, parameters or {})
                 return [record for record in result]
             except Exception as e:
                 logger.error(f"Query failed: {query} with parameters {parameters}. Error: {e}")
                 raise
+
+    def stream_query(self, query: str, parameters: dict = None,
+                     fetch_size: int = DEFAULT_FETCH_SIZE) -> Iterator[Record]:
+        """
+        Execute a Cypher query and yield its records as the driver fetches them.
+        Only one batch of fetch_size records is buffered at a time. The session stays open
+        until the generator is exhausted or closed.
+        Args:
+            query (str): The Cypher query to execute.
+            parameters (dict): Optional parameters for the query.
+            fetch_size (int): The number of records pulled from the server per round trip.
+        Yields:
+            Record: The records of the query.
+        """
+        with self._session(fetch_size=fetch_size) as session:
+            try:
+                yield from session.run(query, parameters or {})
+            except Exception as e:
+                logger.error(f"Streaming query failed: {query} with parameters {parameters}. Error: {e}")
+                raise
+
+    def paginate_query(self, query: str, parameters: dict = None, page_size: int = DEFAULT_PAGE_SIZE,
+                       cursor_field: str = "cursor", start: Any = None) -> Iterator[list[Record]]:
+        """
+        Execute a keyset paginated Cypher query page by page, without SKIP.
+        The query receives the last cursor as `$cursor` (None for the first page) and the page size as `$limit`,
+        and must return the cursor column in ascending order, e.g.
+        `MATCH (n:SDNEntity) WHERE $cursor IS NULL OR n.uid > $cursor RETURN n.uid AS cursor, n ORDER BY n.uid LIMIT $limit`.
+        Args:
+            query (str): The Cypher query to execute.
+            parameters (dict): Optional parameters for the query.
+            page_size (int): The number of records per page.
+            cursor_field (str): The column holding the cursor.
+            start (Any): The cursor to resume after.
+        Yields:
+            list[Record]: The records of each page.
+        """
+        cursor = start
+        while True:
+            page = self.read_query(query, {**(parameters or {}), "cursor": cursor, "limit": page_size})
+            if not page:
+                return
+            yield page
+            if len(page) < page_size:
+                return
+            cursor = page[-1][cursor_field]
+
+    def execute_summary(self, query: str, parameters: dict = None) -> ResultSummary:
+        """
+        Execute a Cypher query and return only its summary, discarding the records.
+        Args:
+            query (str): The Cypher query to execute.
+            parameters (dict): Optional parameters for the query.
+        Returns:
+            ResultSummary: The summary with counters, timings and notifications.
+        """
+        with self._session() as session:
+            try:
+                return session.run(query, parameters or {}).consume()
+            except Exception as e:
+                logger.error(f"Query failed: {query} with parameters {parameters}. Error: {e}")
+                raise
+
+    def read_query(self, query: str, parameters: dict = None) -> list:
+        """
+        Execute a read-only Cypher query in a managed read transaction, routed to a reader
+        and retried on transient errors.
+        Args:
+            query (str): The Cypher query to execute.
+            parameters (dict): Optional parameters for the query.
+        Returns:
+            list: The results of the query.
+        """
+        return self.execute_read(_collect_records, query, parameters or {})
+
+    def write_query(self, query: str, parameters: dict = None) -> list:
+        """
+        Execute a Cypher query in a managed write transaction, retried on transient errors.
+        The query must be idempotent, as a retry runs it again.
+        Args:
+            query (str): The Cypher query to execute.
+            parameters (dict): Optional parameters for the query.
+        Returns:
+            list: The results of the query.
+        """
+        return self.execute_write(_collect_records, query, parameters or {})
+
+    def execute_read(self, work: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Run a unit of work in a managed read transaction.
+        The driver retries the whole unit on transient errors, so it must not have side effects.
+        Args:
+            work (Callable[..., Any]): The unit of work, called with the transaction first.
+            *args: Additional arguments passed to the unit of work.
+            **kwargs: Additional keyword arguments passed to the unit of work.
+        Returns:
+            Any: The result of the unit of work.
+        """
+        with self._session() as session:
+            try:
+                return session.execute_read(work, *args, **kwargs)
+            except Exception as e:
+                logger.error(f"Read transaction failed: {e}")
+                raise
+
+    def execute_write(self, work: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Run a unit of work in a managed write transaction.
+        The driver retries the whole unit on transient errors, so it must be idempotent.
+        Args:
+            work (Callable[..., Any]): The unit of work, called with the transaction first.
+            *args: Additional arguments passed to the unit of work.
+            **kwargs: Additional keyword arguments passed to the unit of work.
+        Returns:
+            Any: The result of the unit of work.
+        """
+        with self._session() as session:
+            try:
+                return session.execute_write(work, *args, **kwargs)
+            except Exception as e:
+                logger.error(f"Write transaction failed: {e}")
+                raise
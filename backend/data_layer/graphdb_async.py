@@ -0,0 +1,152 @@
+# backend/data_layer/graphdb_async.py
+
+# Import dependencies
+import logging
+from typing import Any, AsyncIterator, Awaitable, Callable
+from neo4j import AsyncGraphDatabase, AsyncManagedTransaction, AsyncSession, Record
+
+# Import custom modules
+from backend.data_layer.graphdb import DEFAULT_FETCH_SIZE, GraphDBManager, get_neo4j_config
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+async def _collect_records(tx: AsyncManagedTransaction, query: str, parameters: dict) -> list[Record]:
+    """
+    Run a query in a managed transaction and collect its records before the transaction ends.
+    """
+    result = await tx.run(query, parameters)
+    return [record async for record in result]
+
+
+class AsyncGraphDBManager:
+    """
+    A class to manage the asynchronous Neo4j driver, for use from async endpoints.
+    This class is designed to be a singleton, ensuring that only one instance of the async driver is created.
+    """
+    _instance = None
+
+    def __new__(cls):
+        """
+        Singleton pattern to ensure only one instance of AsyncGraphDBManager exists.
+        """
+        if cls._instance is None:
+            cls._instance = super(AsyncGraphDBManager, cls).__new__(cls)
+            cls._instance._driver = None
+            cls._instance._bookmark_manager = AsyncGraphDatabase.bookmark_manager()
+            cls._instance._initialize_driver()
+        return cls._instance
+
+    def _initialize_driver(self) -> None:
+        """Initialize the async Neo4j driver with the same pool settings as the synchronous one."""
+        NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD = get_neo4j_config()
+        if self._driver is None:
+            try:
+                self._driver = AsyncGraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD),
+                                                         **GraphDBManager.get_pool_config())
+                logger.info(f"Async Neo4j driver created successfully: {NEO4J_URI}")
+            except Exception as e:
+                logger.error(f"Failed to create async Neo4j driver: {e}")
+                raise RuntimeError("Failed to create async Neo4j driver.") from e
+
+    async def close_driver(self) -> None:
+        """Close the async Neo4j driver connection."""
+        if self._driver is not None:
+            try:
+                await self._driver.close()
+                self._driver = None
+                logger.info("Async Neo4j driver closed successfully.")
+            except Exception as e:
+                logger.error(f"Error closing async Neo4j driver: {e}")
+                raise RuntimeError("Failed to close async Neo4j driver.") from e
+        else:
+            logger.warning("No async Neo4j driver to close.")
+
+    def _session(self, **config) -> AsyncSession:
+        """
+        Open a session that shares the bookmark manager of this instance.
+        Args:
+            **config: Additional session configuration.
+        Returns:
+            AsyncSession: The session.
+        """
+        if self._driver is None:
+            self._initialize_driver()
+        return self._driver.session(bookmark_manager=self._bookmark_manager, **config)
+
+    async def execute_read(self, work: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        """
+        Run a unit of work in a managed read transaction, retried on transient errors.
+        Args:
+            work (Callable[..., Awaitable[Any]]): The coroutine function, called with the transaction first.
+            *args: Additional arguments passed to the unit of work.
+            **kwargs: Additional keyword arguments passed to the unit of work.
+        Returns:
+            Any: The result of the unit of work.
+        """
+        async with self._session() as session:
+            try:
+                return await session.execute_read(work, *args, **kwargs)
+            except Exception as e:
+                logger.error(f"Read transaction failed: {e}")
+                raise
+
+    async def execute_write(self, work: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        """
+        Run a unit of work in a managed write transaction, retried on transient errors.
+        Args:
+            work (Callable[..., Awaitable[Any]]): The coroutine function, called with the transaction first.
+            *args: Additional arguments passed to the unit of work.
+            **kwargs: Additional keyword arguments passed to the unit of work.
+        Returns:
+            Any: The result of the unit of work.
+        """
+        async with self._session() as session:
+            try:
+                return await session.execute_write(work, *args, **kwargs)
+            except Exception as e:
+                logger.error(f"Write transaction failed: {e}")
+                raise
+
+    async def read_query(self, query: str, parameters: dict = None) -> list:
+        """
+        Execute a read-only Cypher query in a managed read transaction.
+        Args:
+            query (str): The Cypher query to execute.
+            parameters (dict): Optional parameters for the query.
+        Returns:
+            list: The results of the query.
+        """
+        return await self.execute_read(_collect_records, query, parameters or {})
+
+    async def write_query(self, query: str, parameters: dict = None) -> list:
+        """
+        Execute a Cypher query in a managed write transaction. The query must be idempotent.
+        Args:
+            query (str): The Cypher query to execute.
+            parameters (dict): Optional parameters for the query.
+        Returns:
+            list: The results of the query.
+        """
+        return await self.execute_write(_collect_records, query, parameters or {})
+
+    async def stream_query(self, query: str, parameters: dict = None,
+                           fetch_size: int = DEFAULT_FETCH_SIZE) -> AsyncIterator[Record]:
+        """
+        Execute a Cypher query and yield its records as the driver fetches them.
+        Args:
+            query (str): The Cypher query to execute.
+            parameters (dict): Optional parameters for the query.
+            fetch_size (int): The number of records pulled from the server per round trip.
+        Yields:
+            Record: The records of the query.
+        """
+        async with self._session(fetch_size=fetch_size) as session:
+            try:
+                result = await session.run(query, parameters or {})
+                async for record in result:
+                    yield record
+            except Exception as e:
+                logger.error(f"Streaming query failed: {query} with parameters {parameters}. Error: {e}")
+                raise
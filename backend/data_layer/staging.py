@@ -0,0 +1,157 @@
+# backend/data_layer/staging.py
+
+# Import dependencies
+import logging
+from typing import Callable, Final
+from sqlalchemy import Connection, Engine, Table, text
+from sqlalchemy.orm import Session
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+# Import custom modules
+from backend.data_layer.cache import bump_data_generation
+from backend.models.base import Base
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Schemas used for the shadow load and the rollback generation
+LIVE_SCHEMA: Final[str] = "public"
+STAGING_SCHEMA: Final[str] = "sdn_staging"
+PREVIOUS_SCHEMA: Final[str] = "sdn_previous"
+SWAP_SCHEMA: Final[str] = "sdn_swap"
+
+# Give up on the swap rather than queue behind a long running reader
+SWAP_LOCK_TIMEOUT: Final[str] = "5s"
+
+
+def get_publication_tables() -> list[Table]:
+    """
+    Returns the tables whose content is fully rebuilt from a single publication.
+    Tables can opt out of the swap with `info={"publication": False}`.
+    Returns:
+        list[Table]: The publication tables in dependency order.
+    """
+    return [table for table in Base.metadata.sorted_tables if table.info.get("publication", True)]
+
+
+def _move_tables(connection: Connection, tables: list[Table], source: str, target: str) -> None:
+    """
+    Moves the given tables from one schema to another.
+    Indexes, constraints and owned sequences move along with each table.
+    Args:
+        connection (Connection): The connection to use.
+        tables (list[Table]): The tables to move.
+        source (str): The schema to move the tables from.
+        target (str): The schema to move the tables to.
+    """
+    for table in tables:
+        connection.execute(text(f'ALTER TABLE IF EXISTS {source}."{table.name}" SET SCHEMA {target}'))
+
+
+def load_staging_generation(engine: Engine, loader: Callable[[Session], None]) -> None:
+    """
+    Loads a complete publication into the staging schema.
+    Tables are created without their indexes, filled by the loader and indexed afterwards,
+    so that the live tables are never touched while the load is running. The after_create DDL,
+    i.e. the generated search columns and their GIN indexes, is deferred to the index build as well.
+    Args:
+        engine (Engine): The SQLAlchemy engine.
+        loader (Callable[[Session], None]): Callback writing the publication through the given session.
+    """
+    tables = get_publication_tables()
+    logger.info(f"Loading publication into staging schema {STAGING_SCHEMA}.")
+    with engine.connect() as connection:
+        with connection.begin():
+            connection.execute(text(f"DROP SCHEMA IF EXISTS {STAGING_SCHEMA} CASCADE"))
+            connection.execute(text(f"CREATE SCHEMA {STAGING_SCHEMA}"))
+            connection.execute(text(f"SET LOCAL search_path TO {STAGING_SCHEMA}, {LIVE_SCHEMA}"))
+            for table in tables:
+                connection.execute(CreateTable(table))
+
+            # The session joins the outer transaction, so its commit does not end the load
+            with Session(bind=connection, autoflush=False) as session:
+                loader(session)
+                session.flush()
+
+            logger.info(f"Building indexes in staging schema {STAGING_SCHEMA}.")
+            for table in tables:
+                for index in table.indexes:
+                    connection.execute(CreateIndex(index))
+                table.dispatch.after_create(table, connection, checkfirst=False, _ddl_runner=None)
+                connection.execute(text(f'ANALYZE "{table.name}"'))
+    logger.info(f"Staging schema {STAGING_SCHEMA} loaded successfully.")
+
+
+def _run_on_swap(connection: Connection, on_swap: Callable[[Session], None] | None) -> None:
+    """
+    Runs the swap callback through a session joining the swap transaction.
+    """
+    if on_swap is None:
+        return
+    with Session(bind=connection, autoflush=False) as session:
+        on_swap(session)
+        session.flush()
+
+
+def swap_staging_generation(engine: Engine, on_swap: Callable[[Session], None] | None = None) -> None:
+    """
+    Atomically replaces the live tables with the staged ones.
+    The live generation is kept in the previous schema for rollback,
+    and the data generation is bumped in the same transaction.
+    Args:
+        engine (Engine): The SQLAlchemy engine.
+        on_swap (Callable[[Session], None] | None): Callback writing the tables kept out of the swap,
+            run in the swap transaction once the staged tables are live.
+    """
+    tables = get_publication_tables()
+    logger.info(f"Swapping staging schema {STAGING_SCHEMA} into {LIVE_SCHEMA}.")
+    try:
+        with engine.begin() as connection:
+            connection.execute(text(f"SET LOCAL lock_timeout = '{SWAP_LOCK_TIMEOUT}'"))
+            connection.execute(text(f"DROP SCHEMA IF EXISTS {PREVIOUS_SCHEMA} CASCADE"))
+            connection.execute(text(f"CREATE SCHEMA {PREVIOUS_SCHEMA}"))
+            _move_tables(connection, tables, LIVE_SCHEMA, PREVIOUS_SCHEMA)
+            _move_tables(connection, tables, STAGING_SCHEMA, LIVE_SCHEMA)
+            connection.execute(text(f"DROP SCHEMA {STAGING_SCHEMA}"))
+            _run_on_swap(connection, on_swap)
+            bump_data_generation(connection)
+    except Exception as e:
+        logger.error(f"Failed to swap staging schema: {e}")
+        raise RuntimeError("Failed to swap staging schema.") from e
+    logger.info("Staging schema swapped successfully.")
+
+
+def rollback_generation(engine: Engine, on_swap: Callable[[Session], None] | None = None) -> None:
+    """
+    Swaps the previous generation back in place of the live one.
+    Calling it twice restores the generation that was live before the first call.
+    Args:
+        engine (Engine): The SQLAlchemy engine.
+        on_swap (Callable[[Session], None] | None): Callback writing the tables kept out of the swap,
+            run in the rollback transaction once the previous tables are live.
+    """
+    tables = get_publication_tables()
+    logger.info(f"Rolling back {LIVE_SCHEMA} to the generation in {PREVIOUS_SCHEMA}.")
+    try:
+        with engine.begin() as connection:
+            exists = connection.execute(
+                text("SELECT 1 FROM information_schema.schemata WHERE schema_name = :schema"),
+                {"schema": PREVIOUS_SCHEMA}
+            ).scalar()
+            if not exists:
+                raise ValueError(f"No previous generation found in schema {PREVIOUS_SCHEMA}.")
+            connection.execute(text(f"SET LOCAL lock_timeout = '{SWAP_LOCK_TIMEOUT}'"))
+            connection.execute(text(f"CREATE SCHEMA {SWAP_SCHEMA}"))
+            _move_tables(connection, tables, LIVE_SCHEMA, SWAP_SCHEMA)
+            _move_tables(connection, tables, PREVIOUS_SCHEMA, LIVE_SCHEMA)
+            _move_tables(connection, tables, SWAP_SCHEMA, PREVIOUS_SCHEMA)
+            connection.execute(text(f"DROP SCHEMA {SWAP_SCHEMA}"))
+            _run_on_swap(connection, on_swap)
+            bump_data_generation(connection)
+    except ValueError as e:
+        logger.error(f"Rollback not possible: {e}")
+        raise
+    except Exception as e:
+        logger.error(f"Failed to roll back generation: {e}")
+        raise RuntimeError("Failed to roll back generation.") from e
+    logger.info("Generation rolled back successfully.")
@@ -2,8 +2,10 @@
 
 # Import dependencies
 import logging
-from pymilvus import connections, Collection, FieldSchema, CollectionSchema, DataType
-from typing import Final
+import time
+from dataclasses import dataclass
+from pymilvus import connections, utility, Collection, FieldSchema, CollectionSchema, DataType
+from typing import Final, Iterable, Sequence
 
 # Import custom modules
 from backend.common.utils import get_env_variable
@@ -17,6 +19,13 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+# Budgets of a single insert request of a bulk insertion; Milvus rejects gRPC messages above 64 MiB
+DEFAULT_INSERT_BATCH_ROWS: Final[int] = 5000
+DEFAULT_INSERT_BATCH_BYTES: Final[int] = 16 * 1024 * 1024
+
+# Fields filled by the ID and embedding of a row; any other field of the schema is read from its metadata
+VECTOR_FIELDS: Final[tuple[str, ...]] = ("id", "embedding")
+
 # Cache for the Milvus host and port
 _milvus_host = None
 _milvus_grpc_port = None
@@ -75,13 +84,15 @@ def create_collection(collection_name) -> Collection:
 def insert_vectors(collection_name, ids, embeddings) -> None:
     """
     Insert vectors into the specified collection.
+    The collection is not flushed, so that repeated calls do not seal a segment each;
+    call flush_collection once the vectors must be persisted.
     Args:
         collection_name (str): The name of the collection.
         ids (list): A list of IDs for the vectors.
         embeddings (list): A list of embeddings to insert.
     """
     connect_to_milvus()  # Ensure connection to Milvus
-    if not Collection.exists(collection_name):
+    if not utility.has_collection(collection_name):
         create_collection(collection_name)
 
     collection = Collection(collection_name)
@@ -93,9 +104,120 @@ def insert_vectors(collection_name, ids, embeddings) -> None:
     except Exception as e:
         logger.error(f"Error inserting vectors: {e}")
         raise
-    finally:
-        collection.flush()
+
+# Flush a collection
+def flush_collection(collection_name) -> None:
+    """
+    Seal the growing segments of a collection, persisting the inserted vectors.
+    Args:
+        collection_name (str): The name of the collection.
+    """
+    connect_to_milvus()  # Ensure connection to Milvus
+    try:
+        Collection(collection_name).flush()
         logger.info(f"Flushed collection {collection_name}.")
+    except Exception as e:
+        logger.error(f"Error flushing collection {collection_name}: {e}")
+        raise
+
+@dataclass
+class InsertStats:
+    """
+    Counters of a bulk insertion.
+    """
+    vectors: int = 0
+    batches: int = 0
+    flushed: bool = False
+    seconds: float = 0.0
+
+    @property
+    def vectors_per_second(self) -> float:
+        return self.vectors / self.seconds if self.seconds > 0 else 0.0
+
+    def to_dict(self) -> dict:
+        """
+        Returns the counters as a JSON serializable dictionary.
+        """
+        return {
+            "vectors": self.vectors,
+            "batches": self.batches,
+            "flushed": self.flushed,
+            "seconds": round(self.seconds, 3),
+            "vectors_per_second": round(self.vectors_per_second, 1),
+        }
+
+# Bulk insert vectors
+def insert_vectors_bulk(collection_name,
+                        rows: Iterable[tuple[int, Sequence[float], dict | None]],
+                        batch_rows: int | None = None,
+                        batch_bytes: int | None = None,
+                        flush: bool = True) -> InsertStats:
+    """
+    Insert a stream of vectors into the specified collection, in batches bounded by a row and a byte budget.
+    The rows are consumed lazily, so the embeddings can be produced while the previous batch is inserted.
+    The collection is flushed once at the end, or not at all if flush is False.
+    Args:
+        collection_name (str): The name of the collection.
+        rows (Iterable[tuple[int, Sequence[float], dict | None]]): The ID, embedding and metadata of each vector.
+            The metadata fills the scalar fields of the collection schema, if any.
+        batch_rows (int | None): The maximum number of vectors per insert request.
+        batch_bytes (int | None): The maximum estimated size of an insert request in bytes.
+        flush (bool): Flush the collection once all vectors are inserted.
+    Returns:
+        InsertStats: The counters of the insertion, including the vectors per second.
+    Raises:
+        ValueError: If a budget is not positive.
+    """
+    batch_rows = batch_rows if batch_rows is not None else \
+        int(os.getenv("VECTOR_INSERT_BATCH_ROWS", str(DEFAULT_INSERT_BATCH_ROWS)))
+    batch_bytes = batch_bytes if batch_bytes is not None else \
+        int(os.getenv("VECTOR_INSERT_BATCH_BYTES", str(DEFAULT_INSERT_BATCH_BYTES)))
+    if batch_rows < 1 or batch_bytes < 1:
+        raise ValueError("The batch budgets must be positive.")
+
+    started = time.perf_counter()
+    connect_to_milvus()  # Ensure connection to Milvus
+    if not utility.has_collection(collection_name):
+        create_collection(collection_name)
+    collection = Collection(collection_name)
+    scalar_fields = [field.name for field in collection.schema.fields if field.name not in VECTOR_FIELDS]
+
+    stats = InsertStats()
+    columns = [[] for _ in range(len(VECTOR_FIELDS) + len(scalar_fields))]
+    pending_bytes = 0
+
+    def insert_batch() -> None:
+        nonlocal columns, pending_bytes
+        collection.insert(columns)
+        stats.vectors += len(columns[0])
+        stats.batches += 1
+        columns = [[] for _ in columns]
+        pending_bytes = 0
+
+    try:
+        for uid, embedding, metadata in rows:
+            # A float32 vector plus the INT64 ID; scalar fields are not counted
+            row_bytes = 4 * len(embedding) + 8
+            if columns[0] and (len(columns[0]) >= batch_rows or pending_bytes + row_bytes > batch_bytes):
+                insert_batch()
+            columns[0].append(uid)
+            columns[1].append(embedding)
+            for column, name in zip(columns[2:], scalar_fields):
+                column.append((metadata or {}).get(name))
+            pending_bytes += row_bytes
+        if columns[0]:
+            insert_batch()
+    except Exception as e:
+        logger.error(f"Error inserting vectors after {stats.vectors} vectors: {e}")
+        raise
+
+    if flush and stats.vectors:
+        flush_collection(collection_name)
+        stats.flushed = True
+    stats.seconds = time.perf_counter() - started
+    logger.info(f"Inserted {stats.vectors} vectors into collection {collection_name} in {stats.batches} batches "
+                f"({stats.vectors_per_second:.0f} vectors/s).")
+    return stats
 
 # Search vectors
 def search_vectors(collection_name, query_vectors, top_k=5):
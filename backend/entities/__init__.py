@@ -0,0 +1,5 @@
+# backend/entities/__init__.py
+
+"""
+This module provides the entity read service for backend.
+"""
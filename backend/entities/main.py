@@ -0,0 +1,236 @@
+# backend/entities/main.py
+
+# Import dependencies
+import logging
+from datetime import date, datetime
+from typing import Iterator, Literal
+from fastapi import FastAPI, APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+# Import custom modules
+from backend.data_layer.cache import QueryCache, get_data_generation
+from backend.data_layer.database import DatabaseManager
+from backend.entities.service import (
+    get_entity_document,
+    get_entity_history,
+    list_entities,
+    list_programs,
+    list_countries,
+    search_names,
+    search_text,
+    iter_entity_documents,
+    export_ndjson,
+    export_csv
+)
+
+# Initialize the FastAPI router
+router = APIRouter()
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Initialize the database manager
+db_manager = DatabaseManager()
+
+# Initialize the query result cache, keyed by the data generation
+query_cache = QueryCache()
+
+@router.get("")
+def get_entities(
+    limit: int = Query(100, ge=1, le=1000),
+    after: int | None = None,
+    sdn_type: str | None = None,
+    program: str | None = None,
+    country: str | None = None,
+    born_from: date | None = None,
+    born_to: date | None = None,
+    min_tonnage: float | None = Query(None, ge=0),
+    max_tonnage: float | None = Query(None, ge=0),
+    as_of: datetime | None = None,
+    db: Session = Depends(db_manager.get_db)
+) -> dict:
+    """
+    List entities with keyset pagination.
+
+    Args:
+        limit (int): The maximum number of entities to return.
+        after (int | None): The next_cursor of the previous page.
+        sdn_type (str | None): Only entities of this type.
+        program (str | None): Only entities listed under this program.
+        country (str | None): Only entities with this nationality, citizenship or address country.
+        born_from (date | None): Only entities possibly born on or after this day.
+        born_to (date | None): Only entities possibly born on or before this day.
+        min_tonnage (float | None): Only vessels of at least this tonnage.
+        max_tonnage (float | None): Only vessels of at most this tonnage.
+        as_of (datetime | None): List the entities as listed at this time, paginated by UID.
+        db (Session): The database session.
+
+    Returns:
+        dict: The entity summaries and the cursor of the next page.
+    """
+    parameters = {"limit": limit, "after": after, "sdn_type": sdn_type, "program": program, "country": country,
+                  "born_from": born_from, "born_to": born_to,
+                  "min_tonnage": min_tonnage, "max_tonnage": max_tonnage, "as_of": as_of}
+    try:
+        return query_cache.get_or_compute("entities", parameters, get_data_generation(db),
+                                          lambda: list_entities(db, **parameters))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/export")
+def export_entities(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    sdn_type: str | None = None,
+    program: str | None = None,
+    country: str | None = None
+) -> StreamingResponse:
+    """
+    Stream every matching entity as NDJSON or CSV with constant memory.
+
+    Args:
+        format (str): The export format, ndjson or csv.
+        sdn_type (str | None): Only entities of this type.
+        program (str | None): Only entities listed under this program.
+        country (str | None): Only entities with this nationality, citizenship or address country.
+
+    Returns:
+        StreamingResponse: The streamed export.
+    """
+    serializer, media_type = (export_csv, "text/csv") if format == "csv" else (export_ndjson, "application/x-ndjson")
+
+    def stream() -> Iterator[str]:
+        # The session must outlive the endpoint, so the stream owns it
+        db_generator = db_manager.get_db()
+        db = next(db_generator)
+        try:
+            documents = iter_entity_documents(db, sdn_type=sdn_type, program=program, country=country)
+            yield from serializer(documents)
+        finally:
+            db_generator.close()
+
+    headers = {"Content-Disposition": f"attachment; filename=entities.{format}"}
+    return StreamingResponse(stream(), media_type=media_type, headers=headers)
+
+@router.get("/programs")
+def get_programs(db: Session = Depends(db_manager.get_db)) -> list[dict]:
+    """
+    List the sanctions programs with their entity counts.
+
+    Args:
+        db (Session): The database session.
+
+    Returns:
+        list: The programs and their entity counts.
+    """
+    return query_cache.get_or_compute("programs", None, get_data_generation(db), lambda: list_programs(db))
+
+@router.get("/countries")
+def get_countries(db: Session = Depends(db_manager.get_db)) -> list[dict]:
+    """
+    List the countries with their entity counts.
+
+    Args:
+        db (Session): The database session.
+
+    Returns:
+        list: The countries and their entity counts.
+    """
+    return query_cache.get_or_compute("countries", None, get_data_generation(db), lambda: list_countries(db))
+
+@router.get("/search/names")
+def search_entity_names(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(20, ge=1, le=200),
+    threshold: float = Query(0.3, ge=0.0, le=1.0),
+    db: Session = Depends(db_manager.get_db)
+) -> dict:
+    """
+    Fuzzy search entities by primary name and aliases.
+
+    Args:
+        q (str): The name to search for.
+        limit (int): The maximum number of entities to return.
+        threshold (float): The minimum trigram similarity.
+        db (Session): The database session.
+
+    Returns:
+        dict: The query and the ranked matches.
+    """
+    results = query_cache.get_or_compute(
+        "search_names",
+        [q, limit, threshold],
+        get_data_generation(db),
+        lambda: search_names(q, db, limit=limit, threshold=threshold)
+    )
+    return {"query": q, "results": results}
+
+@router.get("/search/text")
+def search_entity_text(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(20, ge=1, le=200),
+    cursor: str | None = None,
+    db: Session = Depends(db_manager.get_db)
+) -> dict:
+    """
+    Ranked full-text search over entity remarks and addresses.
+
+    Args:
+        q (str): The search query.
+        limit (int): The maximum number of entities to return.
+        cursor (str | None): The cursor returned with the previous page.
+        db (Session): The database session.
+
+    Returns:
+        dict: The highlighted matches and the cursor of the next page.
+    """
+    try:
+        return query_cache.get_or_compute(
+            "search_text",
+            [q, limit, cursor],
+            get_data_generation(db),
+            lambda: search_text(q, db, limit=limit, cursor=cursor)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/{uid}/history")
+def get_entity_versions(uid: int, db: Session = Depends(db_manager.get_db)) -> list[dict]:
+    """
+    List the versions of an entity with their validity ranges.
+
+    Args:
+        uid (int): The UID of the entity.
+        db (Session): The database session.
+
+    Returns:
+        list: The versions of the entity, oldest first.
+    """
+    versions = query_cache.get_or_compute("entity_history", uid, get_data_generation(db),
+                                          lambda: get_entity_history(uid, db))
+    if not versions:
+        raise HTTPException(status_code=404, detail=f"Entity {uid} not found")
+    return versions
+
+@router.get("/{uid}")
+def get_entity(uid: int, as_of: datetime | None = None, db: Session = Depends(db_manager.get_db)) -> dict:
+    """
+    Return the full detail of a single entity.
+
+    Args:
+        uid (int): The UID of the entity.
+        as_of (datetime | None): Return the entity as listed at this time.
+        db (Session): The database session.
+
+    Returns:
+        dict: The assembled entity document.
+    """
+    document = query_cache.get_or_compute("entity", [uid, as_of], get_data_generation(db),
+                                          lambda: get_entity_document(uid, db, as_of=as_of))
+    if document is None:
+        raise HTTPException(status_code=404, detail=f"Entity {uid} not found")
+    return document
+
+# Initialize FastAPI app
+app = FastAPI()
+app.include_router(router, prefix="/entities", tags=["entities"])
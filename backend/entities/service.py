@@ -0,0 +1,651 @@
+# backend/entities/service.py
+
+# Import dependencies
+import base64
+import csv
+import io
+import json
+import logging
+import re
+from datetime import date, datetime, timezone
+from typing import Iterator
+from sqlalchemy import ColumnElement, Select, and_, desc, func, literal, or_, select, text, union_all
+from sqlalchemy.orm import Session
+
+# Import custom modules
+from backend.common.utils import normalize_name, trigram_similarity
+from backend.models.SDNEntity import (
+    SDNEntity,
+    AKA,
+    Address,
+    Citizenship,
+    Country,
+    DateOfBirth,
+    FacetCount,
+    Nationality,
+    Program,
+    SanctionsProgram,
+    SDNEntityDocument,
+    SDNEntityVersion,
+    Vessel
+)
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Ranked full-text search over remarks and addresses. The page is selected first,
+# so the headlines are only computed for the rows that are returned.
+FULL_TEXT_SEARCH_SQL = """
+WITH query AS (
+    SELECT websearch_to_tsquery('simple', :query) AS q
+),
+hits AS (
+    SELECT e.id AS sdn_entity_id, ts_rank(e.remarks_tsv, query.q) AS rank
+    FROM sdn_entities e, query
+    WHERE e.remarks_tsv @@ query.q
+    UNION ALL
+    SELECT a.sdn_entity_id, ts_rank(a.address_tsv, query.q) AS rank
+    FROM addresses a, query
+    WHERE a.address_tsv @@ query.q
+),
+ranked AS (
+    SELECT e.id, e.uid, e.remarks, sum(hits.rank)::float8 AS rank
+    FROM hits
+    JOIN sdn_entities e ON e.id = hits.sdn_entity_id
+    GROUP BY e.id, e.uid, e.remarks
+),
+page AS (
+    SELECT id, uid, remarks, rank
+    FROM ranked
+    {cursor_filter}
+    ORDER BY rank DESC, uid
+    LIMIT :limit
+)
+SELECT page.uid,
+       page.rank,
+       CASE WHEN page.remarks IS NOT NULL
+            THEN ts_headline('simple', page.remarks, query.q, :headline_options) END AS remarks_headline,
+       (SELECT string_agg(ts_headline('simple',
+                                      concat_ws(', ', a.address1, a.address2, a.address3, a.city,
+                                                a.state_or_province, a.postal_code, a.country_name, a.region),
+                                      query.q, :headline_options), ' | ')
+        FROM addresses a
+        WHERE a.sdn_entity_id = page.id AND a.address_tsv @@ query.q) AS address_headline
+FROM page, query
+ORDER BY page.rank DESC, page.uid
+"""
+
+HEADLINE_OPTIONS = "StartSel=<mark>, StopSel=</mark>, MaxFragments=2, MaxWords=20, MinWords=5"
+
+# Characters of context around the first match in the headlines of the embedded text search
+HEADLINE_CONTEXT = 60
+
+# Columns of the CSV export
+CSV_EXPORT_COLUMNS = [
+    "uid", "first_name", "last_name", "title", "sdn_type", "programs",
+    "nationalities", "citizenships", "aliases", "remarks"
+]
+
+
+def _is_postgresql(db: Session) -> bool:
+    """
+    Check whether the session is bound to PostgreSQL, as opposed to an embedded database.
+    Args:
+        db (Session): The database session.
+    Returns:
+        bool: True on PostgreSQL.
+    """
+    return db.get_bind().dialect.name == "postgresql"
+
+
+def _valid_at(as_of: datetime, db: Session) -> ColumnElement[bool]:
+    """
+    Build the condition selecting the entity versions in effect at a point in time.
+    On PostgreSQL it is a range containment served by the GiST validity index.
+    Args:
+        as_of (datetime): The point in time, UTC if naive.
+        db (Session): The database session.
+    Returns:
+        ColumnElement[bool]: The condition.
+    """
+    as_of = as_of.astimezone(timezone.utc) if as_of.tzinfo else as_of.replace(tzinfo=timezone.utc)
+    if _is_postgresql(db):
+        return func.tstzrange(SDNEntityVersion.valid_from, SDNEntityVersion.valid_to).op("@>")(as_of)
+    return and_(SDNEntityVersion.valid_from <= as_of,
+                or_(SDNEntityVersion.valid_to.is_(None), SDNEntityVersion.valid_to > as_of))
+
+
+def get_entity_document(uid: int, db: Session, as_of: datetime | None = None) -> dict | None:
+    """
+    Fetch the assembled entity document with a single primary key lookup.
+    Args:
+        uid (int): The UID of the entity.
+        db (Session): The database session.
+        as_of (datetime | None): Return the document as listed at this time instead of the current one.
+    Returns:
+        dict | None: The entity document, or None if the entity is unknown or was not listed at as_of.
+    """
+    if as_of is not None:
+        return db.execute(
+            select(SDNEntityVersion.document).where(SDNEntityVersion.uid == uid, _valid_at(as_of, db))
+        ).scalar_one_or_none()
+    return db.execute(
+        select(SDNEntityDocument.document).where(SDNEntityDocument.uid == uid)
+    ).scalar_one_or_none()
+
+
+def get_entity_history(uid: int, db: Session) -> list[dict]:
+    """
+    List the versions of an entity, oldest first.
+    Args:
+        uid (int): The UID of the entity.
+        db (Session): The database session.
+    Returns:
+        list[dict]: The validity range, recording time and content hash of each version.
+    """
+    rows = db.execute(
+        select(SDNEntityVersion.valid_from,
+               SDNEntityVersion.valid_to,
+               SDNEntityVersion.recorded_at,
+               SDNEntityVersion.content_hash)
+        .where(SDNEntityVersion.uid == uid)
+        .order_by(SDNEntityVersion.valid_from)
+    ).all()
+    return [dict(row._mapping) for row in rows]
+
+
+def _filter_entities(statement: Select,
+                     sdn_type: str | None = None,
+                     program: str | None = None,
+                     country: str | None = None,
+                     born_from: date | None = None,
+                     born_to: date | None = None,
+                     min_tonnage: float | None = None,
+                     max_tonnage: float | None = None) -> Select:
+    """
+    Apply the entity filters to a statement selecting from SDNEntity.
+    Args:
+        statement (Select): The statement to filter.
+        sdn_type (str | None): Only entities of this type.
+        program (str | None): Only entities listed under this program.
+        country (str | None): Only entities with this nationality, citizenship or address country.
+        born_from (date | None): Only entities possibly born on or after this day.
+        born_to (date | None): Only entities possibly born on or before this day.
+        min_tonnage (float | None): Only vessels of at least this tonnage.
+        max_tonnage (float | None): Only vessels of at most this tonnage.
+    Returns:
+        Select: The filtered statement.
+    """
+    if sdn_type is not None:
+        statement = statement.where(SDNEntity.sdn_type == sdn_type)
+    # Names are resolved to their lookup keys once, so the child rows are matched on small integers
+    if program is not None:
+        program_id = select(SanctionsProgram.id).where(SanctionsProgram.name == program).scalar_subquery()
+        statement = statement.where(SDNEntity.programs.any(Program.program_id == program_id))
+    if country is not None:
+        country_id = select(Country.id).where(Country.name == country).scalar_subquery()
+        statement = statement.where(or_(
+            SDNEntity.nationalities.any(Nationality.country_id == country_id),
+            SDNEntity.citizenships.any(Citizenship.country_id == country_id),
+            SDNEntity.addresses.any(Address.country_id == country_id)
+        ))
+    # A date of birth matches when its range of possible days overlaps the requested one
+    if born_from is not None or born_to is not None:
+        conditions = []
+        if born_from is not None:
+            conditions.append(DateOfBirth.date_to >= born_from)
+        if born_to is not None:
+            conditions.append(DateOfBirth.date_from <= born_to)
+        statement = statement.where(SDNEntity.date_of_birth_list.any(and_(*conditions)))
+    if min_tonnage is not None or max_tonnage is not None:
+        conditions = []
+        if min_tonnage is not None:
+            conditions.append(Vessel.tonnage >= min_tonnage)
+        if max_tonnage is not None:
+            conditions.append(Vessel.tonnage <= max_tonnage)
+        statement = statement.where(SDNEntity.vessel.has(and_(*conditions)))
+    return statement
+
+
+def list_entities(db: Session,
+                  limit: int = 100,
+                  after: int | None = None,
+                  sdn_type: str | None = None,
+                  program: str | None = None,
+                  country: str | None = None,
+                  born_from: date | None = None,
+                  born_to: date | None = None,
+                  min_tonnage: float | None = None,
+                  max_tonnage: float | None = None,
+                  as_of: datetime | None = None) -> dict:
+    """
+    List entities ordered by ID, paginated with a keyset on the ID.
+    With as_of, the entities listed at that time are returned from the history instead,
+    ordered and paginated by UID, and the other filters are not supported.
+    Args:
+        db (Session): The database session.
+        limit (int): The maximum number of entities to return.
+        after (int | None): The ID of the last entity of the previous page.
+        sdn_type (str | None): Only entities of this type.
+        program (str | None): Only entities listed under this program.
+        country (str | None): Only entities with this nationality, citizenship or address country.
+        born_from (date | None): Only entities possibly born on or after this day.
+        born_to (date | None): Only entities possibly born on or before this day.
+        min_tonnage (float | None): Only vessels of at least this tonnage.
+        max_tonnage (float | None): Only vessels of at most this tonnage.
+        as_of (datetime | None): List the entities as listed at this time.
+    Returns:
+        dict: The entity summaries and the cursor of the next page.
+    """
+    if as_of is not None:
+        if any(value is not None for value in (sdn_type, program, country, born_from, born_to,
+                                                min_tonnage, max_tonnage)):
+            raise ValueError("Filters are not supported together with as_of.")
+        return _list_entities_as_of(db, as_of, limit=limit, after=after)
+
+    statement = select(SDNEntity.id,
+                       SDNEntity.uid,
+                       SDNEntity.first_name,
+                       SDNEntity.last_name,
+                       SDNEntity.sdn_type)
+    statement = _filter_entities(statement, sdn_type=sdn_type, program=program, country=country,
+                                 born_from=born_from, born_to=born_to,
+                                 min_tonnage=min_tonnage, max_tonnage=max_tonnage)
+    if after is not None:
+        statement = statement.where(SDNEntity.id > after)
+    rows = db.execute(statement.order_by(SDNEntity.id).limit(limit)).all()
+    return {
+        "results": [dict(row._mapping) for row in rows],
+        "next_cursor": rows[-1].id if len(rows) == limit else None
+    }
+
+
+def _list_entities_as_of(db: Session, as_of: datetime, limit: int = 100, after: int | None = None) -> dict:
+    """
+    List the entities in effect at a point in time from their history, paginated with a keyset on the UID.
+    Args:
+        db (Session): The database session.
+        as_of (datetime): The point in time.
+        limit (int): The maximum number of entities to return.
+        after (int | None): The UID of the last entity of the previous page.
+    Returns:
+        dict: The entity summaries and the cursor of the next page.
+    """
+    statement = select(SDNEntityVersion.uid,
+                       SDNEntityVersion.document["first_name"].as_string().label("first_name"),
+                       SDNEntityVersion.document["last_name"].as_string().label("last_name"),
+                       SDNEntityVersion.document["sdn_type"].as_string().label("sdn_type"))
+    statement = statement.where(_valid_at(as_of, db))
+    if after is not None:
+        statement = statement.where(SDNEntityVersion.uid > after)
+    rows = db.execute(statement.order_by(SDNEntityVersion.uid).limit(limit)).all()
+    return {
+        "results": [dict(row._mapping) for row in rows],
+        "next_cursor": rows[-1].uid if len(rows) == limit else None
+    }
+
+
+def iter_entity_documents(db: Session,
+                          batch_size: int = 1000,
+                          sdn_type: str | None = None,
+                          program: str | None = None,
+                          country: str | None = None) -> Iterator[dict]:
+    """
+    Stream the entity documents in UID order through a server side cursor.
+    Only one batch of rows is held in memory at a time.
+    Args:
+        db (Session): The database session.
+        batch_size (int): The number of rows fetched per round trip.
+        sdn_type (str | None): Only entities of this type.
+        program (str | None): Only entities listed under this program.
+        country (str | None): Only entities with this nationality, citizenship or address country.
+    Returns:
+        Iterator[dict]: The entity documents.
+    """
+    statement = select(SDNEntityDocument.document)
+    if sdn_type is not None or program is not None or country is not None:
+        statement = _filter_entities(statement.join(SDNEntity, SDNEntity.uid == SDNEntityDocument.uid),
+                                     sdn_type=sdn_type, program=program, country=country)
+    statement = statement.order_by(SDNEntityDocument.uid).execution_options(yield_per=batch_size)
+    for document in db.execute(statement).scalars():
+        yield document
+
+
+def export_ndjson(documents: Iterator[dict], chunk_size: int = 500) -> Iterator[str]:
+    """
+    Serialize entity documents as newline delimited JSON, in chunks of lines.
+    Args:
+        documents (Iterator[dict]): The entity documents.
+        chunk_size (int): The number of documents per yielded chunk.
+    Returns:
+        Iterator[str]: The NDJSON chunks.
+    """
+    lines = []
+    for document in documents:
+        lines.append(json.dumps(document, separators=(",", ":")))
+        if len(lines) >= chunk_size:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+
+def _join_countries(items: list[dict]) -> str:
+    """
+    Joins the countries of nationality or citizenship entries, skipping the entries without a country.
+    """
+    return ";".join(country for country in (item.get("country") for item in items) if country)
+
+
+def _csv_row(document: dict) -> list:
+    """
+    Flatten an entity document into a CSV row.
+    Args:
+        document (dict): The entity document.
+    Returns:
+        list: The values in CSV_EXPORT_COLUMNS order.
+    """
+    aliases = [" ".join(part for part in (aka.get("first_name"), aka.get("last_name")) if part)
+               for aka in document.get("aka_list", [])]
+    return [
+        document["uid"],
+        document.get("first_name"),
+        document.get("last_name"),
+        document.get("title"),
+        document.get("sdn_type"),
+        ";".join(document.get("programs", [])),
+        _join_countries(document.get("nationalities", [])),
+        _join_countries(document.get("citizenships", [])),
+        ";".join(aliases),
+        document.get("remarks")
+    ]
+
+
+def export_csv(documents: Iterator[dict], chunk_size: int = 500) -> Iterator[str]:
+    """
+    Serialize entity documents as CSV with a header row, in chunks of rows.
+    Args:
+        documents (Iterator[dict]): The entity documents.
+        chunk_size (int): The number of documents per yielded chunk.
+    Returns:
+        Iterator[str]: The CSV chunks.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_EXPORT_COLUMNS)
+    rows = 0
+    for document in documents:
+        writer.writerow(_csv_row(document))
+        rows += 1
+        if rows % chunk_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def list_facet_counts(facet: str, db: Session) -> list[dict]:
+    """
+    List the values of a facet with their precomputed entity counts.
+    Args:
+        facet (str): The facet, program or country.
+        db (Session): The database session.
+    Returns:
+        list[dict]: The values and their entity counts, by name.
+    """
+    rows = db.execute(
+        select(FacetCount.value, FacetCount.entity_count)
+        .where(FacetCount.facet == facet)
+        .order_by(FacetCount.value)
+    ).all()
+    return [{"name": value, "entity_count": count} for value, count in rows]
+
+
+def list_programs(db: Session) -> list[dict]:
+    """
+    List the sanctions programs with the number of entities listed under each.
+    Args:
+        db (Session): The database session.
+    Returns:
+        list[dict]: The programs and their entity counts, by name.
+    """
+    return list_facet_counts("program", db)
+
+
+def list_countries(db: Session) -> list[dict]:
+    """
+    List the countries with the number of entities linked to each
+    through a nationality, citizenship or address.
+    Args:
+        db (Session): The database session.
+    Returns:
+        list[dict]: The countries and their entity counts, by name.
+    """
+    return list_facet_counts("country", db)
+
+
+def search_names(query: str, db: Session, limit: int = 20, threshold: float = 0.3) -> list[dict]:
+    """
+    Fuzzy search over primary names and aliases using trigram similarity.
+    Candidates are selected with the indexed `%` operator and ranked by `similarity`,
+    keeping the best score per entity across its primary name and aliases.
+    Args:
+        query (str): The name to search for.
+        db (Session): The database session.
+        limit (int): The maximum number of entities to return.
+        threshold (float): The minimum similarity, between 0 and 1.
+    Returns:
+        list[dict]: The matching entity UIDs and their scores, best match first.
+    """
+    normalized = normalize_name(query)
+    if not normalized:
+        return []
+    if not _is_postgresql(db):
+        return _search_names_embedded(normalized, db, limit=limit, threshold=threshold)
+
+    # The % operator compares against this threshold, scoped to the current transaction
+    db.execute(select(func.set_config("pg_trgm.similarity_threshold", str(threshold), True)))
+
+    primary = (
+        select(SDNEntity.uid.label("uid"),
+               func.similarity(SDNEntity.search_name, normalized).label("score"))
+        .where(SDNEntity.search_name.op("%")(normalized))
+    )
+    aliases = (
+        select(SDNEntity.uid.label("uid"),
+               func.similarity(AKA.search_name, normalized).label("score"))
+        .join(AKA, AKA.sdn_entity_id == SDNEntity.id)
+        .where(AKA.search_name.op("%")(normalized))
+    )
+    matches = union_all(primary, aliases).subquery()
+    score = func.max(matches.c.score).label("score")
+    rows = db.execute(
+        select(matches.c.uid, score)
+        .group_by(matches.c.uid)
+        .order_by(desc(score), matches.c.uid)
+        .limit(limit)
+    ).all()
+    return [{"uid": uid, "score": float(score)} for uid, score in rows]
+
+
+def _search_names_embedded(normalized: str, db: Session, limit: int = 20, threshold: float = 0.3) -> list[dict]:
+    """
+    Fuzzy name search for embedded databases without pg_trgm.
+    The names are scanned once and scored in process with the same trigram similarity.
+    Args:
+        normalized (str): The normalized name to search for.
+        db (Session): The database session.
+        limit (int): The maximum number of entities to return.
+        threshold (float): The minimum similarity, between 0 and 1.
+    Returns:
+        list[dict]: The matching entity UIDs and their scores, best match first.
+    """
+    names = union_all(
+        select(SDNEntity.uid, SDNEntity.search_name).where(SDNEntity.search_name.is_not(None)),
+        select(SDNEntity.uid, AKA.search_name)
+        .join(AKA, AKA.sdn_entity_id == SDNEntity.id)
+        .where(AKA.search_name.is_not(None))
+    )
+    scores = {}
+    for uid, search_name in db.execute(names):
+        score = trigram_similarity(normalized, search_name)
+        if score >= threshold and score > scores.get(uid, 0.0):
+            scores[uid] = score
+    ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:limit]
+    return [{"uid": uid, "score": score} for uid, score in ranked]
+
+
+def encode_cursor(*values) -> str:
+    """
+    Encode the sort key of the last returned row into an opaque cursor.
+    Args:
+        *values: The sort key values.
+    Returns:
+        str: The URL safe cursor.
+    """
+    return base64.urlsafe_b64encode(json.dumps(list(values)).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str, length: int = 2) -> list:
+    """
+    Decode a cursor produced by encode_cursor.
+    Args:
+        cursor (str): The cursor.
+        length (int): The number of sort key values the cursor must hold.
+    Returns:
+        list: The sort key values.
+    Raises:
+        ValueError: If the cursor is malformed or is not a list of length numbers.
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (ValueError, UnicodeError) as e:
+        logger.error(f"Invalid cursor {cursor}: {e}")
+        raise ValueError("Invalid cursor.") from e
+    if not isinstance(values, list) or len(values) != length or \
+            not all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in values):
+        logger.error(f"Invalid cursor {cursor}: unexpected sort key {values!r}")
+        raise ValueError("Invalid cursor.")
+    return values
+
+
+def search_text(query: str, db: Session, limit: int = 20, cursor: str | None = None) -> dict:
+    """
+    Ranked full-text search over entity remarks and addresses.
+    Results are ordered by rank and UID and paginated with a keyset cursor on that order.
+    Args:
+        query (str): The web search style query.
+        db (Session): The database session.
+        limit (int): The maximum number of entities to return.
+        cursor (str | None): The cursor returned with the previous page.
+    Returns:
+        dict: The matches with highlighted fragments and the cursor of the next page.
+    """
+    if not _is_postgresql(db):
+        return _search_text_embedded(query, db, limit=limit, cursor=cursor)
+
+    parameters = {"query": query, "limit": limit, "headline_options": HEADLINE_OPTIONS}
+    cursor_filter = ""
+    if cursor is not None:
+        parameters["cursor_rank"], parameters["cursor_uid"] = decode_cursor(cursor)
+        cursor_filter = "WHERE rank < :cursor_rank OR (rank = :cursor_rank AND uid > :cursor_uid)"
+
+    rows = db.execute(text(FULL_TEXT_SEARCH_SQL.format(cursor_filter=cursor_filter)), parameters).all()
+    results = [
+        {
+            "uid": row.uid,
+            "rank": row.rank,
+            "remarks_headline": row.remarks_headline,
+            "address_headline": row.address_headline
+        }
+        for row in rows
+    ]
+    next_cursor = encode_cursor(rows[-1].rank, rows[-1].uid) if len(rows) == limit else None
+    return {"results": results, "next_cursor": next_cursor}
+
+
+def _headline(value: str | None, pattern: re.Pattern) -> str | None:
+    """
+    Highlight the matches of a pattern in a fragment around the first match.
+    Args:
+        value (str | None): The text.
+        pattern (re.Pattern): The pattern of the search terms.
+    Returns:
+        str | None: The highlighted fragment, or None if nothing matches.
+    """
+    match = pattern.search(value or "")
+    if match is None:
+        return None
+    start = max(match.start() - HEADLINE_CONTEXT, 0)
+    end = min(match.end() + HEADLINE_CONTEXT, len(value))
+    return pattern.sub(lambda found: f"<mark>{found.group(0)}</mark>", value[start:end])
+
+
+def _search_text_embedded(query: str, db: Session, limit: int = 20, cursor: str | None = None) -> dict:
+    """
+    Text search for embedded databases without full-text indexes.
+    Entities whose remarks or addresses contain every term are ranked by the number of occurrences.
+    Args:
+        query (str): The search terms; web search operators are ignored.
+        db (Session): The database session.
+        limit (int): The maximum number of entities to return.
+        cursor (str | None): The cursor returned with the previous page.
+    Returns:
+        dict: The matches with highlighted fragments and the cursor of the next page.
+    """
+    terms = normalize_name(query).split()
+    if not terms:
+        return {"results": [], "next_cursor": None}
+    pattern = re.compile("|".join(re.escape(term) for term in terms), re.IGNORECASE)
+
+    address_text = func.trim(
+        func.coalesce(Address.address1, "") + " " + func.coalesce(Address.address2, "") + " " +
+        func.coalesce(Address.address3, "") + " " + func.coalesce(Address.city, "") + " " +
+        func.coalesce(Address.state_or_province, "") + " " + func.coalesce(Address.postal_code, "") + " " +
+        func.coalesce(Address.country_name, "") + " " + func.coalesce(Address.region, "")
+    )
+    remarks = select(SDNEntity.uid, SDNEntity.remarks.label("text"), literal(False).label("is_address")).where(
+        or_(*(SDNEntity.remarks.ilike(f"%{term}%") for term in terms))
+    )
+    addresses = (
+        select(SDNEntity.uid, address_text.label("text"), literal(True).label("is_address"))
+        .join(Address, Address.sdn_entity_id == SDNEntity.id)
+        .where(or_(*(address_text.ilike(f"%{term}%") for term in terms)))
+    )
+
+    matches = {}
+    for uid, value, is_address in db.execute(union_all(remarks, addresses)):
+        match = matches.setdefault(uid, {"texts": [], "remarks": None, "addresses": []})
+        match["texts"].append(normalize_name(value))
+        if is_address:
+            # Collapse the gaps left by the empty address fields
+            match["addresses"].append(" ".join(value.split()))
+        else:
+            match["remarks"] = value
+
+    ranked = []
+    for uid, match in matches.items():
+        combined = " ".join(match["texts"])
+        if all(term in combined for term in terms):
+            rank = float(sum(combined.count(term) for term in terms))
+            ranked.append((rank, uid, match))
+    ranked.sort(key=lambda item: (-item[0], item[1]))
+
+    if cursor is not None:
+        cursor_rank, cursor_uid = decode_cursor(cursor)
+        ranked = [item for item in ranked if item[0] < cursor_rank or (item[0] == cursor_rank and item[1] > cursor_uid)]
+    page = ranked[:limit]
+
+    results = []
+    for rank, uid, match in page:
+        address_headlines = [headline for headline in (_headline(value, pattern) for value in match["addresses"])
+                             if headline]
+        results.append({
+            "uid": uid,
+            "rank": rank,
+            "remarks_headline": _headline(match["remarks"], pattern),
+            "address_headline": " | ".join(address_headlines) or None
+        })
+    next_cursor = encode_cursor(page[-1][0], page[-1][1]) if len(page) == limit else None
+    return {"results": results, "next_cursor": next_cursor}
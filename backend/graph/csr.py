@@ -0,0 +1,533 @@
+# backend/graph/csr.py
+
+# Import dependencies
+import logging
+import threading
+import time
+from typing import Callable, Final, Iterable
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+# Import custom modules
+from backend.common.relationships import LINK_RELATIONSHIPS
+from backend.data_layer.cache import get_data_generation
+from backend.data_layer.graphdb import GraphDBManager
+from backend.graph.service import DEFAULT_BATCH_SIZE, COUNTRY_LINKS, build_graph_rows, iter_document_batches
+from backend.models.SDNEntity import SDNEntityLink
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Node key: (label, key), e.g. ("SDNEntity", 36) or ("Program", "SDGT")
+NodeKey = tuple[str, str | int]
+
+ENTITY_LABEL: Final[str] = "SDNEntity"
+
+# Relationships connecting entities through shared hub nodes, then directly through the references
+# extracted from their remarks; the position is the edge type code
+EDGE_TYPES: Final[tuple[str, ...]] = ("ENROLLED_IN", "HAS_NATIONALITY", "HOLDS_CITIZENSHIP",
+                                      "HAS_ID", "HAS_ADDRESS", "LOCATED_IN") + LINK_RELATIONSHIPS
+
+EXPORT_EDGES_CYPHER = """
+MATCH (a)-[r]->(b)
+WHERE type(r) IN $types
+RETURN labels(a)[0] AS source_label, coalesce(a.key, a.name, a.uid) AS source_key,
+       type(r) AS type,
+       labels(b)[0] AS target_label, coalesce(b.key, b.name, b.uid) AS target_key
+"""
+
+EXPORT_ENTITIES_CYPHER = """
+MATCH (e:SDNEntity)
+RETURN e.uid AS uid
+"""
+
+
+class SearchBudgetExceeded(Exception):
+    """
+    Raised when a graph search runs out of its visit or time budget.
+    """
+
+
+class SearchBudget:
+    """
+    A budget of node visits and wall-clock time shared by the searches of one request.
+    """
+
+    def __init__(self, max_visits: int | None = None, timeout: float | None = None):
+        """
+        Args:
+            max_visits (int | None): The maximum number of adjacency entries visited, None for unbounded.
+            timeout (float | None): The maximum number of seconds, None for unbounded.
+        """
+        self.max_visits = max_visits
+        self.deadline = time.monotonic() + timeout if timeout is not None else None
+        self.visits = 0
+
+    def charge(self, visits: int) -> None:
+        """
+        Account for visited adjacency entries.
+        Raises:
+            SearchBudgetExceeded: If the visits or the time are exhausted.
+        """
+        self.visits += visits
+        if self.max_visits is not None and self.visits > self.max_visits:
+            raise SearchBudgetExceeded(f"Visit budget of {self.max_visits} exceeded.")
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise SearchBudgetExceeded("Search timed out.")
+
+
+class CSRGraph:
+    """
+    An immutable undirected graph stored as NumPy compressed sparse row arrays.
+    The neighbors of node i are indices[indptr[i]:indptr[i + 1]], connected through the
+    relationships edge_types[indptr[i]:indptr[i + 1]], which are codes into EDGE_TYPES.
+    """
+
+    def __init__(self,
+                 indptr: np.ndarray,
+                 indices: np.ndarray,
+                 edge_types: np.ndarray,
+                 node_keys: list[NodeKey],
+                 generation: int | None = None):
+        self.indptr = indptr
+        self.indices = indices
+        self.edge_types = edge_types
+        self.node_keys = node_keys
+        self.generation = generation
+        self.index: dict[NodeKey, int] = {key: i for i, key in enumerate(node_keys)}
+        self._components: np.ndarray | None = None
+
+    @property
+    def num_nodes(self) -> int:
+        return len(self.node_keys)
+
+    @property
+    def num_edges(self) -> int:
+        """The number of undirected edges; each is stored once per direction."""
+        return len(self.indices) // 2
+
+    @property
+    def nbytes(self) -> int:
+        """The memory used by the adjacency arrays."""
+        return self.indptr.nbytes + self.indices.nbytes + self.edge_types.nbytes
+
+    @classmethod
+    def from_edges(cls,
+                   edges: Iterable[tuple[NodeKey, NodeKey, str]],
+                   nodes: Iterable[NodeKey] = (),
+                   generation: int | None = None) -> "CSRGraph":
+        """
+        Build the graph from a list of edges.
+        Args:
+            edges (Iterable[tuple[NodeKey, NodeKey, str]]): The (source, target, relationship type) edges.
+                Edges with a relationship type outside EDGE_TYPES are ignored.
+            nodes (Iterable[NodeKey]): Additional nodes, so that isolated entities get an index too.
+            generation (int | None): The data generation the edges were read from.
+        Returns:
+            CSRGraph: The graph.
+        """
+        index: dict[NodeKey, int] = {}
+        for key in nodes:
+            index.setdefault(key, len(index))
+        type_codes = {name: code for code, name in enumerate(EDGE_TYPES)}
+        sources, targets, types = [], [], []
+        for source, target, edge_type in edges:
+            code = type_codes.get(edge_type)
+            if code is None:
+                continue
+            sources.append(index.setdefault(source, len(index)))
+            targets.append(index.setdefault(target, len(index)))
+            types.append(code)
+
+        num_nodes = len(index)
+        src = np.asarray(sources, dtype=np.int32)
+        dst = np.asarray(targets, dtype=np.int32)
+        typ = np.asarray(types, dtype=np.int8)
+        # Store each edge in both directions, then drop duplicates
+        src, dst, typ = np.concatenate([src, dst]), np.concatenate([dst, src]), np.concatenate([typ, typ])
+        order = np.lexsort((typ, dst, src))
+        src, dst, typ = src[order], dst[order], typ[order]
+        if len(src):
+            keep = np.ones(len(src), dtype=bool)
+            keep[1:] = (src[1:] != src[:-1]) | (dst[1:] != dst[:-1]) | (typ[1:] != typ[:-1])
+            src, dst, typ = src[keep], dst[keep], typ[keep]
+
+        indptr = np.zeros(num_nodes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(src, minlength=num_nodes), out=indptr[1:])
+        node_keys = [None] * num_nodes
+        for key, i in index.items():
+            node_keys[i] = key
+        return cls(indptr, dst, typ, node_keys, generation)
+
+    def entity_index(self, uid: int) -> int | None:
+        """
+        Returns the node index of an entity, None if the entity is not in the graph.
+        """
+        return self.index.get((ENTITY_LABEL, uid))
+
+    def edge_type_codes(self, edge_types: Iterable[str] | None) -> np.ndarray | None:
+        """
+        Translate relationship type names into codes, None meaning all types.
+        Raises:
+            ValueError: If a relationship type is unknown.
+        """
+        if edge_types is None:
+            return None
+        unknown = set(edge_types) - set(EDGE_TYPES)
+        if unknown:
+            raise ValueError(f"Unknown relationship types: {', '.join(sorted(unknown))}")
+        return np.asarray([EDGE_TYPES.index(name) for name in edge_types], dtype=np.int8)
+
+    def project(self, edge_types: Iterable[str]) -> "CSRGraph":
+        """
+        Returns the graph over the given relationship types only, with the same nodes and node indices.
+        Args:
+            edge_types (Iterable[str]): The relationship types to keep.
+        Returns:
+            CSRGraph: The projected graph.
+        Raises:
+            ValueError: If a relationship type is unknown.
+        """
+        keep = np.isin(self.edge_types, self.edge_type_codes(edge_types))
+        # Entries are ordered by source, so filtering keeps each row contiguous
+        sources = np.repeat(np.arange(self.num_nodes, dtype=np.int32), np.diff(self.indptr))[keep]
+        indptr = np.zeros(self.num_nodes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources, minlength=self.num_nodes), out=indptr[1:])
+        return CSRGraph(indptr, self.indices[keep], self.edge_types[keep], self.node_keys, self.generation)
+
+    def _adjacency(self, frontier: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the positions of all adjacency entries of the frontier nodes, without a Python loop,
+        and the number of entries of each node.
+        """
+        starts = self.indptr[frontier]
+        counts = self.indptr[frontier + 1] - starts
+        offsets = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(int(counts.sum()))
+        return offsets, counts
+
+    def degrees(self, nodes: np.ndarray, edge_types: np.ndarray | None = None) -> np.ndarray:
+        """
+        Count the edges of each node.
+        Args:
+            nodes (np.ndarray): The node indices.
+            edge_types (np.ndarray | None): The relationship type codes to count, None for all.
+        Returns:
+            np.ndarray: The degree of each node over the given relationship types.
+        """
+        offsets, counts = self._adjacency(nodes)
+        if edge_types is None:
+            return counts
+        allowed = np.isin(self.edge_types[offsets], edge_types)
+        return np.bincount(np.repeat(np.arange(len(nodes)), counts)[allowed], minlength=len(nodes))
+
+    def expand_edges(self,
+                     frontier: np.ndarray,
+                     edge_types: np.ndarray | None = None) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Gather the edges of all frontier nodes at once.
+        Args:
+            frontier (np.ndarray): The node indices to expand.
+            edge_types (np.ndarray | None): The allowed relationship type codes, None for all.
+        Returns:
+            tuple[np.ndarray, np.ndarray, np.ndarray]: The neighbors, for each neighbor the frontier node
+                it was reached from, and the relationship type code of each edge.
+        """
+        offsets, counts = self._adjacency(frontier)
+        if len(offsets) == 0:
+            empty = np.empty(0, dtype=np.int32)
+            return empty, empty, np.empty(0, dtype=np.int8)
+        neighbors = self.indices[offsets]
+        parents = np.repeat(frontier, counts).astype(np.int32)
+        types = self.edge_types[offsets]
+        if edge_types is not None:
+            allowed = np.isin(types, edge_types)
+            neighbors, parents, types = neighbors[allowed], parents[allowed], types[allowed]
+        return neighbors, parents, types
+
+    def expand(self, frontier: np.ndarray, edge_types: np.ndarray | None = None) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Gather the neighbors of all frontier nodes at once.
+        Args:
+            frontier (np.ndarray): The node indices to expand.
+            edge_types (np.ndarray | None): The allowed relationship type codes, None for all.
+        Returns:
+            tuple[np.ndarray, np.ndarray]: The neighbors and, for each neighbor, the frontier node it was reached from.
+        """
+        neighbors, parents, _ = self.expand_edges(frontier, edge_types)
+        return neighbors, parents
+
+    def neighbors(self, node: int, edge_types: Iterable[str] | None = None) -> np.ndarray:
+        """
+        Returns the distinct neighbors of a node.
+        """
+        neighbors, _ = self.expand(np.asarray([node], dtype=np.int32), self.edge_type_codes(edge_types))
+        return np.unique(neighbors)
+
+    def k_hop(self, source: int, k: int, edge_types: Iterable[str] | None = None) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Breadth-first expansion up to k hops from a node.
+        Args:
+            source (int): The node index to start from.
+            k (int): The maximum number of hops.
+            edge_types (Iterable[str] | None): The relationship types to follow, None for all.
+        Returns:
+            tuple[np.ndarray, np.ndarray]: The reached nodes, the source included, and their distance in hops.
+        """
+        codes = self.edge_type_codes(edge_types)
+        distances = np.full(self.num_nodes, -1, dtype=np.int32)
+        distances[source] = 0
+        frontier = np.asarray([source], dtype=np.int32)
+        for depth in range(1, k + 1):
+            neighbors, _ = self.expand(frontier, codes)
+            frontier = np.unique(neighbors[distances[neighbors] < 0])
+            if len(frontier) == 0:
+                break
+            distances[frontier] = depth
+        reached = np.flatnonzero(distances >= 0)
+        order = np.argsort(distances[reached], kind="stable")
+        return reached[order], distances[reached[order]]
+
+    def shortest_path(self,
+                      source: int,
+                      target: int,
+                      max_depth: int | None = None,
+                      edge_types: Iterable[str] | None = None,
+                      blocked: np.ndarray | None = None,
+                      blocked_edges: dict[int, Iterable[int]] | None = None,
+                      budget: "SearchBudget | None" = None) -> list[int] | None:
+        """
+        Bidirectional breadth-first search for a shortest path, expanding the smaller frontier each step.
+        Args:
+            source (int): The node index to start from.
+            target (int): The node index to reach.
+            max_depth (int | None): The maximum path length in hops, None for unbounded.
+            edge_types (Iterable[str] | None): The relationship types to follow, None for all.
+            blocked (np.ndarray | None): Boolean mask of the nodes the path may not pass through.
+            blocked_edges (dict[int, Iterable[int]] | None): Node pairs the path may not use, in either direction.
+            budget (SearchBudget | None): The visit and time budget charged for every expansion.
+        Returns:
+            list[int] | None: The node indices of the path from source to target, None if there is none.
+        Raises:
+            SearchBudgetExceeded: If the budget runs out before the search completes.
+        """
+        if source == target:
+            return [source]
+        codes = self.edge_type_codes(edge_types)
+        distances = [np.full(self.num_nodes, -1, dtype=np.int32) for _ in range(2)]
+        parents = [np.full(self.num_nodes, -1, dtype=np.int32) for _ in range(2)]
+        frontiers = [np.asarray([source], dtype=np.int32), np.asarray([target], dtype=np.int32)]
+        distances[0][source] = distances[1][target] = 0
+        depth = [0, 0]
+        blocked_edges = {node: np.fromiter(others, dtype=np.int32) for node, others in (blocked_edges or {}).items()}
+
+        while len(frontiers[0]) and len(frontiers[1]):
+            if max_depth is not None and depth[0] + depth[1] >= max_depth:
+                return None
+            side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+            other = 1 - side
+            neighbors, via = self.expand(frontiers[side], codes)
+            if budget is not None:
+                budget.charge(len(neighbors))
+            new = distances[side][neighbors] < 0
+            if blocked is not None:
+                new &= ~blocked[neighbors]
+            for node, others in blocked_edges.items():
+                new &= ~(((via == node) & np.isin(neighbors, others)) | ((neighbors == node) & np.isin(via, others)))
+            neighbors, via = neighbors[new], via[new]
+            neighbors, first = np.unique(neighbors, return_index=True)
+            depth[side] += 1
+            distances[side][neighbors] = depth[side]
+            parents[side][neighbors] = via[first]
+            frontiers[side] = neighbors
+
+            met = neighbors[distances[other][neighbors] >= 0]
+            if len(met):
+                meeting = met[np.argmin(distances[other][met])]
+                return self._join_path(meeting, parents[0], parents[1])
+        return None
+
+    def relationship_types(self, source: int, target: int) -> list[str]:
+        """
+        Returns the types of the relationships between two adjacent nodes.
+        """
+        start, end = self.indptr[source], self.indptr[source + 1]
+        codes = self.edge_types[start:end][self.indices[start:end] == target]
+        return [EDGE_TYPES[code] for code in codes]
+
+    @staticmethod
+    def _join_path(meeting: int, forward: np.ndarray, backward: np.ndarray) -> list[int]:
+        """
+        Join the two halves of a bidirectional search at their meeting node.
+        """
+        path = [int(meeting)]
+        node = forward[meeting]
+        while node >= 0:
+            path.insert(0, int(node))
+            node = forward[node]
+        node = backward[meeting]
+        while node >= 0:
+            path.append(int(node))
+            node = backward[node]
+        return path
+
+    def connected_components(self) -> np.ndarray:
+        """
+        Label the connected components by minimum label propagation with pointer jumping.
+        The labels are computed once per graph, as the graph never changes.
+        Returns:
+            np.ndarray: The component of each node, numbered from 0 by decreasing size.
+        """
+        if self._components is not None:
+            return self._components
+        labels = np.arange(self.num_nodes, dtype=np.int32)
+        sources = np.repeat(np.arange(self.num_nodes, dtype=np.int32), np.diff(self.indptr))
+        while True:
+            previous = labels.copy()
+            np.minimum.at(labels, sources, labels[self.indices])
+            # Point every label at its own label until the forest is flat
+            while True:
+                jumped = labels[labels]
+                if np.array_equal(jumped, labels):
+                    break
+                labels = jumped
+            if np.array_equal(labels, previous):
+                break
+        roots, inverse, sizes = np.unique(labels, return_inverse=True, return_counts=True)
+        rank = np.empty(len(roots), dtype=np.int32)
+        rank[np.argsort(-sizes, kind="stable")] = np.arange(len(roots), dtype=np.int32)
+        self._components = rank[inverse]
+        return self._components
+
+
+def document_edges(documents: list[dict]) -> Iterable[tuple[NodeKey, NodeKey, str]]:
+    """
+    Yield the edges between the entities and the hub nodes described by entity documents.
+    Args:
+        documents (list[dict]): The entity documents.
+    Yields:
+        tuple[NodeKey, NodeKey, str]: The (source, target, relationship type) edges.
+    """
+    rows = build_graph_rows(documents)
+    for row in rows["programs"]:
+        yield (ENTITY_LABEL, row["entity_uid"]), ("Program", row["name"]), "ENROLLED_IN"
+    for key, relationship in COUNTRY_LINKS.items():
+        for row in rows[key]:
+            yield (ENTITY_LABEL, row["entity_uid"]), ("Country", row["country"]), relationship
+    for row in rows["identifiers"]:
+        yield (ENTITY_LABEL, row["entity_uid"]), ("Identifier", row["key"]), "HAS_ID"
+    for row in rows["addresses"]:
+        yield (ENTITY_LABEL, row["entity_uid"]), ("Address", row["key"]), "HAS_ADDRESS"
+        if row["properties"].get("country"):
+            yield ("Address", row["key"]), ("Country", row["properties"]["country"]), "LOCATED_IN"
+
+
+def link_edges(db: Session) -> Iterable[tuple[NodeKey, NodeKey, str]]:
+    """
+    Yield the edges between entities that refer to each other, from the resolved entity links.
+    Args:
+        db (Session): The database session.
+    Yields:
+        tuple[NodeKey, NodeKey, str]: The (source, target, relationship type) edges.
+    """
+    rows = db.execute(
+        select(SDNEntityLink.source_uid, SDNEntityLink.target_uid, SDNEntityLink.relationship_type)
+        .where(SDNEntityLink.target_uid.is_not(None))
+    )
+    for source_uid, target_uid, relationship in rows:
+        yield (ENTITY_LABEL, source_uid), (ENTITY_LABEL, target_uid), relationship
+
+
+def build_csr_graph(db: Session, generation: int | None = None, batch_size: int = DEFAULT_BATCH_SIZE) -> CSRGraph:
+    """
+    Build the in-memory graph from the entity documents in the relational database.
+    Args:
+        db (Session): The database session.
+        generation (int | None): The data generation being read.
+        batch_size (int): The number of documents read per round trip.
+    Returns:
+        CSRGraph: The graph.
+    """
+    started = time.perf_counter()
+    uids, edges = [], []
+    for documents in iter_document_batches(db, batch_size):
+        uids.extend((ENTITY_LABEL, document["uid"]) for document in documents)
+        edges.extend(document_edges(documents))
+    # Links to entities that are no longer listed would add nodes without a document
+    listed = set(uids)
+    edges.extend(edge for edge in link_edges(db) if edge[0] in listed and edge[1] in listed)
+    graph = CSRGraph.from_edges(edges, nodes=uids, generation=generation)
+    logger.info(f"In-memory graph built for generation {generation}: {graph.num_nodes} nodes, "
+                f"{graph.num_edges} edges, {graph.nbytes} bytes in {time.perf_counter() - started:.2f}s.")
+    return graph
+
+
+def build_csr_graph_from_neo4j(graph_db: GraphDBManager, generation: int | None = None) -> CSRGraph:
+    """
+    Build the in-memory graph from an export of the Neo4j graph.
+    Args:
+        graph_db (GraphDBManager): The graph database manager.
+        generation (int | None): The data generation the graph was synced from.
+    Returns:
+        CSRGraph: The graph.
+    """
+    uids = [(ENTITY_LABEL, record["uid"]) for record in graph_db.stream_query(EXPORT_ENTITIES_CYPHER)]
+    edges = (
+        ((record["source_label"], record["source_key"]), (record["target_label"], record["target_key"]), record["type"])
+        for record in graph_db.stream_query(EXPORT_EDGES_CYPHER, {"types": list(EDGE_TYPES)})
+    )
+    return CSRGraph.from_edges(edges, nodes=uids, generation=generation)
+
+
+class CSRGraphManager:
+    """
+    Holds the in-memory graph of the current data generation.
+    A new generation is built next to the current graph and swapped in with a single reference
+    assignment, so queries that already hold the previous graph finish on it undisturbed.
+    on_rebuild is called with each new graph once it is swapped in, e.g. to pre-warm caches,
+    in a background thread so that the request that triggered the rebuild does not wait for it.
+    """
+
+    def __init__(self, on_rebuild: Callable[[CSRGraph], None] | None = None):
+        self._graph: CSRGraph | None = None
+        self._lock = threading.Lock()
+        self.on_rebuild = on_rebuild
+        self.rebuild_thread: threading.Thread | None = None
+
+    def _run_rebuild_hook(self, graph: CSRGraph) -> None:
+        """
+        Runs the rebuild hook on a new graph, logging instead of raising its errors.
+        """
+        try:
+            self.on_rebuild(graph)
+        except Exception as e:
+            logger.error(f"Graph rebuild hook failed for generation {graph.generation}: {e}")
+
+    @property
+    def graph(self) -> CSRGraph | None:
+        return self._graph
+
+    def get(self, db: Session) -> CSRGraph:
+        """
+        Returns the graph of the current data generation, building it first if the generation changed.
+        Args:
+            db (Session): The database session.
+        Returns:
+            CSRGraph: The graph.
+        """
+        generation = get_data_generation(db)
+        graph = self._graph
+        if graph is not None and graph.generation == generation:
+            return graph
+        # Only one request rebuilds; the others wait for it instead of building the same graph
+        rebuilt = False
+        with self._lock:
+            if self._graph is None or self._graph.generation != generation:
+                self._graph = build_csr_graph(db, generation)
+                rebuilt = True
+            graph = self._graph
+        if rebuilt and self.on_rebuild is not None:
+            self.rebuild_thread = threading.Thread(target=self._run_rebuild_hook, args=(graph,),
+                                                   name=f"csr-rebuild-{generation}", daemon=True)
+            self.rebuild_thread.start()
+        return graph
@@ -1 +1,426 @@
+# backend/graph/main.py
 
+# Import dependencies
+import logging
+import os
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, APIRouter, Depends, Header, HTTPException, Query, Response
+from sqlalchemy.orm import Session
+
+# Import custom modules
+from backend.data_layer.database import DatabaseManager
+from backend.data_layer.graph_schema import GraphSchemaManager
+from backend.data_layer.graphdb import GraphDBManager
+from backend.data_layer.graphdb_async import AsyncGraphDBManager
+from backend.graph.analytics import get_component_members, get_top_entities, run_graph_analytics
+from backend.graph.csr import CSRGraphManager
+from backend.graph.neighborhood import DEFAULT_EXPAND_DEPTH, NeighborhoodCache, expand_neighborhood, subgraph_columns
+from backend.graph.ownership import get_ownership_flag, import_ownership_records, run_ownership_propagation
+from backend.graph.paths import DEFAULT_MAX_DEPTH, DEFAULT_MAX_VISITS, DEFAULT_TIMEOUT, describe_path, k_shortest_paths
+from backend.graph.payload import PAYLOAD_MEDIA_TYPE, encode_binary, encode_json
+from backend.graph.service import (
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_NEIGHBOR_LIMIT,
+    apply_pending_change_sets,
+    get_neighborhood,
+    sync_graph
+)
+from backend.graph.subgraph import DEFAULT_HUB_DEGREE, DEFAULT_MAX_NODES, DEFAULT_SUBGRAPH_DEPTH
+
+# Initialize the FastAPI router
+router = APIRouter()
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Initialize the database managers
+db_manager = DatabaseManager()
+graph_manager = GraphDBManager()
+async_graph_manager = AsyncGraphDBManager()
+
+# Neighborhoods of popular entities, pre-warmed whenever a new graph generation is built
+neighborhood_cache = NeighborhoodCache()
+
+# In-memory graph of the current data generation, for interactive traversals
+csr_manager = CSRGraphManager(on_rebuild=neighborhood_cache.prewarm)
+
+@router.post("/sync")
+def sync_graph_data(
+    batch_size: int = Query(DEFAULT_BATCH_SIZE, ge=1, le=50000),
+    prune: bool = True,
+    analytics: bool = True,
+    db: Session = Depends(db_manager.get_db)
+) -> dict:
+    """
+    Rebuild the graph from the entity documents in PostgreSQL.
+
+    Args:
+        batch_size (int): The number of entities per write transaction.
+        prune (bool): Delete the entities that are no longer listed.
+        analytics (bool): Recompute the network metrics once the graph is built.
+        db (Session): The database session.
+
+    Returns:
+        dict: The counters and rates of the sync.
+    """
+    try:
+        stats = sync_graph(db, graph_manager, batch_size=batch_size, prune=prune).to_dict()
+        if analytics:
+            stats["entities_with_metrics"] = run_graph_analytics(db, csr_manager.get(db), graph_manager)
+        return stats
+    except Exception as e:
+        logger.exception("Graph sync failed.")
+        raise HTTPException(status_code=500, detail="An internal server error occurred.")
+
+@router.post("/changes/apply")
+def apply_change_sets(
+    batch_size: int = Query(DEFAULT_BATCH_SIZE, ge=1, le=50000),
+    db: Session = Depends(db_manager.get_db)
+) -> list[dict]:
+    """
+    Apply the change sets of the publications ingested since the graph was last updated.
+
+    Args:
+        batch_size (int): The number of entities per write transaction.
+        db (Session): The database session.
+
+    Returns:
+        list[dict]: The ID and the counters of each applied change set.
+    """
+    try:
+        return apply_pending_change_sets(db, graph_manager, batch_size=batch_size)
+    except Exception as e:
+        logger.exception("Applying the change sets failed.")
+        raise HTTPException(status_code=500, detail="An internal server error occurred.")
+
+@router.post("/analytics")
+def run_analytics(db: Session = Depends(db_manager.get_db)) -> dict:
+    """
+    Recompute the network metrics of the entities from the current graph.
+
+    Args:
+        db (Session): The database session.
+
+    Returns:
+        dict: The number of entities with metrics.
+    """
+    try:
+        return {"entities_with_metrics": run_graph_analytics(db, csr_manager.get(db), graph_manager)}
+    except Exception as e:
+        logger.exception("Graph analytics failed.")
+        raise HTTPException(status_code=500, detail="An internal server error occurred.")
+
+@router.post("/ownership")
+def propagate_ownership_flags(full: bool = False, db: Session = Depends(db_manager.get_db)) -> dict:
+    """
+    Update the entities blocked by ownership under the 50% rule from the ownership links and records.
+
+    Args:
+        full (bool): Recompute every entity instead of only those downstream of the changed links.
+        db (Session): The database session.
+
+    Returns:
+        dict: The counters of the run.
+    """
+    try:
+        return run_ownership_propagation(db, graph_manager, full=full).to_dict()
+    except Exception as e:
+        logger.exception("Ownership propagation failed.")
+        raise HTTPException(status_code=500, detail="An internal server error occurred.")
+
+@router.put("/ownership/records/{source}")
+def put_ownership_records(source: str, records: list[dict], db: Session = Depends(db_manager.get_db)) -> dict:
+    """
+    Replace the ownership records imported from a source outside the list, e.g. a corporate registry.
+
+    Args:
+        source (str): The name of the source.
+        records (list[dict]): The stakes, with owner_uid or owner_name, owned_uid or owned_name, and share.
+        db (Session): The database session.
+
+    Returns:
+        dict: The number of records imported.
+    """
+    try:
+        return {"records": import_ownership_records(db, source, records)}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.exception("Ownership record import failed.")
+        raise HTTPException(status_code=500, detail="An internal server error occurred.")
+
+@router.get("/entities/{uid}/ownership")
+def get_entity_ownership(uid: int, db: Session = Depends(db_manager.get_db)) -> dict:
+    """
+    Retrieve why an entity is blocked by ownership.
+
+    Args:
+        uid (int): The UID of the entity.
+        db (Session): The database session.
+
+    Returns:
+        dict: The aggregate share held by blocked owners, the owners and a provenance path.
+    """
+    flag = get_ownership_flag(db, uid)
+    if flag is None:
+        raise HTTPException(status_code=404, detail=f"Entity {uid} is not blocked by ownership")
+    return flag
+
+@router.get("/metrics/top")
+def get_top_ranked_entities(
+    metric: str = Query("pagerank"),
+    limit: int = Query(20, ge=1, le=1000),
+    db: Session = Depends(db_manager.get_db)
+) -> list[dict]:
+    """
+    Retrieve the entities ranking highest by a precomputed network metric.
+
+    Args:
+        metric (str): The metric to rank by.
+        limit (int): The number of entities.
+        db (Session): The database session.
+
+    Returns:
+        list[dict]: The entities with their metrics, best first.
+    """
+    try:
+        return get_top_entities(db, metric=metric, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/entities/{uid}/component")
+def get_entity_component(
+    uid: int,
+    limit: int = Query(100, ge=1, le=10000),
+    db: Session = Depends(db_manager.get_db)
+) -> list[dict]:
+    """
+    Retrieve the entities in the same connected component as an entity.
+
+    Args:
+        uid (int): The UID of the entity.
+        limit (int): The maximum number of entities.
+        db (Session): The database session.
+
+    Returns:
+        list[dict]: The entities with their metrics, most central first.
+    """
+    members = get_component_members(db, uid, limit=limit)
+    if members is None:
+        raise HTTPException(status_code=404, detail=f"Entity {uid} not found")
+    return members
+
+@router.post("/schema")
+def apply_graph_schema(wait: bool = True) -> list[dict]:
+    """
+    Create the missing graph constraints and indexes.
+
+    Args:
+        wait (bool): Wait for the indexes to come online.
+
+    Returns:
+        list[dict]: The index population progress.
+    """
+    try:
+        return GraphSchemaManager(graph_manager).apply(wait=wait)
+    except Exception as e:
+        logger.exception("Applying the graph schema failed.")
+        raise HTTPException(status_code=500, detail="An internal server error occurred.")
+
+@router.get("/schema/indexes")
+def get_index_progress() -> list[dict]:
+    """
+    Report the state and population progress of the graph indexes.
+
+    Returns:
+        list[dict]: One entry per index.
+    """
+    try:
+        return GraphSchemaManager(graph_manager).index_progress()
+    except Exception as e:
+        logger.exception("Reading the graph indexes failed.")
+        raise HTTPException(status_code=500, detail="An internal server error occurred.")
+
+@router.get("/paths")
+def get_paths(
+    source: int,
+    target: int,
+    k: int = Query(3, ge=1, le=20),
+    max_depth: int = Query(DEFAULT_MAX_DEPTH, ge=1, le=12),
+    edge_types: list[str] | None = Query(None),
+    max_hub_degree: int | None = Query(None, ge=1),
+    max_visits: int = Query(DEFAULT_MAX_VISITS, ge=1),
+    timeout_ms: int = Query(int(DEFAULT_TIMEOUT * 1000), ge=1, le=10000),
+    db: Session = Depends(db_manager.get_db)
+) -> dict:
+    """
+    Find the K shortest paths connecting two entities.
+
+    Args:
+        source (int): The UID of the first entity.
+        target (int): The UID of the second entity.
+        k (int): The number of paths.
+        max_depth (int): The maximum path length in hops.
+        edge_types (list[str] | None): The relationship types to follow, all by default.
+        max_hub_degree (int | None): Do not pass through nodes with more neighbors, such as large programs.
+        max_visits (int): The node visit budget of the request.
+        timeout_ms (int): The time budget of the request in milliseconds.
+        db (Session): The database session.
+
+    Returns:
+        dict: The paths, shortest first, and whether the search completed within its budget.
+    """
+    graph = csr_manager.get(db)
+    nodes = {uid: graph.entity_index(uid) for uid in (source, target)}
+    missing = [uid for uid, node in nodes.items() if node is None]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Entity {missing[0]} not found")
+    try:
+        result = k_shortest_paths(graph, nodes[source], nodes[target], k=k, max_depth=max_depth,
+                                  edge_types=edge_types, max_hub_degree=max_hub_degree,
+                                  max_visits=max_visits, timeout=timeout_ms / 1000)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {
+        "source": source,
+        "target": target,
+        "generation": graph.generation,
+        "complete": result.complete,
+        "visits": result.visits,
+        "seconds": result.seconds,
+        "paths": [describe_path(graph, path, edge_types) for path in result.paths]
+    }
+
+@router.get("/subgraph")
+def get_subgraph(
+    uids: list[int] = Query(...),
+    depth: int = Query(DEFAULT_SUBGRAPH_DEPTH, ge=0, le=6),
+    max_nodes: int = Query(DEFAULT_MAX_NODES, ge=1, le=20000),
+    hub_degree: int | None = Query(DEFAULT_HUB_DEGREE, ge=1),
+    edge_types: list[str] | None = Query(None),
+    format: str | None = Query(None, pattern="^(binary|json)$"),
+    accept: str | None = Header(None),
+    db: Session = Depends(db_manager.get_db)
+) -> Response:
+    """
+    Extract the ego network around one or more entities as a columnar payload.
+    The binary payload is returned when requested through the format or the Accept header, JSON otherwise.
+
+    Args:
+        uids (list[int]): The UIDs of the entities at the center.
+        depth (int): The maximum number of hops.
+        max_nodes (int): The maximum number of nodes.
+        hub_degree (int | None): The degree above which nodes are summarized as clusters.
+        edge_types (list[str] | None): The relationship types to follow, all by default.
+        format (str | None): Force the "binary" or "json" payload.
+        accept (str | None): The Accept header.
+        db (Session): The database session.
+
+    Returns:
+        Response: The encoded subgraph.
+    """
+    graph = csr_manager.get(db)
+    seeds = [graph.entity_index(uid) for uid in uids]
+    if any(seed is None for seed in seeds):
+        missing = next(uid for uid, seed in zip(uids, seeds) if seed is None)
+        raise HTTPException(status_code=404, detail=f"Entity {missing} not found")
+    try:
+        columns = subgraph_columns(graph, neighborhood_cache, uids, depth=depth, max_nodes=max_nodes,
+                                   hub_degree=hub_degree, edge_types=edge_types)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if format == "binary" or (format is None and PAYLOAD_MEDIA_TYPE in (accept or "")):
+        return Response(content=encode_binary(columns), media_type=PAYLOAD_MEDIA_TYPE)
+    return Response(content=encode_json(columns), media_type="application/json")
+
+@router.get("/entities/{uid}/neighbors")
+async def get_entity_neighbors(uid: int, limit: int = Query(DEFAULT_NEIGHBOR_LIMIT, ge=1, le=1000)) -> dict:
+    """
+    Retrieve an entity and the nodes directly connected to it, without blocking a worker thread.
+
+    Args:
+        uid (int): The UID of the entity.
+        limit (int): The maximum number of neighbors.
+
+    Returns:
+        dict: The entity properties and its neighbors.
+    """
+    try:
+        neighborhood = await get_neighborhood(async_graph_manager, uid, limit=limit)
+    except Exception as e:
+        logger.exception("Reading the neighborhood failed.")
+        raise HTTPException(status_code=500, detail="An internal server error occurred.")
+    if neighborhood is None:
+        raise HTTPException(status_code=404, detail=f"Entity {uid} not found")
+    return neighborhood
+
+@router.get("/entities/{uid}/expand")
+def expand_entity(
+    uid: int,
+    depth: int = Query(DEFAULT_EXPAND_DEPTH, ge=1, le=6),
+    edge_types: list[str] | None = Query(None),
+    limit: int = Query(500, ge=1, le=10000),
+    db: Session = Depends(db_manager.get_db)
+) -> dict:
+    """
+    Expand an entity k hops through the in-memory graph.
+
+    Args:
+        uid (int): The UID of the entity.
+        depth (int): The maximum number of hops.
+        edge_types (list[str] | None): The relationship types to follow, all by default.
+        limit (int): The maximum number of nodes returned, nearest first.
+        db (Session): The database session.
+
+    Returns:
+        dict: The reached nodes with their distance in hops.
+    """
+    graph = csr_manager.get(db)
+    if graph.entity_index(uid) is None:
+        raise HTTPException(status_code=404, detail=f"Entity {uid} not found")
+    try:
+        nodes, distances = expand_neighborhood(graph, neighborhood_cache, uid, depth=depth, edge_types=edge_types)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {
+        "uid": uid,
+        "generation": graph.generation,
+        "total": len(nodes),
+        "nodes": [{"label": graph.node_keys[node][0], "key": graph.node_keys[node][1], "distance": int(distance)}
+                  for node, distance in zip(nodes[:limit], distances[:limit])]
+    }
+
+@router.get("/cache/stats")
+def get_cache_stats() -> dict:
+    """
+    Report the counters and memory usage of the neighborhood cache.
+
+    Returns:
+        dict: The entries, hits, misses, evictions and bytes of the cache.
+    """
+    return neighborhood_cache.stats()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Lifespan event handler for the FastAPI application.
+    Creates the missing graph constraints and indexes at startup, without waiting for their population,
+    and closes the async Neo4j driver on shutdown, as it must be closed on the event loop that used it.
+    Args:
+        app (FastAPI): The FastAPI application instance.
+    Yields:
+        None: This function does not yield any value.
+    """
+    # Skip startup logic during tests
+    if "PYTEST_CURRENT_TEST" not in os.environ:
+        try:
+            GraphSchemaManager(graph_manager).apply(wait=False)
+        except Exception as e:
+            logger.error(f"Failed to apply the graph schema at startup: {e}")
+    yield
+    await async_graph_manager.close_driver()
+
+# Initialize FastAPI app
+app = FastAPI(lifespan=lifespan)
+app.include_router(router, prefix="/graph", tags=["graph"])
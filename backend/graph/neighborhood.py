@@ -0,0 +1,206 @@
+# backend/graph/neighborhood.py
+
+# Import dependencies
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, Final, Iterable
+import numpy as np
+from dotenv import load_dotenv
+
+# Import custom modules
+from backend.data_layer.cache import MISSING, LRUCache
+from backend.graph.csr import CSRGraph
+from backend.graph.payload import build_columns
+from backend.graph.subgraph import DEFAULT_HUB_DEGREE, DEFAULT_MAX_NODES, DEFAULT_SUBGRAPH_DEPTH, extract_subgraph
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Memory bound of the cached neighborhoods and number of entities pre-warmed after a rebuild
+DEFAULT_CACHE_MAX_BYTES: Final[int] = 256 * 1024 * 1024
+DEFAULT_PREWARM_COUNT: Final[int] = 100
+
+# Default depth of a k-hop expansion
+DEFAULT_EXPAND_DEPTH: Final[int] = 2
+
+
+class NeighborhoodCache:
+    """
+    A memory bounded LRU cache of entity neighborhoods keyed by (UIDs, depth, filters, graph generation).
+    Entries of an older generation are never hit again and age out of the LRU order.
+    The cache also counts the requests per entity, so that the most requested entities
+    can be expanded ahead of the first view once a new graph is built.
+    """
+
+    def __init__(self,
+                 max_bytes: int | None = None,
+                 max_entries: int = 100000,
+                 prewarm_count: int | None = None):
+        max_bytes = max_bytes if max_bytes is not None else \
+            int(os.getenv("GRAPH_CACHE_MAX_BYTES", str(DEFAULT_CACHE_MAX_BYTES)))
+        self.prewarm_count = prewarm_count if prewarm_count is not None else \
+            int(os.getenv("GRAPH_CACHE_PREWARM", str(DEFAULT_PREWARM_COUNT)))
+        self.entries = LRUCache(max_entries=max_entries, ttl_seconds=None, max_bytes=max_bytes)
+        self._requests: Counter = Counter()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(view: str, uids: Iterable[int], depth: int, filters: dict, generation: int | None) -> str:
+        """
+        Derives the cache key of a neighborhood.
+        Args:
+            view (str): The kind of neighborhood, e.g. "expand" or "subgraph".
+            uids (Iterable[int]): The UIDs of the entities at the center.
+            depth (int): The number of hops.
+            filters (dict): The JSON serializable filters of the traversal.
+            generation (int | None): The generation of the graph.
+        Returns:
+            str: The cache key.
+        """
+        return f"{view}:{generation or 0}:{','.join(map(str, sorted(set(uids))))}:{depth}:" \
+               f"{json.dumps(filters, sort_keys=True, default=str)}"
+
+    def get_or_compute(self,
+                       view: str,
+                       uids: Iterable[int],
+                       depth: int,
+                       filters: dict,
+                       generation: int | None,
+                       compute: Callable[[], Any],
+                       record: bool = True) -> Any:
+        """
+        Returns a cached neighborhood, computing and caching it on a miss.
+        Args:
+            view (str): The kind of neighborhood.
+            uids (Iterable[int]): The UIDs of the entities at the center.
+            depth (int): The number of hops.
+            filters (dict): The JSON serializable filters of the traversal.
+            generation (int | None): The generation of the graph.
+            compute (Callable[[], Any]): Computes the neighborhood; exceptions are not cached.
+            record (bool): Count the request towards the most requested entities.
+        Returns:
+            Any: The neighborhood.
+        """
+        uids = list(uids)
+        if record:
+            with self._lock:
+                self._requests.update(uids)
+        key = self.make_key(view, uids, depth, filters, generation)
+        value = self.entries.get(key)
+        if value is MISSING:
+            value = compute()
+            self.entries.set(key, value)
+        return value
+
+    def most_requested(self, count: int) -> list[int]:
+        """
+        Returns the UIDs of the most requested entities, most requested first.
+        """
+        with self._lock:
+            return [uid for uid, _ in self._requests.most_common(count)]
+
+    def prewarm(self, graph: CSRGraph, count: int | None = None) -> int:
+        """
+        Compute the default views of the most requested entities on a new graph.
+        Args:
+            graph (CSRGraph): The new graph.
+            count (int | None): The number of entities, prewarm_count by default.
+        Returns:
+            int: The number of entities warmed.
+        """
+        started = time.perf_counter()
+        warmed = 0
+        for uid in self.most_requested(self.prewarm_count if count is None else count):
+            if graph.entity_index(uid) is None:
+                continue
+            expand_neighborhood(graph, self, uid, record=False)
+            subgraph_columns(graph, self, [uid], record=False)
+            warmed += 1
+        logger.info(f"Pre-warmed the neighborhoods of {warmed} entities for generation {graph.generation} "
+                    f"in {time.perf_counter() - started:.2f}s.")
+        return warmed
+
+    def clear(self) -> None:
+        """
+        Removes all entries and request counts.
+        """
+        self.entries.clear()
+        with self._lock:
+            self._requests.clear()
+
+    def stats(self) -> dict[str, int]:
+        """
+        Returns the cache counters and memory usage.
+        """
+        return {**self.entries.stats(), "bytes": self.entries.nbytes, "max_bytes": self.entries.max_bytes,
+                "tracked_entities": len(self._requests)}
+
+
+def expand_neighborhood(graph: CSRGraph,
+                        cache: NeighborhoodCache,
+                        uid: int,
+                        depth: int = DEFAULT_EXPAND_DEPTH,
+                        edge_types: Iterable[str] | None = None,
+                        record: bool = True) -> tuple[np.ndarray, np.ndarray]:
+    """
+    The k-hop expansion of an entity, through the neighborhood cache.
+    Args:
+        graph (CSRGraph): The graph.
+        cache (NeighborhoodCache): The neighborhood cache.
+        uid (int): The UID of the entity; it must be in the graph.
+        depth (int): The maximum number of hops.
+        edge_types (Iterable[str] | None): The relationship types to follow, None for all.
+        record (bool): Count the request towards the most requested entities.
+    Returns:
+        tuple[np.ndarray, np.ndarray]: The reached node indices and their distances, nearest first.
+    Raises:
+        ValueError: If a relationship type is unknown.
+    """
+    edge_types = sorted(edge_types) if edge_types is not None else None
+    return cache.get_or_compute("expand", [uid], depth, {"edge_types": edge_types}, graph.generation,
+                                lambda: graph.k_hop(graph.entity_index(uid), depth, edge_types=edge_types),
+                                record=record)
+
+
+def subgraph_columns(graph: CSRGraph,
+                     cache: NeighborhoodCache,
+                     uids: Iterable[int],
+                     depth: int = DEFAULT_SUBGRAPH_DEPTH,
+                     max_nodes: int = DEFAULT_MAX_NODES,
+                     hub_degree: int | None = DEFAULT_HUB_DEGREE,
+                     edge_types: Iterable[str] | None = None,
+                     record: bool = True) -> dict:
+    """
+    The columns of the ego network around entities, through the neighborhood cache.
+    The columns are cached rather than the payloads, so both encodings share an entry.
+    Args:
+        graph (CSRGraph): The graph.
+        cache (NeighborhoodCache): The neighborhood cache.
+        uids (Iterable[int]): The UIDs of the entities at the center; they must be in the graph.
+        depth (int): The maximum number of hops.
+        max_nodes (int): The maximum number of nodes.
+        hub_degree (int | None): The degree above which nodes are summarized as clusters.
+        edge_types (Iterable[str] | None): The relationship types to follow, None for all.
+        record (bool): Count the request towards the most requested entities.
+    Returns:
+        dict: The columns built by build_columns.
+    Raises:
+        ValueError: If a relationship type is unknown.
+    """
+    uids = sorted(set(uids))
+    edge_types = sorted(edge_types) if edge_types is not None else None
+    filters = {"max_nodes": max_nodes, "hub_degree": hub_degree, "edge_types": edge_types}
+
+    def compute() -> dict:
+        subgraph = extract_subgraph(graph, [graph.entity_index(uid) for uid in uids], depth=depth,
+                                    max_nodes=max_nodes, hub_degree=hub_degree, edge_types=edge_types)
+        return build_columns(graph, subgraph)
+
+    return cache.get_or_compute("subgraph", uids, depth, filters, graph.generation, compute, record=record)
@@ -0,0 +1,420 @@
+# backend/graph/ownership.py
+
+# Import dependencies
+import hashlib
+import logging
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Final, Iterable
+import numpy as np
+from neo4j import ManagedTransaction
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
+
+# Import custom modules
+from backend.common.utils import normalize_name
+from backend.data_layer.graphdb import GraphDBManager
+from backend.models.SDNEntity import OwnershipEdge, OwnershipFlag, OwnershipRecord, SDNEntityDocument, SDNEntityLink
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Aggregate ownership by blocked parties from which an entity is blocked itself
+OWNERSHIP_THRESHOLD: Final[float] = 0.5
+
+# Relationships that convey ownership and the share they stand for. The list publishes no percentages,
+# so being owned or controlled by a party counts as full ownership.
+OWNERSHIP_SHARES: Final[dict[str, float]] = {"OWNED_OR_CONTROLLED_BY": 1.0}
+
+# Relationship type of the stakes read from the imported ownership records
+RECORD_RELATIONSHIP: Final[str] = "OWNERSHIP_RECORD"
+
+# Tolerance of the threshold comparison, so that shares such as 0.25 + 0.25 reach it
+_EPSILON: Final[float] = 1e-9
+
+# Synthetic UIDs are negative 52-bit hashes, so they never collide with entity UIDs and stay exact in JSON
+_SYNTHETIC_UID_HEX_DIGITS: Final[int] = 13
+
+# Only listed entities are nodes of the graph, so flags of parties known by name only are not written there
+CLEAR_OWNERSHIP_CYPHER = """
+UNWIND $uids AS uid
+MATCH (e:SDNEntity {uid: uid})
+REMOVE e.blocked_by_ownership, e.ownership_share, e.ownership_path
+"""
+
+WRITE_OWNERSHIP_CYPHER = """
+UNWIND $rows AS row
+MATCH (e:SDNEntity {uid: row.uid})
+SET e.blocked_by_ownership = true,
+    e.ownership_share = row.share,
+    e.ownership_path = row.path
+"""
+
+
+@dataclass(frozen=True)
+class Stake:
+    """
+    An ownership edge: owner holds share of owned.
+    """
+    owner: int
+    owned: int
+    share: float
+    relationship_type: str
+
+    def to_row(self, listed: set[int], names: dict[int, str]) -> dict:
+        return {"owner_uid": self.owner, "owned_uid": self.owned, "share": self.share,
+                "relationship_type": self.relationship_type, "owner_listed": self.owner in listed,
+                "owned_listed": self.owned in listed, "owner_name": names.get(self.owner),
+                "owned_name": names.get(self.owned)}
+
+
+@dataclass
+class OwnershipStats:
+    """
+    Counters of an ownership propagation run.
+    """
+    edges: int = 0
+    unlisted_parties: int = 0
+    changed_edges: int = 0
+    recomputed: int = 0
+    flagged: int = 0
+    iterations: int = 0
+    incremental: bool = False
+    seconds: float = 0.0
+
+    def to_dict(self) -> dict:
+        """
+        Returns the counters as a JSON serializable dictionary.
+        """
+        return {
+            "edges": self.edges,
+            "unlisted_parties": self.unlisted_parties,
+            "changed_edges": self.changed_edges,
+            "recomputed": self.recomputed,
+            "flagged": self.flagged,
+            "iterations": self.iterations,
+            "incremental": self.incremental,
+            "seconds": round(self.seconds, 3),
+        }
+
+
+@dataclass
+class PropagationResult:
+    """
+    The ownership flags of the recomputed entities, keyed by UID, and the iterations it took.
+    """
+    flags: dict[int, dict] = field(default_factory=dict)
+    iterations: int = 0
+
+
+def synthetic_uid(name: str) -> int | None:
+    """
+    Derive the UID of a party known by name only, e.g. an owner whose name resolved to no listed entity.
+    Args:
+        name (str): The name.
+    Returns:
+        int | None: A negative UID, the same for every spelling with the same normalized name; None without a name.
+    """
+    normalized = normalize_name(name)
+    if not normalized:
+        return None
+    return -int(hashlib.sha256(normalized.encode("utf-8")).hexdigest()[:_SYNTHETIC_UID_HEX_DIGITS], 16) or -1
+
+
+def _party_uid(uid: int | None, name: str | None, names: dict[int, str]) -> int | None:
+    """
+    Returns the UID of a party, a synthetic UID recorded in names if it is known by name only.
+    """
+    if uid is not None:
+        return uid
+    uid = synthetic_uid(name or "")
+    if uid is not None:
+        names.setdefault(uid, name)
+    return uid
+
+
+def load_stakes(db: Session) -> tuple[dict[tuple[int, int], Stake], dict[int, str]]:
+    """
+    Read the ownership edges from the entity links and the imported ownership records.
+    In a link, the owned entity is the one whose remarks name its owner, so the owned side is always listed;
+    only the imported records reach owned parties outside the list. A party known by name only, e.g. an owner
+    whose name resolved to no listed entity, is kept with a synthetic UID, so that ownership propagates
+    through unlisted parties.
+    Args:
+        db (Session): The database session.
+    Returns:
+        tuple[dict[tuple[int, int], Stake], dict[int, str]]: The stakes keyed by (owner, owned), the largest share
+            when several links or records agree, and the names of the parties with a synthetic UID.
+    """
+    links = db.execute(
+        select(SDNEntityLink.target_uid, SDNEntityLink.target_name, SDNEntityLink.source_uid,
+               SDNEntityLink.relationship_type)
+        .where(SDNEntityLink.relationship_type.in_(list(OWNERSHIP_SHARES)))
+    )
+    records = db.execute(
+        select(OwnershipRecord.owner_uid, OwnershipRecord.owner_name, OwnershipRecord.owned_uid,
+               OwnershipRecord.owned_name, OwnershipRecord.share)
+    )
+    edges = [(owner_uid, owner_name, owned_uid, None, OWNERSHIP_SHARES[relationship], relationship)
+             for owner_uid, owner_name, owned_uid, relationship in links]
+    edges += [(owner_uid, owner_name, owned_uid, owned_name, share, RECORD_RELATIONSHIP)
+              for owner_uid, owner_name, owned_uid, owned_name, share in records]
+
+    stakes, names = {}, {}
+    for owner_uid, owner_name, owned_uid, owned_name, share, relationship in edges:
+        owner = _party_uid(owner_uid, owner_name, names)
+        owned = _party_uid(owned_uid, owned_name, names)
+        if owner is None or owned is None or owner == owned:
+            continue
+        stake = Stake(owner, owned, share, relationship)
+        if stake.share > stakes.get((owner, owned), stake).share - _EPSILON:
+            stakes[(owner, owned)] = stake
+    return stakes, names
+
+
+def import_ownership_records(db: Session, source: str, records: Iterable[dict]) -> int:
+    """
+    Replace the ownership records of a source, e.g. after each download of a corporate registry.
+    The next ownership propagation run recomputes downstream of the stakes that changed.
+    Args:
+        db (Session): The database session.
+        source (str): The name of the source.
+        records (Iterable[dict]): The stakes, with owner_uid or owner_name, owned_uid or owned_name,
+            and share, the fraction of owned held by owner.
+    Returns:
+        int: The number of records imported.
+    Raises:
+        ValueError: If a record has no owner or owned party, or a share outside (0, 1].
+    """
+    rows = []
+    for record in records:
+        share = record.get("share")
+        if not isinstance(share, (int, float)) or not 0 < share <= 1:
+            raise ValueError(f"Invalid ownership share: {share}")
+        for party in ("owner", "owned"):
+            if record.get(f"{party}_uid") is None and not normalize_name(record.get(f"{party}_name") or ""):
+                raise ValueError(f"Ownership record without {party}: {record}")
+        rows.append({"source": source, "owner_uid": record.get("owner_uid"), "owner_name": record.get("owner_name"),
+                     "owned_uid": record.get("owned_uid"), "owned_name": record.get("owned_name"),
+                     "share": float(share)})
+    try:
+        db.execute(delete(OwnershipRecord).where(OwnershipRecord.source == source))
+        if rows:
+            db.execute(insert(OwnershipRecord), rows)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Failed to import ownership records of {source}: {e}")
+        raise RuntimeError("Failed to import ownership records.") from e
+    logger.info(f"Imported {len(rows)} ownership records from {source}.")
+    return len(rows)
+
+
+def downstream_closure(stakes: Iterable[Stake], seeds: Iterable[int]) -> set[int]:
+    """
+    Collect the seeds and every entity they own, directly or indirectly.
+    Args:
+        stakes (Iterable[Stake]): The ownership edges.
+        seeds (Iterable[int]): The UIDs to start from.
+    Returns:
+        set[int]: The closure.
+    """
+    owned_by = defaultdict(list)
+    for stake in stakes:
+        owned_by[stake.owner].append(stake.owned)
+    closure, frontier = set(seeds), list(seeds)
+    while frontier:
+        owner = frontier.pop()
+        for owned in owned_by.get(owner, ()):
+            if owned not in closure:
+                closure.add(owned)
+                frontier.append(owned)
+    return closure
+
+
+def propagate_ownership(stakes: Iterable[Stake],
+                        listed: set[int],
+                        closure: set[int] | None = None,
+                        known: dict[int, dict] | None = None,
+                        threshold: float = OWNERSHIP_THRESHOLD) -> PropagationResult:
+    """
+    Compute the least fixed point of the 50% rule: an entity is blocked if it is listed or if blocked
+    parties own at least threshold of it in aggregate. Only the entities blocked by ownership alone are flagged. Each iteration is one sparse matrix-vector
+    product of the ownership shares with the blocked vector; the blocked set only grows, so ownership
+    cycles converge instead of looping, and a cycle is only blocked if blocked ownership enters it.
+    Args:
+        stakes (Iterable[Stake]): The ownership edges.
+        listed (set[int]): The UIDs of the listed entities, blocked in their own right.
+        closure (set[int] | None): The UIDs to recompute, None for all. Entities outside the closure keep
+            their known state, so the closure must contain everything downstream of what changed.
+        known (dict[int, dict] | None): The current flags of the entities outside the closure.
+        threshold (float): The aggregate share from which an entity is blocked.
+    Returns:
+        PropagationResult: The flags of the recomputed entities that are blocked by ownership and not listed.
+    """
+    stakes = list(stakes)
+    known = known or {}
+    uids = sorted({stake.owner for stake in stakes} | {stake.owned for stake in stakes})
+    position = {uid: i for i, uid in enumerate(uids)}
+    n = len(uids)
+    owners = np.fromiter((position[stake.owner] for stake in stakes), dtype=np.int64, count=len(stakes))
+    owned = np.fromiter((position[stake.owned] for stake in stakes), dtype=np.int64, count=len(stakes))
+    shares = np.fromiter((stake.share for stake in stakes), dtype=np.float64, count=len(stakes))
+
+    is_listed = np.fromiter((uid in listed for uid in uids), dtype=bool, count=n)
+    recompute = np.ones(n, dtype=bool) if closure is None else \
+        np.fromiter((uid in closure for uid in uids), dtype=bool, count=n)
+    # Level 0: listed entities, and the entities outside the closure that were already blocked by ownership
+    blocked = is_listed | (~recompute & np.fromiter((uid in known for uid in uids), dtype=bool, count=n))
+    level = np.where(blocked, 0, -1)
+    crossed = np.full(n, -1)
+
+    iteration = 0
+    while True:
+        iteration += 1
+        aggregate = np.bincount(owned, weights=shares * blocked[owners], minlength=n)
+        reached = recompute & (aggregate >= threshold - _EPSILON)
+        crossed[reached & (crossed < 0)] = iteration
+        newly = reached & ~blocked
+        if not newly.any():
+            break
+        blocked |= newly
+        level[newly] = iteration
+
+    # Provenance: the blocked owners that pushed each entity over the threshold, and a path through the largest
+    flags: dict[int, dict] = {}
+    paths: dict[int, list[int]] = {}
+
+    def path_of(i: int) -> list[int]:
+        uid = uids[i]
+        if is_listed[i]:
+            return [uid]
+        if uid in paths:
+            return paths[uid]
+        return list(known.get(uid, {}).get("path", [uid]))
+
+    contributions = defaultdict(list)
+    for owner, target, share in zip(owners, owned, shares):
+        if blocked[owner] and crossed[target] > 0:
+            contributions[target].append((owner, share))
+    # Listed entities are blocked in their own right, whoever owns them
+    for i in sorted(np.flatnonzero((crossed > 0) & ~is_listed), key=lambda i: crossed[i]):
+        direct = sorted(contributions[i], key=lambda item: (-item[1], level[item[0]], uids[item[0]]))
+        # Owners blocked before the threshold was crossed, as later ones cannot be on the causal path
+        first = next(owner for owner, _ in direct if level[owner] < crossed[i])
+        paths[uids[i]] = path_of(first) + [uids[i]]
+        flags[uids[i]] = {
+            "uid": uids[i],
+            "share": float(min(aggregate[i], 1.0)),
+            "depth": len(paths[uids[i]]) - 1,
+            "owners": [{"uid": uids[owner], "share": float(share)} for owner, share in direct],
+            "path": paths[uids[i]],
+        }
+    return PropagationResult(flags=flags, iterations=iteration)
+
+
+def write_ownership_properties(tx: ManagedTransaction, cleared: list[int], rows: list[dict]) -> None:
+    """
+    Write the ownership flags of the recomputed entities as node properties.
+    Args:
+        tx (ManagedTransaction): The transaction.
+        cleared (list[int]): The UIDs of the recomputed entities, whose previous flags are removed.
+        rows (list[dict]): The new flags.
+    """
+    tx.run(CLEAR_OWNERSHIP_CYPHER, uids=cleared).consume()
+    tx.run(WRITE_OWNERSHIP_CYPHER, rows=[{"uid": row["uid"], "share": row["share"], "path": row["path"]}
+                                         for row in rows]).consume()
+
+
+def run_ownership_propagation(db: Session,
+                              graph_db: GraphDBManager | None = None,
+                              full: bool = False) -> OwnershipStats:
+    """
+    Bring the ownership flags up to date with the entity links and the imported ownership records.
+    Only the entities downstream of the ownership edges that changed since the last run, and of the parties
+    that were listed or delisted since, are recomputed, unless full is set or no run happened yet.
+    Flags and edges are replaced in a single transaction.
+    Args:
+        db (Session): The database session.
+        graph_db (GraphDBManager | None): The graph database manager, None to skip the node properties.
+        full (bool): Recompute every entity.
+    Returns:
+        OwnershipStats: The counters of the run.
+    Raises:
+        RuntimeError: If the flags could not be stored.
+    """
+    started = time.perf_counter()
+    stakes, names = load_stakes(db)
+    previous_rows = db.execute(select(OwnershipEdge)).scalars().all()
+    previous = {(row.owner_uid, row.owned_uid): Stake(row.owner_uid, row.owned_uid, row.share, row.relationship_type)
+                for row in previous_rows}
+    stats = OwnershipStats(edges=len(stakes), unlisted_parties=len(names), incremental=not full and bool(previous))
+
+    changed = {key for key in stakes.keys() | previous.keys() if stakes.get(key) != previous.get(key)}
+    stats.changed_edges = len(changed)
+    listed = set(db.execute(select(SDNEntityDocument.uid)).scalars())
+    # A party listed or delisted since the last run blocks more or less of what it owns, and is flagged or not
+    relisted = {uid for row in previous_rows
+                for uid, was_listed in ((row.owner_uid, row.owner_listed), (row.owned_uid, row.owned_listed))
+                if was_listed != (uid in listed)}
+    if stats.incremental:
+        # Downstream of the owned side of each changed edge, along the old edges as well as the new ones
+        closure = downstream_closure(list(stakes.values()) + list(previous.values()),
+                                     {owned for _, owned in changed} | relisted)
+        known = {row.uid: {"path": row.path} for row in db.execute(select(OwnershipFlag)).scalars()
+                 if row.uid not in closure}
+    else:
+        closure, known = None, {}
+    result = propagate_ownership(stakes.values(), listed, closure=closure, known=known)
+    stats.iterations = result.iterations
+    for flag in result.flags.values():
+        parties = flag["path"] + [owner["uid"] for owner in flag["owners"]]
+        flag["names"] = {str(uid): names[uid] for uid in parties if uid in names} or None
+
+    try:
+        if closure is None:
+            db.execute(delete(OwnershipFlag))
+        elif closure:
+            db.execute(delete(OwnershipFlag).where(OwnershipFlag.uid.in_(closure)))
+        if result.flags:
+            db.execute(insert(OwnershipFlag), list(result.flags.values()))
+        if changed or relisted:
+            db.execute(delete(OwnershipEdge))
+            if stakes:
+                db.execute(insert(OwnershipEdge), [stake.to_row(listed, names) for stake in stakes.values()])
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Failed to store ownership flags: {e}")
+        raise RuntimeError("Failed to store ownership flags.") from e
+
+    recomputed = sorted(closure) if closure is not None else \
+        sorted({uid for key in stakes.keys() | previous.keys() for uid in key})
+    stats.recomputed = len(recomputed)
+    stats.flagged = len(result.flags)
+    cleared = [uid for uid in recomputed if uid >= 0]
+    if graph_db is not None and cleared:
+        graph_db.execute_write(write_ownership_properties, cleared,
+                               [flag for flag in result.flags.values() if flag["uid"] >= 0])
+
+    stats.seconds = time.perf_counter() - started
+    logger.info(f"Ownership propagation completed: {stats.to_dict()}")
+    return stats
+
+
+def get_ownership_flag(db: Session, uid: int) -> dict | None:
+    """
+    Retrieve the ownership flag of an entity.
+    Args:
+        db (Session): The database session.
+        uid (int): The UID of the entity.
+    Returns:
+        dict | None: The aggregate share, the blocked owners, the provenance path and the names of the parties
+            known by name only, None if the entity is not blocked by ownership.
+    """
+    flag = db.get(OwnershipFlag, uid)
+    if flag is None:
+        return None
+    return {"uid": flag.uid, "share": flag.share, "depth": flag.depth, "owners": flag.owners, "path": flag.path,
+            "names": flag.names or {}, "computed_at": flag.computed_at}
@@ -0,0 +1,144 @@
+# backend/graph/paths.py
+
+# Import dependencies
+import heapq
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Final, Iterable
+import numpy as np
+
+# Import custom modules
+from backend.graph.csr import CSRGraph, SearchBudget, SearchBudgetExceeded
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Defaults of a path query
+DEFAULT_PATH_COUNT: Final[int] = 3
+DEFAULT_MAX_DEPTH: Final[int] = 6
+DEFAULT_MAX_VISITS: Final[int] = 2_000_000
+DEFAULT_TIMEOUT: Final[float] = 0.5
+
+
+@dataclass
+class PathSearchResult:
+    """
+    The paths found between two nodes, shortest first.
+    complete is False when the budget ran out, in which case the paths found so far are returned.
+    """
+    paths: list[list[int]] = field(default_factory=list)
+    complete: bool = True
+    visits: int = 0
+    seconds: float = 0.0
+
+
+def hub_mask(graph: CSRGraph, max_hub_degree: int | None, endpoints: Iterable[int] = ()) -> np.ndarray | None:
+    """
+    Mark the nodes with more than max_hub_degree neighbors, so that paths do not pass through them.
+    Args:
+        graph (CSRGraph): The graph.
+        max_hub_degree (int | None): The maximum degree of an intermediate node, None for no limit.
+        endpoints (Iterable[int]): Nodes never masked, as the path starts or ends there.
+    Returns:
+        np.ndarray | None: The boolean mask, None without a limit.
+    """
+    if max_hub_degree is None:
+        return None
+    mask = np.diff(graph.indptr) > max_hub_degree
+    mask[list(endpoints)] = False
+    return mask
+
+
+def k_shortest_paths(graph: CSRGraph,
+                     source: int,
+                     target: int,
+                     k: int = DEFAULT_PATH_COUNT,
+                     max_depth: int = DEFAULT_MAX_DEPTH,
+                     edge_types: Iterable[str] | None = None,
+                     max_hub_degree: int | None = None,
+                     max_visits: int | None = DEFAULT_MAX_VISITS,
+                     timeout: float | None = DEFAULT_TIMEOUT) -> PathSearchResult:
+    """
+    Yen's algorithm for the k shortest loopless paths, each spur path found by bidirectional search.
+    Args:
+        graph (CSRGraph): The graph.
+        source (int): The node index to start from.
+        target (int): The node index to reach.
+        k (int): The number of paths.
+        max_depth (int): The maximum path length in hops.
+        edge_types (Iterable[str] | None): The relationship types to follow, None for all.
+        max_hub_degree (int | None): Do not pass through nodes with more neighbors, None for no limit.
+        max_visits (int | None): The adjacency entries the whole query may visit, None for unbounded.
+        timeout (float | None): The seconds the whole query may take, None for unbounded.
+    Returns:
+        PathSearchResult: The paths, shortest first.
+    Raises:
+        ValueError: If a relationship type is unknown.
+    """
+    started = time.perf_counter()
+    edge_types = list(edge_types) if edge_types is not None else None
+    graph.edge_type_codes(edge_types)
+    budget = SearchBudget(max_visits=max_visits, timeout=timeout)
+    hubs = hub_mask(graph, max_hub_degree, endpoints=(source, target))
+    result = PathSearchResult()
+
+    try:
+        first = graph.shortest_path(source, target, max_depth=max_depth, edge_types=edge_types,
+                                    blocked=hubs, budget=budget)
+        if first is not None:
+            result.paths.append(first)
+        candidates: list[tuple[int, list[int]]] = []
+        seen = {tuple(first)} if first is not None else set()
+
+        while result.paths and len(result.paths) < k:
+            previous = result.paths[-1]
+            for i in range(len(previous) - 1):
+                spur, root = previous[i], previous[:i + 1]
+                # Leave the root through an edge no accepted path with the same root has taken
+                blocked_edges: dict[int, set[int]] = {}
+                for path in result.paths:
+                    if len(path) > i + 1 and path[:i + 1] == root:
+                        blocked_edges.setdefault(spur, set()).add(path[i + 1])
+                blocked = hubs.copy() if hubs is not None else np.zeros(graph.num_nodes, dtype=bool)
+                blocked[root[:-1]] = True
+
+                spur_path = graph.shortest_path(spur, target, max_depth=max_depth - i, edge_types=edge_types,
+                                                blocked=blocked, blocked_edges=blocked_edges, budget=budget)
+                if spur_path is None:
+                    continue
+                candidate = root[:-1] + spur_path
+                if tuple(candidate) not in seen:
+                    seen.add(tuple(candidate))
+                    heapq.heappush(candidates, (len(candidate), candidate))
+            if not candidates:
+                break
+            result.paths.append(heapq.heappop(candidates)[1])
+    except SearchBudgetExceeded as e:
+        logger.info(f"Path search between nodes {source} and {target} stopped early: {e}")
+        result.complete = False
+
+    result.visits = budget.visits
+    result.seconds = time.perf_counter() - started
+    return result
+
+
+def describe_path(graph: CSRGraph, path: list[int], edge_types: Iterable[str] | None = None) -> dict:
+    """
+    Describe a path by its node keys and the relationship types of each hop.
+    Args:
+        graph (CSRGraph): The graph.
+        path (list[int]): The node indices of the path.
+        edge_types (Iterable[str] | None): The relationship types the path was allowed to follow, None for all.
+    Returns:
+        dict: The length, nodes and relationships of the path.
+    """
+    allowed = set(edge_types) if edge_types is not None else None
+    return {
+        "length": len(path) - 1,
+        "nodes": [{"label": graph.node_keys[node][0], "key": graph.node_keys[node][1]} for node in path],
+        "relationships": [
+            [name for name in graph.relationship_types(source, target) if allowed is None or name in allowed]
+            for source, target in zip(path, path[1:])
+        ],
+    }
@@ -0,0 +1,175 @@
+# backend/graph/payload.py
+
+"""
+Columnar encoding of subgraphs for the frontend.
+
+The binary payload is little endian and laid out so that every column can be viewed as a typed array
+without copying:
+
+    header          8 x uint32: magic, version, node count, edge count, string count, string bytes,
+                    flags (bit 0: truncated), generation
+    node_keys       uint32[nodes]      string index of the node key
+    cluster_sizes   uint32[nodes]      neighbors summarized by a hub node, 0 for regular nodes
+    edge_sources    uint32[edges]      node position of the edge source
+    edge_targets    uint32[edges]      node position of the edge target
+    string_offsets  uint32[strings+1]  byte offsets into the string data
+    node_labels     uint8[nodes]       string index of the node label
+    node_depths     uint8[nodes]       hops from the nearest seed
+    edge_types      uint8[edges]       string index of the relationship type
+    string_data     utf-8 bytes
+
+Relationship types and labels come first in the string table, so their indices fit in a byte.
+The JSON fallback carries the same columns as plain arrays.
+"""
+
+# Import dependencies
+import json
+import logging
+import struct
+from typing import Final
+import numpy as np
+
+# Import custom modules
+from backend.graph.csr import EDGE_TYPES, CSRGraph
+from backend.graph.subgraph import Subgraph
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+PAYLOAD_MEDIA_TYPE: Final[str] = "application/vnd.opengraphintel.subgraph"
+PAYLOAD_MAGIC: Final[int] = 0x4753474F  # "OGSG"
+PAYLOAD_VERSION: Final[int] = 1
+HEADER: Final[struct.Struct] = struct.Struct("<8I")
+TRUNCATED_FLAG: Final[int] = 1
+
+
+def build_columns(graph: CSRGraph, subgraph: Subgraph) -> dict:
+    """
+    Build the columns and the string table of a subgraph.
+    Args:
+        graph (CSRGraph): The graph the subgraph was extracted from.
+        subgraph (Subgraph): The subgraph.
+    Returns:
+        dict: The columns as NumPy arrays, the string table and the flags.
+    """
+    strings = list(EDGE_TYPES)
+    string_index = {value: i for i, value in enumerate(strings)}
+
+    def intern(value: str) -> int:
+        index = string_index.get(value)
+        if index is None:
+            index = string_index[value] = len(strings)
+            strings.append(value)
+        return index
+
+    keys = [graph.node_keys[node] for node in subgraph.nodes]
+    labels = np.fromiter((intern(label) for label, _ in keys), dtype=np.uint8, count=len(keys))
+    node_keys = np.fromiter((intern(str(key)) for _, key in keys), dtype=np.uint32, count=len(keys))
+    return {
+        "node_keys": node_keys,
+        "cluster_sizes": subgraph.cluster_sizes.astype(np.uint32),
+        "edge_sources": subgraph.edge_sources.astype(np.uint32),
+        "edge_targets": subgraph.edge_targets.astype(np.uint32),
+        "node_labels": labels,
+        "node_depths": np.minimum(subgraph.depths, 255).astype(np.uint8),
+        "edge_types": subgraph.edge_types.astype(np.uint8),
+        "strings": strings,
+        "truncated": subgraph.truncated,
+        "generation": graph.generation or 0,
+    }
+
+
+def encode_binary(columns: dict) -> bytes:
+    """
+    Encode the columns of a subgraph as the binary payload described in the module docstring.
+    Args:
+        columns (dict): The columns built by build_columns.
+    Returns:
+        bytes: The payload.
+    """
+    encoded = [value.encode("utf-8") for value in columns["strings"]]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.uint32)
+    np.cumsum([len(value) for value in encoded], out=offsets[1:])
+    header = HEADER.pack(PAYLOAD_MAGIC,
+                         PAYLOAD_VERSION,
+                         len(columns["node_keys"]),
+                         len(columns["edge_sources"]),
+                         len(encoded),
+                         int(offsets[-1]),
+                         TRUNCATED_FLAG if columns["truncated"] else 0,
+                         columns["generation"])
+    parts = [header]
+    parts += [columns[name].astype("<u4").tobytes()
+              for name in ("node_keys", "cluster_sizes", "edge_sources", "edge_targets")]
+    parts.append(offsets.astype("<u4").tobytes())
+    parts += [columns[name].tobytes() for name in ("node_labels", "node_depths", "edge_types")]
+    parts.append(b"".join(encoded))
+    return b"".join(parts)
+
+
+def decode_binary(payload: bytes) -> dict:
+    """
+    Decode a binary payload into the JSON fallback layout.
+    Args:
+        payload (bytes): The payload.
+    Returns:
+        dict: The columns as lists.
+    Raises:
+        ValueError: If the payload is not a subgraph payload of a supported version.
+    """
+    magic, version, nodes, edges, count, string_bytes, flags, generation = HEADER.unpack_from(payload)
+    if magic != PAYLOAD_MAGIC or version != PAYLOAD_VERSION:
+        raise ValueError("Not a supported subgraph payload.")
+    position = HEADER.size
+
+    def column(dtype: str, length: int) -> np.ndarray:
+        nonlocal position
+        values = np.frombuffer(payload, dtype=dtype, count=length, offset=position)
+        position += values.nbytes
+        return values
+
+    node_keys, cluster_sizes = column("<u4", nodes), column("<u4", nodes)
+    edge_sources, edge_targets = column("<u4", edges), column("<u4", edges)
+    offsets = column("<u4", count + 1)
+    node_labels, node_depths, edge_types = column("u1", nodes), column("u1", nodes), column("u1", edges)
+    data = payload[position:position + string_bytes]
+    strings = [data[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(count)]
+    return to_json({
+        "node_keys": node_keys, "cluster_sizes": cluster_sizes,
+        "edge_sources": edge_sources, "edge_targets": edge_targets,
+        "node_labels": node_labels, "node_depths": node_depths, "edge_types": edge_types,
+        "strings": strings, "truncated": bool(flags & TRUNCATED_FLAG), "generation": generation,
+    })
+
+
+def to_json(columns: dict) -> dict:
+    """
+    Convert the columns of a subgraph into the JSON fallback layout.
+    Args:
+        columns (dict): The columns built by build_columns.
+    Returns:
+        dict: The same columns as lists.
+    """
+    return {
+        "generation": columns["generation"],
+        "truncated": columns["truncated"],
+        "strings": columns["strings"],
+        "nodes": {
+            "labels": columns["node_labels"].tolist(),
+            "keys": columns["node_keys"].tolist(),
+            "depths": columns["node_depths"].tolist(),
+            "cluster_sizes": columns["cluster_sizes"].tolist(),
+        },
+        "edges": {
+            "sources": columns["edge_sources"].tolist(),
+            "targets": columns["edge_targets"].tolist(),
+            "types": columns["edge_types"].tolist(),
+        },
+    }
+
+
+def encode_json(columns: dict) -> bytes:
+    """
+    Encode the columns of a subgraph as compact JSON.
+    """
+    return json.dumps(to_json(columns), separators=(",", ":")).encode("utf-8")
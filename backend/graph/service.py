@@ -1 +1,669 @@
+# backend/graph/service.py
 
+# Import dependencies
+import logging
+import re
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Final, Iterator
+from neo4j import ManagedTransaction
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+# Import custom modules
+from backend.common.relationships import LINK_RELATIONSHIPS
+from backend.common.utils import normalize_name
+from backend.data_layer.graph_schema import GraphSchemaManager
+from backend.data_layer.graphdb import GraphDBManager
+from backend.data_layer.graphdb_async import AsyncGraphDBManager
+from backend.ingestion.parsing import parse_number
+from backend.models.SDNEntity import SDNChangeSet, SDNEntityDocument, SDNEntityLink
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Entities per write transaction; child rows make each batch several times larger
+DEFAULT_BATCH_SIZE: Final[int] = 2000
+
+# Neighbors returned per entity by default
+DEFAULT_NEIGHBOR_LIMIT: Final[int] = 100
+
+# Per-entity child nodes keyed by their OFAC UID: document key -> (label, relationship type, properties)
+CHILD_NODES: Final[dict[str, tuple[str, str, tuple[str, ...]]]] = {
+    "aka_list": ("AKA", "ALSO_KNOWN_AS", ("type", "category", "first_name", "last_name")),
+    "date_of_birth_list": ("DateOfBirth", "BORN_ON", ("date_of_birth", "main_entry")),
+    "place_of_birth_list": ("PlaceOfBirth", "BORN_AT", ("place_of_birth", "main_entry")),
+}
+
+# Links to shared Country hubs: document key -> relationship type
+COUNTRY_LINKS: Final[dict[str, str]] = {
+    "nationalities": "HAS_NATIONALITY",
+    "citizenships": "HOLDS_CITIZENSHIP",
+}
+
+# Address fields, in the order they make up the address key
+ADDRESS_FIELDS: Final[tuple[str, ...]] = ("address1", "address2", "address3", "city",
+                                          "state_or_province", "postal_code", "country", "region")
+
+# Relationships from an entity to the nodes describing it and to the entities it refers to,
+# replaced on every sync of the entity
+ENTITY_RELATIONSHIPS: Final[list[str]] = [relationship for _, relationship, _ in CHILD_NODES.values()] + \
+    list(COUNTRY_LINKS.values()) + ["ENROLLED_IN", "HAS_ID", "HAS_ADDRESS", "OWNS"] + list(LINK_RELATIONSHIPS)
+
+# Nodes owned by a single entity or shared between entities, deleted once no entity refers to them
+ENTITY_OWNED_LABELS: Final[list[str]] = [label for label, _, _ in CHILD_NODES.values()] + \
+    ["Vessel", "Program", "Identifier", "Address"]
+
+MERGE_ENTITIES_CYPHER = """
+UNWIND $rows AS row
+MERGE (e:SDNEntity {uid: row.uid})
+SET e += row.properties
+"""
+
+DETACH_ENTITY_RELATIONSHIPS_CYPHER = """
+UNWIND $uids AS uid
+MATCH (e:SDNEntity {uid: uid})-[r]->()
+WHERE type(r) IN $relationships
+DELETE r
+"""
+
+MERGE_CHILDREN_CYPHER = """
+UNWIND $rows AS row
+MATCH (e:SDNEntity {{uid: row.entity_uid}})
+MERGE (c:{label} {{uid: row.uid}})
+SET c += row.properties
+MERGE (e)-[:{relationship}]->(c)
+"""
+
+MERGE_PROGRAMS_CYPHER = """
+UNWIND $rows AS row
+MATCH (e:SDNEntity {uid: row.entity_uid})
+MERGE (p:Program {name: row.name})
+MERGE (e)-[:ENROLLED_IN]->(p)
+"""
+
+MERGE_COUNTRY_LINKS_CYPHER = """
+UNWIND $rows AS row
+MATCH (e:SDNEntity {{uid: row.entity_uid}})
+MERGE (c:Country {{name: row.country}})
+MERGE (e)-[r:{relationship}]->(c)
+SET r.main_entry = row.main_entry
+"""
+
+MERGE_IDENTIFIERS_CYPHER = """
+UNWIND $rows AS row
+MATCH (e:SDNEntity {uid: row.entity_uid})
+MERGE (i:Identifier {key: row.key})
+ON CREATE SET i.id_type = row.id_type, i.id_number = row.id_number
+MERGE (e)-[r:HAS_ID]->(i)
+SET r += row.properties
+"""
+
+MERGE_ADDRESSES_CYPHER = """
+UNWIND $rows AS row
+MATCH (e:SDNEntity {uid: row.entity_uid})
+MERGE (a:Address {key: row.key})
+ON CREATE SET a += row.properties
+MERGE (e)-[:HAS_ADDRESS]->(a)
+WITH a, row
+WHERE row.properties.country IS NOT NULL
+MERGE (c:Country {name: row.properties.country})
+MERGE (a)-[:LOCATED_IN]->(c)
+"""
+
+MERGE_VESSELS_CYPHER = """
+UNWIND $rows AS row
+MATCH (e:SDNEntity {uid: row.entity_uid})
+MERGE (v:Vessel {entity_uid: row.entity_uid})
+SET v += row.properties
+MERGE (e)-[:OWNS]->(v)
+"""
+
+PRUNE_ENTITIES_CYPHER = """
+MATCH (e:SDNEntity)
+WHERE NOT e.uid IN $uids
+DETACH DELETE e
+"""
+
+PRUNE_UNREFERENCED_CYPHER = """
+MATCH (n)
+WHERE any(label IN labels(n) WHERE label IN $labels) AND NOT (n)<--(:SDNEntity)
+DETACH DELETE n
+"""
+
+PRUNE_COUNTRIES_CYPHER = """
+MATCH (c:Country)
+WHERE NOT (c)--()
+DELETE c
+"""
+
+# Links are written once all entities are, so that both ends exist; links to entities missing from the graph are skipped
+MERGE_LINKS_CYPHER = """
+UNWIND $rows AS row
+MATCH (e:SDNEntity {{uid: row.source_uid}})
+MATCH (t:SDNEntity {{uid: row.target_uid}})
+MERGE (e)-[r:{relationship}]->(t)
+SET r.origin = row.origin
+"""
+
+DELETE_LINKS_CYPHER = """
+UNWIND $rows AS row
+MATCH (:SDNEntity {{uid: row.source_uid}})-[r:{relationship}]->(:SDNEntity {{uid: row.target_uid}})
+DELETE r
+"""
+
+DELETE_ENTITIES_CYPHER = """
+UNWIND $uids AS uid
+MATCH (e:SDNEntity {uid: uid})
+DETACH DELETE e
+"""
+
+PRUNE_CANDIDATES_CYPHER = """
+UNWIND $keys AS key
+MATCH (n:{label} {{{property}: key}})
+WHERE NOT (n)<--(:SDNEntity)
+DETACH DELETE n
+"""
+
+PRUNE_COUNTRY_CANDIDATES_CYPHER = """
+UNWIND $keys AS key
+MATCH (c:Country {name: key})
+WHERE NOT (c)--()
+DELETE c
+"""
+
+NEIGHBORHOOD_CYPHER = """
+MATCH (e:SDNEntity {uid: $uid})
+OPTIONAL MATCH (e)-[r]-(n)
+WITH e, r, n
+LIMIT $limit
+RETURN properties(e) AS entity,
+       collect(CASE WHEN r IS NULL THEN NULL
+               ELSE {type: type(r), labels: labels(n), properties: properties(n)} END) AS neighbors
+"""
+
+
+def identifier_key(id_type: str | None, id_number: str | None) -> str | None:
+    """
+    Build the key of an Identifier hub, so that the same document listed on two entities is one node.
+    Args:
+        id_type (str | None): The ID type, e.g. "Passport".
+        id_number (str | None): The ID number.
+    Returns:
+        str | None: The "type|number" key with the number stripped of separators, None without a number.
+    """
+    number = re.sub(r"[^0-9A-Z]", "", (id_number or "").upper())
+    if not number:
+        return None
+    return f"{normalize_name(id_type)}|{number}"
+
+
+def address_key(address: dict) -> str | None:
+    """
+    Build the key of an Address hub from its normalized fields.
+    Args:
+        address (dict): The address fields.
+    Returns:
+        str | None: The normalized address, None if all fields are empty.
+    """
+    return normalize_name(" ".join(address.get(name) or "" for name in ADDRESS_FIELDS)) or None
+
+
+@dataclass
+class GraphSyncStats:
+    """
+    Counters of a graph sync.
+    """
+    entities: int = 0
+    nodes: int = 0
+    relationships: int = 0
+    batches: int = 0
+    pruned: int = 0
+    seconds: float = 0.0
+    _started: float = field(default_factory=time.perf_counter, repr=False)
+
+    @property
+    def nodes_per_second(self) -> float:
+        return self.nodes / self.seconds if self.seconds else 0.0
+
+    @property
+    def relationships_per_second(self) -> float:
+        return self.relationships / self.seconds if self.seconds else 0.0
+
+    def stop(self) -> "GraphSyncStats":
+        """
+        Records the elapsed time since the sync started.
+        """
+        self.seconds = time.perf_counter() - self._started
+        return self
+
+    def to_dict(self) -> dict:
+        """
+        Returns the counters and rates as a JSON serializable dictionary.
+        """
+        return {
+            "entities": self.entities,
+            "nodes": self.nodes,
+            "relationships": self.relationships,
+            "batches": self.batches,
+            "pruned": self.pruned,
+            "seconds": round(self.seconds, 3),
+            "nodes_per_second": round(self.nodes_per_second, 1),
+            "relationships_per_second": round(self.relationships_per_second, 1)
+        }
+
+
+def iter_document_batches(db: Session, batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[list[dict]]:
+    """
+    Read the entity documents in UID order, one batch at a time.
+    Args:
+        db (Session): The database session.
+        batch_size (int): The number of documents per batch.
+    Returns:
+        Iterator[list[dict]]: The batches of entity documents.
+    """
+    statement = select(SDNEntityDocument.document).order_by(SDNEntityDocument.uid)
+    result = db.execute(statement.execution_options(yield_per=batch_size)).scalars()
+    for partition in result.partitions(batch_size):
+        yield list(partition)
+
+
+def build_graph_rows(documents: list[dict]) -> dict[str, list[dict]]:
+    """
+    Flatten a batch of entity documents into the parameter rows of the UNWIND statements.
+    Args:
+        documents (list[dict]): The entity documents.
+    Returns:
+        dict[str, list[dict]]: The rows per statement: entities, programs, identifiers, addresses,
+            vessels and one per child node type and country link.
+    """
+    rows = {"entities": [], "programs": [], "identifiers": [], "addresses": [], "vessels": [],
+            **{key: [] for key in CHILD_NODES}, **{key: [] for key in COUNTRY_LINKS}}
+    for document in documents:
+        uid = document["uid"]
+        rows["entities"].append({
+            "uid": uid,
+            "properties": {key: document.get(key) for key in ("first_name", "last_name", "sdn_type", "remarks")}
+        })
+        rows["programs"].extend({"entity_uid": uid, "name": name} for name in document.get("programs", []))
+        for key, (_, _, properties) in CHILD_NODES.items():
+            rows[key].extend(
+                {"entity_uid": uid, "uid": child["uid"], "properties": {name: child.get(name) for name in properties}}
+                for child in document.get(key, []) if child.get("uid") is not None
+            )
+        for key in COUNTRY_LINKS:
+            rows[key].extend(
+                {"entity_uid": uid, "country": link["country"], "main_entry": link.get("main_entry")}
+                for link in document.get(key, []) if link.get("country")
+            )
+        for id_elem in document.get("ids", []):
+            key = identifier_key(id_elem.get("id_type"), id_elem.get("id_number"))
+            if key is not None:
+                rows["identifiers"].append({
+                    "entity_uid": uid,
+                    "key": key,
+                    "id_type": id_elem.get("id_type"),
+                    "id_number": id_elem.get("id_number"),
+                    "properties": {name: id_elem.get(name) for name in ("id_country", "issue_date", "expiration_date")}
+                })
+        for address in document.get("addresses", []):
+            key = address_key(address)
+            if key is not None:
+                rows["addresses"].append({
+                    "entity_uid": uid,
+                    "key": key,
+                    "properties": {name: address.get(name) for name in ADDRESS_FIELDS}
+                })
+        vessel = document.get("vessel")
+        if vessel:
+            properties = dict(vessel)
+            for name in ("tonnage", "gross_registered_tonnage"):
+                properties[name] = parse_number(properties.get(name))
+            rows["vessels"].append({"entity_uid": uid, "properties": properties})
+    return rows
+
+
+def get_entity_links(db: Session, uids: list[int] | None = None, targets: list[int] | None = None) -> list[dict]:
+    """
+    Read the resolved links between entities.
+    Args:
+        db (Session): The database session.
+        uids (list[int] | None): The UIDs of the source entities, None for the links of all entities.
+        targets (list[int] | None): The UIDs of target entities whose incoming links are read as well.
+    Returns:
+        list[dict]: The link rows, grouped by relationship type.
+    """
+    statement = select(SDNEntityLink.source_uid, SDNEntityLink.target_uid, SDNEntityLink.relationship_type,
+                       SDNEntityLink.origin).where(SDNEntityLink.target_uid.is_not(None))
+    if uids is not None:
+        condition = SDNEntityLink.source_uid.in_(uids)
+        if targets:
+            condition = condition | SDNEntityLink.target_uid.in_(targets)
+        statement = statement.where(condition)
+    rows = db.execute(
+        statement.order_by(SDNEntityLink.relationship_type, SDNEntityLink.source_uid, SDNEntityLink.target_uid)
+    ).mappings().all()
+    return [dict(row) for row in rows]
+
+
+def write_graph_batch(tx: ManagedTransaction, rows: dict[str, list[dict]]) -> tuple[int, int]:
+    """
+    Write one batch of graph rows. Runs as a managed transaction, so it is safe to retry.
+    The links of the entities are detached and left to write_entity_links.
+    Args:
+        tx (ManagedTransaction): The transaction.
+        rows (dict[str, list[dict]]): The rows built by build_graph_rows.
+    Returns:
+        tuple[int, int]: The number of node and relationship rows merged.
+    """
+    tx.run(MERGE_ENTITIES_CYPHER, rows=rows["entities"]).consume()
+    # Children removed from an entity must not stay attached to it
+    tx.run(DETACH_ENTITY_RELATIONSHIPS_CYPHER,
+           uids=[row["uid"] for row in rows["entities"]],
+           relationships=ENTITY_RELATIONSHIPS).consume()
+
+    statements = [(MERGE_CHILDREN_CYPHER.format(label=label, relationship=relationship), rows[key])
+                  for key, (label, relationship, _) in CHILD_NODES.items()]
+    statements += [(MERGE_COUNTRY_LINKS_CYPHER.format(relationship=relationship), rows[key])
+                   for key, relationship in COUNTRY_LINKS.items()]
+    statements += [(MERGE_PROGRAMS_CYPHER, rows["programs"]),
+                   (MERGE_IDENTIFIERS_CYPHER, rows["identifiers"]),
+                   (MERGE_ADDRESSES_CYPHER, rows["addresses"]),
+                   (MERGE_VESSELS_CYPHER, rows["vessels"])]
+
+    nodes, relationships = len(rows["entities"]), 0
+    for statement, statement_rows in statements:
+        if statement_rows:
+            tx.run(statement, rows=statement_rows).consume()
+            nodes += len(statement_rows)
+            relationships += len(statement_rows)
+    return nodes, relationships
+
+
+def _run_links(tx: ManagedTransaction, statement: str, links: list[dict]) -> int:
+    """
+    Runs a link statement once per relationship type, as types cannot be parameterized.
+    """
+    count = 0
+    for relationship in LINK_RELATIONSHIPS:
+        link_rows = [link for link in links if link["relationship_type"] == relationship]
+        if link_rows:
+            tx.run(statement.format(relationship=relationship), rows=link_rows).consume()
+            count += len(link_rows)
+    return count
+
+
+def write_entity_links(tx: ManagedTransaction, links: list[dict]) -> int:
+    """
+    Merge links between entities that are already in the graph.
+    Args:
+        tx (ManagedTransaction): The transaction.
+        links (list[dict]): The links read by get_entity_links.
+    Returns:
+        int: The number of relationship rows merged.
+    """
+    return _run_links(tx, MERGE_LINKS_CYPHER, links)
+
+
+def delete_entity_links(tx: ManagedTransaction, links: list[dict]) -> int:
+    """
+    Delete links between entities.
+    Args:
+        tx (ManagedTransaction): The transaction.
+        links (list[dict]): The links, with source_uid, target_uid and relationship_type.
+    Returns:
+        int: The number of relationship rows processed.
+    """
+    return _run_links(tx, DELETE_LINKS_CYPHER, links)
+
+
+def write_link_batches(graph_db: GraphDBManager, links: list[dict], batch_size: int, stats: GraphSyncStats) -> None:
+    """
+    Write links in batched write transactions.
+    Args:
+        graph_db (GraphDBManager): The graph database manager.
+        links (list[dict]): The links.
+        batch_size (int): The number of links per write transaction.
+        stats (GraphSyncStats): The counters the relationships and batches are added to.
+    """
+    for start in range(0, len(links), batch_size):
+        stats.relationships += graph_db.execute_write(write_entity_links, links[start:start + batch_size])
+        stats.batches += 1
+
+
+def prune_graph(tx: ManagedTransaction, uids: list[int]) -> int:
+    """
+    Delete the entities that are no longer listed and the nodes no entity refers to anymore.
+    Args:
+        tx (ManagedTransaction): The transaction.
+        uids (list[int]): The UIDs of the listed entities.
+    Returns:
+        int: The number of deleted nodes.
+    """
+    deleted = tx.run(PRUNE_ENTITIES_CYPHER, uids=uids).consume().counters.nodes_deleted
+    deleted += tx.run(PRUNE_UNREFERENCED_CYPHER, labels=ENTITY_OWNED_LABELS).consume().counters.nodes_deleted
+    deleted += tx.run(PRUNE_COUNTRIES_CYPHER).consume().counters.nodes_deleted
+    return deleted
+
+
+def delete_entities(tx: ManagedTransaction, uids: list[int]) -> int:
+    """
+    Delete entities and their relationships.
+    Args:
+        tx (ManagedTransaction): The transaction.
+        uids (list[int]): The UIDs of the entities.
+    Returns:
+        int: The number of deleted nodes.
+    """
+    return tx.run(DELETE_ENTITIES_CYPHER, uids=uids).consume().counters.nodes_deleted
+
+
+def orphan_candidates(documents: list[dict]) -> dict[str, tuple[str, list]]:
+    """
+    Collect the keys of the nodes that child entries map to, as those nodes may be left
+    without any entity once the entries are detached.
+    Args:
+        documents (list[dict]): Partial entity documents holding the detached child entries.
+    Returns:
+        dict[str, tuple[str, list]]: The key property and the keys per node label; Country comes last,
+            as addresses may be its last references.
+    """
+    rows = build_graph_rows(documents)
+    candidates = {label: ("uid", {row["uid"] for row in rows[key]}) for key, (label, _, _) in CHILD_NODES.items()}
+    candidates["Program"] = ("name", {row["name"] for row in rows["programs"]})
+    candidates["Identifier"] = ("key", {row["key"] for row in rows["identifiers"]})
+    candidates["Address"] = ("key", {row["key"] for row in rows["addresses"]})
+    candidates["Vessel"] = ("entity_uid", {row["entity_uid"] for row in rows["vessels"]})
+    candidates["Country"] = ("name", {row["country"] for key in COUNTRY_LINKS for row in rows[key]} |
+                             {row["properties"]["country"] for row in rows["addresses"] if row["properties"]["country"]})
+    return {label: (key_property, sorted(keys)) for label, (key_property, keys) in candidates.items() if keys}
+
+
+def prune_candidates(tx: ManagedTransaction, candidates: dict[str, tuple[str, list]]) -> int:
+    """
+    Delete the candidate nodes no entity refers to anymore.
+    Args:
+        tx (ManagedTransaction): The transaction.
+        candidates (dict[str, tuple[str, list]]): The candidates built by orphan_candidates.
+    Returns:
+        int: The number of deleted nodes.
+    """
+    deleted = 0
+    for label, (key_property, keys) in candidates.items():
+        statement = PRUNE_COUNTRY_CANDIDATES_CYPHER if label == "Country" else \
+            PRUNE_CANDIDATES_CYPHER.format(label=label, property=key_property)
+        deleted += tx.run(statement, keys=keys).consume().counters.nodes_deleted
+    return deleted
+
+
+def sync_graph(db: Session,
+               graph_db: GraphDBManager,
+               batch_size: int = DEFAULT_BATCH_SIZE,
+               prune: bool = True) -> GraphSyncStats:
+    """
+    Synchronize the graph with the entity documents in PostgreSQL.
+    Each batch of entities is written with parameterized UNWIND ... MERGE statements
+    in one managed write transaction, so rerunning the sync is idempotent.
+    Args:
+        db (Session): The database session.
+        graph_db (GraphDBManager): The graph database manager.
+        batch_size (int): The number of entities per write transaction.
+        prune (bool): Delete the entities missing from PostgreSQL once all batches are written.
+    Returns:
+        GraphSyncStats: The counters and rates of the sync.
+    """
+    stats = GraphSyncStats()
+    # The schema is applied at startup; reapplying it is a no-op unless the graph was reset since,
+    # so the sync does not wait for the indexes again
+    GraphSchemaManager(graph_db).apply(wait=False)
+    # Change sets recorded before the documents are read are covered by this sync
+    covered = db.execute(
+        select(func.max(SDNChangeSet.id)).where(SDNChangeSet.graph_applied_at.is_(None))
+    ).scalar_one_or_none()
+
+    uids = []
+    for documents in iter_document_batches(db, batch_size):
+        rows = build_graph_rows(documents)
+        nodes, relationships = graph_db.execute_write(write_graph_batch, rows)
+        uids.extend(row["uid"] for row in rows["entities"])
+        stats.entities += len(documents)
+        stats.nodes += nodes
+        stats.relationships += relationships
+        stats.batches += 1
+        logger.info(f"Graph sync batch {stats.batches} written: {len(documents)} entities.")
+
+    # Writing an entity detached its links, so all links are written again once both ends exist
+    write_link_batches(graph_db, get_entity_links(db), batch_size, stats)
+
+    if prune:
+        stats.pruned = graph_db.execute_write(prune_graph, uids)
+        # Without pruning, the removals of pending change sets are still to be applied
+        if covered is not None:
+            mark_change_sets_applied(db, covered)
+
+    stats.stop()
+    logger.info(f"Graph sync completed: {stats.to_dict()}")
+    return stats
+
+
+def mark_change_sets_applied(db: Session, up_to: int) -> None:
+    """
+    Mark the pending change sets up to an ID as applied to the graph.
+    Args:
+        db (Session): The database session.
+        up_to (int): The ID of the last change set covered.
+    """
+    db.execute(
+        update(SDNChangeSet)
+        .where(SDNChangeSet.id <= up_to, SDNChangeSet.graph_applied_at.is_(None))
+        .values(graph_applied_at=datetime.now(timezone.utc))
+    )
+    db.commit()
+
+
+def apply_change_set(db: Session,
+                     graph_db: GraphDBManager,
+                     change_set: SDNChangeSet,
+                     batch_size: int = DEFAULT_BATCH_SIZE) -> GraphSyncStats:
+    """
+    Bring the graph up to date with one publication by writing only the entities it changed.
+    Added and modified entities are merged from their current document, removed entities are
+    detached and deleted, and the nodes their removed child entries mapped to are deleted once
+    unreferenced, each step in batched write transactions. The links from the written entities,
+    and to the added ones, are merged again, and the links a link enrichment run added or removed
+    are merged or deleted.
+    Args:
+        db (Session): The database session.
+        graph_db (GraphDBManager): The graph database manager.
+        change_set (SDNChangeSet): The change set.
+        batch_size (int): The number of entities per write transaction.
+    Returns:
+        GraphSyncStats: The counters and rates of the update.
+    """
+    stats = GraphSyncStats()
+    upserts = sorted(set(change_set.added) | set(change_set.modified))
+    for start in range(0, len(upserts), batch_size):
+        # An entity removed again by a later publication has no document and is left to that change set
+        documents = db.execute(
+            select(SDNEntityDocument.document)
+            .where(SDNEntityDocument.uid.in_(upserts[start:start + batch_size]))
+            .order_by(SDNEntityDocument.uid)
+        ).scalars().all()
+        if not documents:
+            continue
+        rows = build_graph_rows(documents)
+        nodes, relationships = graph_db.execute_write(write_graph_batch, rows)
+        stats.entities += len(documents)
+        stats.nodes += nodes
+        stats.relationships += relationships
+        stats.batches += 1
+
+    link_changes = change_set.links or {}
+    removed_links = link_changes.get("removed", [])
+    for start in range(0, len(removed_links), batch_size):
+        stats.relationships += graph_db.execute_write(delete_entity_links, removed_links[start:start + batch_size])
+        stats.batches += 1
+    links = get_entity_links(db, upserts, targets=list(change_set.added)) if upserts else []
+    write_link_batches(graph_db, links + link_changes.get("added", []), batch_size, stats)
+
+    removed = list(change_set.removed)
+    for start in range(0, len(removed), batch_size):
+        stats.pruned += graph_db.execute_write(delete_entities, removed[start:start + batch_size])
+        stats.batches += 1
+
+    detached = []
+    for uid, diff in change_set.children.items():
+        document = {"uid": int(uid), **{key: entries["removed"] for key, entries in diff.items()}}
+        if "vessel" in document:
+            document["vessel"] = document["vessel"][0] if document["vessel"] else None
+        detached.append(document)
+    candidates = orphan_candidates(detached)
+    if candidates:
+        stats.pruned += graph_db.execute_write(prune_candidates, candidates)
+        stats.batches += 1
+
+    stats.stop()
+    logger.info(f"Change set {change_set.id} applied to the graph: {stats.to_dict()}")
+    return stats
+
+
+def apply_pending_change_sets(db: Session,
+                              graph_db: GraphDBManager,
+                              batch_size: int = DEFAULT_BATCH_SIZE) -> list[dict]:
+    """
+    Apply the change sets the graph has not caught up with yet, oldest first.
+    Each change set is marked as applied once written, so a failure resumes from the change set that failed.
+    Args:
+        db (Session): The database session.
+        graph_db (GraphDBManager): The graph database manager.
+        batch_size (int): The number of entities per write transaction.
+    Returns:
+        list[dict]: The ID and the counters of each applied change set.
+    """
+    pending = db.execute(
+        select(SDNChangeSet).where(SDNChangeSet.graph_applied_at.is_(None)).order_by(SDNChangeSet.id)
+    ).scalars().all()
+    applied = []
+    for change_set in pending:
+        stats = apply_change_set(db, graph_db, change_set, batch_size=batch_size)
+        mark_change_sets_applied(db, change_set.id)
+        applied.append({"id": change_set.id, **stats.to_dict()})
+    return applied
+
+
+async def get_neighborhood(graph_db: AsyncGraphDBManager, uid: int,
+                           limit: int = DEFAULT_NEIGHBOR_LIMIT) -> dict | None:
+    """
+    Retrieve an entity and the nodes directly connected to it.
+    Args:
+        graph_db (AsyncGraphDBManager): The async graph database manager.
+        uid (int): The UID of the entity.
+        limit (int): The maximum number of neighbors.
+    Returns:
+        dict | None: The entity properties and its neighbors, None if the entity is not in the graph.
+    """
+    records = await graph_db.read_query(NEIGHBORHOOD_CYPHER, {"uid": uid, "limit": limit})
+    if not records:
+        return None
+    return {"entity": records[0]["entity"], "neighbors": records[0]["neighbors"]}
@@ -0,0 +1,107 @@
+# backend/graph/subgraph.py
+
+# Import dependencies
+import logging
+from dataclasses import dataclass
+from typing import Final, Iterable
+import numpy as np
+
+# Import custom modules
+from backend.graph.csr import CSRGraph
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Defaults of an ego network extraction
+DEFAULT_SUBGRAPH_DEPTH: Final[int] = 2
+DEFAULT_MAX_NODES: Final[int] = 1000
+DEFAULT_HUB_DEGREE: Final[int] = 50
+
+
+@dataclass
+class Subgraph:
+    """
+    An ego network extracted from a CSRGraph.
+    Nodes are graph node indices; edges refer to positions in nodes. A node with a cluster size
+    is a hub that was not expanded and stands for that many neighbors left out of the subgraph.
+    """
+    nodes: np.ndarray
+    depths: np.ndarray
+    cluster_sizes: np.ndarray
+    edge_sources: np.ndarray
+    edge_targets: np.ndarray
+    edge_types: np.ndarray
+    truncated: bool = False
+
+
+def extract_subgraph(graph: CSRGraph,
+                     seeds: Iterable[int],
+                     depth: int = DEFAULT_SUBGRAPH_DEPTH,
+                     max_nodes: int = DEFAULT_MAX_NODES,
+                     hub_degree: int | None = DEFAULT_HUB_DEGREE,
+                     edge_types: Iterable[str] | None = None) -> Subgraph:
+    """
+    Extract the ego network around one or more nodes, level by level.
+    Hubs with more than hub_degree neighbors are kept as cluster nodes but not expanded,
+    so that a large program does not pull its whole membership into the view.
+    Degrees only count the relationship types followed, so cluster sizes match the edges of the view.
+    Args:
+        graph (CSRGraph): The graph.
+        seeds (Iterable[int]): The node indices at the center of the network.
+        depth (int): The maximum number of hops from the nearest seed.
+        max_nodes (int): The maximum number of nodes; the farthest level is cut once reached.
+        hub_degree (int | None): The degree above which a node is summarized as a cluster, None for never.
+        edge_types (Iterable[str] | None): The relationship types to follow, None for all.
+    Returns:
+        Subgraph: The ego network.
+    Raises:
+        ValueError: If a relationship type is unknown.
+    """
+    codes = graph.edge_type_codes(list(edge_types) if edge_types is not None else None)
+    distances = np.full(graph.num_nodes, -1, dtype=np.int32)
+    frontier = np.unique(np.fromiter(seeds, dtype=np.int32))[:max_nodes]
+    distances[frontier] = 0
+    included = [frontier]
+    count, truncated = len(frontier), False
+
+    for level in range(1, depth + 1):
+        expandable = frontier if hub_degree is None else \
+            frontier[(graph.degrees(frontier, codes) <= hub_degree) | (level == 1)]
+        neighbors, _ = graph.expand(expandable, codes)
+        frontier = np.unique(neighbors[distances[neighbors] < 0])
+        if count + len(frontier) > max_nodes:
+            frontier, truncated = frontier[:max_nodes - count], True
+        if len(frontier) == 0:
+            break
+        distances[frontier] = level
+        included.append(frontier)
+        count += len(frontier)
+        if truncated:
+            break
+
+    nodes = np.concatenate(included)
+    position = np.full(graph.num_nodes, -1, dtype=np.int32)
+    position[nodes] = np.arange(len(nodes), dtype=np.int32)
+
+    # Induced edges, each undirected edge once
+    neighbors, parents, types = graph.expand_edges(nodes, codes)
+    inside = position[neighbors] >= 0
+    edge_sources, edge_targets, types = position[parents[inside]], position[neighbors[inside]], types[inside]
+    once = edge_sources < edge_targets
+    edge_sources, edge_targets, types = edge_sources[once], edge_targets[once], types[once]
+
+    # Hubs stand for the neighbors left out of the view
+    in_view = np.bincount(np.concatenate([edge_sources, edge_targets]), minlength=len(nodes))
+    cluster_sizes = np.zeros(len(nodes), dtype=np.int32)
+    if hub_degree is not None:
+        degree = graph.degrees(nodes, codes)
+        hubs = degree > hub_degree
+        cluster_sizes[hubs] = (degree - in_view)[hubs]
+
+    return Subgraph(nodes=nodes,
+                    depths=distances[nodes],
+                    cluster_sizes=cluster_sizes,
+                    edge_sources=edge_sources,
+                    edge_targets=edge_targets,
+                    edge_types=types,
+                    truncated=truncated)
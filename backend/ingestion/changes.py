@@ -0,0 +1,142 @@
+# backend/ingestion/changes.py
+
+# Import dependencies
+import json
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Final, Iterable
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+# Import custom modules
+from backend.models.SDNEntity import SDNChangeSet
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Document keys holding the child entries of an entity; the vessel is diffed as a list of at most one entry
+CHILD_KEYS: Final[tuple[str, ...]] = ("programs", "aka_list", "ids", "nationalities", "citizenships",
+                                      "date_of_birth_list", "place_of_birth_list", "addresses", "vessel")
+
+
+def _child_entries(document: dict | None, key: str) -> list:
+    """
+    Returns the child entries of a document under a key, as a list.
+    """
+    value = (document or {}).get(key)
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+def _canonical(entry) -> str:
+    return json.dumps(entry, sort_keys=True, separators=(",", ":"), default=str)
+
+
+def diff_children(previous: dict | None, current: dict | None) -> dict[str, dict[str, list]]:
+    """
+    Diff the child entries of two states of an entity document.
+    A changed entry shows up as removed in its old form and added in its new form.
+    Args:
+        previous (dict | None): The previous document, None if the entity is new.
+        current (dict | None): The current document, None if the entity was removed.
+    Returns:
+        dict[str, dict[str, list]]: The added and removed entries per document key, changed keys only.
+    """
+    diff = {}
+    for key in CHILD_KEYS:
+        before = {_canonical(entry): entry for entry in _child_entries(previous, key)}
+        after = {_canonical(entry): entry for entry in _child_entries(current, key)}
+        added = [entry for canonical, entry in after.items() if canonical not in before]
+        removed = [entry for canonical, entry in before.items() if canonical not in after]
+        if added or removed:
+            diff[key] = {"added": added, "removed": removed}
+    return diff
+
+
+def _link_key(link: dict) -> tuple[int, str, int]:
+    return link["source_uid"], link["relationship_type"], link["target_uid"]
+
+
+def diff_links(previous: Iterable[dict], current: Iterable[dict]) -> dict[str, list[dict]]:
+    """
+    Diff two sets of resolved entity links. Links are identified by source, relationship type and target,
+    as that is what makes an edge in the graph; a link found in both the remarks and the ID entries is one edge.
+    Args:
+        previous (Iterable[dict]): The previous links, with source_uid, target_uid, relationship_type and origin.
+        current (Iterable[dict]): The current links.
+    Returns:
+        dict[str, list[dict]]: The links added and removed, sorted by key; empty if nothing changed.
+    """
+    before = {}
+    for link in previous:
+        before.setdefault(_link_key(link), link)
+    after = {}
+    for link in current:
+        after.setdefault(_link_key(link), link)
+    added = [after[key] for key in sorted(after.keys() - before.keys())]
+    removed = [before[key] for key in sorted(before.keys() - after.keys())]
+    return {"added": added, "removed": removed} if added or removed else {}
+
+
+@dataclass
+class ChangeSet:
+    """
+    The entities added, modified and removed by a publication, with the diff of their child entries,
+    or the entity links added and removed by a link enrichment run.
+    """
+    added: list[int] = field(default_factory=list)
+    modified: list[int] = field(default_factory=list)
+    removed: list[int] = field(default_factory=list)
+    children: dict[int, dict] = field(default_factory=dict)
+    links: dict[str, list[dict]] = field(default_factory=dict)
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.modified or self.removed or self.links)
+
+    @classmethod
+    def from_documents(cls, previous: dict[int, dict], current: dict[int, dict]) -> "ChangeSet":
+        """
+        Build the change set between the previous and current documents of the changed entities.
+        Args:
+            previous (dict[int, dict]): The previous document of each modified or removed entity.
+            current (dict[int, dict]): The current document of each added or modified entity.
+        Returns:
+            ChangeSet: The change set.
+        """
+        change_set = cls(added=sorted(set(current) - set(previous)),
+                         modified=sorted(set(current) & set(previous)),
+                         removed=sorted(set(previous) - set(current)))
+        for uid in change_set.added + change_set.modified + change_set.removed:
+            change_set.children[uid] = diff_children(previous.get(uid), current.get(uid))
+        return change_set
+
+    def to_row(self, valid_from: datetime) -> dict:
+        """
+        Returns the change set as a row of sdn_change_sets.
+        """
+        return {
+            "valid_from": valid_from,
+            "added": self.added,
+            "modified": self.modified,
+            "removed": self.removed,
+            "children": {str(uid): diff for uid, diff in self.children.items()},
+            "links": self.links or None,
+        }
+
+
+def store_change_set(db: Session, change_set: ChangeSet, valid_from: datetime) -> None:
+    """
+    Store the change set of a publication, unless nothing changed. The caller commits.
+    Args:
+        db (Session): The database session.
+        change_set (ChangeSet): The change set.
+        valid_from (datetime): The time from which the publication is in effect.
+    """
+    if not change_set:
+        return
+    db.execute(insert(SDNChangeSet), [change_set.to_row(valid_from)])
+    logger.info(f"Change set recorded: {len(change_set.added)} added, {len(change_set.modified)} modified, "
+                f"{len(change_set.removed)} removed, {len(change_set.links.get('added', []))} links added, "
+                f"{len(change_set.links.get('removed', []))} links removed.")
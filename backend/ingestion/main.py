@@ -2,6 +2,7 @@
 
 # Import dependencies
 import logging
+from datetime import datetime, time, timezone
 from fastapi import FastAPI, APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from apscheduler.schedulers.background import BackgroundScheduler
@@ -11,11 +12,15 @@ import os
 
 # Import custom modules
 from backend.data_layer.database import DatabaseManager
+from backend.data_layer.staging import rollback_generation
 from backend.ingestion.service import (
     download_sdn_files,
     validate_sdn_xml,
     parse_sdn_xml,
-    store_sdn_data
+    parse_publish_information,
+    record_live_versions,
+    store_sdn_data,
+    store_sdn_data_staged
 )
 
 # Initialize the FastAPI router
@@ -34,7 +39,8 @@ db_manager = DatabaseManager()
 def load_sdn_data(
     db: Session = Depends(db_manager.get_db),
     xml_url: str = "https://sanctionslistservice.ofac.treas.gov/api/PublicationPreview/exports/SDN.XML",
-    xsd_url: str = "https://sanctionslistservice.ofac.treas.gov/api/PublicationPreview/exports/XML.xsd"
+    xsd_url: str = "https://sanctionslistservice.ofac.treas.gov/api/PublicationPreview/exports/XML.xsd",
+    swap: bool = False
 ) -> dict[str, str]:
     """
     Load SDN data from the provided XML and XSD URLs.
@@ -43,6 +49,7 @@ def load_sdn_data(
         db (Session): The database session.
         xml_url (str): The URL of the SDN XML file.
         xsd_url (str): The URL of the XSD file.
+        swap (bool): Load the publication into staging tables and swap them in atomically.
 
     Returns:
         dict: A message indicating the success or failure of the operation.
@@ -63,8 +70,21 @@ def load_sdn_data(
         logger.info("Parsing XML file.")
         sdn_data = parse_sdn_xml(xml_path)
 
-        logger.info("Saving parsed data to the database.")
-        store_sdn_data(sdn_data, db)
+        # The history of the entities is kept in publication time
+        publish_date = parse_publish_information(xml_path)["publish_date"]
+        valid_from = datetime.combine(publish_date, time.min, tzinfo=timezone.utc) if publish_date else None
+
+        if swap and db_manager.engine.dialect.name != "postgresql":
+            # Embedded databases commit the load in one transaction, which readers never see half done
+            logger.info("Staged loads require PostgreSQL, loading in a single transaction instead.")
+            swap = False
+
+        if swap:
+            logger.info("Saving parsed data to the staging schema.")
+            store_sdn_data_staged(sdn_data, db_manager.engine, valid_from=valid_from)
+        else:
+            logger.info("Saving parsed data to the database.")
+            store_sdn_data(sdn_data, db, valid_from=valid_from)
 
         logger.info("SDN advanced data loaded successfully.")
         return {"message": "SDN advanced data loaded successfully"}
@@ -75,6 +95,24 @@ def load_sdn_data(
         logger.exception("An unexpected error occurred.")
         raise HTTPException(status_code=500, detail="An internal server error occurred.")
 
+@router.post("/rollback/sdn_data")
+def rollback_sdn_data() -> dict[str, str]:
+    """
+    Restore the generation that was live before the last swapped load.
+    The restored documents are recorded in the entity history in the same transaction.
+
+    Returns:
+        dict: A message indicating the success or failure of the operation.
+    """
+    try:
+        rollback_generation(db_manager.engine, on_swap=record_live_versions)
+        return {"message": "SDN data rolled back to the previous generation"}
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        logger.exception("An unexpected error occurred.")
+        raise HTTPException(status_code=500, detail="An internal server error occurred.")
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
@@ -0,0 +1,137 @@
+# backend/ingestion/parsing.py
+
+# Import dependencies
+import calendar
+import logging
+import re
+from datetime import date, datetime
+from typing import Final
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Month abbreviations as used in OFAC dates, e.g. "12 Jan 1965"
+MONTHS: Final[dict[str, int]] = {name.lower(): number for number, name in enumerate(calendar.month_abbr) if name}
+
+# Years added on each side of a "circa" year
+CIRCA_YEARS: Final[int] = 1
+
+_DAY_MONTH_YEAR = re.compile(r"^(\d{1,2})\s+([a-z]{3})[a-z]*\.?\s+(\d{4})$", re.IGNORECASE)
+_MONTH_YEAR = re.compile(r"^([a-z]{3})[a-z]*\.?\s+(\d{4})$", re.IGNORECASE)
+_YEAR = re.compile(r"^(\d{4})$")
+_ISO = re.compile(r"^(\d{4})-(\d{2})(?:-(\d{2}))?$")
+_CIRCA = re.compile(r"^(?:circa|ca\.|c\.)\s*(.+)$", re.IGNORECASE)
+_RANGE = re.compile(r"\s+(?:to|-)\s+", re.IGNORECASE)
+_NUMBER = re.compile(r"^-?\d+(?:\.\d+)?$")
+
+
+def _month_range(year: int, month: int) -> tuple[date, date]:
+    """
+    Returns the first and last day of a month.
+    """
+    return date(year, month, 1), date(year, month, calendar.monthrange(year, month)[1])
+
+
+def _parse_single_date(value: str) -> tuple[date, date] | None:
+    """
+    Parses a single OFAC date into the range of days it covers.
+    Args:
+        value (str): The date without range or circa markers.
+    Returns:
+        tuple[date, date] | None: The first and last possible day, or None if not recognized.
+    """
+    match = _DAY_MONTH_YEAR.match(value)
+    if match and match.group(2).lower() in MONTHS:
+        day = date(int(match.group(3)), MONTHS[match.group(2).lower()], int(match.group(1)))
+        return day, day
+    match = _MONTH_YEAR.match(value)
+    if match and match.group(1).lower() in MONTHS:
+        return _month_range(int(match.group(2)), MONTHS[match.group(1).lower()])
+    match = _YEAR.match(value)
+    if match:
+        year = int(match.group(1))
+        return date(year, 1, 1), date(year, 12, 31)
+    match = _ISO.match(value)
+    if match:
+        year, month = int(match.group(1)), int(match.group(2))
+        if match.group(3):
+            day = date(year, month, int(match.group(3)))
+            return day, day
+        return _month_range(year, month)
+    return None
+
+
+def parse_ofac_date(value: str | None) -> tuple[date | None, date | None]:
+    """
+    Parses an OFAC date into a normalized date range.
+    Supports full dates ("12 Jan 1965"), months ("Jan 1965"), years ("1965"),
+    circa dates ("circa 1965", widened to whole years by CIRCA_YEARS on each side) and ranges ("1965 to 1970").
+    Args:
+        value (str | None): The date as published.
+    Returns:
+        tuple[date | None, date | None]: The first and last possible day, (None, None) if not recognized.
+    """
+    if not value or not value.strip():
+        return None, None
+    value = " ".join(value.split())
+    try:
+        circa = _CIRCA.match(value)
+        if circa:
+            date_from, date_to = parse_ofac_date(circa.group(1))
+            if date_from is None:
+                return None, None
+            return date(date_from.year - CIRCA_YEARS, 1, 1), date(date_to.year + CIRCA_YEARS, 12, 31)
+
+        parts = _RANGE.split(value)
+        if len(parts) == 2:
+            start, end = _parse_single_date(parts[0]), _parse_single_date(parts[1])
+            if start is None or end is None:
+                return None, None
+            return start[0], end[1]
+
+        single = _parse_single_date(value)
+        if single is not None:
+            return single
+    except ValueError as e:
+        logger.warning(f"Invalid date {value}: {e}")
+        return None, None
+
+    logger.debug(f"Unrecognized date format: {value}")
+    return None, None
+
+
+def parse_publish_date(value: str | None) -> date | None:
+    """
+    Parses the publication date of the list, published as "MM/DD/YYYY".
+    Args:
+        value (str | None): The date as published.
+    Returns:
+        date | None: The publication date, or None if not recognized.
+    """
+    if not value or not value.strip():
+        return None
+    try:
+        return datetime.strptime(value.strip(), "%m/%d/%Y").date()
+    except ValueError:
+        date_from, date_to = parse_ofac_date(value)
+        return date_from if date_from == date_to else None
+
+
+def parse_number(value: str | int | float | None) -> float | None:
+    """
+    Parses a published numeric string such as "1,234" or "5000.5".
+    Args:
+        value (str | int | float | None): The value as published.
+    Returns:
+        float | None: The number, or None if the value is empty or not numeric.
+    """
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    cleaned = value.replace(",", "").replace(" ", "").strip()
+    if not _NUMBER.match(cleaned):
+        if cleaned:
+            logger.debug(f"Unrecognized number format: {value}")
+        return None
+    return float(cleaned)
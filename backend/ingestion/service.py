@@ -1,12 +1,22 @@
 # backend/ingestion/service.py
 
 # Import dependencies
+import hashlib
+import json
 import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
 import requests
 from lxml import etree
+from sqlalchemy import Engine, delete, func, insert, literal, select, union, update
 from sqlalchemy.orm import Session
 
 # Import custom modules
+from backend.common.utils import build_search_name
+from backend.data_layer.cache import bump_data_generation
+from backend.data_layer.staging import load_staging_generation, swap_staging_generation
+from backend.ingestion.changes import ChangeSet, store_change_set
+from backend.ingestion.parsing import parse_ofac_date, parse_number, parse_publish_date
 from backend.models.SDNEntity import (
     SDNEntity,
     Address,
@@ -17,7 +27,13 @@ from backend.models.SDNEntity import (
     AKA,
     DateOfBirth,
     PlaceOfBirth,
-    Citizenship
+    Citizenship,
+    SDNEntityDocument,
+    SanctionsProgram,
+    Country,
+    IDType,
+    FacetCount,
+    SDNEntityVersion
 )
 
 
@@ -78,6 +94,25 @@ def validate_sdn_xml(xml_path: str, xsd_path: str) -> bool:
         return False
 
 
+def parse_publish_information(xml_path: str) -> dict:
+    """
+    Parse the publish information from the header of the SDN XML file.
+    Parsing stops at the header, so the entries are not read twice.
+    Args:
+        xml_path (str): The path to the XML file.
+    Returns:
+        dict: The publish date (or None) and the record count (or None).
+    """
+    ns = "{https://sanctionslistservice.ofac.treas.gov/api/PublicationPreview/exports/XML}"
+    for _, element in etree.iterparse(xml_path, events=("end",), tag=f"{ns}publshInformation"):
+        record_count = element.findtext(f"{ns}Record_Count")
+        return {
+            "publish_date": parse_publish_date(element.findtext(f"{ns}Publish_Date")),
+            "record_count": int(record_count) if record_count and record_count.strip().isdigit() else None
+        }
+    return {"publish_date": None, "record_count": None}
+
+
 def parse_sdn_xml(xml_path: str) -> list[dict]:
     """
     Parse the advanced SDN XML file and extract relevant information.
@@ -173,14 +208,15 @@ def parse_sdn_xml(xml_path: str) -> list[dict]:
             })
 
         vessel_info = {}
-        if sdn.find("ns:vesselInfo", namespaces=ns) is not None:
+        vessel = sdn.find("ns:vesselInfo", namespaces=ns)
+        if vessel is not None:
             vessel_info = {
-                "call_sign": sdn.findtext("ns:callSign", namespaces=ns),
-                "vessel_type": sdn.findtext("ns:vesselType", namespaces=ns),
-                "vessel_flag": sdn.findtext("ns:vesselFlag", namespaces=ns),
-                "vessel_owner": sdn.findtext("ns:vesselOwner", namespaces=ns),
-                "tonnage": sdn.findtext("ns:tonnage", namespaces=ns),
-                "gross_registered_tonnage": sdn.findtext("ns:grossRegisteredTonnage", namespaces=ns)
+                "call_sign": vessel.findtext("ns:callSign", namespaces=ns),
+                "vessel_type": vessel.findtext("ns:vesselType", namespaces=ns),
+                "vessel_flag": vessel.findtext("ns:vesselFlag", namespaces=ns),
+                "vessel_owner": vessel.findtext("ns:vesselOwner", namespaces=ns),
+                "tonnage": vessel.findtext("ns:tonnage", namespaces=ns),
+                "gross_registered_tonnage": vessel.findtext("ns:grossRegisteredTonnage", namespaces=ns)
             }
 
         sdn_data.append({
@@ -205,71 +241,421 @@ def parse_sdn_xml(xml_path: str) -> list[dict]:
 
 
 
-def store_sdn_data(sdn_data: list[dict], db: Session):
+class LookupInterner:
+    """
+    Interns lookup values during ingestion, so that each distinct program, country and ID type
+    is stored once and child rows reference it by its small integer key.
+    """
+
+    def __init__(self, db: Session | None = None):
+        self._db = db
+        self._values: dict[type, dict[str, SanctionsProgram | Country | IDType]] = {}
+
+    def intern(self, model: type, name: str | None) -> SanctionsProgram | Country | IDType | None:
+        """
+        Returns the lookup row of a value, creating it on first use.
+        New rows are saved along with the child rows referencing them.
+        Args:
+            model (type): The lookup model.
+            name (str | None): The value.
+        Returns:
+            SanctionsProgram | Country | IDType | None: The lookup row, or None for a missing value.
+        """
+        if name is None:
+            return None
+        values = self._values.get(model)
+        if values is None:
+            # Load the stored values once per ingestion
+            values = {row.name: row for row in self._db.query(model).all()} if self._db is not None else {}
+            self._values[model] = values
+        row = values.get(name)
+        if row is None:
+            row = model(name=name)
+            values[name] = row
+        return row
+
+
+def build_sdn_entity(entry: dict, lookups: LookupInterner | None = None) -> SDNEntity:
+    """
+    Build an SDNEntity and its child rows from a parsed SDN entry.
+    Args:
+        entry (dict): A parsed SDN entry.
+        lookups (LookupInterner | None): The interner shared by all entries of an ingestion.
+    Returns:
+        SDNEntity: The entity, ready to be added to a session.
+    """
+    lookups = lookups or LookupInterner()
+
+    # Create SDNEntity
+    sdn_entity = SDNEntity(uid=entry["uid"],
+                           first_name=entry["first_name"],
+                           last_name=entry["last_name"],
+                           sdn_type=entry["sdn_type"],
+                           remarks=entry["remarks"],
+                           search_name=build_search_name(entry["first_name"], entry["last_name"]))
+
+    # Add programs
+    sdn_entity.programs = [
+        Program(program=lookups.intern(SanctionsProgram, program)) for program in entry["programs"]
+    ]
+
+    # Add aka_list
+    sdn_entity.aka_list = [
+        AKA(**aka, search_name=build_search_name(aka["first_name"], aka["last_name"]))
+        for aka in entry["aka_list"]
+    ]
+
+    # Add IDs
+    sdn_entity.ids = [
+        ID(**{**id_elem, "id_type": lookups.intern(IDType, id_elem.get("id_type"))},
+           issued_on=parse_ofac_date(id_elem.get("issue_date"))[0],
+           expires_on=parse_ofac_date(id_elem.get("expiration_date"))[1])
+        for id_elem in entry["ids"]
+    ]
+
+    # Add nationalities
+    sdn_entity.nationalities = [
+        Nationality(**{**nationality, "country": lookups.intern(Country, nationality["country"])})
+        for nationality in entry["nationalities"]
+    ]
+
+    # Add citizenships
+    sdn_entity.citizenships = [
+        Citizenship(**{**citizenship, "country": lookups.intern(Country, citizenship["country"])})
+        for citizenship in entry["citizenships"]
+    ]
+
+    # Add dates of birth
+    sdn_entity.date_of_birth_list = []
+    for dob in entry["date_of_birth_list"]:
+        date_from, date_to = parse_ofac_date(dob["date_of_birth"])
+        sdn_entity.date_of_birth_list.append(DateOfBirth(**dob, date_from=date_from, date_to=date_to))
+
+    # Add places of birth
+    sdn_entity.place_of_birth_list = [
+        PlaceOfBirth(**pob) for pob in entry["place_of_birth_list"]
+    ]
+
+    # Add addresses
+    sdn_entity.addresses = [
+        Address(**{**address, "country": lookups.intern(Country, address.get("country")),
+                   "country_name": address.get("country")})
+        for address in entry["address_list"]
+    ]
+
+    # Add vessel info
+    if entry["vessel_info"]:
+        vessel_info = entry["vessel_info"]
+        sdn_entity.vessel = Vessel(**{**vessel_info,
+                                      "tonnage": parse_number(vessel_info.get("tonnage")),
+                                      "gross_registered_tonnage": parse_number(vessel_info.get("gross_registered_tonnage"))})
+
+    return sdn_entity
+
+
+def _with_int_uid(items: list[dict]) -> list[dict]:
+    """
+    Copy the parsed child entries with their UID converted to an integer.
+    Args:
+        items (list[dict]): The parsed child entries.
+    Returns:
+        list[dict]: The converted entries.
+    """
+    return [{**item, "uid": int(item["uid"])} if item.get("uid") is not None else dict(item) for item in items]
+
+
+def build_entity_document(entry: dict) -> dict:
+    """
+    Assemble the full entity document for a parsed SDN entry.
+    Args:
+        entry (dict): A parsed SDN entry.
+    Returns:
+        dict: The JSON serializable entity document.
+    """
+    return {
+        "uid": int(entry["uid"]),
+        "first_name": entry["first_name"],
+        "last_name": entry["last_name"],
+        "title": entry.get("title"),
+        "sdn_type": entry["sdn_type"],
+        "remarks": entry["remarks"],
+        "programs": list(entry["programs"]),
+        "aka_list": _with_int_uid(entry["aka_list"]),
+        "ids": _with_int_uid(entry["ids"]),
+        "nationalities": _with_int_uid(entry["nationalities"]),
+        "citizenships": _with_int_uid(entry["citizenships"]),
+        "date_of_birth_list": _with_int_uid(entry["date_of_birth_list"]),
+        "place_of_birth_list": _with_int_uid(entry["place_of_birth_list"]),
+        "addresses": _with_int_uid(entry["address_list"]),
+        "vessel": dict(entry["vessel_info"]) or None
+    }
+
+
+def compute_content_hash(document: dict) -> str:
+    """
+    Compute a stable hash of an entity document.
+    Args:
+        document (dict): The entity document.
+    Returns:
+        str: The hex encoded SHA-256 of the canonical JSON form.
+    """
+    canonical = json.dumps(document, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def sync_entity_documents(sdn_data: list[dict], db: Session) -> set[int]:
+    """
+    Bring the entity documents in line with the parsed publication.
+    Only entities whose content hash changed are rewritten, and documents of
+    entities missing from the publication are removed. The caller commits.
+    Args:
+        sdn_data (list[dict]): The parsed SDN data.
+        db (Session): The database session.
+    Returns:
+        set[int]: The UIDs whose document was inserted, updated or removed.
+    """
+    existing = dict(db.query(SDNEntityDocument.uid, SDNEntityDocument.content_hash).all())
+
+    inserts, updates = [], []
+    for entry in sdn_data:
+        document = build_entity_document(entry)
+        content_hash = compute_content_hash(document)
+        uid = document["uid"]
+        if uid not in existing:
+            inserts.append({"uid": uid, "content_hash": content_hash, "document": document})
+        elif existing[uid] != content_hash:
+            updates.append({"uid": uid, "content_hash": content_hash, "document": document})
+
+    published = {int(entry["uid"]) for entry in sdn_data}
+    removed = set(existing) - published
+
+    if inserts:
+        db.execute(insert(SDNEntityDocument), inserts)
+    if updates:
+        db.execute(update(SDNEntityDocument), updates)
+    if removed:
+        db.query(SDNEntityDocument).filter(SDNEntityDocument.uid.in_(removed)).delete(synchronize_session=False)
+
+    logging.info(f"Entity documents synced: {len(inserts)} added, {len(updates)} updated, {len(removed)} removed.")
+    return {row["uid"] for row in inserts + updates} | removed
+
+
+@dataclass
+class EntityVersionPlan:
+    """
+    The versions to close and open for a set of entity documents, with their change set.
+    Planned apart from the writes, so that staged loads can write them in the swap transaction.
+    """
+    valid_from: datetime
+    closed: list[int] = field(default_factory=list)
+    opened: list[dict] = field(default_factory=list)
+    change_set: ChangeSet = field(default_factory=ChangeSet)
+
+    @property
+    def changed(self) -> set[int]:
+        return set(self.closed) | {row["uid"] for row in self.opened}
+
+
+def _publication_documents(sdn_data: list[dict]) -> dict[int, tuple[str, dict]]:
+    """
+    Returns the content hash and entity document of each entry of a publication, by UID.
+    """
+    documents = {}
+    for entry in sdn_data:
+        document = build_entity_document(entry)
+        documents[document["uid"]] = (compute_content_hash(document), document)
+    return documents
+
+
+def plan_entity_versions(documents: dict[int, tuple[str, dict]], db: Session, valid_from: datetime) -> EntityVersionPlan:
+    """
+    Diff the current entity documents against the open versions of the history. Nothing is written.
+    A publication older than the latest open version is recorded from that version on,
+    so that no validity range ends before it starts.
+    Args:
+        documents (dict[int, tuple[str, dict]]): The content hash and document of each current entity, by UID.
+        db (Session): The database session.
+        valid_from (datetime): The time from which the documents are in effect.
+    Returns:
+        EntityVersionPlan: The versions to close and open, and the change set.
+    """
+    open_versions, latest = {}, None
+    for uid, content_hash, version_from in db.execute(
+        select(SDNEntityVersion.uid, SDNEntityVersion.content_hash, SDNEntityVersion.valid_from)
+        .where(SDNEntityVersion.valid_to.is_(None))
+    ):
+        open_versions[uid] = content_hash
+        # SQLite drops the time zone
+        version_from = version_from if version_from.tzinfo else version_from.replace(tzinfo=timezone.utc)
+        latest = version_from if latest is None else max(latest, version_from)
+    if latest is not None and valid_from < latest:
+        logging.warning(f"Publication time {valid_from} precedes the recorded history, recording it from {latest}.")
+        valid_from = latest
+
+    plan = EntityVersionPlan(valid_from)
+    for uid, (content_hash, document) in documents.items():
+        if open_versions.get(uid) == content_hash:
+            continue
+        if uid in open_versions:
+            plan.closed.append(uid)
+        plan.opened.append({"uid": uid, "valid_from": valid_from, "content_hash": content_hash, "document": document})
+    plan.closed.extend(set(open_versions) - set(documents))
+
+    # Only the changed entities need their previous document, to diff their child entries
+    previous = dict(db.execute(
+        select(SDNEntityVersion.uid, SDNEntityVersion.document)
+        .where(SDNEntityVersion.uid.in_(plan.closed), SDNEntityVersion.valid_to.is_(None))
+    ).all()) if plan.closed else {}
+    plan.change_set = ChangeSet.from_documents(previous, {row["uid"]: row["document"] for row in plan.opened})
+    return plan
+
+
+def write_entity_versions(plan: EntityVersionPlan, db: Session) -> None:
+    """
+    Close and open the versions of a plan, and store its change set. The caller commits.
+    Args:
+        plan (EntityVersionPlan): The planned versions.
+        db (Session): The database session.
+    """
+    store_change_set(db, plan.change_set, plan.valid_from)
+    if plan.closed:
+        db.execute(
+            update(SDNEntityVersion)
+            .where(SDNEntityVersion.uid.in_(plan.closed), SDNEntityVersion.valid_to.is_(None))
+            .values(valid_to=plan.valid_from)
+        )
+    if plan.opened:
+        db.execute(insert(SDNEntityVersion), plan.opened)
+    logging.info(f"Entity history recorded: {len(plan.opened)} versions opened, {len(plan.closed)} closed.")
+
+
+def record_entity_versions(sdn_data: list[dict], db: Session, valid_from: datetime) -> set[int]:
+    """
+    Record the entity history for a publication, slowly changing dimension style.
+    The open version of each changed or removed entity is closed at valid_from,
+    and a new open version is written for each new or changed entity.
+    The same diff is stored as the change set of the publication. The caller commits.
+    Args:
+        sdn_data (list[dict]): The parsed SDN data.
+        db (Session): The database session.
+        valid_from (datetime): The time from which the publication is in effect.
+    Returns:
+        set[int]: The UIDs whose history changed.
+    """
+    plan = plan_entity_versions(_publication_documents(sdn_data), db, valid_from)
+    write_entity_versions(plan, db)
+    return plan.changed
+
+
+def record_live_versions(db: Session, valid_from: datetime | None = None) -> None:
+    """
+    Record the live entity documents in the history, e.g. once a rollback swapped the previous generation back.
+    Entities whose document differs from their open version get a new version, and the change set
+    stored with them reverts the rolled back publication for the graph. The caller commits.
+    Args:
+        db (Session): The database session.
+        valid_from (datetime | None): The time from which the live documents are in effect, now if None.
+    """
+    documents = {
+        uid: (content_hash, document) for uid, content_hash, document in
+        db.execute(select(SDNEntityDocument.uid, SDNEntityDocument.content_hash, SDNEntityDocument.document))
+    }
+    write_entity_versions(plan_entity_versions(documents, db, valid_from or datetime.now(timezone.utc)), db)
+
+
+def refresh_facet_counts(db: Session) -> None:
+    """
+    Rebuild the precomputed entity counts per program and per country.
+    An entity is counted once per country, whether through a nationality, citizenship or address.
+    Args:
+        db (Session): The database session. Changes are not committed.
+    """
+    # The staging session does not autoflush
+    db.flush()
+    db.execute(delete(FacetCount))
+
+    program_counts = (
+        select(literal("program"), SanctionsProgram.name, func.count(func.distinct(Program.sdn_entity_id)))
+        .join(Program, Program.program_id == SanctionsProgram.id)
+        .group_by(SanctionsProgram.name)
+    )
+    country_links = union(
+        select(Nationality.sdn_entity_id, Nationality.country_id),
+        select(Citizenship.sdn_entity_id, Citizenship.country_id),
+        select(Address.sdn_entity_id, Address.country_id).where(Address.country_id.is_not(None))
+    ).subquery()
+    country_counts = (
+        select(literal("country"), Country.name, func.count(country_links.c.sdn_entity_id))
+        .join(country_links, country_links.c.country_id == Country.id)
+        .group_by(Country.name)
+    )
+    for counts in (program_counts, country_counts):
+        db.execute(insert(FacetCount).from_select(["facet", "value", "entity_count"], counts))
+
+
+def store_sdn_data(sdn_data: list[dict],
+                   db: Session,
+                   check_existing: bool = True,
+                   bump_generation: bool = True,
+                   record_history: bool = True,
+                   valid_from: datetime | None = None):
     """
     Store the parsed SDN data into the database.
     Args:
         sdn_data (list[dict]): The parsed SDN data.
         db (Session): The database session.
+        check_existing (bool): Skip entities whose UID is already stored.
+            Disabled when loading into empty staging tables.
+        bump_generation (bool): Bump the data generation in the same commit when data changed.
+            Disabled for staged loads, where the swap bumps it instead.
+        record_history (bool): Record the entity history in the same commit.
+            Disabled for staged loads, where the swap records it instead.
+        valid_from (datetime | None): The time from which the publication is in effect, now if None.
     """
+    added = 0
+    lookups = LookupInterner(db)
     for entry in sdn_data:
-        if db.query(SDNEntity).filter(SDNEntity.uid == entry["uid"]).first():
+        if check_existing and db.query(SDNEntity).filter(SDNEntity.uid == entry["uid"]).first():
             logging.warning(
                 f"SDNEntity with UID {entry['uid']} already exists. Skipping.")
             continue
 
-        # Create SDNEntity
-        sdn_entity = SDNEntity(uid=entry["uid"],
-                               first_name=entry["first_name"],
-                               last_name=entry["last_name"],
-                               sdn_type=entry["sdn_type"],
-                               remarks=entry["remarks"])
-
-        # Add programs
-        sdn_entity.programs = [
-            Program(name=program) for program in entry["programs"]
-        ]
-
-        # Add aka_list
-        sdn_entity.aka_list = [
-            AKA(**aka) for aka in entry["aka_list"]
-        ]
-
-        # Add IDs
-        sdn_entity.ids = [
-            ID(**id_elem) for id_elem in entry["ids"]
-        ]
-
-        # Add nationalities
-        sdn_entity.nationalities = [
-            Nationality(**nationality) for nationality in entry["nationalities"]
-        ]
-
-        # Add citizenships
-        sdn_entity.citizenships = [
-            Citizenship(**citizenship) for citizenship in entry["citizenships"]
-        ]
-
-        # Add dates of birth
-        sdn_entity.date_of_birth_list = [
-            DateOfBirth(**dob) for dob in entry["date_of_birth_list"]
-        ]
-
-        # Add places of birth
-        sdn_entity.place_of_birth_list = [
-            PlaceOfBirth(**pob) for pob in entry["place_of_birth_list"]
-        ]
-
-        # Add addresses
-        sdn_entity.addresses = [
-            Address(**address) for address in entry["address_list"]
-        ]
-
-        # Add vessel info
-        if entry["vessel_info"]:
-            sdn_entity.vessel = Vessel(**entry["vessel_info"])
-
         # Add the entity to the session
-        db.add(sdn_entity)
+        db.add(build_sdn_entity(entry, lookups))
+        added += 1
+
+    # Refresh the entity documents in the same transaction
+    changed = sync_entity_documents(sdn_data, db)
+    if added or changed:
+        refresh_facet_counts(db)
+
+    # The history is diffed against its own open versions, as staged loads start from empty tables
+    if record_history:
+        changed |= record_entity_versions(sdn_data, db, valid_from or datetime.now(timezone.utc))
+
+    # Invalidate cached reads atomically with the commit
+    if bump_generation and (added or changed):
+        bump_data_generation(db)
+
+    db.commit()
+
+
+def store_sdn_data_staged(sdn_data: list[dict], engine: Engine, valid_from: datetime | None = None):
+    """
+    Store the parsed SDN data as a new generation and swap it in atomically.
+    The publication is loaded into the staging schema while readers keep using
+    the live tables, which are then replaced in a single short transaction.
+    The entity history and change sets are not swapped, so they are written in the swap transaction,
+    and the graph never applies a change set of a generation that is not live.
+    Args:
+        sdn_data (list[dict]): The parsed SDN data.
+        engine (Engine): The SQLAlchemy engine.
+        valid_from (datetime | None): The time from which the publication is in effect, now if None.
+    """
+    with Session(engine) as db:
+        plan = plan_entity_versions(_publication_documents(sdn_data), db, valid_from or datetime.now(timezone.utc))
 
-    db.commit()
\ No newline at end of file
+    load_staging_generation(engine,
+                            lambda db: store_sdn_data(sdn_data, db, check_existing=False, bump_generation=False,
+                                                      record_history=False))
+    swap_staging_generation(engine, on_swap=lambda db: write_entity_versions(plan, db))
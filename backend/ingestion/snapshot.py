@@ -0,0 +1,93 @@
+# backend/ingestion/snapshot.py
+
+# Import dependencies
+import argparse
+import logging
+import os
+from datetime import datetime, time, timezone
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+# Import custom modules
+from backend.data_layer.database import SQLITE_BULK_LOAD_PRAGMAS, configure_sqlite_engine
+from backend.ingestion.service import (
+    download_sdn_files,
+    validate_sdn_xml,
+    parse_sdn_xml,
+    parse_publish_information,
+    store_sdn_data
+)
+from backend.models.base import Base
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Default publication sources, as used by the ingestion service
+SDN_XML_URL = "https://sanctionslistservice.ofac.treas.gov/api/PublicationPreview/exports/SDN.XML"
+SDN_XSD_URL = "https://sanctionslistservice.ofac.treas.gov/api/PublicationPreview/exports/XML.xsd"
+
+
+def build_snapshot(output_path: str, xml_path: str, xsd_path: str | None = None) -> str:
+    """
+    Build a self-contained SQLite snapshot of a publication for the embedded profile.
+    The file is bulk loaded without a journal under a temporary name, indexed, analyzed and
+    compacted, then moved into place, so an interrupted build never leaves a partial snapshot.
+    Args:
+        output_path (str): The path of the snapshot file.
+        xml_path (str): The path of the SDN XML file.
+        xsd_path (str | None): The path of the XSD file to validate against, if any.
+    Returns:
+        str: The path of the snapshot file.
+    """
+    if xsd_path is not None and not validate_sdn_xml(xml_path, xsd_path):
+        raise ValueError("Invalid XML file")
+
+    sdn_data = parse_sdn_xml(xml_path)
+    publish_date = parse_publish_information(xml_path)["publish_date"]
+    valid_from = datetime.combine(publish_date, time.min, tzinfo=timezone.utc) if publish_date else None
+
+    temporary_path = f"{output_path}.tmp"
+    if os.path.exists(temporary_path):
+        os.remove(temporary_path)
+
+    engine = configure_sqlite_engine(create_engine(f"sqlite:///{temporary_path}"), SQLITE_BULK_LOAD_PRAGMAS)
+    try:
+        Base.metadata.create_all(bind=engine)
+        with Session(bind=engine, autoflush=False) as db:
+            store_sdn_data(sdn_data, db, check_existing=False, valid_from=valid_from)
+        with engine.connect() as connection:
+            connection.execute(text("ANALYZE"))
+            connection.commit()
+            # A single file without journal, ready to be shipped; the sites switch it to WAL on open
+            connection.execute(text("PRAGMA journal_mode = DELETE"))
+            connection.execute(text("VACUUM"))
+    finally:
+        engine.dispose()
+
+    os.replace(temporary_path, output_path)
+    logger.info(f"Snapshot of {len(sdn_data)} entities written to {output_path}.")
+    return output_path
+
+
+def main(argv: list[str] | None = None) -> None:
+    """
+    Command line entry point: python -m backend.ingestion.snapshot OUTPUT [--xml-path PATH]
+    """
+    parser = argparse.ArgumentParser(description="Build a self-contained SQLite snapshot of the SDN list.")
+    parser.add_argument("output", help="Path of the snapshot file.")
+    parser.add_argument("--xml-path", help="Build from a local SDN XML file instead of downloading it.")
+    parser.add_argument("--xsd-path", help="Validate the local XML file against this XSD file.")
+    parser.add_argument("--xml-url", default=SDN_XML_URL)
+    parser.add_argument("--xsd-url", default=SDN_XSD_URL)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    if args.xml_path:
+        xml_path, xsd_path = args.xml_path, args.xsd_path
+    else:
+        xml_path, xsd_path = download_sdn_files(args.xml_url, args.xsd_url)
+    build_snapshot(args.output, xml_path, xsd_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,8 @@
 
 # Import dependencies
 import logging
-from sqlalchemy import Column, Integer, String, Text, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, SmallInteger, BigInteger, Float, String, Text, Boolean, ForeignKey, Date, DateTime, JSON, Index, DDL, event, func
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 
 # Configure logging
@@ -11,6 +12,58 @@ logger = logging.getLogger(__name__)
 # Initialize the database manager and get the Base
 from backend.models.base import Base
 
+# Trigram operators used by the name search indexes
+event.listen(Base.metadata,
+             "before_create",
+             DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"))
+
+# Scalar operator classes for the composite history range index
+event.listen(Base.metadata,
+             "before_create",
+             DDL("CREATE EXTENSION IF NOT EXISTS btree_gist").execute_if(dialect="postgresql"))
+
+# Small integer keys of the lookup tables; SQLite only auto-increments INTEGER primary keys
+LookupKey = SmallInteger().with_variant(Integer(), "sqlite")
+
+
+class SanctionsProgram(Base):
+    """
+    SQLAlchemy model for the sanctions program lookup table.
+    """
+    __tablename__ = "sanctions_programs"
+    id = Column(LookupKey, primary_key=True)
+    name = Column(String, unique=True, nullable=False)
+
+
+class Country(Base):
+    """
+    SQLAlchemy model for the country lookup table.
+    """
+    __tablename__ = "countries"
+    id = Column(LookupKey, primary_key=True)
+    name = Column(String, unique=True, nullable=False)
+
+
+class IDType(Base):
+    """
+    SQLAlchemy model for the ID type lookup table.
+    """
+    __tablename__ = "id_types"
+    id = Column(LookupKey, primary_key=True)
+    name = Column(String, unique=True, nullable=False)
+
+
+class FacetCount(Base):
+    """
+    SQLAlchemy model for the precomputed number of entities per facet value,
+    e.g. per program or per country. Rebuilt by every ingestion that changes the data.
+    """
+    __tablename__ = "facet_counts"
+    facet = Column(String, primary_key=True)
+    value = Column(String, primary_key=True)
+    entity_count = Column(Integer, nullable=False)
+
+
 class SDNEntity(Base):
     """
     SQLAlchemy model for storing SDN data.
@@ -22,6 +75,14 @@ class SDNEntity(Base):
     last_name = Column(String)
     sdn_type = Column(String)
     remarks = Column(Text)
+    search_name = Column(String, nullable=True)
+
+    __table_args__ = (
+        Index("ix_sdn_entities_search_name_trgm",
+              "search_name",
+              postgresql_using="gin",
+              postgresql_ops={"search_name": "gin_trgm_ops"}),
+    )
 
     # Relationships
     addresses = relationship("Address",
@@ -54,6 +115,15 @@ class SDNEntity(Base):
                                  cascade="all, delete-orphan")
 
 
+# Full-text search vector over the remarks, built with the language-neutral configuration
+event.listen(SDNEntity.__table__,
+             "after_create",
+             DDL("ALTER TABLE %(table)s ADD COLUMN remarks_tsv tsvector "
+                 "GENERATED ALWAYS AS (to_tsvector('simple'::regconfig, coalesce(remarks, ''))) STORED; "
+                 "CREATE INDEX ix_sdn_entities_remarks_tsv ON %(table)s USING gin (remarks_tsv)")
+             .execute_if(dialect="postgresql"))
+
+
 class PublishInformation(Base):
     """
     SQLAlchemy model for storing publish information.
@@ -64,6 +134,18 @@ class PublishInformation(Base):
     record_count = Column(Integer, nullable=True)
 
 
+class DataGeneration(Base):
+    """
+    SQLAlchemy model for storing the data generation counter.
+    The single row is bumped by every ingestion commit that changes the data.
+    """
+    __tablename__ = "data_generation"
+    __table_args__ = {"info": {"publication": False}}
+    id = Column(Integer, primary_key=True)
+    generation = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
 class ID(Base):
     """
     SQLAlchemy model for storing IDs.
@@ -71,13 +153,17 @@ class ID(Base):
     __tablename__ = "ids"
     id = Column(Integer, primary_key=True, index=True)
     uid = Column(Integer, nullable=False)
-    id_type = Column(String, nullable=True)
+    id_type_id = Column(LookupKey, ForeignKey("id_types.id"), nullable=True, index=True)
     id_number = Column(String, nullable=True)
     id_country = Column(String, nullable=True)
     issue_date = Column(String, nullable=True)
     expiration_date = Column(String, nullable=True)
+    # Parsed dates; issued_on is the earliest and expires_on the latest possible day
+    issued_on = Column(Date, nullable=True, index=True)
+    expires_on = Column(Date, nullable=True, index=True)
     sdn_entity_id = Column(Integer, ForeignKey("sdn_entities.id"))
     # Relationships
+    id_type = relationship("IDType")
     sdn_entity = relationship("SDNEntity", back_populates="ids")
 
 
@@ -92,10 +178,18 @@ class AKA(Base):
     category = Column(String, nullable=False)
     last_name = Column(String, nullable=True)
     first_name = Column(String, nullable=True)
-    sdn_entity_id = Column(Integer, ForeignKey("sdn_entities.id"))
+    search_name = Column(String, nullable=True)
+    sdn_entity_id = Column(Integer, ForeignKey("sdn_entities.id"), index=True)
     # Relationships
     sdn_entity = relationship("SDNEntity", back_populates="aka_list")
 
+    __table_args__ = (
+        Index("ix_aka_list_search_name_trgm",
+              "search_name",
+              postgresql_using="gin",
+              postgresql_ops={"search_name": "gin_trgm_ops"}),
+    )
+
 
 class DateOfBirth(Base):
     """
@@ -105,6 +199,9 @@ class DateOfBirth(Base):
     id = Column(Integer, primary_key=True, index=True)
     uid = Column(Integer, nullable=False)
     date_of_birth = Column(String, nullable=False)
+    # Parsed range of possible days, so that partial and circa dates can be range filtered
+    date_from = Column(Date, nullable=True, index=True)
+    date_to = Column(Date, nullable=True, index=True)
     main_entry = Column(Boolean, nullable=False)
     sdn_entity_id = Column(Integer, ForeignKey("sdn_entities.id"))
     # Relationships
@@ -132,10 +229,11 @@ class Citizenship(Base):
     __tablename__ = "citizenships"
     id = Column(Integer, primary_key=True, index=True)
     uid = Column(Integer, nullable=False)
-    country = Column(String, nullable=False)
+    country_id = Column(LookupKey, ForeignKey("countries.id"), nullable=False, index=True)
     main_entry = Column(Boolean, nullable=False)
     sdn_entity_id = Column(Integer, ForeignKey("sdn_entities.id"))
     # Relationships
+    country = relationship("Country")
     sdn_entity = relationship("SDNEntity", back_populates="citizenships")
 
 
@@ -152,22 +250,40 @@ class Address(Base):
     city = Column(String, nullable=True)
     state_or_province = Column(String, nullable=True)
     postal_code = Column(String, nullable=True)
-    country = Column(String, nullable=True)
+    country_id = Column(LookupKey, ForeignKey("countries.id"), nullable=True, index=True)
+    # Copy of the country name kept by the loader for the address search vector
+    country_name = Column(String, nullable=True)
     region = Column(String, nullable=True)
-    sdn_entity_id = Column(Integer, ForeignKey("sdn_entities.id"))
+    sdn_entity_id = Column(Integer, ForeignKey("sdn_entities.id"), index=True)
     # Relationships
+    country = relationship("Country")
     sdn_entity = relationship("SDNEntity", back_populates="addresses")
 
 
+# Full-text search vector over the concatenated address fields.
+# Generated columns cannot read the country lookup table, so the vector uses the denormalized country name.
+event.listen(Address.__table__,
+             "after_create",
+             DDL("ALTER TABLE %(table)s ADD COLUMN address_tsv tsvector "
+                 "GENERATED ALWAYS AS (to_tsvector('simple'::regconfig, "
+                 "coalesce(address1, '') || ' ' || coalesce(address2, '') || ' ' || coalesce(address3, '') || ' ' || "
+                 "coalesce(city, '') || ' ' || coalesce(state_or_province, '') || ' ' || "
+                 "coalesce(postal_code, '') || ' ' || coalesce(country_name, '') || ' ' || "
+                 "coalesce(region, ''))) STORED; "
+                 "CREATE INDEX ix_addresses_address_tsv ON %(table)s USING gin (address_tsv)")
+             .execute_if(dialect="postgresql"))
+
+
 class Program(Base):
     """
     SQLAlchemy model for storing programs.
     """
     __tablename__ = "programs"
     id = Column(Integer, primary_key=True, index=True)
-    name = Column(String, nullable=False)
+    program_id = Column(LookupKey, ForeignKey("sanctions_programs.id"), nullable=False, index=True)
     sdn_entity_id = Column(Integer, ForeignKey("sdn_entities.id"))
     # Relationships
+    program = relationship("SanctionsProgram")
     sdn_entity = relationship("SDNEntity", back_populates="programs")
 
 
@@ -178,10 +294,11 @@ class Nationality(Base):
     __tablename__ = "nationalities"
     id = Column(Integer, primary_key=True, index=True)
     uid = Column(Integer, nullable=False)
-    country = Column(String, nullable=False)
+    country_id = Column(LookupKey, ForeignKey("countries.id"), nullable=False, index=True)
     main_entry = Column(Boolean, nullable=False)
     sdn_entity_id = Column(Integer, ForeignKey("sdn_entities.id"))
     # Relationships
+    country = relationship("Country")
     sdn_entity = relationship("SDNEntity", back_populates="nationalities")
 
 
@@ -195,8 +312,184 @@ class Vessel(Base):
     vessel_type = Column(String, nullable=True)
     vessel_flag = Column(String, nullable=True)
     vessel_owner = Column(String, nullable=True)
-    tonnage = Column(Integer, nullable=True)
-    gross_registered_tonnage = Column(Integer, nullable=True)
+    tonnage = Column(Float, nullable=True, index=True)
+    gross_registered_tonnage = Column(Float, nullable=True, index=True)
     sdn_entity_id = Column(Integer, ForeignKey("sdn_entities.id"))
     # Relationships
-    sdn_entity = relationship("SDNEntity", uselist=False)
\ No newline at end of file
+    sdn_entity = relationship("SDNEntity", uselist=False)
+
+
+class SDNEntityDocument(Base):
+    """
+    SQLAlchemy model for storing the fully assembled entity as a single document.
+    """
+    __tablename__ = "sdn_entity_documents"
+    uid = Column(Integer, primary_key=True)
+    content_hash = Column(String(64), nullable=False)
+    document = Column(JSON().with_variant(JSONB(), "postgresql"), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        Index("ix_sdn_entity_documents_document", document, postgresql_using="gin"),
+    )
+
+
+class SDNEntityVersion(Base):
+    """
+    SQLAlchemy model for storing the history of the entity documents.
+    Each row is the state of an entity over its validity range [valid_from, valid_to),
+    in publication time, and recorded_at is the time it was ingested.
+    Only entities that changed in a publication get a new row.
+    """
+    __tablename__ = "sdn_entity_versions"
+    id = Column(BigInteger().with_variant(Integer(), "sqlite"), primary_key=True)
+    uid = Column(Integer, nullable=False)
+    valid_from = Column(DateTime(timezone=True), nullable=False)
+    valid_to = Column(DateTime(timezone=True), nullable=True)
+    recorded_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    content_hash = Column(String(64), nullable=False)
+    document = Column(JSON().with_variant(JSONB(), "postgresql"), nullable=False)
+
+    __table_args__ = (
+        # At most one open version per entity, also used to diff each publication
+        Index("ix_sdn_entity_versions_open_uid",
+              "uid",
+              unique=True,
+              postgresql_where=valid_to.is_(None),
+              sqlite_where=valid_to.is_(None)),
+        # History survives the staging swap and rollback
+        {"info": {"publication": False}},
+    )
+
+
+# Range index over the validity, so that as-of lookups are index scans
+event.listen(SDNEntityVersion.__table__,
+             "after_create",
+             DDL("CREATE INDEX ix_sdn_entity_versions_validity ON %(table)s "
+                 "USING gist (uid, tstzrange(valid_from, valid_to))")
+             .execute_if(dialect="postgresql"))
+
+
+class SDNChangeSet(Base):
+    """
+    SQLAlchemy model for storing the entity changes of each publication, diffed against the history.
+    children maps each added, modified or removed UID to the child entries added and removed per document key,
+    e.g. {"123": {"aka_list": {"added": [...], "removed": [...]}}}.
+    links holds the resolved entity links added and removed by a link enrichment run, e.g.
+    {"added": [{"source_uid": 1, "target_uid": 2, "relationship_type": "LINKED_TO", "origin": "remarks"}], "removed": []},
+    None when the change set has no link changes.
+    graph_applied_at is set once the graph has caught up with the change set.
+    """
+    __tablename__ = "sdn_change_sets"
+    id = Column(BigInteger().with_variant(Integer(), "sqlite"), primary_key=True)
+    valid_from = Column(DateTime(timezone=True), nullable=False)
+    recorded_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    added = Column(JSON().with_variant(JSONB(), "postgresql"), nullable=False)
+    modified = Column(JSON().with_variant(JSONB(), "postgresql"), nullable=False)
+    removed = Column(JSON().with_variant(JSONB(), "postgresql"), nullable=False)
+    children = Column(JSON().with_variant(JSONB(), "postgresql"), nullable=False)
+    links = Column(JSON().with_variant(JSONB(), "postgresql"), nullable=True)
+    graph_applied_at = Column(DateTime(timezone=True), nullable=True, index=True)
+
+    # Change sets describe the transitions between generations, so they survive the staging swap
+    __table_args__ = {"info": {"publication": False}}
+
+
+class SDNEntityLink(Base):
+    """
+    SQLAlchemy model for storing the references between entities found in the remarks and ID entries,
+    e.g. "Linked To: ...". Unresolved references are kept with a NULL target_uid.
+    """
+    __tablename__ = "sdn_entity_links"
+    id = Column(Integer, primary_key=True)
+    source_uid = Column(Integer, nullable=False, index=True)
+    target_uid = Column(Integer, nullable=True, index=True)
+    relationship_type = Column(String(64), nullable=False)
+    target_name = Column(Text, nullable=False)
+    origin = Column(String(16), nullable=False)
+    resolution = Column(String(16), nullable=True)
+
+    # Derived from the entity documents by the enrichment run, not loaded from the publication
+    __table_args__ = {"info": {"publication": False}}
+
+
+class OwnershipRecord(Base):
+    """
+    SQLAlchemy model for storing ownership stakes imported from sources outside the publication,
+    e.g. corporate registries. The list only names the owners of listed entities, so these records are
+    what reaches the unlisted companies the 50% rule applies to.
+    Each party is given by the UID of a listed entity or, if it is not listed, by its name.
+    """
+    __tablename__ = "ownership_records"
+    id = Column(Integer, primary_key=True)
+    source = Column(String(64), nullable=False, index=True)
+    owner_uid = Column(Integer, nullable=True)
+    owner_name = Column(Text, nullable=True)
+    owned_uid = Column(Integer, nullable=True)
+    owned_name = Column(Text, nullable=True)
+    share = Column(Float, nullable=False)
+    imported_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    # Imported apart from the publication, so kept across the staging swap
+    __table_args__ = {"info": {"publication": False}}
+
+
+class OwnershipEdge(Base):
+    """
+    SQLAlchemy model for storing the ownership edges the ownership flags were last computed from,
+    i.e. the ownership links and the imported ownership records, so that the next run only recomputes
+    downstream of the edges that changed.
+    Parties that are not listed entities have a negative synthetic UID derived from their name.
+    owner_listed and owned_listed record whether each party was listed, as listing or delisting a party
+    changes what it blocks and whether it is flagged itself.
+    """
+    __tablename__ = "ownership_edges"
+    owner_uid = Column(BigInteger, primary_key=True)
+    owned_uid = Column(BigInteger, primary_key=True)
+    share = Column(Float, nullable=False)
+    relationship_type = Column(String(64), nullable=False)
+    owner_listed = Column(Boolean, nullable=False)
+    owned_listed = Column(Boolean, nullable=False)
+    owner_name = Column(Text, nullable=True)
+    owned_name = Column(Text, nullable=True)
+
+    # Derived from the entity links and ownership records, not loaded from the publication
+    __table_args__ = {"info": {"publication": False}}
+
+
+class OwnershipFlag(Base):
+    """
+    SQLAlchemy model for storing the entities blocked by ownership under the 50% rule.
+    Only parties that are not listed themselves are flagged; uid is a synthetic UID for a party known by name only.
+    share is the aggregate ownership held by blocked parties, owners lists the blocked direct owners
+    with their share, and path is a chain of ownership from a listed entity down to the entity.
+    names maps the synthetic UIDs among them to their names.
+    """
+    __tablename__ = "ownership_flags"
+    uid = Column(BigInteger, primary_key=True)
+    share = Column(Float, nullable=False)
+    depth = Column(Integer, nullable=False, index=True)
+    owners = Column(JSON().with_variant(JSONB(), "postgresql"), nullable=False)
+    path = Column(JSON().with_variant(JSONB(), "postgresql"), nullable=False)
+    names = Column(JSON().with_variant(JSONB(), "postgresql"), nullable=True)
+    computed_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    # Derived from the entity links and ownership records, not loaded from the publication
+    __table_args__ = {"info": {"publication": False}}
+
+
+class EntityGraphMetrics(Base):
+    """
+    SQLAlchemy model for storing the network metrics of each entity, computed after each graph build.
+    """
+    __tablename__ = "entity_graph_metrics"
+    uid = Column(Integer, primary_key=True)
+    generation = Column(Integer, nullable=False)
+    component = Column(Integer, nullable=False, index=True)
+    component_size = Column(Integer, nullable=False)
+    degree = Column(Integer, nullable=False, index=True)
+    pagerank = Column(Float, nullable=False, index=True)
+    betweenness = Column(Float, nullable=False, index=True)
+
+    # Derived from the graph, not loaded from the publication
+    __table_args__ = {"info": {"publication": False}}
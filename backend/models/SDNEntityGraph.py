@@ -2,11 +2,20 @@
 
 # Import dependencies
 import logging
-from neomodel import StructuredNode, StringProperty, IntegerProperty, RelationshipTo, RelationshipFrom, BooleanProperty
+from neomodel import (StructuredNode, StructuredRel, StringProperty, IntegerProperty, FloatProperty, RelationshipTo,
+                      RelationshipFrom, BooleanProperty)
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+class MainEntryRel(StructuredRel):
+    main_entry = BooleanProperty()
+
+class IdentifierRel(StructuredRel):
+    id_country = StringProperty()
+    issue_date = StringProperty()
+    expiration_date = StringProperty()
+
 class SDNEntity(StructuredNode):
     uid = IntegerProperty(unique_index=True, required=True)
     first_name = StringProperty()
@@ -17,16 +26,18 @@ class SDNEntity(StructuredNode):
     # Define relationships
     addresses = RelationshipTo('Address', 'HAS_ADDRESS')
     programs = RelationshipTo('Program', 'ENROLLED_IN')
-    nationalities = RelationshipTo('Nationality', 'HAS_NATIONALITY')
+    nationalities = RelationshipTo('Country', 'HAS_NATIONALITY', model=MainEntryRel)
     vessel = RelationshipTo('Vessel', 'OWNS')
-    ids = RelationshipTo('ID', 'HAS_ID')
+    ids = RelationshipTo('Identifier', 'HAS_ID', model=IdentifierRel)
     aka_list = RelationshipTo('AKA', 'ALSO_KNOWN_AS')
     date_of_birth_list = RelationshipTo('DateOfBirth', 'BORN_ON')
     place_of_birth_list = RelationshipTo('PlaceOfBirth', 'BORN_AT')
-    citizenships = RelationshipTo('Citizenship', 'HOLDS_CITIZENSHIP')
+    citizenships = RelationshipTo('Country', 'HOLDS_CITIZENSHIP', model=MainEntryRel)
+
+# Hub nodes shared by every entity with the same attribute
 
 class Address(StructuredNode):
-    uid = IntegerProperty(required=True)
+    key = StringProperty(unique_index=True, required=True)
     address1 = StringProperty()
     address2 = StringProperty()
     address3 = StringProperty()
@@ -36,22 +47,28 @@ class Address(StructuredNode):
     country = StringProperty()
     region = StringProperty()
     sdn_entity = RelationshipFrom('SDNEntity', 'HAS_ADDRESS')
+    located_in = RelationshipTo('Country', 'LOCATED_IN')
 
 class Program(StructuredNode):
-    name = StringProperty(required=True)
+    name = StringProperty(unique_index=True, required=True)
     sdn_entity = RelationshipFrom('SDNEntity', 'ENROLLED_IN')
 
-class ID(StructuredNode):
-    uid = IntegerProperty(required=True)
+class Country(StructuredNode):
+    name = StringProperty(unique_index=True, required=True)
+    nationals = RelationshipFrom('SDNEntity', 'HAS_NATIONALITY', model=MainEntryRel)
+    citizens = RelationshipFrom('SDNEntity', 'HOLDS_CITIZENSHIP', model=MainEntryRel)
+    addresses = RelationshipFrom('Address', 'LOCATED_IN')
+
+class Identifier(StructuredNode):
+    key = StringProperty(unique_index=True, required=True)
     id_type = StringProperty()
     id_number = StringProperty()
-    id_country = StringProperty()
-    issue_date = StringProperty()
-    expiration_date = StringProperty()
-    sdn_entity = RelationshipFrom('SDNEntity', 'HAS_ID')
+    sdn_entity = RelationshipFrom('SDNEntity', 'HAS_ID', model=IdentifierRel)
+
+# Nodes owned by a single entity
 
 class AKA(StructuredNode):
-    uid = IntegerProperty(required=True)
+    uid = IntegerProperty(unique_index=True, required=True)
     type = StringProperty(required=True)
     category = StringProperty(required=True)
     last_name = StringProperty()
@@ -59,34 +76,23 @@ class AKA(StructuredNode):
     sdn_entity = RelationshipFrom('SDNEntity', 'ALSO_KNOWN_AS')
 
 class DateOfBirth(StructuredNode):
-    uid = IntegerProperty(required=True)
+    uid = IntegerProperty(unique_index=True, required=True)
     date_of_birth = StringProperty(required=True)
     main_entry = BooleanProperty(required=True)
     sdn_entity = RelationshipFrom('SDNEntity', 'BORN_ON')
 
 class PlaceOfBirth(StructuredNode):
-    uid = IntegerProperty(required=True)
+    uid = IntegerProperty(unique_index=True, required=True)
     place_of_birth = StringProperty(required=True)
     main_entry = BooleanProperty(required=True)
     sdn_entity = RelationshipFrom('SDNEntity', 'BORN_AT')
 
-class Citizenship(StructuredNode):
-    uid = IntegerProperty(required=True)
-    country = StringProperty(required=True)
-    main_entry = BooleanProperty(required=True)
-    sdn_entity = RelationshipFrom('SDNEntity', 'HOLDS_CITIZENSHIP')
-
-class Nationality(StructuredNode):
-    uid = IntegerProperty(required=True)
-    country = StringProperty(required=True)
-    main_entry = BooleanProperty(required=True)
-    sdn_entity = RelationshipFrom('SDNEntity', 'HAS_NATIONALITY')
-
 class Vessel(StructuredNode):
+    entity_uid = IntegerProperty(unique_index=True, required=True)
     call_sign = StringProperty()
     vessel_type = StringProperty()
     vessel_flag = StringProperty()
     vessel_owner = StringProperty()
-    tonnage = IntegerProperty()
-    gross_registered_tonnage = IntegerProperty()
+    tonnage = FloatProperty()
+    gross_registered_tonnage = FloatProperty()
     sdn_entity = RelationshipFrom('SDNEntity', 'OWNS')
\ No newline at end of file
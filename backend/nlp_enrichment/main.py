@@ -1 +1,40 @@
+# backend/nlp_enrichment/main.py
 
+# Import dependencies
+import logging
+from fastapi import FastAPI, APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+# Import custom modules
+from backend.data_layer.database import DatabaseManager
+from backend.nlp_enrichment.service import run_link_enrichment
+
+# Initialize the FastAPI router
+router = APIRouter()
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Initialize the database manager
+db_manager = DatabaseManager()
+
+@router.post("/links")
+def extract_links(db: Session = Depends(db_manager.get_db)) -> dict:
+    """
+    Extract the references between entities from their remarks and ID entries and store them as entity links.
+
+    Args:
+        db (Session): The database session.
+
+    Returns:
+        dict: The counters of the run, including the unresolved reference rate.
+    """
+    try:
+        return run_link_enrichment(db).to_dict()
+    except Exception as e:
+        logger.exception("Link enrichment failed.")
+        raise HTTPException(status_code=500, detail="An internal server error occurred.")
+
+# Initialize FastAPI app
+app = FastAPI()
+app.include_router(router, prefix="/enrichment", tags=["enrichment"])
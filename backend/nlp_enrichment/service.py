@@ -1 +1,311 @@
+# backend/nlp_enrichment/service.py
 
+# Import dependencies
+import logging
+import re
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Final, Iterable, Iterator
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
+
+# Import custom modules
+from backend.common.relationships import LINK_PATTERNS, LINK_RELATIONSHIPS
+from backend.common.utils import normalize_name
+from backend.data_layer.cache import bump_data_generation
+from backend.ingestion.changes import ChangeSet, diff_links, store_change_set
+from backend.models.SDNEntity import SDNEntityDocument, SDNEntityLink
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+_PHRASES = "|".join(f"(?P<{name}>{pattern})" for name, pattern in LINK_PATTERNS)
+
+# A phrase followed by a colon and the referenced name, up to the next separator; the colon keeps
+# prose such as "linked to shipping" out
+REMARKS_PATTERN: Final[re.Pattern] = re.compile(rf"\b(?:{_PHRASES})\s*:\s*(?P<target>[^;:()\[\]]+)", re.IGNORECASE)
+
+# An ID entry whose type is the phrase and whose number is the referenced name
+ID_TYPE_PATTERN: Final[re.Pattern] = re.compile(rf"\s*(?:{_PHRASES})\s*:?\s*", re.IGNORECASE)
+
+# Sentence breaks a captured name may run past, e.g. "Linked To: ACME LTD. Additional Sanctions Information"
+_SENTENCE_BREAK = re.compile(r"\.\s+")
+
+
+@dataclass
+class Reference:
+    """
+    A reference from an entity to another entity by name.
+    """
+    source_uid: int
+    relationship_type: str
+    target_name: str
+    origin: str
+    target_uid: int | None = None
+    resolution: str | None = None
+
+    def to_row(self) -> dict:
+        return {
+            "source_uid": self.source_uid,
+            "target_uid": self.target_uid,
+            "relationship_type": self.relationship_type,
+            "target_name": self.target_name,
+            "origin": self.origin,
+            "resolution": self.resolution,
+        }
+
+
+@dataclass
+class EnrichmentReport:
+    """
+    Counters of a link extraction run.
+    """
+    entities: int = 0
+    references: int = 0
+    resolved: int = 0
+    ambiguous: int = 0
+    by_relationship: Counter = field(default_factory=Counter)
+    by_resolution: Counter = field(default_factory=Counter)
+    stored: bool = False
+    seconds: float = 0.0
+
+    @property
+    def unresolved(self) -> int:
+        return self.references - self.resolved
+
+    @property
+    def unresolved_rate(self) -> float:
+        return self.unresolved / self.references if self.references else 0.0
+
+    def to_dict(self) -> dict:
+        """
+        Returns the counters as a JSON serializable dictionary.
+        """
+        return {
+            "entities": self.entities,
+            "references": self.references,
+            "resolved": self.resolved,
+            "unresolved": self.unresolved,
+            "ambiguous": self.ambiguous,
+            "unresolved_rate": round(self.unresolved_rate, 4),
+            "by_relationship": dict(self.by_relationship),
+            "by_resolution": dict(self.by_resolution),
+            "stored": self.stored,
+            "seconds": round(self.seconds, 3),
+        }
+
+
+def _relationship(match: re.Match) -> str:
+    """
+    Returns the relationship type of the phrase a pattern matched.
+    """
+    return next(name for name in LINK_RELATIONSHIPS if match.group(name) is not None)
+
+
+def _display_names(first_name: str | None, last_name: str | None) -> list[str]:
+    """
+    Returns the ways OFAC writes a name in a reference: "LAST, First" and "First LAST".
+    """
+    if first_name and last_name:
+        return [f"{last_name}, {first_name}", f"{first_name} {last_name}"]
+    return [name for name in (last_name, first_name) if name]
+
+
+class NameIndex:
+    """
+    Resolves entity names to UIDs, trying an exact match, then the normalized name,
+    then the normalized name regardless of word order. Built once per run from the entity documents.
+    """
+
+    RESOLUTIONS: Final[tuple[str, ...]] = ("exact", "normalized", "tokens")
+
+    def __init__(self):
+        self._keys = {resolution: defaultdict(set) for resolution in self.RESOLUTIONS}
+
+    @staticmethod
+    def keys(name: str) -> dict[str, str]:
+        """
+        Returns the lookup key of a name for each resolution; the token key sorts the words of the normalized name.
+        """
+        normalized = normalize_name(name)
+        return {"exact": name.strip(" .").casefold(),
+                "normalized": normalized,
+                "tokens": " ".join(sorted(normalized.split()))}
+
+    def add(self, uid: int, name: str) -> None:
+        for resolution, key in self.keys(name).items():
+            if key:
+                self._keys[resolution][key].add(uid)
+
+    @classmethod
+    def from_documents(cls, documents: Iterable[dict]) -> "NameIndex":
+        """
+        Index the primary name and the aliases of each entity.
+        Args:
+            documents (Iterable[dict]): The entity documents.
+        Returns:
+            NameIndex: The index.
+        """
+        index = cls()
+        for document in documents:
+            names = [(document.get("first_name"), document.get("last_name"))]
+            names += [(aka.get("first_name"), aka.get("last_name")) for aka in document.get("aka_list", [])]
+            for first_name, last_name in names:
+                for name in _display_names(first_name, last_name):
+                    index.add(document["uid"], name)
+        return index
+
+    def resolve(self, name: str, exclude: int | None = None) -> tuple[int | None, str | None]:
+        """
+        Resolve a name to a single UID.
+        Args:
+            name (str): The referenced name.
+            exclude (int | None): A UID that cannot be the answer, i.e. the referring entity.
+        Returns:
+            tuple[int | None, str | None]: The UID and the resolution that found it, (None, "ambiguous")
+                if a resolution matched several entities, (None, None) if none matched.
+        """
+        for resolution, key in self.keys(name).items():
+            uids = self._keys[resolution].get(key, set()) - {exclude}
+            if len(uids) == 1:
+                return next(iter(uids)), resolution
+            if uids:
+                return None, "ambiguous"
+        return None, None
+
+
+def extract_references(document: dict) -> Iterator[Reference]:
+    """
+    Extract the references to other entities from the remarks and ID entries of an entity document.
+    Args:
+        document (dict): The entity document.
+    Yields:
+        Reference: The unresolved references.
+    """
+    uid = document["uid"]
+    for match in REMARKS_PATTERN.finditer(document.get("remarks") or ""):
+        target = match.group("target").strip(" .,")
+        if target:
+            yield Reference(uid, _relationship(match), target, "remarks")
+    for id_elem in document.get("ids", []):
+        match = ID_TYPE_PATTERN.fullmatch(id_elem.get("id_type") or "")
+        target = (id_elem.get("id_number") or "").strip(" .,")
+        if match and target:
+            yield Reference(uid, _relationship(match), target, "ids")
+
+
+def resolve_reference(reference: Reference, index: NameIndex) -> Reference:
+    """
+    Resolve the target of a reference, cutting the captured name at sentence breaks from the longest candidate
+    down, as a name may end with an abbreviation such as "CO." or be followed by another sentence.
+    Args:
+        reference (Reference): The reference.
+        index (NameIndex): The name index.
+    Returns:
+        Reference: The reference, with its target UID and resolution set when found.
+    """
+    breaks = [match.start() for match in _SENTENCE_BREAK.finditer(reference.target_name)]
+    candidates = [reference.target_name] + [reference.target_name[:end] for end in reversed(breaks)]
+    for candidate in candidates:
+        uid, resolution = index.resolve(candidate, exclude=reference.source_uid)
+        if resolution is not None:
+            reference.target_uid, reference.resolution = uid, resolution
+            if uid is not None:
+                reference.target_name = candidate
+                return reference
+    # Report the shortest candidate, as the text after a sentence break is unlikely to be part of the name
+    if reference.resolution is None:
+        reference.target_name = candidates[-1]
+    return reference
+
+
+def extract_entity_links(documents: list[dict]) -> tuple[list[Reference], EnrichmentReport]:
+    """
+    Extract and resolve the references between entities.
+    Args:
+        documents (list[dict]): The entity documents of the whole list, as references may point to any entity.
+    Returns:
+        tuple[list[Reference], EnrichmentReport]: The references, resolved or not, and the counters.
+    """
+    started = time.perf_counter()
+    index = NameIndex.from_documents(documents)
+    report = EnrichmentReport(entities=len(documents))
+    references = []
+    for document in documents:
+        for reference in extract_references(document):
+            resolve_reference(reference, index)
+            references.append(reference)
+            report.by_relationship[reference.relationship_type] += 1
+            if reference.resolution is not None:
+                report.by_resolution[reference.resolution] += 1
+            if reference.target_uid is not None:
+                report.resolved += 1
+            elif reference.resolution == "ambiguous":
+                report.ambiguous += 1
+    report.references = len(references)
+    report.seconds = time.perf_counter() - started
+    return references, report
+
+
+def _resolved_links(rows: list[dict]) -> list[dict]:
+    """
+    Returns the graph edges of the resolved link rows.
+    """
+    return [{"source_uid": row["source_uid"], "target_uid": row["target_uid"],
+             "relationship_type": row["relationship_type"], "origin": row["origin"]}
+            for row in rows if row["target_uid"] is not None]
+
+
+def store_entity_links(db: Session, references: list[Reference]) -> bool:
+    """
+    Replace the stored entity links in a single transaction, bumping the data generation
+    so that the in-memory graph is rebuilt with the new edges, and recording the resolved links
+    added and removed as a change set, so that the graph can apply them incrementally.
+    Nothing is written if the links did not change.
+    Args:
+        db (Session): The database session.
+        references (list[Reference]): The references.
+    Returns:
+        bool: Whether the links changed.
+    Raises:
+        RuntimeError: If the links could not be stored.
+    """
+    rows = [reference.to_row() for reference in references]
+    columns = ("source_uid", "target_uid", "relationship_type", "target_name", "origin", "resolution")
+    try:
+        existing = [dict(zip(columns, row)) for row in db.execute(select(*(getattr(SDNEntityLink, c) for c in columns)))]
+        if Counter(tuple(row[c] for c in columns) for row in existing) == \
+                Counter(tuple(row[c] for c in columns) for row in rows):
+            return False
+        db.execute(delete(SDNEntityLink))
+        if rows:
+            db.execute(insert(SDNEntityLink), rows)
+        links = diff_links(_resolved_links(existing), _resolved_links(rows))
+        store_change_set(db, ChangeSet(links=links), datetime.now(timezone.utc))
+        bump_data_generation(db)
+        db.commit()
+        logger.info(f"Stored {len(rows)} entity links.")
+        return True
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Failed to store entity links: {e}")
+        raise RuntimeError("Failed to store entity links.") from e
+
+
+def run_link_enrichment(db: Session) -> EnrichmentReport:
+    """
+    Extract the references between all entities, resolve them and store them as entity links.
+    Args:
+        db (Session): The database session.
+    Returns:
+        EnrichmentReport: The counters of the run, including the unresolved reference rate.
+    """
+    started = time.perf_counter()
+    documents = db.execute(select(SDNEntityDocument.document).order_by(SDNEntityDocument.uid)).scalars().all()
+    references, report = extract_entity_links(documents)
+    report.stored = store_entity_links(db, references)
+    report.seconds = time.perf_counter() - started
+    logger.info(f"Link enrichment completed: {report.to_dict()}")
+    return report
@@ -0,0 +1,178 @@
+# tests/test_cache.py
+
+import json
+import numpy as np
+import pytest
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from unittest.mock import patch, MagicMock
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from backend.data_layer import cache
+from backend.data_layer.cache import (
+    MISSING,
+    LRUCache,
+    LocalCacheBackend,
+    QueryCache,
+    get_data_generation,
+    bump_data_generation,
+    estimate_size,
+    get_shared_backend,
+    dump_value,
+    load_value
+)
+from backend.models.base import Base
+
+@pytest.fixture
+def sqlite_session():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(bind=engine)
+    with Session(bind=engine) as session:
+        yield session
+
+@pytest.fixture
+def clock():
+    """Controls time.monotonic as seen by the cache module."""
+    with patch("backend.data_layer.cache.time.monotonic") as mock_monotonic:
+        mock_monotonic.return_value = 1000.0
+        yield mock_monotonic
+
+def test_data_generation(sqlite_session):
+    assert get_data_generation(sqlite_session) == 0
+    assert bump_data_generation(sqlite_session) == 1
+    assert bump_data_generation(sqlite_session) == 2
+    sqlite_session.commit()
+    assert get_data_generation(sqlite_session) == 2
+
+def test_data_generation_rolled_back_with_transaction(sqlite_session):
+    bump_data_generation(sqlite_session)
+    sqlite_session.commit()
+    bump_data_generation(sqlite_session)
+    sqlite_session.rollback()
+    assert get_data_generation(sqlite_session) == 1
+
+def test_lru_cache_evicts_least_recently_used():
+    lru = LRUCache(max_entries=2, ttl_seconds=None)
+    lru.set("a", 1)
+    lru.set("b", 2)
+    assert lru.get("a") == 1
+    lru.set("c", 3)
+    assert lru.get("b") is MISSING
+    assert lru.get("a") == 1 and lru.get("c") == 3
+    assert lru.stats() == {"entries": 2, "hits": 3, "misses": 1, "evictions": 1}
+
+def test_lru_cache_ttl(clock):
+    lru = LRUCache(max_entries=10, ttl_seconds=5)
+    lru.set("a", None)
+    assert lru.get("a") is None
+    clock.return_value += 6
+    assert lru.get("a") is MISSING
+    assert len(lru) == 0
+
+def test_local_backend_ttl(clock):
+    backend = LocalCacheBackend()
+    backend.set("a", "1", ttl_seconds=5)
+    assert backend.get("a") == "1"
+    clock.return_value += 6
+    assert backend.get("a") is None
+
+def test_local_backend_is_bounded():
+    backend = LocalCacheBackend(max_entries=2)
+    for generation in range(5):
+        backend.set(QueryCache.make_key("entity", 1, generation), "1")
+    # Keys of older generations are evicted without being read
+    assert len(backend) == 2
+    assert backend.get(QueryCache.make_key("entity", 1, 0)) is None
+    assert backend.get(QueryCache.make_key("entity", 1, 4)) == "1"
+
+def test_dump_value_round_trip():
+    value = {"valid_from": datetime(2025, 1, 15, 12, 30, tzinfo=timezone.utc), "dob": date(1970, 1, 1),
+             "share": Decimal("0.25"), "versions": [{"valid_to": None, "nested": [datetime(2025, 2, 1)]}]}
+    assert load_value(dump_value(value)) == value
+    with pytest.raises(TypeError):
+        dump_value({"value": object()})
+
+def test_get_shared_backend_defaults_to_local(monkeypatch):
+    monkeypatch.delenv("CACHE_REDIS_URL", raising=False)
+    assert isinstance(get_shared_backend(), LocalCacheBackend)
+
+@patch("backend.data_layer.cache.importlib.import_module")
+def test_get_shared_backend_redis(mock_import_module, monkeypatch):
+    monkeypatch.setenv("CACHE_REDIS_URL", "redis://localhost:6379/0")
+    backend = get_shared_backend()
+    assert isinstance(backend, cache.RedisCacheBackend)
+    mock_import_module.return_value.Redis.from_url.assert_called_once_with("redis://localhost:6379/0")
+
+@patch("backend.data_layer.cache.importlib.import_module", side_effect=ImportError("No module named 'redis'"))
+def test_redis_backend_missing_package(mock_import_module):
+    with pytest.raises(RuntimeError, match="The redis package is not installed."):
+        cache.RedisCacheBackend("redis://localhost:6379/0")
+
+def test_query_cache_key_includes_generation():
+    assert QueryCache.make_key("entity", 1, 1) != QueryCache.make_key("entity", 1, 2)
+    assert QueryCache.make_key("search", {"a": 1, "b": 2}, 1) == QueryCache.make_key("search", {"b": 2, "a": 1}, 1)
+
+def test_query_cache_get_or_compute():
+    query_cache = QueryCache(local=LRUCache(max_entries=10), shared=LocalCacheBackend(), ttl_seconds=60)
+    compute = MagicMock(return_value={"uid": 1})
+
+    assert query_cache.get_or_compute("entity", 1, 1, compute) == {"uid": 1}
+    assert query_cache.get_or_compute("entity", 1, 1, compute) == {"uid": 1}
+    compute.assert_called_once()
+
+    # A new generation misses both tiers
+    query_cache.get_or_compute("entity", 1, 2, compute)
+    assert compute.call_count == 2
+
+def test_query_cache_reads_shared_tier():
+    shared = LocalCacheBackend()
+    shared.set(QueryCache.make_key("entity", 1, 1), json.dumps({"uid": 1}))
+    query_cache = QueryCache(local=LRUCache(max_entries=10), shared=shared, ttl_seconds=60)
+    compute = MagicMock()
+
+    assert query_cache.get_or_compute("entity", 1, 1, compute) == {"uid": 1}
+    compute.assert_not_called()
+    # The shared hit is promoted to the local tier
+    assert len(query_cache.local) == 1
+
+def test_query_cache_shared_hit_preserves_types():
+    shared = LocalCacheBackend()
+    value = [{"uid": 1, "valid_from": datetime(2025, 1, 15, tzinfo=timezone.utc), "valid_to": None}]
+    QueryCache(local=LRUCache(max_entries=10), shared=shared, ttl_seconds=60).get_or_compute(
+        "history", 1, 1, lambda: value)
+
+    # Another replica: an empty local tier served from the shared tier
+    replica = QueryCache(local=LRUCache(max_entries=10), shared=shared, ttl_seconds=60)
+    assert replica.get_or_compute("history", 1, 1, MagicMock()) == value
+
+def test_query_cache_keeps_unserializable_results_local():
+    shared = LocalCacheBackend()
+    query_cache = QueryCache(local=LRUCache(max_entries=10), shared=shared, ttl_seconds=60)
+    value = {"value": object()}
+    assert query_cache.get_or_compute("entity", 1, 1, lambda: value) is value
+    assert len(shared) == 0
+
+def test_query_cache_survives_shared_backend_failure():
+    shared = MagicMock()
+    shared.get.side_effect = ConnectionError("down")
+    shared.set.side_effect = ConnectionError("down")
+    query_cache = QueryCache(local=LRUCache(max_entries=10), shared=shared, ttl_seconds=60)
+    assert query_cache.get_or_compute("entity", 1, 1, lambda: 42) == 42
+
+def test_lru_cache_memory_bound():
+    lru = LRUCache(max_entries=10, ttl_seconds=None, max_bytes=10, sizeof=len)
+    lru.set("a", b"1234")
+    lru.set("b", b"1234")
+    lru.set("c", b"1234")
+    assert lru.get("a") is MISSING
+    assert lru.nbytes == 8 and lru.stats()["evictions"] == 1
+    # Values larger than the whole bound are not cached
+    lru.set("d", b"12345678901")
+    assert lru.get("d") is MISSING and lru.nbytes == 8
+    lru.set("b", b"1")
+    assert lru.nbytes == 5
+
+def test_estimate_size():
+    assert estimate_size(b"abc") == 3
+    assert estimate_size(np.zeros(4, dtype=np.int32)) == 16
+    assert estimate_size({"a": [b"xy", "z"]}) == 4
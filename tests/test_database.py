@@ -186,4 +186,26 @@ def test_get_db_sqlite(sqlite_manager):
 
     db.close()  # Close the session explicitly
     with pytest.raises(StopIteration):
-        next(generator)
\ No newline at end of file
+        next(generator)
+# Test the embedded profile
+def test_construct_database_url_from_database_url(monkeypatch):
+    monkeypatch.setenv("DATABASE_URL", "sqlite:////data/snapshot.db")
+    manager = DatabaseManager()
+    assert manager._db_url == "sqlite:////data/snapshot.db"
+
+def test_construct_database_url_sqlite_backend(monkeypatch, tmp_path):
+    monkeypatch.setenv("DB_BACKEND", "sqlite")
+    monkeypatch.setenv("SQLITE_PATH", str(tmp_path / "embedded.db"))
+    manager = DatabaseManager()
+    assert manager._db_url == f"sqlite:///{tmp_path / 'embedded.db'}"
+
+def test_construct_database_url_unsupported_backend(monkeypatch):
+    monkeypatch.setenv("DB_BACKEND", "oracle")
+    with pytest.raises(ValueError, match="Unsupported database backend"):
+        DatabaseManager()
+
+def test_sqlite_engine_uses_wal(tmp_path):
+    manager = DatabaseManager(f"sqlite:///{tmp_path / 'embedded.db'}")
+    with manager.engine.connect() as connection:
+        assert connection.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+        assert connection.exec_driver_sql("PRAGMA foreign_keys").scalar() == 1
@@ -0,0 +1,156 @@
+# tests/test_entities_main.py
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from backend.data_layer.cache import QueryCache, LRUCache, LocalCacheBackend, bump_data_generation
+from backend.entities import main
+from backend.entities.main import app, db_manager
+from backend.models.base import Base
+from backend.models.SDNEntity import SDNEntityDocument
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)
+
+@pytest.fixture(autouse=True)
+def fresh_cache(monkeypatch):
+    monkeypatch.setattr(main, "query_cache", QueryCache(local=LRUCache(), shared=LocalCacheBackend(), ttl_seconds=60))
+
+@pytest.fixture
+def client(session_factory):
+    def override_get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+    app.dependency_overrides[db_manager.get_db] = override_get_db
+    with TestClient(app) as client:
+        yield client
+    app.dependency_overrides.clear()
+
+def test_get_entity(client, session_factory):
+    with session_factory() as db:
+        db.add(SDNEntityDocument(uid=123, content_hash="abc", document={"uid": 123, "last_name": "Doe"}))
+        db.commit()
+
+    response = client.get("/entities/123")
+    assert response.status_code == 200
+    assert response.json() == {"uid": 123, "last_name": "Doe"}
+
+def test_get_entity_not_found(client):
+    response = client.get("/entities/999")
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Entity 999 not found"
+
+def test_search_entity_names(client, mocker):
+    search_mock = mocker.patch("backend.entities.main.search_names", return_value=[{"uid": 1, "score": 0.8}])
+    response = client.get("/entities/search/names", params={"q": "doe", "limit": 5})
+    assert response.status_code == 200
+    assert response.json() == {"query": "doe", "results": [{"uid": 1, "score": 0.8}]}
+    assert search_mock.call_args.kwargs == {"limit": 5, "threshold": 0.3}
+
+def test_search_entity_text(client, mocker):
+    page = {"results": [{"uid": 1, "rank": 0.5, "remarks_headline": None, "address_headline": None}], "next_cursor": None}
+    mocker.patch("backend.entities.main.search_text", return_value=page)
+    response = client.get("/entities/search/text", params={"q": "imo 1234567"})
+    assert response.status_code == 200
+    assert response.json() == page
+
+def test_search_entity_text_invalid_cursor(client):
+    response = client.get("/entities/search/text", params={"q": "imo", "cursor": "garbage"})
+    assert response.status_code == 400
+
+    # Well-formed JSON that is not a (rank, uid) pair
+    response = client.get("/entities/search/text", params={"q": "imo", "cursor": "WzEsIDIsIDNd"})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor."
+
+def test_get_entity_cached_until_generation_changes(client, session_factory, mocker):
+    with session_factory() as db:
+        db.add(SDNEntityDocument(uid=1, content_hash="a", document={"uid": 1, "remarks": "old"}))
+        db.commit()
+    spy = mocker.spy(main, "get_entity_document")
+
+    assert client.get("/entities/1").json()["remarks"] == "old"
+    assert client.get("/entities/1").json()["remarks"] == "old"
+    assert spy.call_count == 1
+
+    # Ingestion commits new data together with a new generation
+    with session_factory() as db:
+        db.get(SDNEntityDocument, 1).document = {"uid": 1, "remarks": "new"}
+        bump_data_generation(db)
+        db.commit()
+    assert client.get("/entities/1").json()["remarks"] == "new"
+    assert spy.call_count == 2
+
+def test_get_programs(client, mocker):
+    mocker.patch("backend.entities.main.list_programs", return_value=[{"name": "SDGT", "entity_count": 2}])
+    response = client.get("/entities/programs")
+    assert response.status_code == 200
+    assert response.json() == [{"name": "SDGT", "entity_count": 2}]
+
+def test_get_entity_as_of(client, mocker):
+    get_mock = mocker.patch("backend.entities.main.get_entity_document", return_value={"uid": 1})
+    response = client.get("/entities/1", params={"as_of": "2025-01-15T00:00:00Z"})
+    assert response.status_code == 200
+    assert get_mock.call_args.kwargs["as_of"].year == 2025
+
+def test_get_entity_history(client, mocker):
+    versions = [{"valid_from": "2025-01-01T00:00:00+00:00", "valid_to": None,
+                 "recorded_at": "2025-01-01T01:00:00+00:00", "content_hash": "a"}]
+    mocker.patch("backend.entities.main.get_entity_history", return_value=versions)
+    response = client.get("/entities/1/history")
+    assert response.status_code == 200
+    assert response.json() == versions
+
+def test_get_entity_history_not_found(client, mocker):
+    mocker.patch("backend.entities.main.get_entity_history", return_value=[])
+    assert client.get("/entities/1/history").status_code == 404
+
+def test_get_entities_as_of_with_filters(client):
+    response = client.get("/entities", params={"as_of": "2025-01-15T00:00:00Z", "program": "SDGT"})
+    assert response.status_code == 400
+
+def test_get_countries(client, mocker):
+    mocker.patch("backend.entities.main.list_countries", return_value=[{"name": "Iran", "entity_count": 3}])
+    response = client.get("/entities/countries")
+    assert response.status_code == 200
+    assert response.json() == [{"name": "Iran", "entity_count": 3}]
+
+def test_get_entities(client, mocker):
+    page = {"results": [{"id": 1, "uid": 10, "first_name": None, "last_name": "Doe", "sdn_type": "Individual"}],
+            "next_cursor": None}
+    list_mock = mocker.patch("backend.entities.main.list_entities", return_value=page)
+    response = client.get("/entities", params={"limit": 1, "program": "SDGT"})
+    assert response.status_code == 200
+    assert response.json() == page
+    assert list_mock.call_args.kwargs["program"] == "SDGT"
+
+def test_export_entities(client, session_factory, mocker):
+    with session_factory() as db:
+        for uid in (2, 1):
+            db.add(SDNEntityDocument(uid=uid, content_hash=str(uid), document={"uid": uid}))
+        db.commit()
+
+    def get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+    mocker.patch.object(db_manager, "get_db", get_db)
+
+    response = client.get("/entities/export")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert response.text == '{"uid":1}\n{"uid":2}\n'
+
+    response = client.get("/entities/export", params={"format": "csv"})
+    assert response.headers["content-type"].startswith("text/csv")
+    assert response.text.splitlines()[1].startswith("1,")
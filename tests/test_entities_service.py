@@ -0,0 +1,278 @@
+# tests/test_entities_service.py
+
+import base64
+import csv
+import io
+import json
+import pytest
+from datetime import date, datetime, timezone
+from unittest.mock import MagicMock
+from sqlalchemy import create_engine
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+from backend.entities.service import (
+    get_entity_document,
+    get_entity_history,
+    list_entities,
+    list_programs,
+    list_countries,
+    iter_entity_documents,
+    export_ndjson,
+    export_csv,
+    search_names,
+    search_text,
+    encode_cursor,
+    decode_cursor
+)
+from backend.models.base import Base
+from backend.models.SDNEntity import (
+    SDNEntity, AKA, Program, Nationality, Address, DateOfBirth, Vessel, SDNEntityDocument,
+    SanctionsProgram, Country, FacetCount, SDNEntityVersion
+)
+from backend.entities import service
+
+@pytest.fixture
+def sqlite_session():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(bind=engine)
+    with Session(bind=engine) as session:
+        yield session
+
+@pytest.fixture
+def postgresql_session():
+    db = MagicMock(spec=Session)
+    db.get_bind.return_value.dialect.name = "postgresql"
+    return db
+
+def compiled(statement):
+    return str(statement.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+
+def test_get_entity_document(sqlite_session):
+    sqlite_session.add(SDNEntityDocument(uid=1, content_hash="h", document={"uid": 1}))
+    sqlite_session.commit()
+    assert get_entity_document(1, sqlite_session) == {"uid": 1}
+    assert get_entity_document(2, sqlite_session) is None
+
+@pytest.fixture
+def history_session(sqlite_session):
+    jan, feb = datetime(2025, 1, 1, tzinfo=timezone.utc), datetime(2025, 2, 1, tzinfo=timezone.utc)
+    sqlite_session.add_all([
+        SDNEntityVersion(uid=1, valid_from=jan, valid_to=feb, content_hash="a",
+                         document={"uid": 1, "last_name": "Old", "sdn_type": "Individual"}),
+        SDNEntityVersion(uid=1, valid_from=feb, valid_to=None, content_hash="b",
+                         document={"uid": 1, "last_name": "New", "sdn_type": "Individual"}),
+        SDNEntityVersion(uid=2, valid_from=jan, valid_to=feb, content_hash="c",
+                         document={"uid": 2, "last_name": "Delisted", "sdn_type": "Entity"}),
+    ])
+    sqlite_session.commit()
+    return sqlite_session
+
+def test_get_entity_document_as_of(history_session):
+    assert get_entity_document(1, history_session, as_of=datetime(2025, 1, 15))["last_name"] == "Old"
+    assert get_entity_document(1, history_session, as_of=datetime(2025, 2, 1))["last_name"] == "New"
+    assert get_entity_document(2, history_session, as_of=datetime(2025, 1, 15))["last_name"] == "Delisted"
+    assert get_entity_document(2, history_session, as_of=datetime(2025, 3, 1)) is None
+    assert get_entity_document(1, history_session, as_of=datetime(2024, 12, 31)) is None
+
+def test_list_entities_as_of(history_session):
+    page = list_entities(history_session, as_of=datetime(2025, 1, 15), limit=1)
+    assert page["results"] == [{"uid": 1, "first_name": None, "last_name": "Old", "sdn_type": "Individual"}]
+    page = list_entities(history_session, as_of=datetime(2025, 1, 15), limit=1, after=page["next_cursor"])
+    assert [row["uid"] for row in page["results"]] == [2]
+    assert [row["uid"] for row in list_entities(history_session, as_of=datetime(2025, 3, 1))["results"]] == [1]
+    with pytest.raises(ValueError, match="Filters are not supported"):
+        list_entities(history_session, as_of=datetime(2025, 3, 1), program="SDGT")
+
+def test_get_entity_history(history_session):
+    history = get_entity_history(1, history_session)
+    assert [version["content_hash"] for version in history] == ["a", "b"]
+    assert history[1]["valid_to"] is None
+
+def test_valid_at_uses_range_containment_on_postgresql():
+    db = MagicMock()
+    db.get_bind.return_value.dialect.name = "postgresql"
+    condition = service._valid_at(datetime(2025, 1, 15), db)
+    assert "tstzrange(sdn_entity_versions.valid_from, sdn_entity_versions.valid_to) @>" in \
+        str(condition.compile(dialect=postgresql.dialect()))
+
+def test_list_facet_counts(sqlite_session):
+    sqlite_session.add_all([
+        FacetCount(facet="program", value="SDGT", entity_count=2),
+        FacetCount(facet="program", value="IRAN", entity_count=1),
+        FacetCount(facet="country", value="Iran", entity_count=3),
+    ])
+    sqlite_session.commit()
+    assert list_programs(sqlite_session) == [
+        {"name": "IRAN", "entity_count": 1},
+        {"name": "SDGT", "entity_count": 2}
+    ]
+    assert list_countries(sqlite_session) == [{"name": "Iran", "entity_count": 3}]
+
+@pytest.fixture
+def populated_session(sqlite_session):
+    sdgt, iran_program = SanctionsProgram(name="SDGT"), SanctionsProgram(name="IRAN")
+    iran = Country(name="Iran")
+    sqlite_session.add_all([
+        SDNEntity(uid=10, last_name="Alpha", sdn_type="Individual", programs=[Program(program=sdgt)],
+                  nationalities=[Nationality(uid=1, country=iran, main_entry=True)]),
+        SDNEntity(uid=11, last_name="Bravo", sdn_type="Entity", programs=[Program(program=iran_program)],
+                  addresses=[Address(uid=2, country=iran)]),
+        SDNEntity(uid=12, last_name="Charlie", sdn_type="Individual", programs=[Program(program=sdgt)]),
+    ])
+    for uid, name in ((10, "Alpha"), (11, "Bravo"), (12, "Charlie")):
+        document = {"uid": uid, "last_name": name, "programs": [], "nationalities": [], "citizenships": [], "aka_list": []}
+        sqlite_session.add(SDNEntityDocument(uid=uid, content_hash=str(uid), document=document))
+    sqlite_session.commit()
+    return sqlite_session
+
+def test_list_entities_keyset_pagination(populated_session):
+    first = list_entities(populated_session, limit=2)
+    assert [row["uid"] for row in first["results"]] == [10, 11]
+    second = list_entities(populated_session, limit=2, after=first["next_cursor"])
+    assert [row["uid"] for row in second["results"]] == [12]
+    assert second["next_cursor"] is None
+
+def test_list_entities_filters(populated_session):
+    assert [row["uid"] for row in list_entities(populated_session, sdn_type="Individual")["results"]] == [10, 12]
+    assert [row["uid"] for row in list_entities(populated_session, program="IRAN")["results"]] == [11]
+    assert [row["uid"] for row in list_entities(populated_session, country="Iran")["results"]] == [10, 11]
+
+def test_list_entities_typed_range_filters(sqlite_session):
+    sqlite_session.add_all([
+        SDNEntity(uid=1, date_of_birth_list=[DateOfBirth(uid=1, date_of_birth="circa 1960", main_entry=True,
+                                                         date_from=date(1959, 1, 1), date_to=date(1961, 12, 31))]),
+        SDNEntity(uid=2, date_of_birth_list=[DateOfBirth(uid=2, date_of_birth="12 Jan 1967", main_entry=True,
+                                                         date_from=date(1967, 1, 12), date_to=date(1967, 1, 12))]),
+        SDNEntity(uid=3, vessel=Vessel(tonnage=5000.0)),
+        SDNEntity(uid=4, vessel=Vessel(tonnage=120.0)),
+    ])
+    sqlite_session.commit()
+    born = list_entities(sqlite_session, born_from=date(1965, 1, 1), born_to=date(1970, 12, 31))
+    assert [row["uid"] for row in born["results"]] == [2]
+    # Overlapping circa ranges match as well
+    assert [row["uid"] for row in list_entities(sqlite_session, born_to=date(1959, 6, 1))["results"]] == [1]
+    assert [row["uid"] for row in list_entities(sqlite_session, min_tonnage=1000)["results"]] == [3]
+    assert [row["uid"] for row in list_entities(sqlite_session, max_tonnage=1000)["results"]] == [4]
+
+def test_iter_entity_documents(populated_session):
+    assert [document["uid"] for document in iter_entity_documents(populated_session, batch_size=1)] == [10, 11, 12]
+    filtered = iter_entity_documents(populated_session, program="SDGT", sdn_type="Individual")
+    assert [document["uid"] for document in filtered] == [10, 12]
+
+def test_export_ndjson_chunks():
+    documents = [{"uid": uid} for uid in range(5)]
+    chunks = list(export_ndjson(iter(documents), chunk_size=2))
+    assert len(chunks) == 3
+    assert [json.loads(line) for line in "".join(chunks).splitlines()] == documents
+
+def test_export_csv():
+    documents = [{
+        "uid": 1, "first_name": "John", "last_name": "Doe", "title": None, "sdn_type": "Individual",
+        "programs": ["SDGT", "IRAN"], "nationalities": [{"country": "Iran"}], "citizenships": [],
+        "aka_list": [{"first_name": "Johnny", "last_name": "D"}], "remarks": "Linked To: X"
+    }]
+    rows = list(csv.reader(io.StringIO("".join(export_csv(iter(documents))))))
+    assert rows[0][0] == "uid"
+    assert rows[1] == ["1", "John", "Doe", "", "Individual", "SDGT;IRAN", "Iran", "", "Johnny D", "Linked To: X"]
+
+def test_export_csv_entries_without_country():
+    documents = [{"uid": 1, "nationalities": [{"country": None}, {"country": "Iran"}], "citizenships": [{"uid": 5}]}]
+    rows = list(csv.reader(io.StringIO("".join(export_csv(iter(documents))))))
+    assert rows[1][6:8] == ["Iran", ""]
+
+def test_search_names(postgresql_session):
+    db = postgresql_session
+    db.execute.return_value.all.return_value = [(7, 0.9), (3, 0.5)]
+
+    results = search_names("  José Garcia ", db, limit=5, threshold=0.4)
+
+    assert results == [{"uid": 7, "score": 0.9}, {"uid": 3, "score": 0.5}]
+    threshold_sql = compiled(db.execute.call_args_list[0].args[0])
+    assert "set_config('pg_trgm.similarity_threshold', '0.4', true)" in threshold_sql
+    search_sql = compiled(db.execute.call_args_list[1].args[0])
+    assert "sdn_entities.search_name %% 'jose garcia'" in search_sql
+    assert "aka_list.search_name %% 'jose garcia'" in search_sql
+    assert "similarity(" in search_sql
+    assert "LIMIT 5" in search_sql
+
+def test_search_names_empty_query():
+    db = MagicMock(spec=Session)
+    assert search_names(" -- ", db) == []
+    db.execute.assert_not_called()
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor(0.25, 42)) == [0.25, 42]
+
+def test_decode_cursor_invalid():
+    with pytest.raises(ValueError, match="Invalid cursor."):
+        decode_cursor("not a cursor")
+
+@pytest.mark.parametrize("values", [[1, 2, 3], {"rank": 0.4}, ["0.4", 9], [True, 9], 7])
+def test_decode_cursor_invalid_shape(values):
+    cursor = base64.urlsafe_b64encode(json.dumps(values).encode("utf-8")).decode("ascii")
+    with pytest.raises(ValueError, match="Invalid cursor."):
+        decode_cursor(cursor)
+
+def make_text_row(uid, rank):
+    row = MagicMock()
+    row.uid, row.rank = uid, rank
+    row.remarks_headline, row.address_headline = "<mark>vessel</mark>", None
+    return row
+
+def test_search_text_first_page(postgresql_session):
+    db = postgresql_session
+    db.execute.return_value.all.return_value = [make_text_row(5, 0.8), make_text_row(9, 0.4)]
+
+    page = search_text("vessel", db, limit=2)
+
+    statement, parameters = db.execute.call_args.args
+    assert "websearch_to_tsquery('simple', :query)" in str(statement)
+    assert "cursor_rank" not in str(statement)
+    assert parameters["query"] == "vessel"
+    assert page["results"][0] == {"uid": 5, "rank": 0.8, "remarks_headline": "<mark>vessel</mark>", "address_headline": None}
+    assert decode_cursor(page["next_cursor"]) == [0.4, 9]
+
+def test_search_text_next_page(postgresql_session):
+    db = postgresql_session
+    db.execute.return_value.all.return_value = [make_text_row(11, 0.4)]
+
+    page = search_text("vessel", db, limit=2, cursor=encode_cursor(0.4, 9))
+
+    statement, parameters = db.execute.call_args.args
+    assert "rank < :cursor_rank OR (rank = :cursor_rank AND uid > :cursor_uid)" in str(statement)
+    assert parameters["cursor_rank"] == 0.4 and parameters["cursor_uid"] == 9
+    # A short page is the last one
+    assert page["next_cursor"] is None
+
+@pytest.fixture
+def embedded_search_session(sqlite_session):
+    iran = Country(name="Iran")
+    sqlite_session.add_all([
+        SDNEntity(uid=1, search_name="jose garcia", remarks="Vessel owner; linked to Tehran shipping.",
+                  aka_list=[AKA(uid=1, type="a.k.a.", category="strong", search_name="pepe garcia")]),
+        SDNEntity(uid=2, search_name="maria lopez", remarks="Linked to a bank.",
+                  addresses=[Address(uid=2, city="Tehran", country=iran, country_name="Iran")]),
+        SDNEntity(uid=3, search_name="john smith", remarks=None),
+    ])
+    sqlite_session.commit()
+    return sqlite_session
+
+def test_search_names_embedded(embedded_search_session):
+    results = search_names("Pepe Garcia", embedded_search_session, threshold=0.3)
+    assert results[0] == {"uid": 1, "score": 1.0}
+    assert all(result["uid"] != 3 for result in results)
+
+def test_search_text_embedded(embedded_search_session):
+    page = search_text("tehran", embedded_search_session, limit=1)
+    assert [result["uid"] for result in page["results"]] == [1]
+    assert "<mark>Tehran</mark>" in page["results"][0]["remarks_headline"]
+    page = search_text("tehran", embedded_search_session, limit=1, cursor=page["next_cursor"])
+    assert page["results"][0]["uid"] == 2
+    assert page["results"][0]["address_headline"] == "<mark>Tehran</mark> Iran"
+    # Every term must match
+    assert search_text("tehran bank shipping", embedded_search_session)["results"] == []
+
+def test_search_text_embedded_by_country(embedded_search_session):
+    page = search_text("iran", embedded_search_session)
+    assert [result["uid"] for result in page["results"]] == [2]
+    assert page["results"][0]["address_headline"] == "Tehran <mark>Iran</mark>"
@@ -0,0 +1,115 @@
+# tests/test_graph_analytics.py
+
+import numpy as np
+import pytest
+from unittest.mock import MagicMock
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from backend.graph.analytics import (
+    compute_betweenness,
+    compute_graph_metrics,
+    compute_pagerank,
+    get_component_members,
+    get_top_entities,
+    run_graph_analytics
+)
+from backend.graph.csr import CSRGraph
+from backend.models.base import Base
+from backend.models.SDNEntity import EntityGraphMetrics, SDNEntity
+
+def entity(uid):
+    return ("SDNEntity", uid)
+
+# Entities 1 and 2 share a program, 2 and 3 share an identifier, 4 and 5 share an address
+EDGES = [
+    (entity(1), ("Program", "SDGT"), "ENROLLED_IN"),
+    (entity(2), ("Program", "SDGT"), "ENROLLED_IN"),
+    (entity(2), ("Identifier", "passport|A1"), "HAS_ID"),
+    (entity(3), ("Identifier", "passport|A1"), "HAS_ID"),
+    (entity(4), ("Address", "tehran"), "HAS_ADDRESS"),
+    (entity(5), ("Address", "tehran"), "HAS_ADDRESS"),
+]
+
+@pytest.fixture
+def graph():
+    return CSRGraph.from_edges(EDGES, generation=5)
+
+@pytest.fixture
+def linked_graph():
+    # Entity 3 is also linked to entity 4, which connects the identifier and address groups
+    return CSRGraph.from_edges(EDGES + [(entity(3), entity(4), "LINKED_TO")], generation=5)
+
+@pytest.fixture
+def sqlite_session():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(bind=engine)
+    with Session(bind=engine) as session:
+        session.add_all(SDNEntity(uid=uid, first_name="John", last_name=f"Doe {uid}", sdn_type="Individual")
+                        for uid in range(1, 6))
+        session.commit()
+        yield session
+
+def test_compute_pagerank(graph):
+    rank = compute_pagerank(graph)
+    assert rank.sum() == pytest.approx(1.0)
+    # Entity 2 links both hubs of its component
+    entities = [graph.entity_index(uid) for uid in (1, 2, 3)]
+    assert rank[entities[1]] > rank[entities[0]] == pytest.approx(rank[entities[2]])
+
+def test_compute_pagerank_with_isolated_node():
+    graph = CSRGraph.from_edges([], nodes=[entity(1), entity(2)])
+    assert compute_pagerank(graph).tolist() == pytest.approx([0.5, 0.5])
+
+def test_compute_betweenness_is_exact_with_all_sources(graph):
+    betweenness = compute_betweenness(graph, samples=100)
+    # The path 1 - SDGT - 2 - A1 - 3: the middle entity lies on 4 of the 10 shortest paths
+    assert betweenness[graph.entity_index(2)] == pytest.approx(4.0)
+    assert betweenness[graph.index[("Program", "SDGT")]] == pytest.approx(3.0)
+    assert betweenness[graph.entity_index(1)] == 0.0
+
+def test_compute_betweenness_sampled(graph):
+    betweenness = compute_betweenness(graph, samples=3, seed=1)
+    assert betweenness.shape == (graph.num_nodes,)
+    assert np.array_equal(betweenness, compute_betweenness(graph, samples=3, seed=1))
+
+def test_compute_graph_metrics(linked_graph):
+    metrics = compute_graph_metrics(linked_graph)
+    rows = {row["uid"]: row for row in metrics.entity_rows(linked_graph)}
+    assert set(rows) == {1, 2, 3, 4, 5}
+    # The program hub does not connect entity 1 to the others
+    assert rows[2]["component"] == rows[5]["component"] != rows[1]["component"]
+    assert (rows[1]["component_size"], rows[2]["component_size"]) == (1, 4)
+    assert (rows[1]["degree"], rows[3]["degree"]) == (0, 2)
+    assert rows[3]["betweenness"] > rows[2]["betweenness"] == 0.0
+    assert rows[1]["generation"] == 5
+
+def test_compute_graph_metrics_over_all_relationships(linked_graph):
+    metrics = compute_graph_metrics(linked_graph, edge_types=None)
+    rows = {row["uid"]: row for row in metrics.entity_rows(linked_graph)}
+    assert len({row["component"] for row in rows.values()}) == 1
+    assert rows[1]["component_size"] == 5
+
+def test_run_graph_analytics(graph, sqlite_session):
+    graph_db = MagicMock()
+    assert run_graph_analytics(sqlite_session, graph, graph_db, batch_size=2) == 5
+    assert sqlite_session.query(EntityGraphMetrics).count() == 5
+    # Three write transactions of at most two entities each
+    assert graph_db.execute_write.call_count == 3
+
+    # Rerunning replaces the metrics
+    run_graph_analytics(sqlite_session, graph)
+    assert sqlite_session.query(EntityGraphMetrics).count() == 5
+
+def test_get_top_entities(linked_graph, sqlite_session):
+    run_graph_analytics(sqlite_session, linked_graph)
+    top = get_top_entities(sqlite_session, metric="betweenness", limit=2)
+    assert top[0]["uid"] == 3 and top[0]["last_name"] == "Doe 3"
+    assert len(top) == 2
+    with pytest.raises(ValueError, match="Unknown metric"):
+        get_top_entities(sqlite_session, metric="closeness")
+
+def test_get_component_members(linked_graph, sqlite_session):
+    run_graph_analytics(sqlite_session, linked_graph)
+    assert {row["uid"] for row in get_component_members(sqlite_session, 4)} == {2, 3, 4, 5}
+    assert [row["uid"] for row in get_component_members(sqlite_session, 1)] == [1]
+    assert get_component_members(sqlite_session, 99) is None
@@ -0,0 +1,186 @@
+# tests/test_graph_csr.py
+
+import threading
+import numpy as np
+import pytest
+from unittest.mock import MagicMock
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from backend.graph.csr import (
+    CSRGraph,
+    CSRGraphManager,
+    build_csr_graph,
+    build_csr_graph_from_neo4j
+)
+from backend.models.base import Base
+from backend.models.SDNEntity import SDNEntityDocument, SDNEntityLink
+from tests.test_graph_service import make_document
+
+def entity(uid):
+    return ("SDNEntity", uid)
+
+PROGRAM, IDENTIFIER, COUNTRY, ADDRESS = ("Program", "SDGT"), ("Identifier", "passport|A1"), \
+    ("Country", "Iran"), ("Address", "tehran iran")
+
+@pytest.fixture
+def graph():
+    edges = [
+        (entity(1), PROGRAM, "ENROLLED_IN"),
+        (entity(2), PROGRAM, "ENROLLED_IN"),
+        (entity(2), PROGRAM, "ENROLLED_IN"),
+        (entity(2), IDENTIFIER, "HAS_ID"),
+        (entity(3), IDENTIFIER, "HAS_ID"),
+        (entity(1), COUNTRY, "HAS_NATIONALITY"),
+        (entity(3), ADDRESS, "HAS_ADDRESS"),
+        (ADDRESS, COUNTRY, "LOCATED_IN"),
+        (entity(1), ("AKA", 10), "ALSO_KNOWN_AS"),
+    ]
+    return CSRGraph.from_edges(edges, nodes=[entity(uid) for uid in (1, 2, 3, 4)], generation=7)
+
+def keys(graph, nodes):
+    return [graph.node_keys[node] for node in nodes]
+
+def test_from_edges(graph):
+    # Duplicates are dropped and relationships outside the hub model ignored
+    assert graph.num_nodes == 8 and graph.num_edges == 7
+    assert graph.indptr[-1] == len(graph.indices) == len(graph.edge_types)
+    assert sorted(keys(graph, graph.neighbors(graph.index[PROGRAM]))) == [entity(1), entity(2)]
+    assert graph.entity_index(4) is not None and len(graph.neighbors(graph.entity_index(4))) == 0
+    assert graph.entity_index(99) is None
+
+def test_degrees(graph):
+    nodes = np.asarray([graph.entity_index(1), graph.index[PROGRAM], graph.entity_index(4)], dtype=np.int32)
+    assert graph.degrees(nodes).tolist() == [2, 2, 0]
+    assert graph.degrees(nodes, graph.edge_type_codes(["ENROLLED_IN"])).tolist() == [1, 2, 0]
+
+def test_k_hop(graph):
+    nodes, distances = graph.k_hop(graph.entity_index(1), 2)
+    reached = dict(zip(keys(graph, nodes), distances.tolist()))
+    assert reached == {entity(1): 0, PROGRAM: 1, COUNTRY: 1, entity(2): 2, ADDRESS: 2}
+
+    nodes, _ = graph.k_hop(graph.entity_index(1), 2, edge_types=["ENROLLED_IN"])
+    assert set(keys(graph, nodes)) == {entity(1), PROGRAM, entity(2)}
+
+def test_shortest_path(graph):
+    source, target = graph.entity_index(1), graph.entity_index(3)
+    assert keys(graph, graph.shortest_path(source, target)) == [entity(1), COUNTRY, ADDRESS, entity(3)]
+    assert keys(graph, graph.shortest_path(target, source)) == [entity(3), ADDRESS, COUNTRY, entity(1)]
+    # Without the address hop the path goes through the program and the shared identifier
+    path = graph.shortest_path(source, target, edge_types=["ENROLLED_IN", "HAS_ID"])
+    assert keys(graph, path) == [entity(1), PROGRAM, entity(2), IDENTIFIER, entity(3)]
+    assert graph.shortest_path(source, target, max_depth=3) is not None
+    assert graph.shortest_path(source, target, max_depth=2) is None
+    assert graph.shortest_path(source, graph.entity_index(4)) is None
+    assert graph.shortest_path(source, source) == [source]
+
+def test_unknown_edge_type(graph):
+    with pytest.raises(ValueError, match="Unknown relationship types: OWNS"):
+        graph.k_hop(0, 1, edge_types=["OWNS"])
+
+def test_project(graph):
+    projected = graph.project(["HAS_ID", "HAS_ADDRESS"])
+    # Same node indices, without the program and country edges
+    assert projected.node_keys == graph.node_keys
+    assert projected.indptr[-1] == len(projected.indices) == len(projected.edge_types)
+    assert len(projected.neighbors(projected.index[PROGRAM])) == 0
+    assert sorted(keys(projected, projected.neighbors(projected.index[IDENTIFIER]))) == \
+        sorted(keys(graph, graph.neighbors(graph.index[IDENTIFIER])))
+
+def test_connected_components(graph):
+    components = graph.connected_components()
+    assert components[graph.entity_index(4)] == 1
+    assert np.all(np.delete(components, graph.entity_index(4)) == 0)
+    assert graph.connected_components() is components
+
+def test_connected_components_of_a_long_chain():
+    edges = [(entity(uid), ("Program", str(uid)), "ENROLLED_IN") for uid in range(200)] + \
+        [(entity(uid + 1), ("Program", str(uid)), "ENROLLED_IN") for uid in range(199)]
+    components = CSRGraph.from_edges(edges).connected_components()
+    assert set(components.tolist()) == {0}
+
+def test_build_csr_graph():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(bind=engine)
+    with Session(bind=engine) as session:
+        session.add_all(SDNEntityDocument(uid=uid, content_hash=str(uid), document=make_document(uid))
+                        for uid in (1, 2))
+        session.commit()
+        graph = build_csr_graph(session, generation=3)
+
+    assert graph.generation == 3
+    # Both entities share the program, the country, the identifier and the address
+    path = graph.shortest_path(graph.entity_index(1), graph.entity_index(2))
+    assert len(path) == 3
+    assert {graph.node_keys[node][0] for node in graph.neighbors(graph.entity_index(1))} == \
+        {"Program", "Country", "Identifier", "Address"}
+
+def test_build_csr_graph_with_entity_links():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(bind=engine)
+    with Session(bind=engine) as session:
+        session.add_all(SDNEntityDocument(uid=uid, content_hash=str(uid), document=make_document(uid))
+                        for uid in (1, 2))
+        session.add_all([
+            SDNEntityLink(source_uid=1, target_uid=2, relationship_type="LINKED_TO", target_name="B", origin="remarks"),
+            # Unresolved and stale links add no edges
+            SDNEntityLink(source_uid=1, target_uid=None, relationship_type="LINKED_TO", target_name="C",
+                          origin="remarks"),
+            SDNEntityLink(source_uid=2, target_uid=9, relationship_type="LINKED_TO", target_name="D", origin="ids"),
+        ])
+        session.commit()
+        graph = build_csr_graph(session)
+
+    source, target = graph.entity_index(1), graph.entity_index(2)
+    assert graph.shortest_path(source, target, edge_types=["LINKED_TO"]) == [source, target]
+    assert graph.relationship_types(source, target) == ["LINKED_TO"]
+    assert graph.entity_index(9) is None
+
+def test_build_csr_graph_from_neo4j():
+    graph_db = MagicMock()
+    graph_db.stream_query.side_effect = [
+        iter([{"uid": 1}, {"uid": 2}]),
+        iter([{"source_label": "SDNEntity", "source_key": 1, "type": "ENROLLED_IN",
+               "target_label": "Program", "target_key": "SDGT"}])
+    ]
+    graph = build_csr_graph_from_neo4j(graph_db, generation=1)
+    assert graph.num_nodes == 3 and graph.num_edges == 1
+
+def test_csr_graph_manager_rebuilds_per_generation(mocker):
+    generation = mocker.patch("backend.graph.csr.get_data_generation", return_value=1)
+    build = mocker.patch("backend.graph.csr.build_csr_graph",
+                         side_effect=lambda db, generation: CSRGraph.from_edges([], generation=generation))
+    manager = CSRGraphManager()
+
+    first = manager.get(object())
+    assert manager.get(object()) is first
+    generation.return_value = 2
+    second = manager.get(object())
+    assert second is not first and second.generation == 2
+    assert build.call_count == 2
+
+def test_csr_graph_manager_calls_rebuild_hook(mocker):
+    mocker.patch("backend.graph.csr.get_data_generation", return_value=1)
+    mocker.patch("backend.graph.csr.build_csr_graph",
+                 side_effect=lambda db, generation: CSRGraph.from_edges([], generation=generation))
+    on_rebuild = MagicMock(side_effect=RuntimeError("boom"))
+    manager = CSRGraphManager(on_rebuild=on_rebuild)
+
+    # A failing hook does not fail the request
+    graph = manager.get(object())
+    manager.get(object())
+    manager.rebuild_thread.join(timeout=5)
+    on_rebuild.assert_called_once_with(graph)
+
+def test_csr_graph_manager_runs_rebuild_hook_in_background(mocker):
+    mocker.patch("backend.graph.csr.get_data_generation", return_value=1)
+    mocker.patch("backend.graph.csr.build_csr_graph",
+                 side_effect=lambda db, generation: CSRGraph.from_edges([], generation=generation))
+    release = threading.Event()
+    manager = CSRGraphManager(on_rebuild=lambda graph: release.wait(timeout=5))
+
+    # The request returns while the hook is still running
+    graph = manager.get(object())
+    assert graph.generation == 1 and manager.rebuild_thread.is_alive()
+    release.set()
+    manager.rebuild_thread.join(timeout=5)
+    assert not manager.rebuild_thread.is_alive()
@@ -0,0 +1,231 @@
+# tests/test_graph_main.py
+
+import pytest
+from fastapi.testclient import TestClient
+from backend.graph.csr import CSRGraph
+from backend.graph.payload import PAYLOAD_MEDIA_TYPE, decode_binary
+from backend.graph.main import app, async_graph_manager, csr_manager, db_manager, neighborhood_cache
+from backend.graph.service import GraphSyncStats
+
+@pytest.fixture
+def client():
+    app.dependency_overrides[db_manager.get_db] = lambda: object()
+    with TestClient(app) as client:
+        yield client
+    app.dependency_overrides.clear()
+    neighborhood_cache.clear()
+
+def test_sync_graph_data(client, mocker):
+    sync_mock = mocker.patch("backend.graph.main.sync_graph",
+                             return_value=GraphSyncStats(entities=2, nodes=10, relationships=8, seconds=0.5))
+    mocker.patch.object(csr_manager, "get", return_value="graph")
+    analytics_mock = mocker.patch("backend.graph.main.run_graph_analytics", return_value=2)
+    response = client.post("/graph/sync", params={"batch_size": 500})
+    assert response.status_code == 200
+    assert response.json()["nodes_per_second"] == 20.0
+    assert response.json()["entities_with_metrics"] == 2
+    assert sync_mock.call_args.kwargs["batch_size"] == 500
+    assert analytics_mock.call_args.args[1] == "graph"
+
+def test_sync_graph_data_without_analytics(client, mocker):
+    mocker.patch("backend.graph.main.sync_graph", return_value=GraphSyncStats())
+    analytics_mock = mocker.patch("backend.graph.main.run_graph_analytics")
+    response = client.post("/graph/sync", params={"analytics": False})
+    assert response.status_code == 200
+    assert "entities_with_metrics" not in response.json()
+    analytics_mock.assert_not_called()
+
+def test_sync_graph_data_failure(client, mocker):
+    mocker.patch("backend.graph.main.sync_graph", side_effect=Exception("Neo4j unavailable"))
+    response = client.post("/graph/sync")
+    assert response.status_code == 500
+
+def test_apply_change_sets(client, mocker):
+    apply_mock = mocker.patch("backend.graph.main.apply_pending_change_sets", return_value=[{"id": 1, "entities": 2}])
+    response = client.post("/graph/changes/apply", params={"batch_size": 100})
+    assert response.status_code == 200
+    assert response.json() == [{"id": 1, "entities": 2}]
+    assert apply_mock.call_args.kwargs["batch_size"] == 100
+
+    apply_mock.side_effect = Exception("Neo4j unavailable")
+    assert client.post("/graph/changes/apply").status_code == 500
+
+def test_apply_graph_schema(client, mocker):
+    apply_mock = mocker.patch("backend.graph.main.GraphSchemaManager.apply",
+                              return_value=[{"name": "sdn_entity_uid", "state": "ONLINE"}])
+    response = client.post("/graph/schema", params={"wait": False})
+    assert response.status_code == 200
+    assert response.json()[0]["name"] == "sdn_entity_uid"
+    apply_mock.assert_called_once_with(wait=False)
+
+def test_get_index_progress(client, mocker):
+    mocker.patch("backend.graph.main.GraphSchemaManager.index_progress",
+                 return_value=[{"name": "entity_names", "state": "POPULATING", "populationPercent": 40.0}])
+    response = client.get("/graph/schema/indexes")
+    assert response.status_code == 200
+    assert response.json()[0]["populationPercent"] == 40.0
+
+def test_get_entity_neighbors(client, mocker):
+    neighborhood = {"entity": {"uid": 1}, "neighbors": [{"type": "ENROLLED_IN", "labels": ["Program"],
+                                                        "properties": {"name": "SDGT"}}]}
+    get_mock = mocker.patch("backend.graph.main.get_neighborhood", return_value=neighborhood)
+    response = client.get("/graph/entities/1/neighbors", params={"limit": 10})
+    assert response.status_code == 200
+    assert response.json() == neighborhood
+    get_mock.assert_awaited_once_with(async_graph_manager, 1, limit=10)
+
+def test_get_entity_neighbors_not_found(client, mocker):
+    mocker.patch("backend.graph.main.get_neighborhood", return_value=None)
+    assert client.get("/graph/entities/1/neighbors").status_code == 404
+
+def test_lifespan_closes_async_driver(mocker):
+    close_mock = mocker.patch.object(async_graph_manager, "close_driver")
+    with TestClient(app):
+        pass
+    close_mock.assert_awaited_once()
+
+def test_lifespan_applies_graph_schema(mocker, monkeypatch):
+    # Unset PYTEST_CURRENT_TEST to trigger startup logic
+    monkeypatch.delenv("PYTEST_CURRENT_TEST", raising=False)
+    mocker.patch.object(async_graph_manager, "close_driver")
+    apply_mock = mocker.patch("backend.graph.main.GraphSchemaManager.apply")
+    with TestClient(app):
+        pass
+    apply_mock.assert_called_once_with(wait=False)
+
+def test_lifespan_survives_graph_schema_failure(mocker, monkeypatch):
+    monkeypatch.delenv("PYTEST_CURRENT_TEST", raising=False)
+    mocker.patch.object(async_graph_manager, "close_driver")
+    mocker.patch("backend.graph.main.GraphSchemaManager.apply", side_effect=RuntimeError("Neo4j unavailable"))
+    log_mock = mocker.patch("backend.graph.main.logger.error")
+    with TestClient(app):
+        pass
+    log_mock.assert_any_call("Failed to apply the graph schema at startup: Neo4j unavailable")
+
+def test_expand_entity(client, mocker):
+    graph = CSRGraph.from_edges([(("SDNEntity", 1), ("Program", "SDGT"), "ENROLLED_IN"),
+                                 (("SDNEntity", 2), ("Program", "SDGT"), "ENROLLED_IN")], generation=4)
+    mocker.patch.object(csr_manager, "get", return_value=graph)
+
+    response = client.get("/graph/entities/1/expand", params={"depth": 2})
+    assert response.status_code == 200
+    assert response.json()["generation"] == 4
+    assert response.json()["nodes"] == [{"label": "SDNEntity", "key": 1, "distance": 0},
+                                        {"label": "Program", "key": "SDGT", "distance": 1},
+                                        {"label": "SDNEntity", "key": 2, "distance": 2}]
+    assert client.get("/graph/entities/9/expand").status_code == 404
+    assert client.get("/graph/entities/1/expand", params={"edge_types": "OWNS"}).status_code == 400
+
+def test_expand_entity_served_from_cache(client, mocker):
+    graph = CSRGraph.from_edges([(("SDNEntity", 1), ("Program", "SDGT"), "ENROLLED_IN")], generation=4)
+    mocker.patch.object(csr_manager, "get", return_value=graph)
+    k_hop = mocker.spy(graph, "k_hop")
+    before = client.get("/graph/cache/stats").json()
+
+    first = client.get("/graph/entities/1/expand").json()
+    assert client.get("/graph/entities/1/expand").json() == first
+    assert k_hop.call_count == 1
+    stats = client.get("/graph/cache/stats").json()
+    assert stats["hits"] - before["hits"] == 1 and stats["misses"] - before["misses"] == 1
+    assert stats["entries"] == 1 and stats["bytes"] > 0
+
+def test_run_analytics(client, mocker):
+    mocker.patch.object(csr_manager, "get", return_value="graph")
+    mocker.patch("backend.graph.main.run_graph_analytics", return_value=3)
+    response = client.post("/graph/analytics")
+    assert response.status_code == 200
+    assert response.json() == {"entities_with_metrics": 3}
+
+def test_propagate_ownership_flags(client, mocker):
+    run_mock = mocker.patch("backend.graph.main.run_ownership_propagation")
+    run_mock.return_value.to_dict.return_value = {"flagged": 2}
+    response = client.post("/graph/ownership", params={"full": True})
+    assert response.status_code == 200
+    assert response.json() == {"flagged": 2}
+    assert run_mock.call_args.kwargs["full"] is True
+
+    run_mock.side_effect = RuntimeError("Failed to store ownership flags.")
+    assert client.post("/graph/ownership").status_code == 500
+
+def test_put_ownership_records(client, mocker):
+    import_mock = mocker.patch("backend.graph.main.import_ownership_records", return_value=1)
+    records = [{"owner_uid": 1, "owned_name": "ACME HOLDINGS", "share": 0.6}]
+    response = client.put("/graph/ownership/records/registry", json=records)
+    assert response.status_code == 200
+    assert response.json() == {"records": 1}
+    assert import_mock.call_args.args[1:] == ("registry", records)
+
+    import_mock.side_effect = ValueError("Invalid ownership share: 2")
+    response = client.put("/graph/ownership/records/registry", json=records)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid ownership share: 2"
+
+def test_get_entity_ownership(client, mocker):
+    flag = {"uid": 2, "share": 1.0, "depth": 1, "owners": [{"uid": 1, "share": 1.0}], "path": [1, 2],
+            "computed_at": None}
+    get_mock = mocker.patch("backend.graph.main.get_ownership_flag", return_value=flag)
+    response = client.get("/graph/entities/2/ownership")
+    assert response.status_code == 200
+    assert response.json()["path"] == [1, 2]
+
+    get_mock.return_value = None
+    response = client.get("/graph/entities/3/ownership")
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Entity 3 is not blocked by ownership"
+
+def test_get_top_ranked_entities(client, mocker):
+    top_mock = mocker.patch("backend.graph.main.get_top_entities", return_value=[{"uid": 1, "pagerank": 0.4}])
+    response = client.get("/graph/metrics/top", params={"metric": "betweenness", "limit": 5})
+    assert response.status_code == 200
+    assert response.json() == [{"uid": 1, "pagerank": 0.4}]
+    assert top_mock.call_args.kwargs == {"metric": "betweenness", "limit": 5}
+
+    top_mock.side_effect = ValueError("Unknown metric closeness")
+    assert client.get("/graph/metrics/top", params={"metric": "closeness"}).status_code == 400
+
+def test_get_entity_component(client, mocker):
+    mocker.patch("backend.graph.main.get_component_members", return_value=[{"uid": 1}, {"uid": 2}])
+    response = client.get("/graph/entities/1/component")
+    assert response.status_code == 200
+    assert len(response.json()) == 2
+
+    mocker.patch("backend.graph.main.get_component_members", return_value=None)
+    assert client.get("/graph/entities/9/component").status_code == 404
+
+def test_get_paths(client, mocker):
+    graph = CSRGraph.from_edges([(("SDNEntity", 1), ("Program", "SDGT"), "ENROLLED_IN"),
+                                 (("SDNEntity", 2), ("Program", "SDGT"), "ENROLLED_IN")],
+                                nodes=[("SDNEntity", 3)], generation=4)
+    mocker.patch.object(csr_manager, "get", return_value=graph)
+
+    response = client.get("/graph/paths", params={"source": 1, "target": 2, "k": 2, "timeout_ms": 100})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["complete"] and body["generation"] == 4
+    assert [path["length"] for path in body["paths"]] == [2]
+    assert body["paths"][0]["relationships"] == [["ENROLLED_IN"], ["ENROLLED_IN"]]
+
+    assert client.get("/graph/paths", params={"source": 1, "target": 3}).json()["paths"] == []
+    assert client.get("/graph/paths", params={"source": 1, "target": 9}).status_code == 404
+    assert client.get("/graph/paths", params={"source": 1, "target": 2, "edge_types": "OWNS"}).status_code == 400
+
+def test_get_subgraph(client, mocker):
+    graph = CSRGraph.from_edges([(("SDNEntity", 1), ("Program", "SDGT"), "ENROLLED_IN"),
+                                 (("SDNEntity", 2), ("Program", "SDGT"), "ENROLLED_IN")], generation=4)
+    mocker.patch.object(csr_manager, "get", return_value=graph)
+
+    response = client.get("/graph/subgraph", params={"uids": [1], "depth": 2})
+    assert response.headers["content-type"] == "application/json"
+    body = response.json()
+    assert body["generation"] == 4 and len(body["nodes"]["keys"]) == 3
+
+    response = client.get("/graph/subgraph", params={"uids": [1], "depth": 2},
+                          headers={"Accept": PAYLOAD_MEDIA_TYPE})
+    assert response.headers["content-type"] == PAYLOAD_MEDIA_TYPE
+    assert decode_binary(response.content) == body
+    assert client.get("/graph/subgraph", params={"uids": [1], "format": "binary"}).headers["content-type"] == \
+        PAYLOAD_MEDIA_TYPE
+
+    assert client.get("/graph/subgraph", params={"uids": [1, 9]}).status_code == 404
+    assert client.get("/graph/subgraph", params={"uids": [1], "edge_types": "OWNS"}).status_code == 400
+    assert client.get("/graph/subgraph", params={"uids": [1], "format": "xml"}).status_code == 422
@@ -0,0 +1,55 @@
+# tests/test_graph_neighborhood.py
+
+import pytest
+from backend.graph.csr import CSRGraph
+from backend.graph.neighborhood import NeighborhoodCache, expand_neighborhood, subgraph_columns
+
+def entity(uid):
+    return ("SDNEntity", uid)
+
+def make_graph(generation):
+    edges = [(entity(uid), ("Program", "SDGT"), "ENROLLED_IN") for uid in range(1, 6)]
+    return CSRGraph.from_edges(edges, generation=generation)
+
+@pytest.fixture
+def cache():
+    return NeighborhoodCache(max_bytes=1024 * 1024, prewarm_count=2)
+
+def test_make_key_is_order_insensitive():
+    assert NeighborhoodCache.make_key("subgraph", [2, 1], 2, {"a": 1, "b": None}, 3) == \
+           NeighborhoodCache.make_key("subgraph", [1, 2, 1], 2, {"b": None, "a": 1}, 3)
+    assert NeighborhoodCache.make_key("expand", [1], 2, {}, 3) != NeighborhoodCache.make_key("expand", [1], 2, {}, 4)
+
+def test_expand_neighborhood_cached_per_generation(cache, mocker):
+    graph = make_graph(1)
+    k_hop = mocker.spy(graph, "k_hop")
+    nodes, distances = expand_neighborhood(graph, cache, 1)
+    assert len(nodes) == 6 and distances.max() == 2
+    expand_neighborhood(graph, cache, 1)
+    expand_neighborhood(graph, cache, 1, edge_types=["ENROLLED_IN"])
+    assert k_hop.call_count == 2
+
+    expand_neighborhood(make_graph(2), cache, 1)
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 3
+
+def test_errors_are_not_cached(cache):
+    graph = make_graph(1)
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            subgraph_columns(graph, cache, [1], edge_types=["OWNS"])
+    assert len(cache.entries) == 0
+
+def test_prewarm_most_requested(cache):
+    graph = make_graph(1)
+    for uid in (3, 3, 3, 2, 2, 1, 9):
+        cache.get_or_compute("expand", [uid], 2, {}, 1, lambda: None)
+    assert cache.most_requested(2) == [3, 2]
+
+    new_graph = make_graph(2)
+    assert cache.prewarm(new_graph) == 2
+    misses = cache.stats()["misses"]
+    expand_neighborhood(new_graph, cache, 3)
+    subgraph_columns(new_graph, cache, [2])
+    assert cache.stats()["misses"] == misses
+    # Pre-warming does not count as requests
+    assert cache.most_requested(1) == [3]
@@ -0,0 +1,194 @@
+# tests/test_graph_ownership.py
+
+import pytest
+from unittest.mock import MagicMock
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+from backend.graph.ownership import (
+    Stake,
+    downstream_closure,
+    get_ownership_flag,
+    import_ownership_records,
+    load_stakes,
+    propagate_ownership,
+    run_ownership_propagation,
+    synthetic_uid
+)
+from backend.models.base import Base
+from backend.models.SDNEntity import OwnershipEdge, OwnershipFlag, OwnershipRecord, SDNEntityDocument, SDNEntityLink
+
+def stake(owner, owned, share):
+    return Stake(owner, owned, share, "OWNED_OR_CONTROLLED_BY")
+
+def test_propagate_aggregates_blocked_ownership():
+    # 1 and 2 are listed; 3 is held 30% by 1 and 25% by 2; 4 is held 60% by 3; 5 is held 40% by 1
+    stakes = [stake(1, 3, 0.3), stake(2, 3, 0.25), stake(3, 4, 0.6), stake(1, 5, 0.4)]
+    result = propagate_ownership(stakes, listed={1, 2})
+    assert set(result.flags) == {3, 4}
+    assert result.flags[3]["share"] == pytest.approx(0.55)
+    assert result.flags[3]["owners"] == [{"uid": 1, "share": 0.3}, {"uid": 2, "share": 0.25}]
+    assert result.flags[3]["path"] == [1, 3]
+    assert result.flags[4]["path"] == [1, 3, 4] and result.flags[4]["depth"] == 2
+
+def test_propagate_handles_cycles():
+    # 3 and 4 own each other; they are only blocked once blocked ownership enters the cycle
+    cycle = [stake(3, 4, 0.5), stake(4, 3, 0.5)]
+    assert propagate_ownership(cycle, listed={1}).flags == {}
+
+    result = propagate_ownership(cycle + [stake(1, 3, 0.5)], listed={1})
+    assert set(result.flags) == {3, 4}
+    assert result.flags[4]["path"] == [1, 3, 4]
+    # 3 crossed the threshold through 1 alone, before 4 was blocked
+    assert result.flags[3]["path"] == [1, 3] and result.flags[3]["share"] == 1.0
+
+def test_propagate_within_closure_keeps_known_state():
+    stakes = [stake(1, 3, 0.5), stake(3, 4, 0.5), stake(4, 5, 0.5)]
+    result = propagate_ownership(stakes, listed={1}, closure={5}, known={4: {"path": [1, 3, 4]}})
+    assert set(result.flags) == {5}
+    assert result.flags[5]["path"] == [1, 3, 4, 5]
+
+def test_downstream_closure():
+    stakes = [stake(1, 2, 1.0), stake(2, 3, 1.0), stake(3, 2, 1.0), stake(4, 5, 1.0)]
+    assert downstream_closure(stakes, [1]) == {1, 2, 3}
+    assert downstream_closure(stakes, [5]) == {5}
+
+def test_propagate_never_flags_listed_entities():
+    chain = [stake(1, 2, 1.0), stake(2, 3, 1.0)]
+    assert propagate_ownership(chain, listed={1, 2, 3}).flags == {}
+    result = propagate_ownership(chain, listed={1})
+    assert [(uid, flag["depth"]) for uid, flag in result.flags.items()] == [(2, 1), (3, 2)]
+
+def test_synthetic_uid():
+    assert synthetic_uid("ACME Holdings Ltd.") == synthetic_uid("acme holdings ltd") < 0
+    assert synthetic_uid("ACME Holdings") != synthetic_uid("ACME Trading")
+    assert synthetic_uid(" ") is None
+
+@pytest.fixture
+def sqlite_session():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(bind=engine)
+    with Session(bind=engine) as session:
+        session.add_all(SDNEntityDocument(uid=uid, content_hash=str(uid), document={"uid": uid}) for uid in (1, 2, 3))
+        session.commit()
+        yield session
+
+def add_link(session, owned, owner=None, owner_name=None):
+    session.add(SDNEntityLink(source_uid=owned, target_uid=owner, relationship_type="OWNED_OR_CONTROLLED_BY",
+                              target_name=owner_name or str(owner), origin="remarks"))
+    session.commit()
+
+def delist(session, uid):
+    session.query(SDNEntityDocument).filter(SDNEntityDocument.uid == uid).delete()
+    session.commit()
+
+def test_run_ownership_propagation_listed_entities(sqlite_session):
+    # Listed entities on both ends, and an owner that resolved to no listed entity
+    add_link(sqlite_session, owned=2, owner=1)
+    add_link(sqlite_session, owned=3, owner=2)
+    add_link(sqlite_session, owned=3, owner_name="ACME HOLDINGS LTD.")
+    stats = run_ownership_propagation(sqlite_session)
+    assert (stats.edges, stats.unlisted_parties, stats.flagged) == (3, 1, 0)
+    assert sqlite_session.execute(select(OwnershipFlag.uid)).all() == []
+    acme = sqlite_session.execute(select(OwnershipEdge).where(OwnershipEdge.owner_uid < 0)).scalar_one()
+    assert (acme.owner_uid, acme.owner_name, acme.owner_listed) == \
+        (synthetic_uid("ACME HOLDINGS LTD."), "ACME HOLDINGS LTD.", False)
+
+def test_run_ownership_propagation_incremental(sqlite_session):
+    add_link(sqlite_session, owned=2, owner=1)
+    add_link(sqlite_session, owned=3, owner=2)
+    stats = run_ownership_propagation(sqlite_session)
+    assert (stats.incremental, stats.flagged, stats.edges) == (False, 0, 2)
+
+    # Delisting 2 leaves it blocked through 1; 3 is still listed in its own right
+    delist(sqlite_session, 2)
+    stats = run_ownership_propagation(sqlite_session)
+    assert (stats.incremental, stats.changed_edges, stats.recomputed, stats.flagged) == (True, 0, 2, 1)
+    assert get_ownership_flag(sqlite_session, 2)["path"] == [1, 2]
+    assert get_ownership_flag(sqlite_session, 3) is None
+
+    # Delisting 3 only recomputes 3, through the known path of 2
+    delist(sqlite_session, 3)
+    graph_db = MagicMock()
+    stats = run_ownership_propagation(sqlite_session, graph_db)
+    assert (stats.recomputed, stats.flagged) == (1, 1)
+    assert get_ownership_flag(sqlite_session, 3)["path"] == [1, 2, 3]
+    assert get_ownership_flag(sqlite_session, 2) is not None
+    _, cleared, rows = graph_db.execute_write.call_args.args
+    assert cleared == [3] and [row["uid"] for row in rows] == [3]
+
+    # An unlisted owner holds no blocked share, so it adds an owner to nobody's flag
+    add_link(sqlite_session, owned=3, owner_name="ACME HOLDINGS")
+    stats = run_ownership_propagation(sqlite_session)
+    assert (stats.changed_edges, stats.recomputed, stats.flagged) == (1, 1, 1)
+    assert get_ownership_flag(sqlite_session, 3)["owners"] == [{"uid": 2, "share": 1.0}]
+
+    # Removing the first link clears the whole chain below it
+    sqlite_session.query(SDNEntityLink).filter(SDNEntityLink.source_uid == 2).delete()
+    sqlite_session.commit()
+    stats = run_ownership_propagation(sqlite_session)
+    assert (stats.recomputed, stats.flagged) == (2, 0)
+    assert sqlite_session.execute(select(OwnershipFlag.uid)).all() == []
+
+    # Nothing changed, nothing recomputed
+    assert run_ownership_propagation(sqlite_session).recomputed == 0
+
+def test_load_stakes_from_links_and_records(sqlite_session):
+    add_link(sqlite_session, owned=2, owner=1)
+    import_ownership_records(sqlite_session, "registry", [
+        {"owner_uid": 1, "owned_name": "ACME Holdings", "share": 0.4},
+        # The larger share wins when a record and a link agree
+        {"owner_uid": 1, "owned_uid": 2, "share": 0.5},
+    ])
+    stakes, names = load_stakes(sqlite_session)
+    acme = synthetic_uid("ACME HOLDINGS")
+    assert stakes[(1, 2)] == stake(1, 2, 1.0)
+    assert stakes[(1, acme)] == Stake(1, acme, 0.4, "OWNERSHIP_RECORD")
+    assert names == {acme: "ACME Holdings"}
+
+def test_import_ownership_records_replaces_source(sqlite_session):
+    assert import_ownership_records(sqlite_session, "registry", [{"owner_uid": 1, "owned_uid": 2, "share": 0.5}]) == 1
+    import_ownership_records(sqlite_session, "other", [{"owner_uid": 1, "owned_uid": 3, "share": 0.5}])
+    import_ownership_records(sqlite_session, "registry", [{"owner_uid": 2, "owned_uid": 3, "share": 0.5}])
+    rows = sqlite_session.execute(select(OwnershipRecord.source, OwnershipRecord.owner_uid)
+                                  .order_by(OwnershipRecord.id)).all()
+    assert rows == [("other", 1), ("registry", 2)]
+
+@pytest.mark.parametrize("record, message", [
+    ({"owner_uid": 1, "owned_uid": 2, "share": 1.5}, "Invalid ownership share"),
+    ({"owner_uid": 1, "owned_uid": 2}, "Invalid ownership share"),
+    ({"owner_uid": 1, "owned_name": " ", "share": 0.5}, "without owned"),
+])
+def test_import_ownership_records_invalid(sqlite_session, record, message):
+    with pytest.raises(ValueError, match=message):
+        import_ownership_records(sqlite_session, "registry", [record])
+
+def test_run_ownership_propagation_through_unlisted_parties(sqlite_session):
+    # A company outside the list, owned by a listed entity, passes the block on to what it owns
+    acme = synthetic_uid("ACME HOLDINGS")
+    import_ownership_records(sqlite_session, "registry", [
+        {"owner_uid": 1, "owned_name": "ACME HOLDINGS", "share": 1.0},
+        {"owner_name": "Acme Holdings", "owned_name": "ACME SHIPPING", "share": 0.4},
+        {"owner_uid": 2, "owned_name": "ACME SHIPPING", "share": 0.2},
+    ])
+    shipping = synthetic_uid("ACME SHIPPING")
+    graph_db = MagicMock()
+    stats = run_ownership_propagation(sqlite_session, graph_db)
+    assert (stats.edges, stats.unlisted_parties, stats.flagged) == (3, 2, 2)
+    flag = get_ownership_flag(sqlite_session, shipping)
+    assert flag["share"] == pytest.approx(0.6)
+    assert flag["path"] == [1, acme, shipping]
+    assert flag["names"] == {str(acme): "ACME HOLDINGS", str(shipping): "ACME SHIPPING"}
+    assert get_ownership_flag(sqlite_session, acme)["depth"] == 1
+    # Parties known by name only are not nodes of the graph
+    _, cleared, rows = graph_db.execute_write.call_args.args
+    assert cleared == [1, 2] and rows == []
+
+    # Replacing the records recomputes downstream of the stakes that changed
+    import_ownership_records(sqlite_session, "registry", [
+        {"owner_uid": 1, "owned_name": "ACME HOLDINGS", "share": 1.0},
+        {"owner_name": "ACME HOLDINGS", "owned_name": "ACME SHIPPING", "share": 0.4},
+    ])
+    stats = run_ownership_propagation(sqlite_session)
+    assert (stats.incremental, stats.changed_edges, stats.flagged) == (True, 1, 0)
+    assert get_ownership_flag(sqlite_session, shipping) is None
+    assert get_ownership_flag(sqlite_session, acme) is not None
@@ -0,0 +1,75 @@
+# tests/test_graph_paths.py
+
+import pytest
+from backend.graph.csr import CSRGraph
+from backend.graph.paths import describe_path, hub_mask, k_shortest_paths
+
+def entity(uid):
+    return ("SDNEntity", uid)
+
+PROGRAM, IDENTIFIER, COUNTRY, ADDRESS = ("Program", "SDGT"), ("Identifier", "passport|A1"), \
+    ("Country", "Iran"), ("Address", "tehran iran")
+
+@pytest.fixture
+def graph():
+    edges = [
+        (entity(1), PROGRAM, "ENROLLED_IN"),
+        (entity(2), PROGRAM, "ENROLLED_IN"),
+        (entity(5), PROGRAM, "ENROLLED_IN"),
+        (entity(2), IDENTIFIER, "HAS_ID"),
+        (entity(3), IDENTIFIER, "HAS_ID"),
+        (entity(1), COUNTRY, "HAS_NATIONALITY"),
+        (entity(3), ADDRESS, "HAS_ADDRESS"),
+        (ADDRESS, COUNTRY, "LOCATED_IN"),
+        (entity(5), IDENTIFIER, "HAS_ID"),
+    ]
+    return CSRGraph.from_edges(edges, nodes=[entity(4)])
+
+def keys(graph, path):
+    return [graph.node_keys[node] for node in path]
+
+def test_k_shortest_paths(graph):
+    result = k_shortest_paths(graph, graph.entity_index(1), graph.entity_index(3), k=5)
+    assert result.complete
+    assert [keys(graph, path) for path in result.paths] == [
+        [entity(1), COUNTRY, ADDRESS, entity(3)],
+        [entity(1), PROGRAM, entity(2), IDENTIFIER, entity(3)],
+        [entity(1), PROGRAM, entity(5), IDENTIFIER, entity(3)],
+    ]
+    assert result.visits > 0
+
+def test_k_shortest_paths_max_depth(graph):
+    result = k_shortest_paths(graph, graph.entity_index(1), graph.entity_index(3), k=5, max_depth=3)
+    assert [len(path) - 1 for path in result.paths] == [3]
+
+def test_k_shortest_paths_filters(graph):
+    source, target = graph.entity_index(1), graph.entity_index(3)
+    # The program has three members, so it is skipped as a hub
+    result = k_shortest_paths(graph, source, target, k=5, max_hub_degree=2)
+    assert [keys(graph, path) for path in result.paths] == [[entity(1), COUNTRY, ADDRESS, entity(3)]]
+
+    result = k_shortest_paths(graph, source, target, k=1, edge_types=["ENROLLED_IN", "HAS_ID"])
+    assert len(result.paths[0]) == 5
+    assert k_shortest_paths(graph, source, graph.entity_index(4)).paths == []
+    with pytest.raises(ValueError):
+        k_shortest_paths(graph, source, target, edge_types=["OWNS"])
+
+def test_k_shortest_paths_budget(graph):
+    result = k_shortest_paths(graph, graph.entity_index(1), graph.entity_index(3), k=5, max_visits=1)
+    assert not result.complete
+    assert result.paths == []
+
+def test_hub_mask(graph):
+    mask = hub_mask(graph, 2, endpoints=[graph.index[PROGRAM]])
+    assert not mask[graph.index[PROGRAM]]
+    assert mask[graph.index[IDENTIFIER]]
+    assert hub_mask(graph, None) is None
+
+def test_describe_path(graph):
+    path = k_shortest_paths(graph, graph.entity_index(1), graph.entity_index(3), k=1).paths[0]
+    assert describe_path(graph, path) == {
+        "length": 3,
+        "nodes": [{"label": "SDNEntity", "key": 1}, {"label": "Country", "key": "Iran"},
+                  {"label": "Address", "key": "tehran iran"}, {"label": "SDNEntity", "key": 3}],
+        "relationships": [["HAS_NATIONALITY"], ["LOCATED_IN"], ["HAS_ADDRESS"]]
+    }
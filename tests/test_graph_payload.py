@@ -0,0 +1,35 @@
+# tests/test_graph_payload.py
+
+import json
+import pytest
+from backend.graph.csr import EDGE_TYPES, CSRGraph
+from backend.graph.payload import HEADER, build_columns, decode_binary, encode_binary, encode_json, to_json
+from backend.graph.subgraph import extract_subgraph
+
+@pytest.fixture
+def columns():
+    edges = [(("SDNEntity", uid), ("Program", "SDGT"), "ENROLLED_IN") for uid in range(1, 4)]
+    edges.append((("SDNEntity", 1), ("Address", "tehran"), "HAS_ADDRESS"))
+    graph = CSRGraph.from_edges(edges, generation=9)
+    subgraph = extract_subgraph(graph, [graph.entity_index(1)], depth=1, hub_degree=2)
+    return build_columns(graph, subgraph)
+
+def test_build_columns(columns):
+    strings = columns["strings"]
+    assert strings[:len(EDGE_TYPES)] == list(EDGE_TYPES)
+    labels = [strings[code] for code in columns["node_labels"]]
+    keys = [strings[code] for code in columns["node_keys"]]
+    assert list(zip(labels, keys)) == [("SDNEntity", "1"), ("Program", "SDGT"), ("Address", "tehran")]
+    assert columns["cluster_sizes"].tolist() == [0, 2, 0]
+    assert sorted(strings[code] for code in columns["edge_types"]) == ["ENROLLED_IN", "HAS_ADDRESS"]
+
+def test_binary_round_trip(columns):
+    payload = encode_binary(columns)
+    assert decode_binary(payload) == to_json(columns)
+    assert json.loads(encode_json(columns)) == to_json(columns)
+    # Node and edge columns are a few bytes per row, the JSON fallback is larger
+    assert len(payload) < len(encode_json(columns))
+
+def test_decode_rejects_foreign_payload():
+    with pytest.raises(ValueError, match="Not a supported subgraph payload."):
+        decode_binary(bytes(HEADER.size))
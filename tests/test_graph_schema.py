@@ -0,0 +1,46 @@
+# tests/test_graph_schema.py
+
+import pytest
+from unittest.mock import MagicMock
+from backend.data_layer.graph_schema import (
+    GraphSchemaManager,
+    GRAPH_CONSTRAINTS,
+    NAME_FULLTEXT_INDEX
+)
+
+@pytest.fixture
+def graph_db():
+    graph_db = MagicMock()
+    graph_db.execute_query.side_effect = lambda query, parameters=None: (
+        [{"name": "entity_names", "type": "FULLTEXT", "state": "POPULATING", "populationPercent": 40.0,
+          "labelsOrTypes": ["SDNEntity", "AKA"], "properties": ["first_name", "last_name"]}]
+        if query.lstrip().startswith("SHOW INDEXES") else []
+    )
+    return graph_db
+
+def test_statements_are_idempotent():
+    statements = GraphSchemaManager.statements()
+    assert all("IF NOT EXISTS" in statement for statement in statements)
+    # Constraints come first, so the MERGE lookups are backed before anything else
+    assert all(statement.startswith("CREATE CONSTRAINT") for statement in statements[:len(GRAPH_CONSTRAINTS)])
+    assert any("REQUIRE n.key IS UNIQUE" in statement and ":Identifier" in statement for statement in statements)
+    assert any(statement.startswith("CREATE TEXT INDEX") for statement in statements)
+    assert statements[-1] == (f"CREATE FULLTEXT INDEX {NAME_FULLTEXT_INDEX} IF NOT EXISTS "
+                              "FOR (n:SDNEntity|AKA) ON EACH [n.first_name, n.last_name]")
+
+def test_apply(graph_db):
+    progress = GraphSchemaManager(graph_db).apply(timeout=60)
+
+    queries = [call.args[0] for call in graph_db.execute_query.call_args_list]
+    assert queries[:-2] == GraphSchemaManager.statements()
+    assert graph_db.execute_query.call_args_list[-2].args == ("CALL db.awaitIndexes($timeout)", {"timeout": 60})
+    assert progress[0]["populationPercent"] == 40.0
+
+def test_apply_without_wait(graph_db):
+    GraphSchemaManager(graph_db).apply(wait=False)
+    assert not any("awaitIndexes" in call.args[0] for call in graph_db.execute_query.call_args_list)
+
+def test_apply_failure(graph_db):
+    graph_db.execute_query.side_effect = Exception("Neo4j unavailable")
+    with pytest.raises(RuntimeError, match="Failed to apply graph schema."):
+        GraphSchemaManager(graph_db).apply()
@@ -0,0 +1,232 @@
+# tests/test_graph_service.py
+
+import pytest
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, MagicMock
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from backend.graph.service import (
+    GraphSyncStats,
+    address_key,
+    apply_pending_change_sets,
+    build_graph_rows,
+    get_neighborhood,
+    identifier_key,
+    iter_document_batches,
+    orphan_candidates,
+    delete_entity_links,
+    sync_graph,
+    write_entity_links,
+    write_graph_batch
+)
+from backend.data_layer.graph_schema import GraphSchemaManager
+from backend.models.base import Base
+from backend.models.SDNEntity import SDNChangeSet, SDNEntityDocument, SDNEntityLink
+
+def make_document(uid):
+    return {
+        "uid": uid, "first_name": "John", "last_name": f"Doe {uid}", "sdn_type": "Individual", "remarks": None,
+        "programs": ["SDGT"],
+        "aka_list": [{"uid": uid * 10, "type": "a.k.a.", "category": "strong", "first_name": None, "last_name": "JD"}],
+        "addresses": [{"uid": uid * 10 + 1, "city": "Tehran", "country": "Iran"}],
+        "ids": [{"uid": uid * 10 + 2, "id_type": "Passport", "id_number": "A-123 456", "id_country": "Iran",
+                 "issue_date": None, "expiration_date": None}],
+        "date_of_birth_list": [], "place_of_birth_list": [], "citizenships": [],
+        "nationalities": [{"uid": None, "country": "Iran", "main_entry": True}],
+        "vessel": {"call_sign": "ABC", "tonnage": "1,000", "gross_registered_tonnage": None}
+    }
+
+@pytest.fixture
+def sqlite_session():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(bind=engine)
+    with Session(bind=engine) as session:
+        session.add_all(SDNEntityDocument(uid=uid, content_hash=str(uid), document=make_document(uid))
+                        for uid in (3, 1, 2))
+        session.commit()
+        yield session
+
+@pytest.fixture
+def graph_db():
+    graph_db = MagicMock()
+    tx = MagicMock()
+    tx.run.return_value.consume.return_value.counters.nodes_deleted = 1
+    graph_db.execute_write.side_effect = lambda work, *args: work(tx, *args)
+    graph_db.tx = tx
+    return graph_db
+
+def test_iter_document_batches(sqlite_session):
+    batches = list(iter_document_batches(sqlite_session, batch_size=2))
+    assert [[document["uid"] for document in batch] for batch in batches] == [[1, 2], [3]]
+
+def test_build_graph_rows():
+    rows = build_graph_rows([make_document(1)])
+    assert rows["entities"] == [{"uid": 1, "properties": {"first_name": "John", "last_name": "Doe 1",
+                                                           "sdn_type": "Individual", "remarks": None}}]
+    assert rows["programs"] == [{"entity_uid": 1, "name": "SDGT"}]
+    assert rows["aka_list"][0]["uid"] == 10
+    assert rows["addresses"][0]["key"] == "tehran iran"
+    assert rows["addresses"][0]["properties"]["city"] == "Tehran"
+    # Countries are shared hubs, so links need no UID
+    assert rows["nationalities"] == [{"entity_uid": 1, "country": "Iran", "main_entry": True}]
+    assert rows["identifiers"][0]["key"] == "passport|A123456"
+    assert rows["vessels"][0]["properties"]["tonnage"] == 1000.0
+
+def test_write_graph_batch():
+    tx = MagicMock()
+    nodes, relationships = write_graph_batch(tx, build_graph_rows([make_document(1), make_document(2)]))
+    # Two entities plus, per entity, an alias, program, nationality, identifier, address and vessel
+    assert (nodes, relationships) == (14, 12)
+    statements = [call.args[0] for call in tx.run.call_args_list]
+    assert all(statement.strip().startswith("UNWIND $") for statement in statements)
+    assert any("MERGE (c:AKA {uid: row.uid})" in statement for statement in statements)
+    assert any("MERGE (e)-[:ALSO_KNOWN_AS]->(c)" in statement for statement in statements)
+    assert any("DELETE r" in statement for statement in statements)
+    # Hubs are merged on their canonical key
+    assert any("MERGE (c:Country {name: row.country})" in statement for statement in statements)
+    assert any("MERGE (i:Identifier {key: row.key})" in statement for statement in statements)
+    assert any("MERGE (a:Address {key: row.key})" in statement for statement in statements)
+
+def test_write_and_delete_entity_links():
+    tx = MagicMock()
+    links = [{"source_uid": 1, "target_uid": 2, "relationship_type": "OWNED_OR_CONTROLLED_BY", "origin": "remarks"},
+             {"source_uid": 1, "target_uid": 3, "relationship_type": "LINKED_TO", "origin": "ids"}]
+    assert write_entity_links(tx, links) == 2
+    statements = [call.args[0] for call in tx.run.call_args_list]
+    # The target is matched, so no stub entity is created for it
+    assert "MATCH (t:SDNEntity {uid: row.target_uid})" in statements[0]
+    assert "MERGE (t:SDNEntity" not in statements[0]
+    assert "MERGE (e)-[r:OWNED_OR_CONTROLLED_BY]->(t)" in statements[0]
+    assert tx.run.call_args_list[0].kwargs["rows"] == links[:1]
+
+    tx.reset_mock()
+    assert delete_entity_links(tx, links[1:]) == 1
+    assert "-[r:LINKED_TO]->" in tx.run.call_args.args[0] and "DELETE r" in tx.run.call_args.args[0]
+
+def test_hub_keys():
+    assert identifier_key("Passport", "a-123 456") == identifier_key("passport", "A123456") == "passport|A123456"
+    assert identifier_key("Passport", " - ") is None
+    assert address_key({"address1": "1 Main St.", "city": "Tehran", "country": "Iran"}) == \
+        address_key({"address1": "1 MAIN ST", "city": "tehran", "country": "IRAN"})
+    assert address_key({"city": None}) is None
+
+def test_sync_graph(sqlite_session, graph_db):
+    stats = sync_graph(sqlite_session, graph_db, batch_size=2)
+
+    assert (stats.entities, stats.batches) == (3, 2)
+    assert stats.nodes == 21 and stats.relationships == 18
+    assert stats.pruned == 3
+    # One write transaction per batch and one for pruning
+    assert graph_db.execute_write.call_count == 3
+    # The schema is applied before the first batch,
+    statements = [call.args[0] for call in graph_db.execute_query.call_args_list]
+    assert statements[:len(GraphSchemaManager.statements())] == GraphSchemaManager.statements()
+    # without waiting for the indexes on every sync
+    assert not any("db.awaitIndexes" in statement for statement in statements)
+    prune_call = next(call for call in graph_db.tx.run.call_args_list if "NOT e.uid IN $uids" in call.args[0])
+    assert prune_call.kwargs["uids"] == [1, 2, 3]
+
+def add_link(session, source_uid, target_uid, relationship_type="LINKED_TO"):
+    session.add(SDNEntityLink(source_uid=source_uid, target_uid=target_uid, relationship_type=relationship_type,
+                              target_name=str(target_uid), origin="remarks"))
+    session.commit()
+
+def link_calls(graph_db, verb):
+    return [call.kwargs["rows"] for call in graph_db.tx.run.call_args_list
+            if verb in call.args[0] and "row.target_uid" in call.args[0]]
+
+def test_sync_graph_writes_links_after_entities(sqlite_session, graph_db):
+    add_link(sqlite_session, 1, 3)
+    stats = sync_graph(sqlite_session, graph_db, batch_size=2)
+    # Two entity batches, one link batch and the pruning
+    assert graph_db.execute_write.call_count == 4
+    assert stats.relationships == 19
+    # Entity 3 is only written by the second batch, so the link comes after both
+    statements = [call.args[0] for call in graph_db.tx.run.call_args_list]
+    link_position = next(i for i, statement in enumerate(statements) if "-[r:LINKED_TO]->" in statement)
+    assert link_position > max(i for i, statement in enumerate(statements) if "MERGE (e:SDNEntity" in statement)
+    assert link_calls(graph_db, "MERGE")[0][0]["target_uid"] == 3
+
+def test_sync_graph_without_prune(sqlite_session, graph_db):
+    assert sync_graph(sqlite_session, graph_db, prune=False).pruned == 0
+    assert graph_db.execute_write.call_count == 1
+
+def add_change_set(session, **changes):
+    row = {"added": [], "modified": [], "removed": [], "children": {}, **changes}
+    session.add(SDNChangeSet(valid_from=datetime(2025, 1, 1, tzinfo=timezone.utc), **row))
+    session.commit()
+
+def test_sync_graph_covers_pending_change_sets(sqlite_session, graph_db):
+    add_change_set(sqlite_session, added=[1])
+    sync_graph(sqlite_session, graph_db, prune=False)
+    assert sqlite_session.query(SDNChangeSet).one().graph_applied_at is None
+    sync_graph(sqlite_session, graph_db)
+    assert sqlite_session.query(SDNChangeSet).one().graph_applied_at is not None
+
+def test_orphan_candidates():
+    candidates = orphan_candidates([{"uid": 1, "programs": ["SDGT"], "ids": make_document(1)["ids"],
+                                     "addresses": make_document(1)["addresses"], "vessel": {"call_sign": "ABC"}}])
+    assert candidates == {
+        "Program": ("name", ["SDGT"]),
+        "Identifier": ("key", ["passport|A123456"]),
+        "Address": ("key", ["tehran iran"]),
+        "Vessel": ("entity_uid", [1]),
+        "Country": ("name", ["Iran"]),
+    }
+    # Countries are pruned after the addresses that may be their last references
+    assert list(candidates)[-1] == "Country"
+    assert orphan_candidates([{"uid": 1}]) == {}
+
+def test_apply_pending_change_sets(sqlite_session, graph_db):
+    add_change_set(sqlite_session, added=[1], modified=[2, 9])
+    add_change_set(sqlite_session, removed=[3],
+                   children={"3": {"aka_list": {"added": [], "removed": make_document(3)["aka_list"]},
+                                   "vessel": {"added": [], "removed": [make_document(3)["vessel"]]}}})
+
+    applied = apply_pending_change_sets(sqlite_session, graph_db, batch_size=1)
+
+    assert [result["id"] for result in applied] == [1, 2]
+    # Entity 9 has no document anymore and is skipped
+    assert (applied[0]["entities"], applied[0]["batches"]) == (2, 2)
+    # One deleted entity, then the alias and the vessel it left unreferenced
+    assert (applied[1]["entities"], applied[1]["pruned"]) == (0, 3)
+    statements = [call for call in graph_db.tx.run.call_args_list if "DETACH DELETE" in call.args[0]]
+    assert statements[0].kwargs["uids"] == [3]
+    assert [call.kwargs["keys"] for call in statements[1:]] == [[30], [3]]
+    assert all(change_set.graph_applied_at is not None for change_set in sqlite_session.query(SDNChangeSet))
+    assert apply_pending_change_sets(sqlite_session, graph_db) == []
+
+def test_apply_change_set_links(sqlite_session, graph_db):
+    add_link(sqlite_session, 1, 2)
+    add_link(sqlite_session, 3, 1)
+    # A publication adding entity 1 writes its links and the links to it
+    add_change_set(sqlite_session, added=[1])
+    apply_pending_change_sets(sqlite_session, graph_db)
+    assert sorted((row["source_uid"], row["target_uid"]) for row in link_calls(graph_db, "MERGE")[0]) == \
+        [(1, 2), (3, 1)]
+
+    # A link enrichment run only changes links
+    graph_db.tx.reset_mock()
+    removed = {"source_uid": 3, "target_uid": 1, "relationship_type": "LINKED_TO", "origin": "remarks"}
+    added = {"source_uid": 2, "target_uid": 3, "relationship_type": "ACTING_FOR", "origin": "ids"}
+    add_change_set(sqlite_session, links={"added": [added], "removed": [removed]})
+    applied = apply_pending_change_sets(sqlite_session, graph_db)
+    assert applied[0]["relationships"] == 2
+    assert link_calls(graph_db, "DELETE") == [[removed]]
+    assert link_calls(graph_db, "MERGE") == [[added]]
+
+def test_graph_sync_stats_rates():
+    stats = GraphSyncStats(nodes=100, relationships=50, seconds=2.0)
+    assert stats.nodes_per_second == 50.0
+    assert stats.to_dict()["relationships_per_second"] == 25.0
+    assert GraphSyncStats().nodes_per_second == 0.0
+
+@pytest.mark.asyncio
+async def test_get_neighborhood():
+    async_graph_db = MagicMock()
+    async_graph_db.read_query = AsyncMock(return_value=[{"entity": {"uid": 1}, "neighbors": []}])
+    assert await get_neighborhood(async_graph_db, 1, limit=5) == {"entity": {"uid": 1}, "neighbors": []}
+    assert async_graph_db.read_query.await_args.args[1] == {"uid": 1, "limit": 5}
+
+    async_graph_db.read_query.return_value = []
+    assert await get_neighborhood(async_graph_db, 2) is None
@@ -0,0 +1,62 @@
+# tests/test_graph_subgraph.py
+
+import numpy as np
+import pytest
+from backend.graph.csr import CSRGraph
+from backend.graph.subgraph import extract_subgraph
+
+def entity(uid):
+    return ("SDNEntity", uid)
+
+PROGRAM, IDENTIFIER = ("Program", "SDGT"), ("Identifier", "passport|A1")
+
+@pytest.fixture
+def graph():
+    # A large program hub and a shared identifier between entities 1 and 2
+    edges = [(entity(uid), PROGRAM, "ENROLLED_IN") for uid in range(1, 11)]
+    edges += [(entity(1), IDENTIFIER, "HAS_ID"), (entity(2), IDENTIFIER, "HAS_ID")]
+    return CSRGraph.from_edges(edges)
+
+def keys(graph, subgraph):
+    return {graph.node_keys[node]: int(depth) for node, depth in zip(subgraph.nodes, subgraph.depths)}
+
+def test_extract_subgraph_clusters_hubs(graph):
+    subgraph = extract_subgraph(graph, [graph.entity_index(1)], depth=2, hub_degree=5)
+    # The program is kept as a cluster node but its members are not pulled in
+    assert keys(graph, subgraph) == {entity(1): 0, PROGRAM: 1, IDENTIFIER: 1, entity(2): 2}
+    program = list(subgraph.nodes).index(graph.index[PROGRAM])
+    assert subgraph.cluster_sizes[program] == 8
+    assert subgraph.cluster_sizes.sum() == 8
+    assert not subgraph.truncated
+    # Induced edges, once each: 1-SDGT, 1-A1, 2-SDGT, 2-A1
+    assert len(subgraph.edge_sources) == 4
+    assert np.all(subgraph.edge_sources < subgraph.edge_targets)
+
+def test_extract_subgraph_without_hub_threshold(graph):
+    subgraph = extract_subgraph(graph, [graph.entity_index(1)], depth=2, hub_degree=None)
+    assert len(subgraph.nodes) == 12
+    assert subgraph.cluster_sizes.sum() == 0
+
+def test_extract_subgraph_node_cap(graph):
+    subgraph = extract_subgraph(graph, [graph.entity_index(1)], depth=2, max_nodes=5, hub_degree=None)
+    assert len(subgraph.nodes) == 5
+    assert subgraph.truncated
+
+def test_extract_subgraph_several_seeds_and_edge_types(graph):
+    seeds = [graph.entity_index(1), graph.entity_index(2)]
+    subgraph = extract_subgraph(graph, seeds, depth=1, edge_types=["HAS_ID"])
+    assert keys(graph, subgraph) == {entity(1): 0, entity(2): 0, IDENTIFIER: 1}
+    assert len(subgraph.edge_types) == 2
+    with pytest.raises(ValueError):
+        extract_subgraph(graph, seeds, edge_types=["OWNS"])
+
+def test_extract_subgraph_cluster_sizes_follow_edge_types(graph):
+    seed = graph.entity_index(1)
+    # Only the program edges count towards the program's cluster
+    subgraph = extract_subgraph(graph, [seed], depth=2, hub_degree=5, edge_types=["ENROLLED_IN"])
+    assert keys(graph, subgraph) == {entity(1): 0, PROGRAM: 1}
+    assert subgraph.cluster_sizes.sum() == 9
+    # Without program edges entity 1 has a single edge and is no hub; the identifier hides entity 2
+    subgraph = extract_subgraph(graph, [seed], depth=2, hub_degree=1, edge_types=["HAS_ID"])
+    assert keys(graph, subgraph) == {entity(1): 0, IDENTIFIER: 1}
+    assert subgraph.cluster_sizes.tolist() == [0, 1]
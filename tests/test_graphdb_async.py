@@ -0,0 +1,93 @@
+# tests/test_graphdb_async.py
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from backend.data_layer.graphdb import GraphDBManager
+from backend.data_layer.graphdb_async import AsyncGraphDBManager
+
+class AsyncRecords:
+    def __init__(self, records):
+        self._records = iter(records)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._records)
+        except StopIteration:
+            raise StopAsyncIteration
+
+@pytest.fixture(autouse=True)
+def reset_singleton():
+    AsyncGraphDBManager._instance = None
+    yield
+    AsyncGraphDBManager._instance = None
+
+@pytest.fixture
+def driver():
+    with patch('backend.data_layer.graphdb.get_env_variable') as mock_get_env_variable, \
+            patch('backend.data_layer.graphdb_async.AsyncGraphDatabase.driver') as mock_driver:
+        mock_get_env_variable.side_effect = lambda x: {
+            "NEO4J_URI": "bolt://localhost:7687",
+            "NEO4J_USER": "user",
+            "NEO4J_PASSWORD": "password"
+        }[x]
+        driver = MagicMock()
+        driver.close = AsyncMock()
+        session = AsyncMock()
+        driver.session.return_value.__aenter__.return_value = session
+        mock_driver.return_value = driver
+        yield mock_driver
+
+def test_singleton_instance(driver):
+    assert AsyncGraphDBManager() is AsyncGraphDBManager()
+    driver.assert_called_once_with("bolt://localhost:7687", auth=("user", "password"),
+                                   **GraphDBManager.get_pool_config())
+
+def test_initialize_driver_failure(driver):
+    driver.side_effect = RuntimeError("Driver error")
+    with pytest.raises(RuntimeError, match="Failed to create async Neo4j driver."):
+        AsyncGraphDBManager()
+
+@pytest.mark.asyncio
+async def test_read_and_write_queries(driver):
+    manager = AsyncGraphDBManager()
+    session = driver.return_value.session.return_value.__aenter__.return_value
+    tx = MagicMock()
+    tx.run = AsyncMock(return_value=AsyncRecords(["record"]))
+
+    async def execute_read(work, *args):
+        return await work(tx, *args)
+
+    session.execute_read.side_effect = execute_read
+
+    assert await manager.read_query("MATCH (n) RETURN n", {"uid": 1}) == ["record"]
+    tx.run.assert_awaited_once_with("MATCH (n) RETURN n", {"uid": 1})
+    await manager.write_query("CREATE (n)")
+    assert session.execute_write.await_args.args[1:] == ("CREATE (n)", {})
+    assert driver.return_value.session.call_args.kwargs["bookmark_manager"] is manager._bookmark_manager
+
+@pytest.mark.asyncio
+async def test_stream_query(driver):
+    manager = AsyncGraphDBManager()
+    session = driver.return_value.session.return_value.__aenter__.return_value
+    session.run.return_value = AsyncRecords(["a", "b"])
+
+    assert [record async for record in manager.stream_query("MATCH (n) RETURN n", fetch_size=10)] == ["a", "b"]
+    assert driver.return_value.session.call_args.kwargs["fetch_size"] == 10
+
+@pytest.mark.asyncio
+async def test_execute_read_failure(driver):
+    manager = AsyncGraphDBManager()
+    session = driver.return_value.session.return_value.__aenter__.return_value
+    session.execute_read.side_effect = RuntimeError("Query failed")
+    with pytest.raises(RuntimeError, match="Query failed"):
+        await manager.read_query("MATCH (n) RETURN n")
+
+@pytest.mark.asyncio
+async def test_close_driver(driver):
+    manager = AsyncGraphDBManager()
+    await manager.close_driver()
+    driver.return_value.close.assert_awaited_once()
+    assert manager._driver is None
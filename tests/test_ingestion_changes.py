@@ -0,0 +1,47 @@
+# tests/test_ingestion_changes.py
+
+from datetime import datetime, timezone
+from unittest.mock import MagicMock
+from backend.ingestion.changes import ChangeSet, diff_children, diff_links, store_change_set
+
+def make_document(aliases, vessel=None):
+    return {"uid": 1, "programs": ["SDGT"], "aka_list": [{"uid": uid, "last_name": name} for uid, name in aliases],
+            "vessel": vessel}
+
+def test_diff_children():
+    previous = make_document([(10, "Doe"), (11, "Roe")])
+    current = make_document([(10, "Doe"), (11, "Row")], vessel={"call_sign": "ABC"})
+    assert diff_children(previous, current) == {
+        "aka_list": {"added": [{"uid": 11, "last_name": "Row"}], "removed": [{"uid": 11, "last_name": "Roe"}]},
+        "vessel": {"added": [{"call_sign": "ABC"}], "removed": []},
+    }
+    assert diff_children(previous, previous) == {}
+    assert diff_children(previous, None)["programs"] == {"added": [], "removed": ["SDGT"]}
+
+def test_change_set_from_documents():
+    document = make_document([(10, "Doe")])
+    change_set = ChangeSet.from_documents(previous={1: document, 2: document}, current={1: document, 3: document})
+    assert (change_set.added, change_set.modified, change_set.removed) == ([3], [1], [2])
+    assert change_set.children[1] == {}
+    assert change_set.children[2]["aka_list"]["removed"] == [{"uid": 10, "last_name": "Doe"}]
+    assert change_set.to_row(datetime(2025, 1, 1, tzinfo=timezone.utc))["children"].keys() == {"1", "2", "3"}
+
+def test_store_change_set_skips_empty_publications():
+    db = MagicMock()
+    store_change_set(db, ChangeSet(), datetime(2025, 1, 1, tzinfo=timezone.utc))
+    db.execute.assert_not_called()
+    store_change_set(db, ChangeSet(added=[1]), datetime(2025, 1, 1, tzinfo=timezone.utc))
+    assert db.execute.call_args.args[1][0]["added"] == [1]
+
+def link(source_uid, target_uid, origin="remarks"):
+    return {"source_uid": source_uid, "target_uid": target_uid, "relationship_type": "LINKED_TO", "origin": origin}
+
+def test_diff_links():
+    previous = [link(1, 2), link(1, 2, origin="ids"), link(1, 3)]
+    current = [link(1, 2, origin="ids"), link(2, 3)]
+    # The edge 1 -> 2 remains as long as one of its origins does
+    assert diff_links(previous, current) == {"added": [link(2, 3)], "removed": [link(1, 3)]}
+    assert diff_links(previous, previous) == {}
+    change_set = ChangeSet(links=diff_links(previous, current))
+    assert change_set and change_set.to_row(datetime(2025, 1, 1, tzinfo=timezone.utc))["links"]["added"] == [link(2, 3)]
+    assert ChangeSet().to_row(datetime(2025, 1, 1, tzinfo=timezone.utc))["links"] is None
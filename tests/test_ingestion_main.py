@@ -2,7 +2,9 @@
 
 import os
 import pytest
+from datetime import date, datetime, timezone
 from fastapi.testclient import TestClient
+from backend.ingestion import main
 from backend.ingestion.main import app
 
 @pytest.fixture(autouse=True)
@@ -24,11 +26,15 @@ def test_load_sdn_data_success(mocker, client):
     mocker.patch("backend.ingestion.main.download_sdn_files", return_value=("xml_path", "xsd_path"))
     mocker.patch("backend.ingestion.main.validate_sdn_xml", return_value=True)
     mocker.patch("backend.ingestion.main.parse_sdn_xml", return_value={"some": "data"})
-    mocker.patch("backend.ingestion.main.store_sdn_data", return_value=None)
+    mocker.patch("backend.ingestion.main.parse_publish_information",
+                 return_value={"publish_date": date(2025, 5, 9), "record_count": 1})
+    store_mock = mocker.patch("backend.ingestion.main.store_sdn_data", return_value=None)
 
     response = client.post("/ingestion/load/sdn_data")
     assert response.status_code == 200
     assert response.json() == {"message": "SDN advanced data loaded successfully"}
+    # The history is recorded from the publish date
+    assert store_mock.call_args.kwargs["valid_from"] == datetime(2025, 5, 9, tzinfo=timezone.utc)
 
 def test_load_sdn_data_invalid_xml(mocker, client):
     mock_db = object()
@@ -49,6 +55,52 @@ def test_load_sdn_data_unexpected_exception(mocker, client):
     assert response.status_code == 500
     assert response.json()["detail"] == "An internal server error occurred."
 
+def test_load_sdn_data_swap(mocker, client):
+    mock_db = object()
+    mocker.patch("backend.ingestion.main.db_manager.get_db", return_value=iter([mock_db]))
+    mocker.patch("backend.ingestion.main.download_sdn_files", return_value=("xml_path", "xsd_path"))
+    mocker.patch("backend.ingestion.main.validate_sdn_xml", return_value=True)
+    mocker.patch("backend.ingestion.main.parse_sdn_xml", return_value=[])
+    mocker.patch("backend.ingestion.main.parse_publish_information",
+                 return_value={"publish_date": None, "record_count": None})
+    store_mock = mocker.patch("backend.ingestion.main.store_sdn_data", return_value=None)
+    staged_mock = mocker.patch("backend.ingestion.main.store_sdn_data_staged", return_value=None)
+
+    response = client.post("/ingestion/load/sdn_data", params={"swap": True})
+    assert response.status_code == 200
+    staged_mock.assert_called_once()
+    store_mock.assert_not_called()
+
+def test_load_sdn_data_swap_on_embedded_database(mocker, client):
+    mocker.patch("backend.ingestion.main.db_manager.get_db", return_value=iter([object()]))
+    mocker.patch("backend.ingestion.main.download_sdn_files", return_value=("xml_path", "xsd_path"))
+    mocker.patch("backend.ingestion.main.validate_sdn_xml", return_value=True)
+    mocker.patch("backend.ingestion.main.parse_sdn_xml", return_value=[])
+    mocker.patch("backend.ingestion.main.parse_publish_information",
+                 return_value={"publish_date": None, "record_count": None})
+    mocker.patch.object(type(main.db_manager), "engine", new_callable=mocker.PropertyMock,
+                        return_value=mocker.MagicMock(**{"dialect.name": "sqlite"}))
+    store_mock = mocker.patch("backend.ingestion.main.store_sdn_data", return_value=None)
+    staged_mock = mocker.patch("backend.ingestion.main.store_sdn_data_staged", return_value=None)
+
+    response = client.post("/ingestion/load/sdn_data", params={"swap": True})
+    assert response.status_code == 200
+    # Embedded databases load in a single transaction instead
+    store_mock.assert_called_once()
+    staged_mock.assert_not_called()
+
+def test_rollback_sdn_data(mocker, client):
+    rollback_mock = mocker.patch("backend.ingestion.main.rollback_generation", return_value=None)
+    response = client.post("/ingestion/rollback/sdn_data")
+    assert response.status_code == 200
+    # The restored documents are recorded in the history by the rollback transaction
+    rollback_mock.assert_called_once_with(main.db_manager.engine, on_swap=main.record_live_versions)
+
+def test_rollback_sdn_data_without_previous(mocker, client):
+    mocker.patch("backend.ingestion.main.rollback_generation", side_effect=ValueError("No previous generation"))
+    response = client.post("/ingestion/rollback/sdn_data")
+    assert response.status_code == 409
+
 def test_lifespan_startup_logic(mocker, monkeypatch):
     # Unset PYTEST_CURRENT_TEST to trigger startup logic
     monkeypatch.delenv("PYTEST_CURRENT_TEST", raising=False)
@@ -0,0 +1,36 @@
+# tests/test_ingestion_parsing.py
+
+import pytest
+from datetime import date
+from backend.ingestion.parsing import parse_ofac_date, parse_number
+
+@pytest.mark.parametrize("value, expected", [
+    ("12 Jan 1965", (date(1965, 1, 12), date(1965, 1, 12))),
+    ("12 JAN 1965", (date(1965, 1, 12), date(1965, 1, 12))),
+    ("Feb 1964", (date(1964, 2, 1), date(1964, 2, 29))),
+    ("1965", (date(1965, 1, 1), date(1965, 12, 31))),
+    ("circa 1965", (date(1964, 1, 1), date(1966, 12, 31))),
+    ("Circa 1965", (date(1964, 1, 1), date(1966, 12, 31))),
+    ("1962 to 1965", (date(1962, 1, 1), date(1965, 12, 31))),
+    ("1962 - 1965", (date(1962, 1, 1), date(1965, 12, 31))),
+    ("1980-01-01", (date(1980, 1, 1), date(1980, 1, 1))),
+    ("1980-02", (date(1980, 2, 1), date(1980, 2, 29))),
+])
+def test_parse_ofac_date(value, expected):
+    assert parse_ofac_date(value) == expected
+
+@pytest.mark.parametrize("value", [None, "", "  ", "unknown", "31 Feb 1965", "1965 to unknown"])
+def test_parse_ofac_date_unrecognized(value):
+    assert parse_ofac_date(value) == (None, None)
+
+@pytest.mark.parametrize("value, expected", [
+    ("5000", 5000.0),
+    ("1,234", 1234.0),
+    (" 5000.5 ", 5000.5),
+    (42, 42.0),
+    (None, None),
+    ("", None),
+    ("n/a", None),
+])
+def test_parse_number(value, expected):
+    assert parse_number(value) == expected
@@ -4,6 +4,7 @@ import os
 import io
 import pytest
 import requests
+from datetime import date, datetime, timezone
 from unittest.mock import patch, mock_open, MagicMock
 from lxml import etree
 from sqlalchemy.orm import Session
@@ -11,7 +12,21 @@ from backend.ingestion.service import (
     download_sdn_files,
     validate_sdn_xml,
     parse_sdn_xml,
-    store_sdn_data
+    parse_publish_information,
+    record_entity_versions,
+    record_live_versions,
+    store_sdn_data,
+    store_sdn_data_staged,
+    build_sdn_entity,
+    LookupInterner,
+    build_entity_document,
+    compute_content_hash,
+    sync_entity_documents
+)
+from sqlalchemy import create_engine
+from backend.models.base import Base
+from backend.models.SDNEntity import (
+    SDNChangeSet, SDNEntityDocument, SDNEntityVersion, SanctionsProgram, Country, FacetCount
 )
 
 # Sample XML and XSD content for testing
@@ -465,3 +480,182 @@ def test_store_sdn_data_skips_existing(mock_db_session):
     # Should not call add, but should still call commit
     assert not mock_db_session.add.called
     assert mock_db_session.commit.called
+
+def test_store_sdn_data_without_existing_check(mock_db_session):
+    sdn_data = parse_sdn_xml(io.StringIO(SAMPLE_XML))
+    store_sdn_data(sdn_data, mock_db_session, check_existing=False)
+    # No lookup per entity when loading into empty tables
+    assert not mock_db_session.query.return_value.filter.called
+    assert mock_db_session.add.called
+    assert mock_db_session.commit.called
+
+@pytest.fixture
+def sqlite_session():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(bind=engine)
+    with Session(bind=engine) as session:
+        yield session
+
+def test_build_sdn_entity_parses_typed_columns():
+    entry = parse_sdn_xml(io.StringIO(SAMPLE_XML))[0]
+    sdn_entity = build_sdn_entity(entry)
+    assert sdn_entity.date_of_birth_list[0].date_from == date(1980, 1, 1)
+    assert sdn_entity.date_of_birth_list[0].date_to == date(1980, 1, 1)
+    assert sdn_entity.ids[0].issued_on == date(2020, 1, 1)
+    assert sdn_entity.ids[0].expires_on == date(2030, 1, 1)
+    assert sdn_entity.vessel.tonnage == 5000.0
+    assert sdn_entity.vessel.gross_registered_tonnage == 6000.0
+
+def test_build_entity_document():
+    entry = parse_sdn_xml(io.StringIO(SAMPLE_XML))[0]
+    document = build_entity_document(entry)
+    assert document["uid"] == 123
+    assert document["programs"] == ["Program1"]
+    assert document["aka_list"][0]["uid"] == 1
+    assert document["addresses"][0]["city"] == "New York"
+    assert document["vessel"]["call_sign"] == "ABC123"
+
+def test_build_entity_document_no_vessel():
+    entry = parse_sdn_xml(io.StringIO(SAMPLE_XML_NO_VESSEL))[0]
+    assert build_entity_document(entry)["vessel"] is None
+
+def test_compute_content_hash_is_stable():
+    assert compute_content_hash({"a": 1, "b": [1, 2]}) == compute_content_hash({"b": [1, 2], "a": 1})
+    assert compute_content_hash({"a": 1}) != compute_content_hash({"a": 2})
+
+def test_sync_entity_documents_incremental(sqlite_session):
+    sdn_data = parse_sdn_xml(io.StringIO(SAMPLE_XML))
+    assert sync_entity_documents(sdn_data, sqlite_session) == {123}
+    sqlite_session.commit()
+
+    # An unchanged publication rewrites nothing
+    assert sync_entity_documents(sdn_data, sqlite_session) == set()
+
+    # A changed entity is rewritten
+    sdn_data[0]["remarks"] = "Updated remarks"
+    assert sync_entity_documents(sdn_data, sqlite_session) == {123}
+    sqlite_session.commit()
+    assert sqlite_session.get(SDNEntityDocument, 123).document["remarks"] == "Updated remarks"
+
+    # An entity missing from the publication is removed
+    assert sync_entity_documents([], sqlite_session) == {123}
+    sqlite_session.commit()
+    assert sqlite_session.get(SDNEntityDocument, 123) is None
+
+def test_store_sdn_data_bumps_generation_on_change(sqlite_session):
+    from backend.data_layer.cache import get_data_generation
+    sdn_data = parse_sdn_xml(io.StringIO(SAMPLE_XML))
+    store_sdn_data(sdn_data, sqlite_session)
+    assert get_data_generation(sqlite_session) == 1
+
+    # Reloading the same publication changes nothing and keeps the generation
+    store_sdn_data(sdn_data, sqlite_session)
+    assert get_data_generation(sqlite_session) == 1
+
+def test_build_sdn_entity_interns_lookups():
+    lookups = LookupInterner()
+    first = build_sdn_entity(parse_sdn_xml(io.StringIO(SAMPLE_XML))[0], lookups)
+    second = build_sdn_entity(parse_sdn_xml(io.StringIO(SAMPLE_XML_NO_VESSEL))[0], lookups)
+    # Repeated values share a single lookup row
+    assert first.programs[0].program is second.programs[0].program
+    assert first.nationalities[0].country is first.citizenships[0].country
+    assert first.nationalities[0].country.name == "US"
+    # The address keeps the country name for its search vector
+    assert first.addresses[0].country_name == first.addresses[0].country.name
+
+def test_store_sdn_data_builds_lookups_and_facets(sqlite_session):
+    sdn_data = parse_sdn_xml(io.StringIO(SAMPLE_XML))
+    store_sdn_data(sdn_data, sqlite_session)
+    assert [row.name for row in sqlite_session.query(SanctionsProgram)] == ["Program1"]
+    facets = {(row.facet, row.value): row.entity_count for row in sqlite_session.query(FacetCount)}
+    assert facets[("program", "Program1")] == 1
+    # Nationality and citizenship in the same country count the entity once
+    assert facets[("country", "US")] == 1
+
+    # Stored values are reused by later ingestions
+    sdn_data[0]["uid"] = "124"
+    store_sdn_data(sdn_data, sqlite_session)
+    assert sqlite_session.query(SanctionsProgram).count() == 1
+    assert sqlite_session.get(FacetCount, ("program", "Program1")).entity_count == 2
+
+def test_parse_publish_information(tmp_path):
+    xml_path = tmp_path / "sdn.xml"
+    xml_path.write_text(SAMPLE_XML.replace("2025-05-11", "05/09/2025"))
+    assert parse_publish_information(str(xml_path)) == {"publish_date": date(2025, 5, 9), "record_count": 1}
+
+def test_record_entity_versions(sqlite_session):
+    first, second, third = (datetime(2025, 1, day, tzinfo=timezone.utc) for day in (1, 2, 3))
+    sdn_data = parse_sdn_xml(io.StringIO(SAMPLE_XML))
+    assert record_entity_versions(sdn_data, sqlite_session, first) == {123}
+    # An unchanged publication writes nothing
+    assert record_entity_versions(sdn_data, sqlite_session, second) == set()
+
+    sdn_data[0]["remarks"] = "Updated remarks"
+    assert record_entity_versions(sdn_data, sqlite_session, second) == {123}
+    # A removed entity has its open version closed
+    assert record_entity_versions([], sqlite_session, third) == {123}
+    sqlite_session.commit()
+
+    versions = sqlite_session.query(SDNEntityVersion).order_by(SDNEntityVersion.valid_from).all()
+    assert [(v.valid_from.day, v.valid_to.day) for v in versions] == [(1, 2), (2, 3)]
+    assert versions[1].document["remarks"] == "Updated remarks"
+
+    # One change set per publication that changed anything
+    change_sets = sqlite_session.query(SDNChangeSet).order_by(SDNChangeSet.id).all()
+    assert [(c.added, c.modified, c.removed) for c in change_sets] == [([123], [], []), ([], [123], []),
+                                                                       ([], [], [123])]
+    assert change_sets[1].children == {"123": {}}
+    assert change_sets[2].children["123"]["programs"] == {"added": [], "removed": ["Program1"]}
+
+def test_record_entity_versions_out_of_order(sqlite_session):
+    sdn_data = parse_sdn_xml(io.StringIO(SAMPLE_XML))
+    record_entity_versions(sdn_data, sqlite_session, datetime(2025, 1, 2, tzinfo=timezone.utc))
+
+    # An older publication is recorded from the latest version on, never ending a version before it starts
+    sdn_data[0]["remarks"] = "Updated remarks"
+    record_entity_versions(sdn_data, sqlite_session, datetime(2025, 1, 1, tzinfo=timezone.utc))
+    sqlite_session.commit()
+
+    versions = sqlite_session.query(SDNEntityVersion).order_by(SDNEntityVersion.id).all()
+    assert [(v.valid_from.day, v.valid_to and v.valid_to.day) for v in versions] == [(2, 2), (2, None)]
+
+@patch("backend.ingestion.service.swap_staging_generation")
+@patch("backend.ingestion.service.load_staging_generation")
+def test_store_sdn_data_staged(mock_load, mock_swap, sqlite_session):
+    engine = sqlite_session.get_bind()
+    sdn_data = parse_sdn_xml(io.StringIO(SAMPLE_XML))
+    store_sdn_data_staged(sdn_data, engine, valid_from=datetime(2025, 1, 1, tzinfo=timezone.utc))
+
+    mock_load.assert_called_once()
+    assert mock_load.call_args.args[0] is engine
+    # The loader writes the publication through the staging session, without the history
+    staging_session = MagicMock()
+    mock_load.call_args.args[1](staging_session)
+    assert staging_session.add.called
+    assert sqlite_session.query(SDNEntityVersion).count() == 0
+    assert sqlite_session.query(SDNChangeSet).count() == 0
+
+    # The versions and the change set are written by the swap transaction
+    assert mock_swap.call_args.args == (engine,)
+    mock_swap.call_args.kwargs["on_swap"](sqlite_session)
+    assert [v.uid for v in sqlite_session.query(SDNEntityVersion)] == [123]
+    assert [c.added for c in sqlite_session.query(SDNChangeSet)] == [[123]]
+
+def test_record_live_versions(sqlite_session):
+    sdn_data = parse_sdn_xml(io.StringIO(SAMPLE_XML))
+    record_entity_versions(sdn_data, sqlite_session, datetime(2025, 1, 1, tzinfo=timezone.utc))
+    sdn_data[0]["remarks"] = "Updated remarks"
+    record_entity_versions(sdn_data, sqlite_session, datetime(2025, 1, 2, tzinfo=timezone.utc))
+
+    # After a rollback the live documents are those of the first publication again
+    sync_entity_documents(parse_sdn_xml(io.StringIO(SAMPLE_XML)), sqlite_session)
+    record_live_versions(sqlite_session, datetime(2025, 1, 3, tzinfo=timezone.utc))
+    sqlite_session.commit()
+
+    versions = sqlite_session.query(SDNEntityVersion).order_by(SDNEntityVersion.id).all()
+    assert [(v.valid_from.day, v.valid_to and v.valid_to.day) for v in versions] == [(1, 2), (2, 3), (3, None)]
+    assert versions[2].document["remarks"] == versions[0].document["remarks"]
+    # The change set of the rollback reverts the remarks for the graph
+    change_set = sqlite_session.query(SDNChangeSet).order_by(SDNChangeSet.id.desc()).first()
+    assert (change_set.added, change_set.modified, change_set.removed) == ([], [123], [])
+    assert change_set.valid_from.day == 3
@@ -0,0 +1,41 @@
+# tests/test_ingestion_snapshot.py
+
+import pytest
+from unittest.mock import patch
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from backend.entities.service import get_entity_document, search_names
+from backend.ingestion.snapshot import build_snapshot, main
+from tests.test_ingestion_service import SAMPLE_XML
+
+@pytest.fixture
+def xml_path(tmp_path):
+    path = tmp_path / "sdn.xml"
+    path.write_text(SAMPLE_XML)
+    return str(path)
+
+def test_build_snapshot(xml_path, tmp_path):
+    output = str(tmp_path / "snapshot.db")
+    assert build_snapshot(output, xml_path) == output
+    assert not (tmp_path / "snapshot.db.tmp").exists()
+
+    # The snapshot serves the read APIs on its own
+    engine = create_engine(f"sqlite:///{output}")
+    with Session(bind=engine) as db:
+        assert get_entity_document(123, db)["last_name"] == "Doe"
+        assert search_names("John Doe", db)[0]["uid"] == 123
+        assert db.connection().exec_driver_sql("PRAGMA journal_mode").scalar() == "delete"
+    engine.dispose()
+
+def test_build_snapshot_invalid_xml(xml_path, tmp_path):
+    with patch("backend.ingestion.snapshot.validate_sdn_xml", return_value=False):
+        with pytest.raises(ValueError, match="Invalid XML file"):
+            build_snapshot(str(tmp_path / "snapshot.db"), xml_path, "schema.xsd")
+    assert not (tmp_path / "snapshot.db").exists()
+
+@patch("backend.ingestion.snapshot.build_snapshot")
+@patch("backend.ingestion.snapshot.download_sdn_files", return_value=("sdn.xml", "sdn.xsd"))
+def test_main_downloads_publication(mock_download, mock_build):
+    main(["snapshot.db"])
+    mock_download.assert_called_once()
+    mock_build.assert_called_once_with("snapshot.db", "sdn.xml", "sdn.xsd")
@@ -0,0 +1,95 @@
+# tests/test_nlp_enrichment_service.py
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+from backend.data_layer.cache import get_data_generation
+from backend.models.base import Base
+from backend.models.SDNEntity import SDNChangeSet, SDNEntityDocument, SDNEntityLink
+from backend.nlp_enrichment.service import (
+    NameIndex,
+    extract_entity_links,
+    extract_references,
+    run_link_enrichment
+)
+
+def make_document(uid, first_name, last_name, remarks=None, aka_list=(), ids=()):
+    return {"uid": uid, "first_name": first_name, "last_name": last_name, "remarks": remarks,
+            "aka_list": list(aka_list), "ids": list(ids)}
+
+DOCUMENTS = [
+    make_document(1, None, "ACME TRADING CO.", aka_list=[{"first_name": None, "last_name": "ACME TRADERS"}]),
+    make_document(2, "Ahmad", "TAMIMI", remarks="(Linked To: ACME TRADING CO.; Family Member Of: DOE, John)"),
+    make_document(3, "John", "DOE", remarks="Owned or Controlled By: acme traders. Additional Sanctions Information"),
+    make_document(4, "John", "DOE"),
+    make_document(5, None, "GULF SHIPPING", remarks="Linked to shipping in the Gulf.",
+                  ids=[{"id_type": "Linked To", "id_number": "Tamimi Ahmad"},
+                       {"id_type": "Passport", "id_number": "A123"}]),
+    make_document(6, None, "UNKNOWN HOLDER", remarks="Associate Of: NOBODY LTD"),
+]
+
+def test_extract_references():
+    references = list(extract_references(DOCUMENTS[1]))
+    assert [(r.relationship_type, r.target_name, r.origin) for r in references] == [
+        ("LINKED_TO", "ACME TRADING CO", "remarks"), ("FAMILY_MEMBER_OF", "DOE, John", "remarks")]
+    # Prose without a colon is not a reference; ID entries are
+    assert [(r.relationship_type, r.target_name, r.origin) for r in extract_references(DOCUMENTS[4])] == [
+        ("LINKED_TO", "Tamimi Ahmad", "ids")]
+
+def test_name_index_resolutions():
+    index = NameIndex.from_documents(DOCUMENTS)
+    assert index.resolve("ACME TRADING CO.") == (1, "exact")
+    assert index.resolve("Acme-Traders") == (1, "normalized")
+    assert index.resolve("Tamimi Ahmad") == (2, "normalized")
+    assert index.resolve("Shipping, Gulf") == (5, "tokens")
+    assert index.resolve("DOE, John") == (None, "ambiguous")
+    # The referring entity is never its own target
+    assert index.resolve("DOE, John", exclude=4) == (3, "exact")
+    assert index.resolve("Nobody") == (None, None)
+
+def test_extract_entity_links():
+    references, report = extract_entity_links(DOCUMENTS)
+    resolved = {(r.source_uid, r.relationship_type, r.target_uid) for r in references if r.target_uid}
+    assert resolved == {(2, "LINKED_TO", 1), (3, "OWNED_OR_CONTROLLED_BY", 1), (5, "LINKED_TO", 2)}
+    # The name is cut at the sentence break it ran past
+    assert next(r for r in references if r.source_uid == 3).target_name == "acme traders"
+    assert (report.references, report.resolved, report.ambiguous) == (5, 3, 1)
+    assert report.to_dict()["unresolved_rate"] == 0.4
+    assert report.by_resolution == {"exact": 2, "normalized": 1, "ambiguous": 1}
+
+@pytest.fixture
+def sqlite_session():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(bind=engine)
+    with Session(bind=engine) as session:
+        session.add_all(SDNEntityDocument(uid=document["uid"], content_hash=str(document["uid"]), document=document)
+                        for document in DOCUMENTS)
+        session.commit()
+        yield session
+
+def test_run_link_enrichment(sqlite_session):
+    report = run_link_enrichment(sqlite_session)
+    assert report.stored
+    links = sqlite_session.execute(select(SDNEntityLink.source_uid, SDNEntityLink.target_uid)).all()
+    assert len(links) == 5 and (2, 1) in links
+    assert get_data_generation(sqlite_session) == 1
+
+    # The resolved links are recorded as a change set for the graph
+    change_set = sqlite_session.execute(select(SDNChangeSet)).scalar_one()
+    resolved = {(source, target) for source, target in links if target is not None}
+    assert {(row["source_uid"], row["target_uid"]) for row in change_set.links["added"]} == resolved
+    assert change_set.links["removed"] == [] and change_set.added == []
+
+    # An unchanged run neither rewrites the links nor invalidates the caches
+    assert not run_link_enrichment(sqlite_session).stored
+    assert get_data_generation(sqlite_session) == 1
+    assert sqlite_session.query(SDNChangeSet).count() == 1
+
+    # Dropping the remarks of entity 2 removes its links
+    document = sqlite_session.get(SDNEntityDocument, 2)
+    document.document = {**document.document, "remarks": None}
+    sqlite_session.commit()
+    assert run_link_enrichment(sqlite_session).stored
+    change_set = sqlite_session.execute(select(SDNChangeSet).order_by(SDNChangeSet.id.desc())).scalars().first()
+    assert change_set.links["added"] == []
+    assert {row["source_uid"] for row in change_set.links["removed"]} == {2}
@@ -0,0 +1,134 @@
+# tests/test_staging.py
+
+import pytest
+from unittest.mock import patch, MagicMock
+from backend.data_layer import staging
+from backend.models.base import Base
+
+
+def executed_sql(connection):
+    """Collect the SQL strings executed on a mocked connection."""
+    return [str(call.args[0]) for call in connection.execute.call_args_list]
+
+@pytest.fixture
+def mock_engine():
+    engine = MagicMock()
+    connection = MagicMock()
+    engine.begin.return_value.__enter__.return_value = connection
+    engine.connect.return_value.__enter__.return_value = connection
+    return engine, connection
+
+def test_get_publication_tables_respects_opt_out():
+    tables = staging.get_publication_tables()
+    assert "sdn_entities" in [table.name for table in tables]
+    assert all(table.info.get("publication", True) for table in tables)
+    # Parents come before their children
+    names = [table.name for table in tables]
+    assert names.index("sdn_entities") < names.index("aka_list")
+
+@patch("backend.data_layer.staging.Session")
+def test_load_staging_generation(mock_session_class, mock_engine):
+    engine, connection = mock_engine
+    session = mock_session_class.return_value.__enter__.return_value
+    loader = MagicMock()
+
+    staging.load_staging_generation(engine, loader)
+
+    statements = executed_sql(connection)
+    assert statements[0] == f"DROP SCHEMA IF EXISTS {staging.STAGING_SCHEMA} CASCADE"
+    assert statements[1] == f"CREATE SCHEMA {staging.STAGING_SCHEMA}"
+    assert statements[2].startswith(f"SET LOCAL search_path TO {staging.STAGING_SCHEMA}")
+    loader.assert_called_once_with(session)
+    session.flush.assert_called_once()
+
+    # Indexes are only built once the data is loaded
+    first_index = next(i for i, sql in enumerate(statements) if "CREATE INDEX" in sql)
+    last_table = max(i for i, sql in enumerate(statements) if "CREATE TABLE" in sql)
+    assert first_index > last_table
+    assert any(sql.startswith("ANALYZE") for sql in statements)
+
+@patch("backend.data_layer.staging.Session")
+def test_load_staging_generation_defers_after_create_ddl(mock_session_class, mock_engine):
+    engine, connection = mock_engine
+    # The search columns and their GIN indexes are PostgreSQL only
+    connection.engine.name = connection.dialect.name = "postgresql"
+    loader = MagicMock(side_effect=lambda session: connection.execute("-- load"))
+
+    staging.load_staging_generation(engine, loader)
+
+    statements = executed_sql(connection)
+    load = statements.index("-- load")
+    search_ddl = [i for i, sql in enumerate(statements) if "remarks_tsv" in sql or "address_tsv" in sql]
+    assert search_ddl and min(search_ddl) > load
+    # The address vector covers the country name
+    assert any("coalesce(country_name, '')" in statements[i] for i in search_ddl)
+
+@patch("backend.data_layer.staging.bump_data_generation")
+def test_swap_staging_generation(mock_bump, mock_engine):
+    engine, connection = mock_engine
+
+    staging.swap_staging_generation(engine)
+
+    statements = executed_sql(connection)
+    engine.begin.assert_called_once()
+    assert statements[0].startswith("SET LOCAL lock_timeout")
+    assert f"DROP SCHEMA IF EXISTS {staging.PREVIOUS_SCHEMA} CASCADE" in statements
+    to_previous = statements.index(f'ALTER TABLE IF EXISTS public."sdn_entities" SET SCHEMA {staging.PREVIOUS_SCHEMA}')
+    to_live = statements.index(f'ALTER TABLE IF EXISTS {staging.STAGING_SCHEMA}."sdn_entities" SET SCHEMA public')
+    assert to_previous < to_live
+    assert statements[-1] == f"DROP SCHEMA {staging.STAGING_SCHEMA}"
+    # Cached reads are invalidated by the same transaction
+    mock_bump.assert_called_once_with(connection)
+
+@patch("backend.data_layer.staging.bump_data_generation")
+@patch("backend.data_layer.staging.Session")
+def test_swap_staging_generation_on_swap(mock_session_class, mock_bump, mock_engine):
+    engine, connection = mock_engine
+    session = mock_session_class.return_value.__enter__.return_value
+    on_swap = MagicMock(side_effect=lambda db: mock_bump.assert_not_called())
+
+    staging.swap_staging_generation(engine, on_swap=on_swap)
+
+    # The callback writes through the swap transaction, before the generation is bumped
+    mock_session_class.assert_called_once_with(bind=connection, autoflush=False)
+    on_swap.assert_called_once_with(session)
+    session.flush.assert_called_once()
+    mock_bump.assert_called_once_with(connection)
+
+def test_swap_staging_generation_failure(mock_engine):
+    engine, connection = mock_engine
+    connection.execute.side_effect = Exception("lock timeout")
+    with pytest.raises(RuntimeError, match="Failed to swap staging schema."):
+        staging.swap_staging_generation(engine)
+
+@patch("backend.data_layer.staging.bump_data_generation")
+def test_rollback_generation(mock_bump, mock_engine):
+    engine, connection = mock_engine
+    connection.execute.return_value.scalar.return_value = 1
+
+    staging.rollback_generation(engine)
+
+    statements = executed_sql(connection)
+    assert f"CREATE SCHEMA {staging.SWAP_SCHEMA}" in statements
+    assert statements.index(f'ALTER TABLE IF EXISTS public."sdn_entities" SET SCHEMA {staging.SWAP_SCHEMA}') < \
+        statements.index(f'ALTER TABLE IF EXISTS {staging.PREVIOUS_SCHEMA}."sdn_entities" SET SCHEMA public')
+    assert statements[-1] == f"DROP SCHEMA {staging.SWAP_SCHEMA}"
+    mock_bump.assert_called_once_with(connection)
+
+@patch("backend.data_layer.staging.bump_data_generation")
+@patch("backend.data_layer.staging.Session")
+def test_rollback_generation_on_swap(mock_session_class, mock_bump, mock_engine):
+    engine, connection = mock_engine
+    connection.execute.return_value.scalar.return_value = 1
+    on_swap = MagicMock()
+
+    staging.rollback_generation(engine, on_swap=on_swap)
+
+    mock_session_class.assert_called_once_with(bind=connection, autoflush=False)
+    on_swap.assert_called_once_with(mock_session_class.return_value.__enter__.return_value)
+
+def test_rollback_generation_without_previous(mock_engine):
+    engine, connection = mock_engine
+    connection.execute.return_value.scalar.return_value = None
+    with pytest.raises(ValueError, match="No previous generation found"):
+        staging.rollback_generation(engine)
@@ -1,7 +1,7 @@
 # tests/test_utils.py
 
 import pytest
-from backend.common.utils import get_env_variable
+from backend.common.utils import get_env_variable, normalize_name, build_search_name
 
 def test_get_env_variable_existing(monkeypatch):
     # Use monkeypatch to set an environment variable
@@ -17,4 +17,16 @@ def test_get_env_variable_non_existing():
         get_env_variable('NON_EXISTENT_VAR')
 
 
+def test_normalize_name():
+    assert normalize_name("  José  GARCÍA-López ") == "jose garcia lopez"
+    assert normalize_name("Straße") == "strasse"
+    assert normalize_name(None) == ""
+
+
+def test_build_search_name():
+    assert build_search_name("Müller", "Hans") == "muller hans"
+    assert build_search_name(None, "Doe") == "doe"
+    assert build_search_name(None, None) is None
+
+
 # Additional test cases can be defined as needed
@@ -156,11 +156,12 @@ def test_create_collection_failure(mock_field_schema, mock_collection_schema, mo
         name=collection_name, schema=mock_collection_schema.return_value)
 
 # Test insert_vectors
+@patch("backend.data_layer.vector_store.utility")
 @patch("backend.data_layer.vector_store.Collection")
 @patch("backend.data_layer.vector_store.connect_to_milvus")
-def test_insert_vectors(mock_connect_to_milvus, mock_collection):
+def test_insert_vectors(mock_connect_to_milvus, mock_collection, mock_utility):
     # Mock vector insertion
-    mock_collection.exists.return_value = False
+    mock_utility.has_collection.return_value = False
     mock_collection.return_value = MagicMock()
 
     collection_name = "test_collection"
@@ -172,20 +173,22 @@ def test_insert_vectors(mock_connect_to_milvus, mock_collection):
     # Verify that connect_to_milvus is called (but not necessarily only once)
     assert mock_connect_to_milvus.call_count > 0
 
-    # Verify that the collection is checked for existence
-    mock_collection.exists.assert_called_once_with(collection_name)
+    # Verify that the collection is checked for existence and created
+    mock_utility.has_collection.assert_called_once_with(collection_name)
+    assert mock_collection.call_args_list[0].kwargs["name"] == collection_name
 
     # Verify that the vectors are inserted
     mock_collection.return_value.insert.assert_called_once_with([ids, embeddings])
 
-    # Verify that the collection is flushed
-    mock_collection.return_value.flush.assert_called_once()
+    # Verify that the collection is not flushed on every call
+    mock_collection.return_value.flush.assert_not_called()
 
+@patch("backend.data_layer.vector_store.utility")
 @patch("backend.data_layer.vector_store.Collection")
 @patch("backend.data_layer.vector_store.connect_to_milvus")
-def test_insert_vectors_failure(mock_connect_to_milvus, mock_collection):
+def test_insert_vectors_failure(mock_connect_to_milvus, mock_collection, mock_utility):
     # Mock collection existence and instance
-    mock_collection.exists.return_value = True
+    mock_utility.has_collection.return_value = True
     collection_instance = MagicMock()
     collection_instance.insert.side_effect = Exception("Insertion failed")
     mock_collection.return_value = collection_instance
@@ -198,10 +201,77 @@ def test_insert_vectors_failure(mock_connect_to_milvus, mock_collection):
         vector_store.insert_vectors(collection_name, ids, embeddings)
 
     mock_connect_to_milvus.assert_called_once()
-    mock_collection.exists.assert_called_once_with(collection_name)
+    mock_utility.has_collection.assert_called_once_with(collection_name)
     collection_instance.insert.assert_called_once_with([ids, embeddings])
+    collection_instance.flush.assert_not_called()
+
+# Test flush_collection
+@patch("backend.data_layer.vector_store.Collection")
+@patch("backend.data_layer.vector_store.connect_to_milvus")
+def test_flush_collection(mock_connect_to_milvus, mock_collection):
+    vector_store.flush_collection("test_collection")
+
+    mock_collection.assert_called_once_with("test_collection")
+    mock_collection.return_value.flush.assert_called_once()
+
+# Test insert_vectors_bulk
+@patch("backend.data_layer.vector_store.utility")
+@patch("backend.data_layer.vector_store.Collection")
+@patch("backend.data_layer.vector_store.connect_to_milvus")
+def test_insert_vectors_bulk(mock_connect_to_milvus, mock_collection, mock_utility):
+    mock_utility.has_collection.return_value = True
+    collection_instance = MagicMock()
+    collection_instance.schema.fields = [MagicMock(), MagicMock(), MagicMock()]
+    for field, name in zip(collection_instance.schema.fields, ("id", "embedding", "program")):
+        field.name = name
+    mock_collection.return_value = collection_instance
+    batches = []
+    collection_instance.insert.side_effect = lambda data: batches.append([list(column) for column in data])
+
+    rows = ((uid, [0.1] * 4, {"program": f"P{uid}"}) for uid in range(5))
+    stats = vector_store.insert_vectors_bulk("test_collection", rows, batch_rows=2, flush=True)
+
+    assert [batch[0] for batch in batches] == [[0, 1], [2, 3], [4]]
+    assert batches[0][2] == ["P0", "P1"]
+    assert (stats.vectors, stats.batches, stats.flushed) == (5, 3, True)
+    assert stats.to_dict()["vectors_per_second"] > 0
+    mock_utility.has_collection.assert_called_once_with("test_collection")
     collection_instance.flush.assert_called_once()
 
+@patch("backend.data_layer.vector_store.utility")
+@patch("backend.data_layer.vector_store.Collection")
+@patch("backend.data_layer.vector_store.connect_to_milvus")
+def test_insert_vectors_bulk_byte_budget(mock_connect_to_milvus, mock_collection, mock_utility):
+    mock_utility.has_collection.return_value = True
+    collection_instance = MagicMock()
+    collection_instance.schema.fields = []
+    mock_collection.return_value = collection_instance
+
+    # Each row takes 4 * 1024 + 8 bytes, so two rows fit in the budget
+    rows = [(uid, [0.1] * 1024, None) for uid in range(5)]
+    stats = vector_store.insert_vectors_bulk("test_collection", iter(rows), batch_bytes=2 * 4104, flush=False)
+
+    assert stats.batches == 3 and stats.vectors == 5
+    collection_instance.flush.assert_not_called()
+
+def test_insert_vectors_bulk_invalid_budget():
+    with pytest.raises(ValueError, match="The batch budgets must be positive."):
+        vector_store.insert_vectors_bulk("test_collection", [], batch_rows=0)
+
+@patch("backend.data_layer.vector_store.utility")
+@patch("backend.data_layer.vector_store.Collection")
+@patch("backend.data_layer.vector_store.connect_to_milvus")
+def test_insert_vectors_bulk_failure(mock_connect_to_milvus, mock_collection, mock_utility):
+    mock_utility.has_collection.return_value = True
+    collection_instance = MagicMock()
+    collection_instance.insert.side_effect = Exception("Insertion failed")
+    mock_collection.return_value = collection_instance
+
+    with pytest.raises(Exception, match="Insertion failed"):
+        vector_store.insert_vectors_bulk("test_collection", [(1, [0.1] * 4, None)])
+
+    collection_instance.flush.assert_not_called()
+
 # Test search_vectors
 @patch("backend.data_layer.vector_store.Collection")
 @patch("backend.data_layer.vector_store.connect_to_milvus")